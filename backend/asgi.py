@@ -0,0 +1,566 @@
+"""
+Suspicious Profile Analyzer - ASGI Backend
+asyncio serving path with the same routes as main.py; concurrent /analyze-profile
+requests are micro-batched into single engine calls run off the event loop
+
+Run with: uvicorn asgi:app --host 0.0.0.0 --port $PORT
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs
+
+from batch import batch_results, parse_batch_item, parse_ndjson, score_profiles
+from config import (ASGI_MAX_BATCH_SIZE, ASGI_MAX_BATCH_WAIT_MS, JOB_MAX_BYTES, MAX_ACTIVITY_BYTES, MAX_ACTIVITY_EVENTS,
+                    MAX_BATCH_BYTES, MAX_BATCH_SIZE, PAYLOAD_LIMITS, REQUEST_LOG_SAMPLE_RATE, RESPONSE_GZIP_LEVEL,
+                    RESPONSE_GZIP_MIN_BYTES, SERVICE_INFO, create_engine, create_history, create_jobs, create_metrics)
+from demo_data import DEMO_PROFILES
+from engine import ThreatDetectionEngine
+from history import query_arguments
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from payloads import PayloadTooLarge, ProfileParser
+from records import ProfileRecord, parse_profile
+from responses import ResponseEncoder, StaticPayload, accepts_gzip, negotiate
+from velocity import read_event
+
+logger = logging.getLogger(__name__)
+
+CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+]
+
+PREFLIGHT_HEADERS = CORS_HEADERS + [
+    (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+    (b"access-control-allow-headers", b"Content-Type"),
+]
+
+# Method served on each path, as in the Flask app; HEAD is answered like GET, without the body
+ROUTE_METHODS = {
+    "/": "GET",
+    "/demo-data": "GET",
+    "/metrics": "GET",
+    "/rules": "GET",
+    "/analyze-profile": "POST",
+    "/analyze-profiles": "POST",
+    "/cache-stats": "GET",
+    "/cache/invalidate": "POST",
+    "/history": "GET",
+    "/history/distribution": "GET",
+    "/activity": "POST",
+    "/jobs": "POST",
+}
+JOB_ACTION_METHODS = {"": "GET", "results": "GET", "cancel": "POST"}
+
+
+def score_batch(engine: ThreatDetectionEngine, profiles: List[ProfileRecord]) -> List[Any]:
+    """Score a batch, returning an assessment or the exception for each profile"""
+    try:
+        return engine.calculate_risk_scores(profiles)
+    except Exception:
+        results: List[Any] = []
+        for profile in profiles:
+            try:
+                results.append(engine.calculate_risk_score(profile))
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+class MicroBatcher:
+    """
+    Collects profiles submitted close together and scores them in one engine call
+    A batch is dispatched when it is full or max_wait seconds after its first profile
+    """
+
+    def __init__(self, score: Callable[[List[ProfileRecord]], List[Any]],
+                 max_batch_size: int = 64, max_wait: float = 0.002,
+                 executor: Optional[Executor] = None):
+        self.score = score
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="scoring")
+        self.batches = 0
+        self.items = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._collector = asyncio.create_task(self._collect())
+
+    async def stop(self) -> None:
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    async def submit(self, profile: ProfileRecord) -> Dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((profile, future))
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Keep collecting the next batch while this one is scored
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[ProfileRecord, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        profiles = [profile for profile, _ in batch]
+        try:
+            results = await loop.run_in_executor(self.executor, self.score, profiles)
+        except Exception as e:
+            results = [e] * len(batch)
+
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+pipeline_metrics = create_metrics()
+threat_detector = create_engine(metrics=pipeline_metrics)
+assessment_history = create_history()
+job_store, job_runner = create_jobs()
+batcher = MicroBatcher(
+    lambda profiles: score_batch(threat_detector, profiles),
+    max_batch_size=ASGI_MAX_BATCH_SIZE,
+    max_wait=ASGI_MAX_BATCH_WAIT_MS / 1000
+)
+
+SERVICE_INFO_PAYLOAD = StaticPayload(SERVICE_INFO)
+DEMO_DATA_PAYLOAD = StaticPayload(DEMO_PROFILES)
+response_encoder = ResponseEncoder()
+
+# Sent with every negotiated response, so caches keep the encodings apart
+VARY_HEADERS = [(b"vary", b"Accept-Encoding")] if RESPONSE_GZIP_LEVEL > 0 else []
+
+
+async def _read_body(receive: Callable, max_bytes: Optional[int] = None) -> Optional[bytes]:
+    """The request body, or None once it grows past max_bytes"""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if max_bytes is not None and size > max_bytes:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def _content_length(headers: Dict[str, str]) -> int:
+    """The declared body size (0 when absent); raises ValueError for a malformed header"""
+    length = int(headers.get("content-length") or 0)
+    if length < 0:
+        raise ValueError(f"Negative Content-Length: {length}")
+    return length
+
+
+async def _send(send: Callable, status: int, payload: bytes, content_type: bytes,
+                headers: Sequence[Tuple[bytes, bytes]] = ()) -> int:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(payload)).encode())]
+                   + list(headers) + CORS_HEADERS,
+    })
+    await send({"type": "http.response.body", "body": payload})
+    return status
+
+
+async def _send_json(send: Callable, status: int, body: Any, accept_encoding: Optional[str] = None) -> int:
+    """Encoded JSON, gzipped when accept_encoding allows it"""
+    started = time.perf_counter()
+    payload, encoding = negotiate(response_encoder.encode(body).encode("utf-8"), accept_encoding,
+                                  RESPONSE_GZIP_MIN_BYTES, RESPONSE_GZIP_LEVEL)
+    pipeline_metrics.serialize_seconds.observe(time.perf_counter() - started)
+    headers = VARY_HEADERS + [(b"content-encoding", encoding.encode())] if encoding is not None else VARY_HEADERS
+    return await _send(send, status, payload, b"application/json", headers)
+
+
+async def _send_static(send: Callable, payload: StaticPayload, request_headers: Dict[str, str]) -> int:
+    """Pre-encoded constant response; answers 304 when the client's ETag still matches"""
+    headers = [(b"etag", f'W/"{payload.etag}"'.encode())] + VARY_HEADERS
+    if payload.matches(request_headers.get("if-none-match")):
+        await send({"type": "http.response.start", "status": 304, "headers": headers + CORS_HEADERS})
+        await send({"type": "http.response.body", "body": b""})
+        return 304
+    if (RESPONSE_GZIP_LEVEL > 0 and len(payload.body) >= RESPONSE_GZIP_MIN_BYTES
+            and accepts_gzip(request_headers.get("accept-encoding"))):
+        return await _send(send, 200, payload.gzipped, b"application/json", headers + [(b"content-encoding", b"gzip")])
+    return await _send(send, 200, payload.body, b"application/json", headers)
+
+
+async def _read_profile(receive: Callable, content_length: int) -> Any:
+    """
+    Parse the profile body as it arrives, within PAYLOAD_LIMITS
+    Raises PayloadTooLarge once a limit is exceeded, ValueError for anything but a JSON object
+    """
+    if content_length > PAYLOAD_LIMITS.max_bytes:
+        raise PayloadTooLarge(f"Request body too large (maximum {PAYLOAD_LIMITS.max_bytes} bytes)")
+    parser = ProfileParser(PAYLOAD_LIMITS)
+    while True:
+        message = await receive()
+        parser.feed(message.get("body", b""))
+        if not message.get("more_body", False):
+            return parser.close()
+
+
+async def analyze_profile(receive: Callable, send: Callable, fast: bool = False,
+                          headers: Optional[Dict[str, str]] = None) -> int:
+    """
+    Analyze a profile for suspicious characteristics
+    fast=True (?verdict=fast) returns only the risk level and recommended actions
+    """
+    headers = headers or {}
+    accept_encoding = headers.get("accept-encoding")
+    try:
+        started = time.perf_counter()
+        try:
+            content_length = _content_length(headers)
+        except ValueError:
+            return await _send_json(send, 400, {"error": "Invalid Content-Length header"})
+        try:
+            profile, error = parse_profile(await _read_profile(receive, content_length))
+        except PayloadTooLarge as e:
+            return await _send_json(send, 413, {"error": str(e)})
+        except ValueError:
+            profile, error = None, "No profile data provided"
+        pipeline_metrics.parse_seconds.observe(time.perf_counter() - started)
+
+        if error:
+            return await _send_json(send, 400, {"error": error})
+
+        if fast:
+            # Fast verdicts are cheap enough not to wait for a batch
+            loop = asyncio.get_running_loop()
+            assessment = await loop.run_in_executor(batcher.executor, threat_detector.fast_verdict, profile)
+        else:
+            assessment = await batcher.submit(profile)
+        pipeline_metrics.assessments.inc(assessment['risk_level'])
+        if assessment_history is not None:
+            assessment_history.record(profile.record_id, assessment)
+        if REQUEST_LOG_SAMPLE_RATE > 0 and random.random() < REQUEST_LOG_SAMPLE_RATE:
+            logger.info(
+                "Threat assessment: risk_level=%s risk_score=%s age_days=%s followers=%s messages=%d",
+                assessment['risk_level'], assessment.get('risk_score'), profile.account_age_days,
+                profile.followers, len(profile.messages)
+            )
+        return await _send_json(send, 200, assessment, accept_encoding)
+
+    except Exception as e:
+        logger.error(f"Error analyzing profile: {str(e)}")
+        return await _send_json(send, 500, {"error": f"Analysis failed: {str(e)}"})
+
+
+def _explain_requested(query: Dict[str, str]) -> bool:
+    """?explain=false asks for score-only assessments"""
+    return query.get("explain", "true").lower() not in ("0", "false", "no")
+
+
+async def analyze_profiles(query: Dict[str, str], headers: Dict[str, str], receive: Callable, send: Callable) -> int:
+    """
+    Analyze a batch of profiles sent as a JSON array or NDJSON body
+    Results come back in input order, with per-item errors; ?explain=false skips
+    building explanations and ?verdict=fast returns levels and actions only
+    """
+    try:
+        too_large = {"error": f"Request body too large (maximum {MAX_BATCH_BYTES} bytes)"}
+        try:
+            declared = _content_length(headers)
+        except ValueError:
+            return await _send_json(send, 400, {"error": "Invalid Content-Length header"})
+        if declared > MAX_BATCH_BYTES:
+            return await _send_json(send, 413, too_large)
+        body = await _read_body(receive, MAX_BATCH_BYTES)
+        if body is None:
+            return await _send_json(send, 413, too_large)
+
+        started = time.perf_counter()
+        content_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+        if content_type in ("application/x-ndjson", "application/ndjson"):
+            items = parse_ndjson(body.decode("utf-8", errors="replace"))
+        else:
+            try:
+                profiles = json.loads(body or b"null")
+            except (ValueError, RecursionError):
+                profiles = None
+            if not isinstance(profiles, list):
+                return await _send_json(send, 400, {"error": "Expected a JSON array or NDJSON body of profiles"})
+            items = [(profile, None) for profile in profiles]
+        if not items:
+            return await _send_json(send, 400, {"error": "No profile data provided"})
+        if len(items) > MAX_BATCH_SIZE:
+            return await _send_json(send, 413,
+                                    {"error": f"Batch too large: {len(items)} profiles (maximum {MAX_BATCH_SIZE})"})
+
+        # Validate every item into a profile record, then score the valid ones together off the event loop
+        records = [parse_batch_item(profile, PAYLOAD_LIMITS) if error is None else (None, error)
+                   for profile, error in items]
+        pipeline_metrics.parse_seconds.observe(time.perf_counter() - started)
+        errors = [error for _, error in records]
+        valid = [record for record, error in records if error is None]
+        explain = _explain_requested(query)
+        fast = query.get("verdict", "full").lower() == "fast"
+        assessments = await asyncio.get_running_loop().run_in_executor(
+            batcher.executor, score_profiles, threat_detector, valid, explain, fast)
+        results = batch_results(errors, assessments)
+
+        error_count = sum(1 for error in errors if error is not None)
+        for result in results:
+            if "assessment" in result:
+                pipeline_metrics.assessments.inc(result["assessment"]["risk_level"])
+        if assessment_history is not None:
+            for profile, assessment in zip(valid, assessments):
+                if not isinstance(assessment, str):
+                    assessment_history.record(profile.record_id, assessment)
+        if REQUEST_LOG_SAMPLE_RATE > 0 and random.random() < REQUEST_LOG_SAMPLE_RATE:
+            logger.info("Batch threat assessment: profiles=%d errors=%d", len(items), error_count)
+        return await _send_json(send, 200, {"results": results, "count": len(results), "errors": error_count},
+                                headers.get("accept-encoding"))
+
+    except Exception as e:
+        logger.error(f"Error analyzing profile batch: {str(e)}")
+        return await _send_json(send, 500, {"error": f"Analysis failed: {str(e)}"})
+
+
+async def cache_stats(send: Callable, invalidate: bool = False) -> int:
+    """Verdict and message cache counters; invalidate=True drops all cached verdicts first"""
+    loop = asyncio.get_running_loop()
+    if invalidate:
+        await loop.run_in_executor(None, threat_detector.invalidate_caches)
+        logger.info("Verdict caches invalidated")
+    return await _send_json(send, 200, await loop.run_in_executor(None, threat_detector.cache_stats))
+
+
+async def history(query: Dict[str, str], send: Callable, distribution: bool = False,
+                  accept_encoding: Optional[str] = None) -> int:
+    """Past assessments (or their distribution), queried off the event loop"""
+    if assessment_history is None:
+        return await _send_json(send, 404, {"error": "Assessment history is not enabled"})
+    names = ("since", "until") if distribution else ("account_id", "risk_level", "since", "until", "limit", "cursor")
+    arguments, error = query_arguments(query, names)
+    if error:
+        return await _send_json(send, 400, {"error": error})
+    query_history = assessment_history.distribution if distribution else assessment_history.history
+    result = await asyncio.get_running_loop().run_in_executor(None, lambda: query_history(**arguments))
+    return await _send_json(send, 200, result, accept_encoding)
+
+
+async def record_activity(headers: Dict[str, str], receive: Callable, send: Callable) -> int:
+    """Record timestamped activity events sent as a JSON array or NDJSON body, for velocity signals"""
+    if threat_detector.velocity is None:
+        return await _send_json(send, 404, {"error": "Velocity tracking is not enabled"})
+    too_large = {"error": f"Request body too large (maximum {MAX_ACTIVITY_BYTES} bytes)"}
+    try:
+        declared = _content_length(headers)
+    except ValueError:
+        return await _send_json(send, 400, {"error": "Invalid Content-Length header"})
+    if declared > MAX_ACTIVITY_BYTES:
+        return await _send_json(send, 413, too_large)
+    body = await _read_body(receive, MAX_ACTIVITY_BYTES)
+    if body is None:
+        return await _send_json(send, 413, too_large)
+    content_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/ndjson"):
+        items = parse_ndjson(body.decode("utf-8", errors="replace"))
+    else:
+        try:
+            events = json.loads(body or b"null")
+        except (ValueError, RecursionError):
+            events = None
+        if isinstance(events, dict):
+            events = [events]
+        if not isinstance(events, list):
+            return await _send_json(send, 400, {"error": "Expected a JSON array or NDJSON body of events"})
+        items = [(event, None) for event in events]
+    if not items:
+        return await _send_json(send, 400, {"error": "No events provided"})
+    if len(items) > MAX_ACTIVITY_EVENTS:
+        return await _send_json(send, 413, {"error": f"Too many events: {len(items)} (maximum {MAX_ACTIVITY_EVENTS})"})
+
+    valid, errors = [], []
+    for index, (data, error) in enumerate(items):
+        event, error = read_event(data) if error is None else (None, error)
+        if error is None:
+            valid.append(event)
+        else:
+            errors.append({"index": index, "error": error})
+    recorded = await asyncio.get_running_loop().run_in_executor(None, threat_detector.velocity.record_events, valid)
+    return await _send_json(send, 200, {"received": len(items), "recorded": recorded, "errors": errors})
+
+
+async def submit_job(query: Dict[str, str], headers: Dict[str, str], receive: Callable, send: Callable) -> int:
+    """
+    Queue a large submission (a profile, a JSON array or NDJSON) for background scoring
+    Answers 202 with the job ID straight away; ?explain=false writes score-only results
+    """
+    if job_store is None:
+        return await _send_json(send, 404, {"error": "Background jobs are not enabled"})
+    too_large = {"error": f"Job payload too large (maximum {JOB_MAX_BYTES} bytes)"}
+    try:
+        declared = _content_length(headers)
+    except ValueError:
+        return await _send_json(send, 400, {"error": "Invalid Content-Length header"})
+    if declared > JOB_MAX_BYTES:
+        return await _send_json(send, 413, too_large)
+    body = await _read_body(receive, JOB_MAX_BYTES)
+    if body is None:
+        return await _send_json(send, 413, too_large)
+    if not body.strip():
+        return await _send_json(send, 400, {"error": "No profile data provided"})
+
+    content_type = headers.get("content-type", "").partition(";")[0].strip().lower()
+    job = await asyncio.get_running_loop().run_in_executor(
+        None, lambda: job_store.submit(body, content_type, explain=_explain_requested(query)))
+    if job is None:
+        payload = response_encoder.encode({"error": "Job queue is full, retry later"}).encode("utf-8")
+        return await _send(send, 429, payload, b"application/json", [(b"retry-after", b"5")])
+    payload = response_encoder.encode(job).encode("utf-8")
+    return await _send(send, 202, payload, b"application/json", [(b"location", f"/jobs/{job['job_id']}".encode())])
+
+
+async def job(job_id: str, action: str, query: Dict[str, str], send: Callable,
+              accept_encoding: Optional[str] = None) -> int:
+    """Job status (GET /jobs/<id>), paged results (GET .../results) and cancellation (POST .../cancel)"""
+    if job_store is None:
+        return await _send_json(send, 404, {"error": "Job not found"})
+    loop = asyncio.get_running_loop()
+    if action == "cancel":
+        result = await loop.run_in_executor(None, job_store.cancel, job_id)
+    else:
+        result = await loop.run_in_executor(None, job_store.get, job_id)
+    if result is None:
+        return await _send_json(send, 404, {"error": "Job not found"})
+    if action == "results":
+        try:
+            offset = int(query.get("offset", 0))
+            limit = int(query.get("limit", 100))
+        except ValueError:
+            return await _send_json(send, 400, {"error": "offset and limit must be integers"})
+        result = await loop.run_in_executor(None, job_store.results, job_id, offset, limit)
+    return await _send_json(send, 200, result, accept_encoding)
+
+
+async def _lifespan(receive: Callable, send: Callable) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await batcher.start()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await batcher.stop()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def _match(path: str) -> Tuple[str, Optional[str]]:
+    """(route label, method served) of a path; the method is None when nothing is served there"""
+    if path in ROUTE_METHODS:
+        return path, ROUTE_METHODS[path]
+    if path.startswith("/jobs/"):
+        job_id, _, action = path[len("/jobs/"):].partition("/")
+        if job_id and action in JOB_ACTION_METHODS:
+            return "/jobs/<job_id>" + (f"/{action}" if action else ""), JOB_ACTION_METHODS[action]
+    return "unmatched", None
+
+
+def _without_body(send: Callable) -> Callable:
+    """send for a HEAD request: the GET response's status and headers, with an empty body"""
+    async def send_head(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.body":
+            message = dict(message, body=b"")
+        await send(message)
+    return send_head
+
+
+async def _route(method: str, path: str, query: bytes, headers: Dict[str, str],
+                 receive: Callable, send: Callable) -> Tuple[str, int]:
+    """Dispatch a request, returning (route label, status)"""
+    label, served = _match(path)
+    if served is None:
+        return label, await _send_json(send, 404, {"error": "Not found"})
+    if method == "OPTIONS":
+        # A fixed label: preflights must not add a metrics series per requested URL
+        await send({"type": "http.response.start", "status": 204, "headers": PREFLIGHT_HEADERS})
+        await send({"type": "http.response.body", "body": b""})
+        return "preflight", 204
+    if method == "HEAD" and served == "GET":
+        method, send = "GET", _without_body(send)
+    if method != served:
+        allow = "GET, HEAD, OPTIONS" if served == "GET" else f"{served}, OPTIONS"
+        payload = response_encoder.encode({"error": "Method not allowed"}).encode("utf-8")
+        return label, await _send(send, 405, payload, b"application/json", [(b"allow", allow.encode())])
+
+    if path == "/":
+        return label, await _send_static(send, SERVICE_INFO_PAYLOAD, headers)
+    if path == "/demo-data":
+        return label, await _send_static(send, DEMO_DATA_PAYLOAD, headers)
+    if path == "/metrics":
+        return label, await _send(send, 200, pipeline_metrics.render().encode("utf-8"), METRICS_CONTENT_TYPE.encode())
+    if path == "/rules":
+        return label, await _send_json(send, 200, threat_detector.rules_stats(), headers.get("accept-encoding"))
+    params = {name: values[-1] for name, values in parse_qs(query.decode("latin-1")).items()}
+    if path == "/analyze-profile":
+        return label, await analyze_profile(receive, send, fast=params.get("verdict", "full").lower() == "fast",
+                                            headers=headers)
+    if path == "/analyze-profiles":
+        return label, await analyze_profiles(params, headers, receive, send)
+    if path in ("/cache-stats", "/cache/invalidate"):
+        return label, await cache_stats(send, invalidate=path == "/cache/invalidate")
+    if path in ("/history", "/history/distribution"):
+        return label, await history(params, send, distribution=path == "/history/distribution",
+                                    accept_encoding=headers.get("accept-encoding"))
+    if path == "/activity":
+        return label, await record_activity(headers, receive, send)
+    if path == "/jobs":
+        return label, await submit_job(params, headers, receive, send)
+    job_id, _, action = path[len("/jobs/"):].partition("/")
+    return label, await job(job_id, action, params, send, accept_encoding=headers.get("accept-encoding"))
+
+
+async def app(scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+    """ASGI entry point"""
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    started = time.perf_counter()
+    headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope.get("headers", ())}
+    route, status = await _route(scope["method"], scope["path"], scope.get("query_string", b""), headers, receive, send)
+    pipeline_metrics.request_seconds.observe(time.perf_counter() - started, route)
+    pipeline_metrics.requests.inc(route, str(status))
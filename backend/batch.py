@@ -0,0 +1,76 @@
+"""
+Batch request helpers
+Parses, validates and scores multi-profile request bodies for the batch scoring endpoint,
+shared by the Flask and ASGI entry points
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from engine import ThreatDetectionEngine
+from payloads import PayloadLimits, check_messages
+from records import ProfileRecord, parse_profile
+
+
+def parse_ndjson(body: str) -> List[Tuple[Optional[Any], Optional[str]]]:
+    """
+    Parse an NDJSON body line by line
+    Returns: [(profile, error), ...] so a bad line only fails its own item
+    """
+    items: List[Tuple[Optional[Any], Optional[str]]] = []
+    for line_number, line in enumerate(body.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            items.append((json.loads(line), None))
+        except ValueError as e:
+            items.append((None, f"Invalid JSON on line {line_number}: {e}"))
+        except RecursionError:
+            items.append((None, f"Invalid JSON on line {line_number}: nested too deeply"))
+    return items
+
+
+def parse_batch_item(data: Any, limits: PayloadLimits) -> Tuple[Optional[ProfileRecord], Optional[str]]:
+    """Validate a batch item, holding its messages to the single-profile limits"""
+    error = check_messages(data.get('messages'), limits) if isinstance(data, dict) else None
+    return (None, error) if error else parse_profile(data)
+
+
+def _score_item(engine: ThreatDetectionEngine, profile: ProfileRecord, explain: bool, fast: bool) -> Any:
+    """Score a single batch item, returning the error message on failure"""
+    try:
+        if fast:
+            return engine.fast_verdict(profile)
+        return engine.calculate_risk_score(profile, explain=explain)
+    except Exception as e:
+        return f"Analysis failed: {str(e)}"
+
+
+def score_profiles(engine: ThreatDetectionEngine, profiles: List[ProfileRecord], explain: bool = True,
+                   fast: bool = False) -> List[Any]:
+    """Assessments of the valid batch items, or an error message for each item that failed to score"""
+    if fast:
+        return [_score_item(engine, profile, explain, fast) for profile in profiles]
+    try:
+        return engine.calculate_risk_scores(profiles, explain=explain)
+    except Exception:
+        # Malformed field values: score one by one so only the bad items fail
+        return [_score_item(engine, profile, explain, fast) for profile in profiles]
+
+
+def batch_results(errors: Sequence[Optional[str]], assessments: List[Any]) -> List[Dict[str, Any]]:
+    """
+    One result per batch item in input order, {"index", "assessment"} or {"index", "error"}
+    errors holds each item's validation error; assessments those of the valid items
+    """
+    results = []
+    pending = iter(assessments)
+    for index, error in enumerate(errors):
+        assessment = next(pending) if error is None else None
+        if isinstance(assessment, str):
+            error = assessment
+        if error is None:
+            results.append({"index": index, "assessment": assessment})
+        else:
+            results.append({"index": index, "error": error})
+    return results
@@ -0,0 +1,4 @@
+"""
+Performance benchmarks for the threat detection engine
+Run from the backend directory, e.g. python -m benchmarks.bench_parallel
+"""
@@ -0,0 +1,99 @@
+"""
+Message classifier benchmark
+Writes a labeled synthetic export (profiles drawn with and without scam phrases), trains a
+model from it with a holdout, then times classification per profile, one at a time and in
+batches, and full scoring with and without the classifier, one at a time and in batches
+
+Usage:
+    python -m benchmarks.bench_classifier --profiles 20000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.synthetic import SyntheticProfileGenerator
+from classifier import TextClassifier, read_examples, train_model
+from engine import ThreatDetectionEngine
+from normalize import TextNormalizer
+
+
+def _percentiles(samples: List[float]) -> str:
+    ordered = sorted(samples)
+    p50 = ordered[len(ordered) // 2]
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"p50 {p50 * 1e6:8.1f} us  p99 {p99 * 1e6:8.1f} us  mean {sum(samples) / len(samples) * 1e6:8.1f} us"
+
+
+def _timed(function: Callable[[Dict[str, Any]], Any], profiles: List[Dict[str, Any]]) -> List[float]:
+    samples = []
+    for profile in profiles:
+        started = time.perf_counter()
+        function(profile)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def labeled_profiles(count: int, seed: int) -> List[Dict[str, Any]]:
+    """Half scam profiles (most messages from the scam phrases), half benign, interleaved"""
+    scams = SyntheticProfileGenerator(seed=seed, scam_density=0.7).profiles(count // 2)
+    benign = SyntheticProfileGenerator(seed=seed + 1, scam_density=0.0).profiles(count - count // 2)
+    profiles = []
+    for scam, other in zip(scams, benign):
+        profiles.extend((dict(scam, label="scam"), dict(other, label="benign")))
+    return profiles
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Message classifier training, accuracy and inference cost")
+    parser.add_argument("--profiles", type=int, default=20000, help="labeled training profiles")
+    parser.add_argument("--scored", type=int, default=5000, help="profiles timed")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        export, model = os.path.join(directory, "labeled.ndjson"), os.path.join(directory, "classifier.bin")
+        with open(export, "w", encoding="utf-8") as output:
+            for profile in labeled_profiles(args.profiles, args.seed):
+                output.write(json.dumps(profile) + "\n")
+
+        started = time.perf_counter()
+        stats = train_model(list(read_examples(export)), model, seed=args.seed)
+        print(f"train              {time.perf_counter() - started:8.1f} s  ({stats['examples']} examples, "
+              f"{os.path.getsize(model) / 1e6:.1f} MB model)")
+        print(f"holdout            {stats['holdout']}")
+
+        classifier = TextClassifier(model)
+        profiles = SyntheticProfileGenerator(seed=args.seed + 2, scam_density=0.3).profiles(args.scored)
+        normalize = TextNormalizer().normalize
+        print(f"{'normalize only':<18} {_percentiles(_timed(lambda p: [normalize(m) for m in p['messages']], profiles))}")
+        print(f"{'classify':<18} {_percentiles(_timed(lambda p: classifier.classify(p['messages']), profiles))}")
+        print(f"{'classify, no why':<18} "
+              f"{_percentiles(_timed(lambda p: classifier.classify(p['messages'], False), profiles))}")
+
+        batches = [profiles[start:start + args.batch_size] for start in range(0, len(profiles), args.batch_size)]
+        started = time.perf_counter()
+        for batch in batches:
+            classifier.score_batch([profile["messages"] for profile in batch])
+        per_profile = (time.perf_counter() - started) / len(profiles)
+        print(f"{f'batch of {args.batch_size}':<18} mean {per_profile * 1e6:8.1f} us per profile")
+
+        for name, engine in (("engine", ThreatDetectionEngine(normalizer=TextNormalizer())),
+                             ("engine+classifier", ThreatDetectionEngine(normalizer=TextNormalizer(),
+                                                                         classifier=classifier))):
+            print(f"{name:<18} {_percentiles(_timed(engine.calculate_risk_score, profiles))}")
+            started = time.perf_counter()
+            for batch in batches:
+                engine.calculate_risk_scores(batch)
+            per_profile = (time.perf_counter() - started) / len(profiles)
+            print(f"{'  batched':<18} mean {per_profile * 1e6:8.1f} us per profile")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
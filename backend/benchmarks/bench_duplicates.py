@@ -0,0 +1,83 @@
+"""
+Near-duplicate index benchmark
+Fills a DuplicateIndex with random-word messages from distinct accounts, a share of them
+copied from a few scam scripts, and reports insert and query throughput plus memory as
+the index grows
+
+Usage:
+    python -m benchmarks.bench_duplicates --messages 1000000 --checkpoints 5
+"""
+
+import argparse
+import random
+import resource
+import sys
+import time
+from typing import List, Optional
+
+from benchmarks.synthetic import SCAM_PHRASES
+from duplicates import DuplicateIndex
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def vocabulary(size: int, rng: random.Random) -> List[str]:
+    """Pseudo-words, so organic messages rarely share more than a few shingles"""
+    return ["".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 9))) for _ in range(size)]
+
+
+def campaign_scripts(count: int, rng: random.Random) -> List[str]:
+    """Long scam scripts, each reused by many accounts"""
+    return [" ".join(rng.sample(SCAM_PHRASES, 4)) for _ in range(count)]
+
+
+def _rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="DuplicateIndex insert and query throughput")
+    parser.add_argument("--messages", type=int, default=1000000, help="messages to index")
+    parser.add_argument("--checkpoints", type=int, default=5, help="progress reports while filling")
+    parser.add_argument("--queries", type=int, default=10000, help="lookups timed at each checkpoint")
+    parser.add_argument("--campaign-share", type=float, default=0.05, help="share of messages copied from scripts")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    words = vocabulary(20000, rng)
+    scripts = campaign_scripts(20, rng)
+    index = DuplicateIndex(max_entries=args.messages, window_seconds=None)
+
+    def next_message() -> str:
+        if rng.random() < args.campaign_share:
+            return rng.choice(scripts)
+        return " ".join(rng.choices(words, k=rng.randint(10, 40)))
+
+    probes = [next_message() for _ in range(args.queries)]
+    step = max(1, args.messages // args.checkpoints)
+    inserted = 0
+
+    print(f"{'indexed':>10} {'inserts/s':>10} {'queries/s':>10} {'max cluster':>12} {'rss MB':>8}")
+    while inserted < args.messages:
+        batch = [next_message() for _ in range(min(step, args.messages - inserted))]
+        started = time.perf_counter()
+        for offset, message in enumerate(batch):
+            index.record_messages(inserted + offset, [message])
+        insert_rate = len(batch) / (time.perf_counter() - started)
+        inserted += len(batch)
+
+        # Anonymous lookups do not insert, so the index size stays fixed while timing
+        started = time.perf_counter()
+        largest = max(index.record_messages(None, [message]) for message in probes)
+        query_rate = len(probes) / (time.perf_counter() - started)
+
+        print(f"{inserted:>10} {insert_rate:>10.0f} {query_rate:>10.0f} {largest:>12} {_rss_mb():>8.0f}")
+
+    print(index.stats())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Social graph benchmark
+Builds a synthetic follow graph with heavy-tailed popularity and planted bot rings, then
+times per-account signals for ordinary accounts, ring members and the most followed
+accounts
+
+Usage:
+    python -m benchmarks.bench_graph --edges 20000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from graph import SocialGraph, build_graph
+
+
+def synthetic_edges(edges: int, rings: int, ring_size: int, rng: random.Random) -> Iterator[Tuple[str, str]]:
+    """About edges follow edges over edges / 20 accounts, plus rings following shared targets and each other"""
+    accounts = max(1000, edges // 20)
+    for _ in range(edges):
+        # Pareto-distributed popularity: a few accounts gather most of the followers
+        yield f"user{rng.randrange(accounts)}", f"user{int((rng.paretovariate(0.8) - 1) * 20) % accounts}"
+    for ring in range(rings):
+        members = [f"ring{ring}-{index}" for index in range(ring_size)]
+        targets = [f"user{rng.randrange(accounts)}" for _ in range(60)]
+        for member in members:
+            for target in targets:
+                yield member, target
+            for other in members:
+                yield member, other
+
+
+def _timed(name: str, accounts: List[str], signals: Callable) -> None:
+    timings = []
+    for account in accounts:
+        started = time.perf_counter()
+        signals(account)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    p50 = timings[len(timings) // 2]
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{name + ':':<16}p50 {p50 * 1000:7.3f} ms  p99 {p99 * 1000:7.3f} ms  max {timings[-1] * 1000:7.3f} ms")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Social graph build and signal cost")
+    parser.add_argument("--edges", type=int, default=2000000, help="organic follow edges")
+    parser.add_argument("--rings", type=int, default=50)
+    parser.add_argument("--ring-size", type=int, default=25)
+    parser.add_argument("--queries", type=int, default=2000, help="accounts scored per group")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    accounts = max(1000, args.edges // 20)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "graph.bin")
+        started = time.perf_counter()
+        counts = build_graph(synthetic_edges(args.edges, args.rings, args.ring_size, rng), path)
+        print(f"build:          {time.perf_counter() - started:8.1f} s  {counts['accounts']} accounts, "
+              f"{counts['edges']} edges, {os.path.getsize(path) / 2 ** 20:.1f} MB on disk")
+
+        started = time.perf_counter()
+        graph = SocialGraph(path)
+        print(f"mmap open:      {(time.perf_counter() - started) * 1000:8.3f} ms")
+
+        _timed("ordinary", [f"user{rng.randrange(accounts)}" for _ in range(args.queries)], graph.signals)
+        _timed("ring member", [f"ring{rng.randrange(args.rings)}-{rng.randrange(args.ring_size)}"
+                               for _ in range(args.queries)], graph.signals)
+        _timed("most followed", [f"user{index}" for index in range(min(args.queries, 100))], graph.signals)
+
+        edges = [(f"user{rng.randrange(accounts)}", f"user{rng.randrange(accounts)}") for _ in range(100000)]
+        started = time.perf_counter()
+        graph.add_edges(edges)
+        elapsed = time.perf_counter() - started
+        print(f"add_edges:      {len(edges) / elapsed:8.0f} edges/s")
+        _timed("after adding", [f"user{rng.randrange(accounts)}" for _ in range(args.queries)], graph.signals)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
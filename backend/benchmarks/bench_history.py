@@ -0,0 +1,76 @@
+"""
+Assessment history benchmark
+Times record() on the request path while the writer runs, the writer's throughput, and
+history/distribution queries over the resulting log
+
+Usage:
+    python -m benchmarks.bench_history --assessments 200000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+from benchmarks.synthetic import SyntheticProfileGenerator
+from engine import ThreatDetectionEngine
+from history import HistoryStore
+
+
+def _percentiles(samples: List[float]) -> str:
+    ordered = sorted(samples)
+    p50 = ordered[len(ordered) // 2]
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"p50 {p50 * 1e6:8.1f} us  p99 {p99 * 1e6:8.1f} us"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Assessment history write and query cost")
+    parser.add_argument("--assessments", type=int, default=200000, help="assessments recorded")
+    parser.add_argument("--profiles", type=int, default=2000, help="distinct scored profiles to record")
+    parser.add_argument("--accounts", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    engine = ThreatDetectionEngine()
+    assessments = engine.calculate_risk_scores(SyntheticProfileGenerator(seed=args.seed).profiles(args.profiles))
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(os.path.join(directory, "history.db"), max_queue=args.assessments)
+
+        latencies = []
+        started = time.perf_counter()
+        for i in range(args.assessments):
+            recorded = time.perf_counter()
+            store.record(f"user{i % args.accounts}", assessments[i % len(assessments)])
+            latencies.append(time.perf_counter() - recorded)
+        store.flush(timeout=600)
+        elapsed = time.perf_counter() - started
+        stats = store.stats()
+        print(f"record:       {_percentiles(latencies)}  ({stats['dropped']} dropped)")
+        print(f"write:        {stats['written'] / elapsed:10.0f} assessments/s in {stats['batches']} batches")
+
+        queries = {
+            "latest page": lambda i: store.history(),
+            "account page": lambda i: store.history(account_id=f"user{i % args.accounts}"),
+            "level page": lambda i: store.history(risk_level="High Risk"),
+            "time range": lambda i: store.history(since=time.time() - 60),
+            "distribution": lambda i: store.distribution(),
+        }
+        for name, query in queries.items():
+            timings = []
+            for i in range(args.queries):
+                started = time.perf_counter()
+                query(i)
+                timings.append(time.perf_counter() - started)
+            print(f"{name + ':':<14}{_percentiles(timings)}  mean {statistics.mean(timings) * 1e6:8.1f} us")
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
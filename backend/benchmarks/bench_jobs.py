@@ -0,0 +1,106 @@
+"""
+Background job benchmark
+Measures /analyze-profile latency on a spawned Flask deployment while idle, while bulk
+batches are scored inline through /analyze-profiles, and while the same profiles are
+scored as a background job, and reports the job's throughput
+
+Usage:
+    python -m benchmarks.bench_jobs --profiles 20000 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+from benchmarks.load_test import SPAWN_COMMANDS, _wait_for_port, run_load
+from benchmarks.synthetic import SyntheticProfileGenerator
+
+
+def _post(url: str, body: bytes, content_type: str = "application/json") -> Dict[str, Any]:
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type})
+    with urllib.request.urlopen(request, timeout=300) as response:
+        return json.loads(response.read())
+
+
+def _get(url: str) -> Dict[str, Any]:
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return json.loads(response.read())
+
+
+def _report(name: str, result: Dict[str, float]) -> None:
+    print(f"{name:<22} {result['requests']:>9} {result['errors']:>7} {result['rps']:>9.0f} "
+          f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Interactive latency with bulk work inline or in background jobs")
+    parser.add_argument("--profiles", type=int, default=20000, help="profiles in the bulk submission")
+    parser.add_argument("--batch-size", type=int, default=1000, help="inline /analyze-profiles batch size")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8710)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    url = f"http://127.0.0.1:{args.port}"
+    lines = [json.dumps(p) for p in SyntheticProfileGenerator(seed=args.seed).stream(args.profiles)]
+    batches = ["[" + ",".join(lines[start:start + args.batch_size]) + "]"
+               for start in range(0, len(lines), args.batch_size)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, PYTHONUNBUFFERED="1", JOB_DB=os.path.join(directory, "jobs.db"),
+                   JOB_MAX_PROFILES=str(args.profiles), VERDICT_CACHE_SIZE="0", REQUEST_LOG_SAMPLE_RATE="0")
+        server = subprocess.Popen(SPAWN_COMMANDS["flask"].format(port=args.port).split(), env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_for_port(args.port)
+            print(f"{'/analyze-profile while':<22} {'requests':>9} {'errors':>7} {'req/s':>9} "
+                  f"{'p50 ms':>8} {'p99 ms':>8}")
+            _report("idle", asyncio.run(run_load(url, args.concurrency, args.duration)))
+
+            # Inline: bulk batches keep a server worker busy for the whole run
+            stop = threading.Event()
+            scored = []
+
+            def bulk() -> None:
+                while not stop.is_set():
+                    for batch in batches:
+                        if stop.is_set():
+                            return
+                        scored.append(_post(f"{url}/analyze-profiles?explain=false", batch.encode())["count"])
+
+            thread = threading.Thread(target=bulk)
+            started = time.perf_counter()
+            thread.start()
+            _report("inline batches", asyncio.run(run_load(url, args.concurrency, args.duration)))
+            stop.set()
+            thread.join()
+            print(f"  inline throughput: {sum(scored) / (time.perf_counter() - started):.0f} profiles/s")
+
+            # Background: one job with every profile, scored by the runner's process pool
+            started = time.perf_counter()
+            job = _post(f"{url}/jobs?explain=false", "\n".join(lines).encode(), "application/x-ndjson")
+            submitted = time.perf_counter() - started
+            _report("background job", asyncio.run(run_load(url, args.concurrency, args.duration)))
+            while job["status"] in ("queued", "running"):
+                time.sleep(0.2)
+                job = _get(f"{url}/jobs/{job['job_id']}")
+            elapsed = job["finished_at"] - job["created_at"]
+            print(f"  job {job['status']}: {job['progress']['done']} profiles in {elapsed:.1f} s "
+                  f"({job['progress']['done'] / elapsed:.0f} profiles/s), accepted in {submitted * 1000:.0f} ms")
+        finally:
+            server.terminate()
+            server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
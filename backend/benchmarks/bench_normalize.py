@@ -0,0 +1,72 @@
+"""
+Text normalization benchmark
+Scans the evasion corpus with and without normalization and reports how many disguised
+signatures each catches and whether any benign message matches, then times normalization
+per message for ASCII and non-ASCII text
+
+Usage:
+    python -m benchmarks.bench_normalize --messages 20000
+"""
+
+import argparse
+import sys
+import time
+from typing import Callable, List, Optional
+
+from benchmarks.evasions import BENIGN_CASES, EVASION_CASES
+from benchmarks.synthetic import SyntheticProfileGenerator
+from engine import ThreatDetectionEngine
+from normalize import TextNormalizer
+from signatures import SignatureHits
+
+
+def _matches(hits: SignatureHits) -> List[str]:
+    return [field for field, value in hits._asdict().items() if value]
+
+
+def _per_message(function: Callable[[str], str], messages: List[str], repeat: int) -> float:
+    """Best per-message time of repeat passes, in microseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for message in messages:
+            function(message)
+        best = min(best, time.perf_counter() - started)
+    return best / len(messages) * 1e6
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Evasion detection and cost of text normalization")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-v", "--verbose", action="store_true", help="list the cases each mode misses")
+    args = parser.parse_args(argv)
+
+    scanner = ThreatDetectionEngine.builtin_rules().scanner
+    normalizer = TextNormalizer()
+    for name, normalize in (("lowercase", str.lower), ("normalized", normalizer.normalize)):
+        missed = [(text, field) for text, field in EVASION_CASES
+                  if field not in _matches(scanner.scan(normalize(text)))]
+        flagged = [text for text in BENIGN_CASES if _matches(scanner.scan(normalize(text)))]
+        caught = len(EVASION_CASES) - len(missed)
+        print(f"{name:<11} caught {caught}/{len(EVASION_CASES)} evasions, "
+              f"{len(flagged)}/{len(BENIGN_CASES)} benign messages flagged")
+        if args.verbose:
+            for text, field in missed:
+                print(f"    missed {field}: {text!r}")
+            for text in flagged:
+                print(f"    flagged: {text!r}")
+
+    generator = SyntheticProfileGenerator(seed=args.seed, scam_density=0.3)
+    ascii_messages = [message for profile in generator.profiles(args.messages // 4) for message in profile["messages"]]
+    other_messages = [text for text in BENIGN_CASES if not text.isascii()] + [text for text, _ in EVASION_CASES]
+    for name, messages in (("ascii", ascii_messages), ("non-ascii", other_messages)):
+        lower = _per_message(str.lower, messages, args.repeat)
+        normalized = _per_message(normalizer.normalize, messages, args.repeat)
+        print(f"{name:<11} {len(messages):>6} messages  lowercase {lower:6.2f} us  normalize {normalized:6.2f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
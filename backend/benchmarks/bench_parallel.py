@@ -0,0 +1,46 @@
+"""
+Process-pool scaling benchmark
+Scores the same synthetic corpus with 1..N workers and reports throughput
+
+Usage:
+    python -m benchmarks.bench_parallel --profiles 100000 --max-workers 8
+"""
+
+import argparse
+import logging
+import os
+import time
+
+from benchmarks.synthetic import SyntheticProfileGenerator
+from parallel import ParallelScorer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process-pool scoring throughput from 1 to N workers")
+    parser.add_argument("--profiles", type=int, default=50000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    profiles = SyntheticProfileGenerator(seed=args.seed).profiles(args.profiles)
+
+    baseline = None
+    print(f"{'workers':>8} {'seconds':>9} {'profiles/s':>12} {'speedup':>8}")
+    for workers in range(1, args.max_workers + 1):
+        with ParallelScorer(workers=workers, chunk_size=args.chunk_size) as scorer:
+            # Warm the pool so worker startup is not measured
+            list(scorer.score(profiles[:workers * args.chunk_size]))
+
+            started = time.perf_counter()
+            scored = sum(1 for _ in scorer.score(profiles))
+            elapsed = time.perf_counter() - started
+
+        rate = scored / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>8} {elapsed:>9.2f} {rate:>12.0f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Payload benchmark
+Parses a profile with a large messages array with json.loads and with the streaming
+ProfileParser, reporting time and peak memory, then scores it with messages joined
+into one text and scanned message by message
+
+Usage:
+    python -m benchmarks.bench_payloads --messages 1000 --message-chars 2000
+"""
+
+import argparse
+import io
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, List, Optional, Tuple
+
+from engine import ThreatDetectionEngine
+from payloads import PayloadLimits, read_profile
+
+_WORDS = ("hello", "thanks", "send", "money", "gift", "card", "urgent", "wire", "click", "link",
+          "crypto", "investment", "meet", "today", "please", "account", "verify", "friend")
+
+
+def _measure(function: Callable[[], Any], repeat: int) -> Tuple[float, int]:
+    """Best time of repeat runs and the peak memory of one traced run"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Streaming payload parsing and message-by-message scanning cost")
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--message-chars", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    messages = []
+    for _ in range(args.messages):
+        words = []
+        while sum(map(len, words)) + len(words) < args.message_chars:
+            words.append(rng.choice(_WORDS))
+        messages.append(" ".join(words)[:args.message_chars])
+    profile = {"id": "u1", "account_age_days": 30, "followers": 10, "following": 500, "post_count": 40,
+               "profile_completed": True, "messages": messages}
+    body = json.dumps(profile).encode()
+    limits = PayloadLimits(len(body), args.messages, args.message_chars)
+    print(f"body: {len(body) / 1e6:.1f} MB, {args.messages} messages")
+
+    for name, parse in (("json.loads", lambda: json.loads(body)),
+                        ("ProfileParser", lambda: read_profile(io.BytesIO(body), limits, len(body)))):
+        elapsed, peak = _measure(parse, args.repeat)
+        print(f"{name:<16} {elapsed * 1000:9.1f} ms  peak {peak / 1e6:7.2f} MB")
+
+    # Rejection cost: a body with one message over the limit is refused as soon as it is seen
+    strict = PayloadLimits(len(body), args.messages, args.message_chars - 1)
+    started = time.perf_counter()
+    try:
+        read_profile(io.BytesIO(body), strict, len(body))
+    except ValueError as error:
+        print(f"{'rejected':<16} {(time.perf_counter() - started) * 1000:9.1f} ms  ({error})")
+
+    for name, join_limit in (("joined", sys.maxsize), ("per message", 0)):
+        engine = ThreatDetectionEngine(join_limit=join_limit)
+        elapsed, peak = _measure(lambda: engine.calculate_risk_score(profile), args.repeat)
+        print(f"{name:<16} {elapsed * 1000:9.1f} ms  peak {peak / 1e6:7.2f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
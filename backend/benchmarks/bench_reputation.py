@@ -0,0 +1,107 @@
+"""
+Reputation store benchmark
+Compares building indicator sets in every worker with mapping a prebuilt store, then
+times entity extraction and lookups over synthetic profiles, a tenth of them carrying
+a listed link, handle, wallet or phone number. Lookups are timed as the engine runs
+them: on the joined text, and message by message for submissions too large to join
+
+Usage:
+    python -m benchmarks.bench_reputation --indicators 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.synthetic import SyntheticProfileGenerator
+from reputation import CATEGORIES, ReputationSnapshot, build_store, extract_entities, normalize_indicator
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def synthetic_indicators(count: int, rng: random.Random) -> Dict[str, List[str]]:
+    """count random indicators split evenly over the categories"""
+    def word() -> str:
+        return "".join(rng.choice(LETTERS) for _ in range(rng.randint(4, 10)))
+
+    share = count // len(CATEGORIES)
+    return {
+        'phrases': [f"{word()} {word()} {word()}" for _ in range(share)],
+        'domains': [f"{word()}.{rng.choice(('com', 'net', 'io', 'xyz'))}" for _ in range(share)],
+        'payment_handles': [f"${word()}" for _ in range(share)],
+        'wallets': ["0x" + "".join(rng.choice("0123456789abcdef") for _ in range(40)) for _ in range(share)],
+        'phone_numbers': [f"+{rng.randint(1, 99)} {rng.randint(100, 999)} {rng.randint(100, 999)} {rng.randint(1000, 9999)}"
+                          for _ in range(share)],
+    }
+
+
+def with_entities(text: str, indicators: Dict[str, List[str]], rng: random.Random) -> str:
+    """text with a listed domain, payment handle, wallet or phone number appended"""
+    category = rng.choice(('domains', 'payment_handles', 'wallets', 'phone_numbers'))
+    value = rng.choice(indicators[category])
+    if category == 'domains':
+        value = f"https://{value}/login"
+    return f"{text} contact {value} today"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Reputation store startup and lookup cost")
+    parser.add_argument("--indicators", type=int, default=1000000, help="indicators across all categories")
+    parser.add_argument("--messages", type=int, default=20000, help="messages looked up")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    indicators = synthetic_indicators(args.indicators, rng)
+    profiles = SyntheticProfileGenerator(seed=args.seed).profiles(args.messages)
+    for profile in profiles:
+        if rng.random() < 0.1:
+            profile['messages'][-1] = with_entities(profile['messages'][-1], indicators, rng)
+    texts = [" ".join(profile['messages']).lower() for profile in profiles]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "reputation.bin")
+        started = time.perf_counter()
+        build_store(indicators, path)
+        print(f"build:           {time.perf_counter() - started:8.2f} s  {os.path.getsize(path) / 2 ** 20:.1f} MB on disk")
+
+        # What each worker pays without the store: normalized in-memory sets built at import
+        started = time.perf_counter()
+        sets = {category: {normalize_indicator(category, value) for value in values}
+                for category, values in indicators.items()}
+        elapsed = time.perf_counter() - started
+        private = sum(sys.getsizeof(values) + sum(map(sys.getsizeof, values)) for values in sets.values())
+        print(f"per-worker sets: {elapsed * 1000:8.1f} ms  {private / 2 ** 20:.1f} MB private per worker")
+        del sets
+
+        started = time.perf_counter()
+        snapshot = ReputationSnapshot(path)
+        print(f"mmap open:       {(time.perf_counter() - started) * 1000:8.3f} ms  pages shared through the page cache")
+
+        started = time.perf_counter()
+        entities = sum(sum(map(len, extract_entities((text,)))) for text in texts)
+        elapsed = time.perf_counter() - started
+        print(f"extract:         {elapsed / len(texts) * 1e6:8.1f} us/profile  "
+              f"{len(texts) / elapsed:10.0f} profiles/s  ({entities} entities)")
+
+        # Both lookups extract entities as extract_entities does, then probe the tables
+        started = time.perf_counter()
+        found = sum(sum(snapshot.lookup(text)) for text in texts)
+        elapsed = time.perf_counter() - started
+        print(f"lookup:          {elapsed / len(texts) * 1e6:8.1f} us/profile  "
+              f"{len(texts) / elapsed:10.0f} profiles/s  ({found} hits)")
+
+        started = time.perf_counter()
+        found = sum(sum(snapshot.lookup_messages(profile['messages'])) for profile in profiles)
+        elapsed = time.perf_counter() - started
+        print(f"lookup_messages: {elapsed / len(profiles) * 1e6:8.1f} us/profile  "
+              f"{len(profiles) / elapsed:10.0f} profiles/s  ({found} hits)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
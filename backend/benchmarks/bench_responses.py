@@ -0,0 +1,90 @@
+"""
+Response serialization microbenchmark
+Compares jsonify and json.dumps with the fragment encoder for each assessment layout
+and for batches, the per-request cost of constant responses, and gzip size and cost
+
+Usage:
+    python -m benchmarks.bench_responses
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, List, Optional
+
+from benchmarks.synthetic import SyntheticProfileGenerator
+from engine import ThreatDetectionEngine
+from responses import ResponseEncoder, dumps
+
+
+def _best_us(operation: Callable[[], Any], items: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        operation()
+        best = min(best, time.perf_counter() - started)
+    return best / items * 1e6
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Response serialization cost")
+    parser.add_argument("--profiles", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    for variable in ("VERDICT_CACHE_SIZE", "REQUEST_LOG_SAMPLE_RATE"):
+        os.environ.setdefault(variable, "0")
+    import main as service
+    from flask import jsonify
+
+    engine = ThreatDetectionEngine()
+    profiles = SyntheticProfileGenerator(seed=args.seed, scam_density=0.3).profiles(args.profiles)
+    layouts = {
+        "full": [engine.calculate_risk_score(p) for p in profiles],
+        "score-only": [engine.calculate_risk_score(p, explain=False) for p in profiles],
+        "fast verdict": [engine.fast_verdict(p) for p in profiles],
+    }
+    full = layouts["full"]
+    batches = [
+        {"results": [{"index": i, "assessment": a} for i, a in enumerate(full[start:start + args.batch_size])],
+         "count": args.batch_size, "errors": 0}
+        for start in range(0, len(full), args.batch_size)
+    ]
+    encoder = ResponseEncoder()
+
+    print(f"{'payload':<16} {'jsonify us':>11} {'dumps us':>9} {'encoder us':>11} {'speedup':>8}")
+    with service.app.test_request_context():
+        for name, values in list(layouts.items()) + [(f"batch of {args.batch_size}", batches)]:
+            before = _best_us(lambda: [jsonify(v) for v in values], len(values), args.repeat)
+            plain = _best_us(lambda: [json.dumps(v) for v in values], len(values), args.repeat)
+            after = _best_us(lambda: [encoder.encode(v).encode("utf-8") for v in values], len(values), args.repeat)
+            print(f"{name:<16} {before:>11.1f} {plain:>9.1f} {after:>11.1f} {before / after:>7.1f}x")
+
+    # Route handler cost only, without the test client's request handling
+    requests = 2000
+    with service.app.test_request_context():
+        rebuilt = _best_us(lambda: [jsonify(service.DEMO_PROFILES) for _ in range(requests)], requests, args.repeat)
+        static = _best_us(lambda: [service._static_response(service.DEMO_DATA_PAYLOAD) for _ in range(requests)],
+                          requests, args.repeat)
+    etag = f'W/"{service.DEMO_DATA_PAYLOAD.etag}"'
+    with service.app.test_request_context(headers={"If-None-Match": etag}):
+        revalidated = _best_us(lambda: [service._static_response(service.DEMO_DATA_PAYLOAD) for _ in range(requests)],
+                               requests, args.repeat)
+    print(f"\n/demo-data handler: jsonify {rebuilt:.1f} us, pre-encoded {static:.1f} us, "
+          f"304 revalidation {revalidated:.1f} us")
+
+    body = dumps(batches[0]).encode("utf-8")
+    for level in (1, 6, 9):
+        compress = _best_us(lambda: gzip.compress(body, compresslevel=level, mtime=0), 1, args.repeat * 20)
+        size = len(gzip.compress(body, compresslevel=level, mtime=0))
+        print(f"gzip level {level}: batch of {args.batch_size} {len(body)} -> {size} bytes in {compress:.0f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
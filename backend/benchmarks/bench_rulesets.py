@@ -0,0 +1,104 @@
+"""
+Rule set benchmark
+Times compiling a rule set artifact, then scores a synthetic corpus with the built-in
+rules, with a rule store whose artifact is replaced every --swap-ms milliseconds, and
+with shadow comparison at several sample rates, reporting p50/p99 scoring latency
+
+Usage:
+    python -m benchmarks.bench_rulesets --profiles 5000 --swap-ms 50
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.synthetic import SyntheticProfileGenerator
+from engine import ThreatDetectionEngine
+from rulesets import RuleStore, load_artifact
+
+
+def _percentiles(samples: List[float]) -> str:
+    ordered = sorted(samples)
+    p50 = ordered[len(ordered) // 2]
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"p50 {p50 * 1e6:8.1f} us  p99 {p99 * 1e6:8.1f} us"
+
+
+def _score(engine: ThreatDetectionEngine, profiles: List[Dict[str, Any]]) -> List[float]:
+    samples = []
+    for profile in profiles:
+        started = time.perf_counter()
+        engine.calculate_risk_score(profile)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _write(path: str, artifact: Dict[str, Any]) -> None:
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as output:
+        json.dump(artifact, output)
+    os.replace(temporary, path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rule set compile, hot swap and shadow comparison cost")
+    parser.add_argument("--profiles", type=int, default=5000)
+    parser.add_argument("--swap-ms", type=float, default=50, help="interval between artifact replacements")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    profiles = SyntheticProfileGenerator(seed=args.seed, scam_density=0.3).profiles(args.profiles)
+    builtin = ThreatDetectionEngine.builtin_rules()
+    with tempfile.TemporaryDirectory() as directory:
+        active, shadow = os.path.join(directory, "active.json"), os.path.join(directory, "shadow.json")
+        artifact = builtin.to_dict()
+        _write(active, dict(artifact, version="v1"))
+        candidate = json.loads(json.dumps(artifact))
+        candidate["version"] = "v2"
+        candidate["signatures"]["financial"].append("gift card")
+        # Weigh new accounts more, so some levels change
+        candidate["rules"]["metadata"]["ladders"][0][0]["points"] += 15
+        _write(shadow, candidate)
+
+        started = time.perf_counter()
+        load_artifact(active, builtin)
+        print(f"compile artifact   {(time.perf_counter() - started) * 1000:8.1f} ms (background thread)")
+
+        print(f"{'built-in':<18} {_percentiles(_score(ThreatDetectionEngine(), profiles))}")
+
+        store = RuleStore(active, builtin, check_interval=args.swap_ms / 1000)
+        engine = ThreatDetectionEngine(rule_store=store)
+        stop = threading.Event()
+
+        def replace() -> None:
+            # Alternate two versions, so every check finds a replaced file
+            versions = [dict(artifact, version="v1"), candidate]
+            while not stop.wait(args.swap_ms / 1000):
+                versions.reverse()
+                _write(active, versions[0])
+
+        swapper = threading.Thread(target=replace, daemon=True)
+        swapper.start()
+        samples = _score(engine, profiles)
+        stop.set()
+        swapper.join()
+        print(f"{'hot swapping':<18} {_percentiles(samples)}  ({store.swaps} swaps)")
+
+        for rate in (0.0, 0.1, 1.0):
+            engine = ThreatDetectionEngine(shadow_rules=RuleStore(shadow, builtin), shadow_sample_rate=rate)
+            samples = _score(engine, profiles)
+            while engine.shadow.stats()["queued"]:
+                time.sleep(0.01)
+            stats = engine.shadow.stats()
+            print(f"{f'shadow {rate:.0%}':<18} {_percentiles(samples)}  "
+                  f"compared {stats['compared']} (dropped {stats['dropped']}), disagreement {stats['disagreement_rate']:.1%}, latency delta {stats['latency_delta_ms']:+.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Shared verdict cache benchmark
+Replays one skewed request stream against 1, 2, 4... worker processes, each request
+going to the next worker in turn as a load balancer would, once with a private LRU
+verdict cache per worker and once with the shared cache file, and reports hit rates
+and throughput
+
+Usage:
+    python -m benchmarks.bench_shared_cache --requests 40000 --workers 1 2 4 8
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.synthetic import SyntheticProfileGenerator
+from cache import LRUCache
+from engine import ThreatDetectionEngine
+from shared_cache import SharedVerdictCache
+
+
+def _serve(worker: int, workers: int, stream: List[Dict[str, Any]], cache_path: Optional[str], entries: int) -> int:
+    """Score this worker's share of the stream; returns its private cache hits"""
+    cache = SharedVerdictCache(cache_path, entries) if cache_path else LRUCache(entries)
+    engine = ThreatDetectionEngine(verdict_cache=cache)
+    for profile in stream[worker::workers]:
+        engine.calculate_risk_score(profile)
+    return cache.hits if isinstance(cache, LRUCache) else 0
+
+
+def _run(workers: int, stream: List[Dict[str, Any]], cache_path: Optional[str], entries: int) -> Tuple[float, float]:
+    """Hit rate and requests per second of one deployment"""
+    if cache_path and os.path.exists(cache_path):
+        os.remove(cache_path)
+    with multiprocessing.get_context("fork").Pool(workers) as pool:
+        started = time.perf_counter()
+        hits = sum(pool.starmap(_serve, [(worker, workers, stream, cache_path, entries) for worker in range(workers)]))
+        elapsed = time.perf_counter() - started
+    if cache_path:
+        # Counters of every worker are kept in the file
+        hits = SharedVerdictCache(cache_path, entries).stats()["hits"]
+    return hits / len(stream), len(stream) / elapsed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Verdict cache hit rate with private and shared caches")
+    parser.add_argument("--requests", type=int, default=40000)
+    parser.add_argument("--profiles", type=int, default=20000, help="distinct profiles in the stream")
+    parser.add_argument("--entries", type=int, default=5000, help="verdict cache entries")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    profiles = SyntheticProfileGenerator(seed=args.seed).profiles(args.profiles)
+    # Zipf-like: the k-th most popular profile is submitted about 1/k as often as the first
+    stream = rng.choices(profiles, weights=[1 / rank for rank in range(1, args.profiles + 1)], k=args.requests)
+
+    print(f"{'workers':>7} {'private hit %':>14} {'shared hit %':>13} {'private req/s':>14} {'shared req/s':>13}")
+    with tempfile.TemporaryDirectory(dir="/dev/shm" if os.path.isdir("/dev/shm") else None) as directory:
+        path = os.path.join(directory, "verdicts")
+        for workers in args.workers:
+            private_rate, private_rps = _run(workers, stream, None, args.entries)
+            shared_rate, shared_rps = _run(workers, stream, path, args.entries)
+            print(f"{workers:>7} {private_rate * 100:>14.1f} {shared_rate * 100:>13.1f} "
+                  f"{private_rps:>14.0f} {shared_rps:>13.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
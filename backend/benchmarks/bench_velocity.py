@@ -0,0 +1,89 @@
+"""
+Velocity tracker benchmark
+Streams synthetic activity events (heavy-tailed across accounts, spread over the
+window) into the tracker, and reports ingestion throughput, signal lookup latency
+and memory per tracked account
+
+Usage:
+    python -m benchmarks.bench_velocity --events 5000000 --accounts 100000
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from itertools import islice
+from typing import Iterator, List, Optional
+
+from velocity import Event, VelocityTracker
+
+
+def synthetic_events(events: int, accounts: int, start: float, span: float, rng: random.Random) -> Iterator[Event]:
+    """Events in time order over [start, start + span), a few accounts producing most of them"""
+    step = span / events
+    for index in range(events):
+        account = int((rng.paretovariate(0.6) - 1) * 20) % accounts
+        yield f"user{account}", start + index * step, 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Velocity tracker ingestion and lookup cost")
+    parser.add_argument("--events", type=int, default=2000000)
+    parser.add_argument("--accounts", type=int, default=100000)
+    parser.add_argument("--chunk-size", type=int, default=10000, help="events per record_events call")
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    now = time.time()
+    window = 86400.0
+    tracker = VelocityTracker(max_accounts=args.accounts, window_seconds=window, clock=lambda: now)
+
+    # Generated up front so the timing only covers ingestion
+    stream = synthetic_events(args.events, args.accounts * 2, now - window, window, rng)
+    chunks = []
+    while True:
+        chunk = list(islice(stream, args.chunk_size))
+        if not chunk:
+            break
+        chunks.append(chunk)
+
+    started = time.perf_counter()
+    for chunk in chunks:
+        tracker.record_events(chunk)
+    elapsed = time.perf_counter() - started
+    stats = tracker.stats()
+
+    # Memory is measured on a second pass, since tracing slows ingestion down
+    measured = VelocityTracker(max_accounts=args.accounts, window_seconds=window, clock=lambda: now)
+    tracemalloc.start()
+    for chunk in chunks:
+        measured.record_events(chunk)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"ingest:        {args.events / elapsed:12,.0f} events/s  ({args.events / elapsed * 60 / 1e6:.1f}M per minute)")
+    print(f"tracked:       {stats['accounts']:12,} accounts, {stats['evictions']:,} evicted, "
+          f"{memory / max(stats['accounts'], 1):.0f} bytes per account")
+
+    single = chunks[-1][:2000]
+    started = time.perf_counter()
+    for account, timestamp, count in single:
+        tracker.record(account, timestamp, count)
+    print(f"record():      {(time.perf_counter() - started) / len(single) * 1e6:12.2f} us per event")
+
+    accounts = [f"user{int((rng.paretovariate(0.6) - 1) * 20) % args.accounts}" for _ in range(args.queries)]
+    timings = []
+    for account in accounts:
+        started = time.perf_counter()
+        tracker.signals(account)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f"signals():     p50 {timings[len(timings) // 2] * 1e6:.1f} us  "
+          f"p99 {timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e6:.1f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Signature evasion corpus
+Scam messages disguised the ways seen in the wild, each with the SignatureHits field it
+should trigger once normalized, and benign messages (several languages, numbers, emails,
+handles) that must not trigger anything
+"""
+
+from typing import List, Tuple
+
+# (message, SignatureHits field it must set)
+EVASION_CASES: List[Tuple[str, str]] = [
+    # Leetspeak
+    ("Send it through W3stern Uni0n today", "financial"),
+    ("pay me in b1tc01n please", "financial"),
+    ("I need you to s3nd m0ney for the ticket", "financial"),
+    ("wire ca$h to my cousin", "financial"),
+    ("you are the l0ttery w1nner!", "financial"),
+    ("guaranteed inv3stment opp0rtunity", "financial"),
+    ("what is your p4ssw0rd", "personal_info"),
+    ("need your cr3dit c4rd number", "personal_info"),
+    ("my d4rling I need m0ney for the hospital", "romance"),
+    ("this is urg3nt", "urgency_count"),
+    ("reply imm3diately", "urgency_count"),
+    # Letter spacing
+    ("pay with b i t c o i n", "financial"),
+    ("send p.a.y.p.a.l", "financial"),
+    ("the l-o-t-t-e-r-y office called", "financial"),
+    ("what is your s s n", "personal_info"),
+    ("this is u r g e n t", "urgency_count"),
+    ("answer a_s_a_p", "urgency_count"),
+    # Fullwidth and mathematical alphanumerics
+    ("ｓｅｎｄ ｍｏｎｅｙ now", "financial"),
+    ("Ｗｅｓｔｅｒｎ\u3000Ｕｎｉｏｎ transfer", "financial"),
+    ("𝐛𝐢𝐭𝐜𝐨𝐢𝐧 only", "financial"),
+    ("𝓹𝓪𝔂𝓹𝓪𝓵 me", "financial"),
+    ("𝖚𝖗𝖌𝖊𝖓𝖙 reply", "urgency_count"),
+    # Invisible characters
+    ("send via bit\u200bcoin", "financial"),
+    ("pay\u200cpal works", "financial"),
+    ("your pass\u00adword please", "personal_info"),
+    ("em\u2060ergency", "urgency_count"),
+    # Homoglyphs: Cyrillic а, о, е, с, Р and у, Greek ι, and Latin small capitals
+    ("pаypal me", "financial"),
+    ("Рауpal accepted", "financial"),
+    ("send mоnеy fast", "financial"),
+    ("bitсoin wallet", "financial"),
+    ("ʟᴏᴛᴛᴇʀʏ ᴡɪɴɴᴇʀ", "financial"),
+    ("your bаnk ассount", "personal_info"),
+    ("urgеnt!!", "urgency_count"),
+    ("ιmmediately", "urgency_count"),
+    # Accents
+    ("Émergency, I need help", "urgency_count"),
+    ("wíre möney tonight", "financial"),
+    ("Sénd càsh", "financial"),
+    # Latin words inside text written without spaces
+    ("请用bitcoin付款", "financial"),
+    ("paypalで送金してください", "financial"),
+    ("โอนผ่านwesternunionด่วน", "financial"),
+]
+
+# Messages that must not set any SignatureHits field
+BENIGN_CASES: List[str] = [
+    "Thanks for connecting! Looking forward to networking.",
+    "The meeting is at 10:30, room 4B.",
+    "I have 3 kids and 2 dogs, 24x7 busy!",
+    "Write to me at alex@example.com or j0hn.smith@mail4u.net",
+    "Follow @user_42 and #travel2024",
+    "mp3s, b2b, covid19 and h2o",
+    "It costs $5, not $50.",
+    "i am a b c student",
+    "Crème brûlée at the café, señor?",
+    "Привет, как дела? Давно не виделись.",
+    "Καλημέρα, τι κάνεις;",
+    "你好，很高兴认识你。",
+    "こんにちは、よろしくお願いします。",
+    "สวัสดีครับ ยินดีที่ได้รู้จัก",
+    "Merhaba, nasılsın?",
+    "Guten Morgen, schöne Grüße aus München",
+    "مرحبا، كيف حالك؟",
+    "नमस्ते, आप कैसे हैं?",
+    "Great article you shared about industry trends.",
+    "See you at 5 o'clock!",
+    "Meet me at 5pm on the 1st, 3rd floor",
+    "wow!!great news from the 8th grade team",
+]
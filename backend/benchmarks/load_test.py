@@ -0,0 +1,175 @@
+"""
+HTTP load test comparing the Flask (gunicorn) and ASGI (uvicorn) deployments
+Keeps N keep-alive connections busy posting /demo-data profiles to /analyze-profile
+and reports requests per second with p50/p99 latency
+
+Usage:
+    python -m benchmarks.load_test --spawn flask --spawn asgi --concurrency 64 --duration 10
+    python -m benchmarks.load_test --target prod=http://127.0.0.1:8000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from demo_data import DEMO_PROFILES
+
+# Server commands matching Procfile (flask) and the ASGI entry point
+SPAWN_COMMANDS = {
+    "flask": "gunicorn main:app --bind 127.0.0.1:{port} --workers 2 --timeout 120",
+    "asgi": "uvicorn asgi:app --host 127.0.0.1 --port {port} --log-level warning",
+}
+
+
+def _percentile(samples: List[float], percentile: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _read_head(reader: asyncio.StreamReader) -> Tuple[int, int, bool]:
+    """Read a response status line and headers: (status, content length, connection close)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("connection closed")
+
+    length, close = 0, False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name = name.lower()
+        if name == "content-length":
+            length = int(value.strip())
+        elif name == "connection":
+            close = value.strip().lower() == "close"
+    return int(status_line.split()[1]), length, close
+
+
+async def _worker(host: str, port: int, path: str, bodies: List[bytes], deadline: float,
+                  latencies: List[float], errors: List[int]) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    index = 0
+    try:
+        while time.perf_counter() < deadline:
+            body = bodies[index % len(bodies)]
+            index += 1
+            request = (
+                f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n"
+            ).encode() + body
+
+            started = time.perf_counter()
+            try:
+                writer.write(request)
+                await writer.drain()
+                status, length, close = await _read_head(reader)
+                await reader.readexactly(length)
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+                # Server dropped the connection; reconnect
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, port)
+                errors.append(0)
+                continue
+            latencies.append(time.perf_counter() - started)
+
+            if status != 200:
+                errors.append(status)
+            if close:
+                # Sync gunicorn workers close after every response
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, port)
+    finally:
+        writer.close()
+
+
+async def run_load(url: str, concurrency: int, duration: float) -> Dict[str, float]:
+    parts = urlsplit(url)
+    bodies = [json.dumps(profile).encode() for profile in DEMO_PROFILES.values()]
+    latencies: List[float] = []
+    errors: List[int] = []
+
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*[
+        _worker(parts.hostname, parts.port or 80, "/analyze-profile", bodies, deadline, latencies, errors)
+        for _ in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+    }
+
+
+def _wait_for_port(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def _spawn(name: str, port: int) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    process = subprocess.Popen(
+        SPAWN_COMMANDS[name].format(port=port).split(),
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    _wait_for_port(port)
+    return process
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare Flask and ASGI serving latency and throughput")
+    parser.add_argument("--target", action="append", default=[], help="name=url of a running server")
+    parser.add_argument("--spawn", action="append", default=[], choices=sorted(SPAWN_COMMANDS),
+                        help="start a local server for the run")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8700, help="first port for spawned servers")
+    args = parser.parse_args(argv)
+
+    targets: List[Tuple[str, str, Optional[subprocess.Popen]]] = []
+    for item in args.target:
+        name, _, url = item.partition("=")
+        targets.append((name, url, None))
+    for offset, name in enumerate(args.spawn):
+        port = args.port + offset
+        targets.append((name, f"http://127.0.0.1:{port}", _spawn(name, port)))
+
+    if not targets:
+        parser.error("give at least one --target or --spawn")
+
+    print(f"{'target':<10} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    try:
+        for name, url, _ in targets:
+            result = asyncio.run(run_load(url, args.concurrency, args.duration))
+            print(f"{name:<10} {result['requests']:>9} {result['errors']:>7} {result['rps']:>9.0f} "
+                  f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+    finally:
+        for _, _, process in targets:
+            if process is not None:
+                process.terminate()
+                process.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Reproducible engine benchmark suite
+Runs every benchmark over a seeded synthetic corpus and writes the results as JSON so
+two commits can be compared automatically
+
+Usage:
+    python -m benchmarks.suite -o before.json
+    python -m benchmarks.suite -o after.json --only score
+    python -m benchmarks.suite --compare before.json after.json --threshold 0.10
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from benchmarks.synthetic import SyntheticProfileGenerator
+from engine import ThreatDetectionEngine
+
+# Each benchmark is a setup(config) returning (operation, items per operation)
+Benchmark = Callable[[Dict[str, Any]], "tuple"]
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    def register(setup: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _corpus(config: Dict[str, Any], **overrides: Any) -> List[Dict[str, Any]]:
+    settings = dict(config["generator"], **overrides)
+    return SyntheticProfileGenerator(**settings).profiles(config["profiles"])
+
+
+@benchmark("parse_profile")
+def _parse_profile(config: Dict[str, Any]):
+    from records import parse_profile
+    profiles = _corpus(config)
+    return (lambda: [parse_profile(p) for p in profiles]), len(profiles)
+
+
+@benchmark("metadata")
+def _metadata(config: Dict[str, Any]):
+    engine = ThreatDetectionEngine()
+    profiles = _corpus(config)
+    return (lambda: [engine.analyze_profile_metadata(p) for p in profiles]), len(profiles)
+
+
+@benchmark("metadata_score_only")
+def _metadata_score_only(config: Dict[str, Any]):
+    engine = ThreatDetectionEngine()
+    profiles = _corpus(config)
+    return (lambda: [engine.rules.metadata_score(p) for p in profiles]), len(profiles)
+
+
+@benchmark("content")
+def _content(config: Dict[str, Any]):
+    engine = ThreatDetectionEngine()
+    conversations = [p["messages"] for p in _corpus(config)]
+    return (lambda: [engine.analyze_message_content(m) for m in conversations]), len(conversations)
+
+
+@benchmark("content_long")
+def _content_long(config: Dict[str, Any]):
+    engine = ThreatDetectionEngine()
+    conversations = [p["messages"] for p in _corpus(config, message_count=(20, 40), message_words=(40, 120))]
+    return (lambda: [engine.analyze_message_content(m) for m in conversations]), len(conversations)
+
+
+@benchmark("content_scam_heavy")
+def _content_scam_heavy(config: Dict[str, Any]):
+    engine = ThreatDetectionEngine()
+    conversations = [p["messages"] for p in _corpus(config, scam_density=0.8)]
+    return (lambda: [engine.analyze_message_content(m) for m in conversations]), len(conversations)
+
+
+@benchmark("score")
+def _score(config: Dict[str, Any]):
+    engine = ThreatDetectionEngine()
+    profiles = _corpus(config)
+    return (lambda: [engine.calculate_risk_score(p) for p in profiles]), len(profiles)
+
+
+@benchmark("score_batch")
+def _score_batch(config: Dict[str, Any]):
+    engine = ThreatDetectionEngine()
+    profiles = _corpus(config)
+    return (lambda: engine.calculate_risk_scores(profiles)), len(profiles)
+
+
+@benchmark("score_batch_score_only")
+def _score_batch_score_only(config: Dict[str, Any]):
+    engine = ThreatDetectionEngine()
+    profiles = _corpus(config)
+    return (lambda: engine.calculate_risk_scores(profiles, explain=False)), len(profiles)
+
+
+@benchmark("score_bot_followers")
+def _score_bot_followers(config: Dict[str, Any]):
+    engine = ThreatDetectionEngine()
+    profiles = _corpus(config, follower_distribution="bot")
+    return (lambda: [engine.calculate_risk_score(p) for p in profiles]), len(profiles)
+
+
+@benchmark("fast_verdict")
+def _fast_verdict(config: Dict[str, Any]):
+    engine = ThreatDetectionEngine()
+    profiles = _corpus(config)
+    return (lambda: [engine.fast_verdict(p) for p in profiles]), len(profiles)
+
+
+@benchmark("fast_verdict_scam_heavy")
+def _fast_verdict_scam_heavy(config: Dict[str, Any]):
+    engine = ThreatDetectionEngine()
+    profiles = _corpus(config, scam_density=0.8)
+    return (lambda: [engine.fast_verdict(p) for p in profiles]), len(profiles)
+
+
+@benchmark("serialize_assessment")
+def _serialize_assessment(config: Dict[str, Any]):
+    from responses import ResponseEncoder
+    engine = ThreatDetectionEngine()
+    encoder = ResponseEncoder()
+    assessments = engine.calculate_risk_scores(_corpus(config))
+    return (lambda: [encoder.encode(a).encode("utf-8") for a in assessments]), len(assessments)
+
+
+@benchmark("http_analyze_profile")
+def _http_analyze_profile(config: Dict[str, Any]):
+    # In-process WSGI requests: routing, JSON parsing, scoring and serialization
+    for variable in ("VERDICT_CACHE_SIZE", "MESSAGE_CACHE_SIZE", "CONVERSATION_CACHE_SIZE", "REQUEST_LOG_SAMPLE_RATE"):
+        os.environ.setdefault(variable, "0")
+    import main
+
+    client = main.app.test_client()
+    bodies = [json.dumps(p) for p in _corpus(config, message_count=(1, 5))[:max(1, config["profiles"] // 10)]]
+
+    def run() -> None:
+        for body in bodies:
+            client.post("/analyze-profile", data=body, content_type="application/json")
+    return run, len(bodies)
+
+
+def run_benchmark(name: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    operation, items = BENCHMARKS[name](config)
+    operation()  # warm-up
+
+    timings = []
+    for _ in range(config["repeat"]):
+        started = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - started)
+
+    per_item = [t / items for t in timings]
+    best = min(per_item)
+    return {
+        "items": items,
+        "repeat": config["repeat"],
+        "best_us": best * 1e6,
+        "mean_us": statistics.mean(per_item) * 1e6,
+        "p50_us": statistics.median(per_item) * 1e6,
+        "stdev_us": statistics.stdev(per_item) * 1e6 if len(per_item) > 1 else 0.0,
+        "ops_per_sec": 1 / best,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(config: Dict[str, Any], names: Sequence[str]) -> Dict[str, Any]:
+    results = {}
+    for name in names:
+        results[name] = run_benchmark(name, config)
+        print(f"{name:<22} {results[name]['best_us']:>10.2f} us/item {results[name]['ops_per_sec']:>12.0f} items/s",
+              file=sys.stderr)
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "profiles": config["profiles"],
+            "repeat": config["repeat"],
+            "generator": config["generator"],
+        },
+        "results": results,
+    }
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float) -> int:
+    """Print per-benchmark change; returns the number of regressions beyond threshold"""
+    regressions = 0
+    print(f"{'benchmark':<22} {'base us':>10} {'head us':>10} {'change':>8}")
+    for name, head_result in head["results"].items():
+        base_result = base["results"].get(name)
+        if base_result is None:
+            print(f"{name:<22} {'-':>10} {head_result['best_us']:>10.2f} {'new':>8}")
+            continue
+        change = head_result["best_us"] / base_result["best_us"] - 1
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{name:<22} {base_result['best_us']:>10.2f} {head_result['best_us']:>10.2f} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Threat detection engine benchmark suite")
+    parser.add_argument("-o", "--output", help="write results JSON here (default stdout)")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--profiles", type=int, default=2000, help="profiles per corpus")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scam-density", type=float, default=0.2)
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"), help="compare two results files")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown treated as a regression")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as base_file, open(args.compare[1]) as head_file:
+            regressions = compare(json.load(base_file), json.load(head_file), args.threshold)
+        return 1 if regressions else 0
+
+    logging.basicConfig(level=logging.WARNING)
+    config = {
+        "profiles": args.profiles,
+        "repeat": args.repeat,
+        "generator": SyntheticProfileGenerator(seed=args.seed, scam_density=args.scam_density).settings(),
+    }
+    report = run_suite(config, args.only or list(BENCHMARKS))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as results_file:
+            results_file.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Seeded synthetic profile and message generator
+Modeled on the /demo-data fixtures; the same seed and settings always produce the
+same corpus so benchmark runs on different commits are comparable
+"""
+
+import math
+import random
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Benign sentences in the style of the legitimate and suspicious demo profiles
+BENIGN_PHRASES = [
+    "Thanks for connecting! Looking forward to networking.",
+    "Great article you shared about industry trends.",
+    "Hello! I'm new to this platform.",
+    "Looking to connect with professionals in your field.",
+    "Would love to discuss potential opportunities.",
+    "Hope your week is going well.",
+    "Congratulations on the new role!",
+    "Let me know if you are attending the conference.",
+]
+
+# Scam sentences in the style of the romance scam demo profile
+SCAM_PHRASES = [
+    "My darling, I love you so much already.",
+    "I am engineer working on oil rig, need emergency money.",
+    "Trust me honey, send Western Union transfer immediately.",
+    "Please wire money urgently, it is an emergency.",
+    "Guaranteed investment opportunity with huge returns.",
+    "Send your bank account and routing number asap.",
+    "You are the lottery winner, pay the fee quickly.",
+    "I am deployed overseas and need funds for my ticket.",
+]
+
+# Filler words used to stretch messages to a target length
+FILLER_WORDS = (
+    "really just today also here with some more about your time work team "
+    "project plan meeting weekend family friends photo message reply"
+).split()
+
+FOLLOWER_DISTRIBUTIONS = ("lognormal", "uniform", "bot")
+
+
+class SyntheticProfileGenerator:
+    """
+    Generates profiles with controllable shape
+    message_count and message_words are inclusive (min, max) ranges, scam_density is
+    the probability that a message is drawn from the scam phrases, and
+    follower_distribution is one of lognormal, uniform or bot
+    """
+
+    def __init__(self, seed: int = 42, message_count: Tuple[int, int] = (1, 5),
+                 message_words: Tuple[int, int] = (6, 30), scam_density: float = 0.2,
+                 follower_distribution: str = "lognormal"):
+        if follower_distribution not in FOLLOWER_DISTRIBUTIONS:
+            raise ValueError(f"follower_distribution must be one of {FOLLOWER_DISTRIBUTIONS}")
+        if not 0.0 <= scam_density <= 1.0:
+            raise ValueError("scam_density must be between 0 and 1")
+
+        self.seed = seed
+        self.message_count = message_count
+        self.message_words = message_words
+        self.scam_density = scam_density
+        self.follower_distribution = follower_distribution
+        self._rng = random.Random(seed)
+
+    def settings(self) -> Dict[str, Any]:
+        return {
+            "seed": self.seed,
+            "message_count": list(self.message_count),
+            "message_words": list(self.message_words),
+            "scam_density": self.scam_density,
+            "follower_distribution": self.follower_distribution,
+        }
+
+    def _social_counts(self) -> Tuple[int, int]:
+        rng = self._rng
+        if self.follower_distribution == "uniform":
+            return rng.randint(0, 20000), rng.randint(0, 5000)
+        if self.follower_distribution == "bot":
+            # Follows many, followed by few (the suspicious demo profile pattern)
+            return rng.randint(0, 50), rng.randint(500, 5000)
+        followers = int(math.exp(rng.gauss(5.5, 1.8)))
+        following = int(math.exp(rng.gauss(5.0, 1.2)))
+        return followers, following
+
+    def message(self) -> str:
+        rng = self._rng
+        phrases = SCAM_PHRASES if rng.random() < self.scam_density else BENIGN_PHRASES
+        words = rng.choice(phrases).split()
+        target = rng.randint(*self.message_words)
+        while len(words) < target:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(FILLER_WORDS))
+        return " ".join(words)
+
+    def profile(self) -> Dict[str, Any]:
+        rng = self._rng
+        followers, following = self._social_counts()
+        account_age_days = rng.choice([rng.randint(0, 30), rng.randint(30, 120), rng.randint(120, 3000)])
+        return {
+            "account_age_days": account_age_days,
+            "followers": followers,
+            "following": following,
+            "post_count": int(account_age_days * rng.choice([0.0, 0.05, 1.0, 5.0, 60.0]) * rng.random()),
+            "profile_completed": rng.random() < 0.6,
+            "messages": [self.message() for _ in range(rng.randint(*self.message_count))],
+        }
+
+    def profiles(self, count: int) -> List[Dict[str, Any]]:
+        return [self.profile() for _ in range(count)]
+
+    def stream(self, count: int) -> Iterator[Dict[str, Any]]:
+        for _ in range(count):
+            yield self.profile()
@@ -0,0 +1,108 @@
+"""
+Verdict caching
+Bounded LRU/TTL caches keyed on a canonical hash of the fields that affect scoring
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from records import PROFILE_FIELDS, ProfileRecord
+
+# Profile record fields that feed the risk score
+SCORING_FIELDS = PROFILE_FIELDS + ('messages',)
+
+_MISSING = object()
+
+
+def profile_cache_key(profile: ProfileRecord, rules_fingerprint: str = "") -> Optional[str]:
+    """
+    Canonical hash of everything that can change a profile's verdict
+    Returns None for profiles that cannot be canonicalized (they are not cached)
+    """
+    fields = [getattr(profile, name) for name in SCORING_FIELDS]
+    try:
+        canonical = json.dumps([rules_fingerprint, fields], separators=(',', ':'), sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def message_cache_key(message: str) -> bytes:
+    return hashlib.blake2b(message.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with optional TTL expiry and hit/miss/eviction counters
+    invalidate() drops every entry, e.g. after the rule set changes
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        expires_at = self._clock() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
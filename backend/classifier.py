@@ -0,0 +1,428 @@
+"""
+Statistical message classifier
+A logistic regression over hashed word unigrams and bigrams of the normalized messages, a
+second content tier next to the signatures: it picks up scam wording no signature lists.
+Weights are trained offline from labeled exports into a model file of float32 weights,
+which workers memory-map read-only
+
+A profile costs one normalization per message and a cached hash per word, with at most max_tokens words
+read from its messages, so inference stays in the tens of microseconds
+
+Usage:
+    python classifier.py train labeled.ndjson.gz -o classifier.bin
+    python classifier.py train labeled.csv --label-field is_scam --epochs 10 -o classifier.bin
+    python classifier.py info classifier.bin
+"""
+
+import argparse
+import csv
+import json
+import math
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from array import array
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from normalize import TextNormalizer
+
+MAGIC = b'SPACLF01'
+
+# magic, model version, created at, hash bits, n-gram order, bias, metadata length
+_HEADER = struct.Struct('<8sQdIIdQ')
+
+# Label values accepted in training exports
+POSITIVE_LABELS = frozenset({'1', 'true', 'yes', 'scam', 'fraud', 'spam', 'suspicious'})
+NEGATIVE_LABELS = frozenset({'0', 'false', 'no', 'benign', 'legit', 'legitimate', 'ham'})
+
+# (messages, 1 for a scam or 0)
+Example = Tuple[List[str], int]
+
+_TOKEN = re.compile(r'\w+')
+
+# Odd multiplier mixing the first word's hash into a word pair's bucket
+_MIX = 0x01000193
+
+
+class ClassifierSignals(NamedTuple):
+    """Classifier output for one profile's messages"""
+    probability: float
+    # The highest-weighted n-grams present, quoted, when explanations were asked for
+    top_features: str
+
+
+class FeatureHasher:
+    """
+    Hashed n-gram features of a list of messages: the buckets of every word and, for order
+    2, every pair of adjacent words within a message. Words are hashed with CRC32 (cached,
+    as vocabularies are small) and a pair's bucket mixes the hashes of its two words
+    """
+
+    def __init__(self, bits: int = 18, order: int = 2, max_tokens: int = 2000,
+                 normalizer: Optional[TextNormalizer] = None, cache_size: int = 100000):
+        if not 8 <= bits <= 26:
+            raise ValueError("bits must be between 8 and 26")
+        if order not in (1, 2):
+            raise ValueError("order must be 1 or 2")
+        self.bits = bits
+        self.order = order
+        self.max_tokens = max_tokens
+        self.cache_size = cache_size
+        self._mask = (1 << bits) - 1
+        self._normalize = (normalizer or TextNormalizer()).normalize
+        self._hashes: Dict[str, int] = {}
+
+    def _tokens(self, messages: Sequence[str]) -> Iterator[List[str]]:
+        """Words of each message, at most max_tokens in all"""
+        remaining = self.max_tokens
+        for message in messages:
+            if remaining <= 0:
+                return
+            tokens = _TOKEN.findall(self._normalize(message))[:remaining]
+            remaining -= len(tokens)
+            yield tokens
+
+    def _hash(self, token: str) -> int:
+        code = self._hashes.get(token)
+        if code is None:
+            if len(self._hashes) >= self.cache_size:
+                self._hashes.clear()
+            code = self._hashes[token] = zlib.crc32(token.encode('utf-8', 'surrogatepass'))
+        return code
+
+    def _token_features(self, tokens: List[str], features: Set[int]) -> None:
+        mask = self._mask
+        codes = list(map(self._hash, tokens))
+        features.update(code & mask for code in codes)
+        if self.order == 2:
+            features.update(((first * _MIX) ^ second) & mask for first, second in zip(codes, codes[1:]))
+
+    def features(self, messages: Sequence[str]) -> Set[int]:
+        features: Set[int] = set()
+        for tokens in self._tokens(messages):
+            self._token_features(tokens, features)
+        return features
+
+    def batch_features(self, batch: Sequence[Sequence[str]]) -> List[Set[int]]:
+        """
+        features() of each message list in batch; a message repeated within the batch
+        (campaign copies, templated notifications) is normalized and hashed once
+        """
+        seen: Dict[str, Tuple[int, Set[int]]] = {}
+        results = []
+        for messages in batch:
+            features: Set[int] = set()
+            token_count = 0
+            for message in messages:
+                known = seen.get(message)
+                if known is None:
+                    tokens = _TOKEN.findall(self._normalize(message))
+                    known = seen[message] = (len(tokens), set())
+                    self._token_features(tokens, known[1])
+                token_count += known[0]
+                if token_count > self.max_tokens:
+                    # Truncated within a message, which per-message features cannot express
+                    features = self.features(messages)
+                    break
+                features |= known[1]
+            results.append(features)
+        return results
+
+    def grams(self, messages: Sequence[str]) -> Iterator[Tuple[int, str]]:
+        """(bucket, n-gram) of every feature, for naming buckets in training"""
+        mask = self._mask
+        for tokens in self._tokens(messages):
+            codes = list(map(self._hash, tokens))
+            for code, token in zip(codes, tokens):
+                yield code & mask, token
+            if self.order == 2:
+                for index in range(len(tokens) - 1):
+                    yield ((codes[index] * _MIX) ^ codes[index + 1]) & mask, f"{tokens[index]} {tokens[index + 1]}"
+
+
+def _sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    odds = math.exp(z)
+    return odds / (1.0 + odds)
+
+
+def parse_label(value: Any) -> Optional[int]:
+    """1 for a scam label, 0 for a benign one, None when unrecognized"""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return 1 if value >= 0.5 else 0
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if value in POSITIVE_LABELS:
+            return 1
+        if value in NEGATIVE_LABELS:
+            return 0
+    return None
+
+
+def read_examples(path: str, label_field: str = 'label') -> Iterator[Example]:
+    """
+    (messages, label) pairs from an NDJSON or CSV export (optionally gzipped) holding
+    the profile fields plus a label column; rows without messages or a recognized label
+    are skipped
+    """
+    # Imported here, as rescore imports the engine, which imports this module
+    from rescore import detect_format, open_text, parse_csv_row
+
+    with open_text(path, 'r') as stream:
+        if detect_format(path) == 'csv':
+            rows: Iterable[Dict[str, Any]] = map(parse_csv_row, csv.DictReader(stream))
+        else:
+            rows = (json.loads(line) for line in stream if line.strip())
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            messages = row.get('messages')
+            label = parse_label(row.get(label_field))
+            if label is None or not isinstance(messages, list):
+                continue
+            messages = [message for message in messages if isinstance(message, str)]
+            if messages:
+                yield messages, label
+
+
+def train_model(examples: Sequence[Example], path: str, bits: int = 18, order: int = 2, epochs: int = 5,
+                learning_rate: float = 0.5, l2: float = 1e-6, holdout: float = 0.1, named_features: int = 5000,
+                seed: int = 42, version: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Fit the model by stochastic gradient descent on the log loss and write its file,
+    replacing path atomically. Each profile's features are scaled to unit length, so
+    long conversations do not saturate the score
+    A seeded holdout fraction is kept out of training and evaluated on the written model
+    Returns training and holdout statistics
+    """
+    if not 0.0 <= holdout < 1.0:
+        raise ValueError("holdout must be in [0, 1)")
+    hasher = FeatureHasher(bits, order)
+    # A representative n-gram per bucket, to name features in explanations
+    names: Dict[int, str] = {}
+    encoded = []
+    for messages, label in examples:
+        features = {}
+        for index, gram in hasher.grams(messages):
+            features.setdefault(index, gram)
+        if features:
+            for index, gram in features.items():
+                names.setdefault(index, gram)
+            encoded.append((array('I', sorted(features)), label))
+    if not encoded:
+        raise ValueError("no labeled examples with messages")
+
+    rng = random.Random(seed)
+    rng.shuffle(encoded)
+    held = int(len(encoded) * holdout)
+    evaluation, training = encoded[:held], encoded[held:]
+    positives = sum(label for _, label in training)
+    if positives in (0, len(training)):
+        raise ValueError("training needs both scam and benign examples")
+
+    weights = array('d', bytes(8 << bits))
+    bias = math.log(positives / (len(training) - positives))
+    step = 0
+    for _ in range(epochs):
+        rng.shuffle(training)
+        for features, label in training:
+            scale = 1.0 / math.sqrt(len(features))
+            gradient = _sigmoid(bias + scale * sum(map(weights.__getitem__, features))) - label
+            rate = learning_rate / math.sqrt(1.0 + step * 1e-4)
+            update = rate * gradient * scale
+            decay = 1.0 - rate * l2
+            for index in features:
+                weights[index] = weights[index] * decay - update
+            bias -= rate * gradient
+            step += 1
+
+    positive = sorted((index for index in names if weights[index] > 0), key=weights.__getitem__, reverse=True)
+    stats: Dict[str, Any] = {
+        "examples": len(training),
+        "scam_examples": positives,
+        "epochs": epochs,
+        "normalization": TextNormalizer.version,
+        "features_seen": len(names),
+    }
+    metadata = dict(stats, features={str(index): names[index] for index in positive[:named_features]})
+    _write_model(path, weights, bias, bits, order, metadata, version)
+
+    if evaluation:
+        model = TextClassifier(path)
+        stats["holdout"] = model.evaluate(evaluation)
+    return stats
+
+
+def _write_model(path: str, weights: array, bias: float, bits: int, order: int,
+                 metadata: Dict[str, Any], version: Optional[int]) -> None:
+    if version is None:
+        version = time.time_ns()
+    packed = array('f', weights)
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    trailer = json.dumps(metadata, separators=(',', ':')).encode('utf-8')
+
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(prefix='.classifier-', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as output:
+            output.write(_HEADER.pack(MAGIC, version, time.time(), bits, order, bias, len(trailer)))
+            packed.tofile(output)
+            output.write(trailer)
+            output.flush()
+            os.fsync(output.fileno())
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+class TextClassifier:
+    """
+    A trained model file, mapped read-only
+    classify() scores one profile's messages; classify_batch() and score_batch() score
+    many, extracting the features of a message repeated across the batch once
+    """
+
+    def __init__(self, path: str, max_tokens: int = 2000, explain_features: int = 3):
+        self.path = path
+        self.explain_features = explain_features
+        with open(path, 'rb') as source:
+            self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, self.created_at, bits, order, self.bias, trailer = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a classifier model")
+
+        size = 4 << bits
+        if _HEADER.size + size + trailer > len(self._map):
+            raise ValueError(f"{path} is truncated")
+        view = memoryview(self._map)[_HEADER.size:_HEADER.size + size]
+        if sys.byteorder == 'little':
+            self._weights: Sequence[float] = view.cast('f')
+        else:
+            # Big-endian hosts pay for a private copy
+            self._weights = array('f', view)
+            self._weights.byteswap()
+        offset = _HEADER.size + size
+        self.metadata = json.loads(bytes(self._map[offset:offset + trailer]))
+        self._names = {int(index): name for index, name in self.metadata.pop('features', {}).items()}
+        self.hasher = FeatureHasher(bits, order, max_tokens)
+        self.queries = 0
+
+    def _probability(self, features: Sequence[int]) -> float:
+        if not features:
+            return 0.0
+        return _sigmoid(self.bias + sum(map(self._weights.__getitem__, features)) / math.sqrt(len(features)))
+
+    def _signals(self, features: Set[int], explain: bool) -> ClassifierSignals:
+        probability = self._probability(features)
+        if not explain or not features:
+            return ClassifierSignals(probability, '')
+        weights = self._weights
+        # Ties broken by bucket, so features named do not depend on set iteration order
+        top = sorted((index for index in features if weights[index] > 0 and index in self._names),
+                     key=lambda index: (-weights[index], index))[:self.explain_features]
+        return ClassifierSignals(probability, ", ".join(f'"{self._names[index]}"' for index in top))
+
+    def classify(self, messages: Sequence[str], explain: bool = True) -> ClassifierSignals:
+        """Scam probability of the messages, with the top-weighted n-grams when explain is set"""
+        self.queries += 1
+        return self._signals(self.hasher.features(messages), explain)
+
+    def classify_batch(self, batch: Sequence[Sequence[str]], explain: bool = True) -> List[ClassifierSignals]:
+        """classify() for each message list in batch, hashing messages repeated across the batch once"""
+        self.queries += len(batch)
+        return [self._signals(features, explain) for features in self.hasher.batch_features(batch)]
+
+    def score_batch(self, batch: Sequence[Sequence[str]]) -> List[float]:
+        """Scam probability of each message list in batch"""
+        return [signals.probability for signals in self.classify_batch(batch, False)]
+
+    def evaluate(self, examples: Sequence[Tuple[Any, int]], threshold: float = 0.5,
+                 chunk_size: int = 1000) -> Dict[str, Any]:
+        """
+        Accuracy, precision and recall at threshold over (messages, label) examples; encoded
+        examples holding sorted feature indices instead of messages are accepted too
+        """
+        counts = {"tp": 0, "fp": 0, "tn": 0, "fn": 0}
+        iterator = iter(examples)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            if isinstance(chunk[0][0], array):
+                scores = [self._probability(features) for features, _ in chunk]
+            else:
+                scores = self.score_batch([messages for messages, _ in chunk])
+            for score, (_, label) in zip(scores, chunk):
+                flagged = score >= threshold
+                counts[("t" if flagged == bool(label) else "f") + ("p" if flagged else "n")] += 1
+        total = sum(counts.values())
+        flagged, scams = counts["tp"] + counts["fp"], counts["tp"] + counts["fn"]
+        return {
+            "examples": total,
+            "accuracy": round((counts["tp"] + counts["tn"]) / total, 4) if total else None,
+            "precision": round(counts["tp"] / flagged, 4) if flagged else None,
+            "recall": round(counts["tp"] / scams, 4) if scams else None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "created_at": self.created_at,
+            "hash_bits": self.hasher.bits,
+            "ngram_order": self.hasher.order,
+            "named_features": len(self._names),
+            "training": self.metadata,
+            "queries": self.queries,
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Train or inspect a message classifier model")
+    commands = parser.add_subparsers(dest="command", required=True)
+    train = commands.add_parser("train", help="train a model from labeled NDJSON or CSV exports")
+    train.add_argument("exports", nargs="+", help="profiles with messages and a label field (.gz allowed)")
+    train.add_argument("-o", "--output", required=True, help="model file, replaced atomically")
+    train.add_argument("--label-field", default="label", help="field holding 1/0, true/false or scam/benign")
+    train.add_argument("--bits", type=int, default=18, help="feature hash size as a power of two")
+    train.add_argument("--order", type=int, default=2, choices=(1, 2), help="longest n-gram")
+    train.add_argument("--epochs", type=int, default=5)
+    train.add_argument("--learning-rate", type=float, default=0.5)
+    train.add_argument("--l2", type=float, default=1e-6)
+    train.add_argument("--holdout", type=float, default=0.1, help="fraction kept out for evaluation")
+    train.add_argument("--seed", type=int, default=42)
+    train.add_argument("--version", type=int, default=None, help="model version (default: build time in ns)")
+    info = commands.add_parser("info", help="print a model file's header and training statistics")
+    info.add_argument("model")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "train":
+            examples = [example for path in args.exports for example in read_examples(path, args.label_field)]
+            stats = train_model(examples, args.output, bits=args.bits, order=args.order, epochs=args.epochs,
+                                learning_rate=args.learning_rate, l2=args.l2, holdout=args.holdout,
+                                seed=args.seed, version=args.version)
+            print(json.dumps(stats), file=sys.stderr)
+        else:
+            print(json.dumps(TextClassifier(args.model).stats(), indent=2))
+    except (OSError, ValueError, struct.error) as e:
+        print(f"classifier: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Service configuration
+Environment-driven settings shared by the Flask and ASGI entry points
+"""
+
+import atexit
+import os
+from typing import Optional, Tuple, Union
+
+from cache import LRUCache
+from classifier import TextClassifier
+from duplicates import DuplicateIndex
+from engine import ThreatDetectionEngine
+from graph import SocialGraph
+from history import HistoryStore
+from jobs import JobRunner, JobStore
+from metrics import PipelineMetrics
+from normalize import TextNormalizer
+from payloads import PayloadLimits
+from reputation import ReputationStore
+from rulesets import RuleStore
+from shared_cache import SharedVerdictCache
+from velocity import VelocityTracker
+
+SERVICE_INFO = {
+    "message": "Suspicious Profile Analyzer API",
+    "status": "operational",
+    "version": "1.0.0"
+}
+
+# Largest batch accepted by /analyze-profiles
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 1000))
+MAX_BATCH_BYTES = int(os.environ.get("MAX_BATCH_BYTES", 32 * 1024 * 1024))
+
+# Profile payload limits, checked while the body streams in (413 beyond them)
+MAX_PROFILE_BYTES = int(os.environ.get("MAX_PROFILE_BYTES", 1024 * 1024))
+MAX_MESSAGES = int(os.environ.get("MAX_MESSAGES", 1000))
+MAX_MESSAGE_CHARS = int(os.environ.get("MAX_MESSAGE_CHARS", 20000))
+PAYLOAD_LIMITS = PayloadLimits(MAX_PROFILE_BYTES, MAX_MESSAGES, MAX_MESSAGE_CHARS)
+
+# Profiles whose messages total more characters are scanned message by message
+CONTENT_JOIN_LIMIT = int(os.environ.get("CONTENT_JOIN_LIMIT", 65536))
+
+# Rule set artifact (see rulesets.py), reloaded when replaced; unset uses the built-in rules
+RULES = os.environ.get("RULES", "")
+RULES_CHECK_INTERVAL = float(os.environ.get("RULES_CHECK_INTERVAL", 5))
+# Candidate rule set scored next to the active one on sampled traffic; unset disables shadow mode
+RULES_SHADOW = os.environ.get("RULES_SHADOW", "")
+SHADOW_SAMPLE_RATE = float(os.environ.get("SHADOW_SAMPLE_RATE", 0.1))
+
+# Undo leetspeak, homoglyphs, invisible characters and letter spacing before signature matching and
+# reputation lookups (1 enables it; scores then differ from plain lowercased matching)
+TEXT_NORMALIZATION = int(os.environ.get("TEXT_NORMALIZATION", 0))
+
+# Cache sizing (0 disables a cache)
+VERDICT_CACHE_SIZE = int(os.environ.get("VERDICT_CACHE_SIZE", 10000))
+VERDICT_CACHE_TTL = float(os.environ.get("VERDICT_CACHE_TTL", 300))
+# Verdict cache file shared by every worker on the host (e.g. /dev/shm/spa-verdicts); unset keeps one per process
+SHARED_VERDICT_CACHE = os.environ.get("SHARED_VERDICT_CACHE", "")
+SHARED_CACHE_SLOT_BYTES = int(os.environ.get("SHARED_CACHE_SLOT_BYTES", 1024))
+# Directory where every worker on the host publishes its /metrics counters (e.g. /dev/shm/spa-metrics);
+# unset reports each process's own
+SHARED_METRICS_DIR = os.environ.get("SHARED_METRICS_DIR", "")
+MESSAGE_CACHE_SIZE = int(os.environ.get("MESSAGE_CACHE_SIZE", 50000))
+CONVERSATION_CACHE_SIZE = int(os.environ.get("CONVERSATION_CACHE_SIZE", 10000))
+CONVERSATION_TTL = float(os.environ.get("CONVERSATION_TTL", 3600))
+
+# Cross-account near-duplicate index: messages kept and how long (0 disables it)
+DUPLICATE_INDEX_SIZE = int(os.environ.get("DUPLICATE_INDEX_SIZE", 50000))
+DUPLICATE_WINDOW = float(os.environ.get("DUPLICATE_WINDOW", 86400))
+
+# Prebuilt reputation store (see reputation.py), mapped by every worker; unset disables it
+REPUTATION_STORE = os.environ.get("REPUTATION_STORE", "")
+REPUTATION_CHECK_INTERVAL = float(os.environ.get("REPUTATION_CHECK_INTERVAL", 5))
+
+# Trained message classifier model (see classifier.py), mapped by every worker; unset disables it
+TEXT_CLASSIFIER = os.environ.get("TEXT_CLASSIFIER", "")
+
+# Prebuilt follow graph (see graph.py), mapped by every worker; unset disables graph signals
+SOCIAL_GRAPH = os.environ.get("SOCIAL_GRAPH", "")
+
+# Windowed activity counts per account, fed by /activity (0 disables velocity signals)
+VELOCITY_MAX_ACCOUNTS = int(os.environ.get("VELOCITY_MAX_ACCOUNTS", 100000))
+VELOCITY_BUCKET_SECONDS = float(os.environ.get("VELOCITY_BUCKET_SECONDS", 300))
+VELOCITY_WINDOW = float(os.environ.get("VELOCITY_WINDOW", 86400))
+# Events stamped further ahead of the server clock are dropped
+VELOCITY_MAX_SKEW = float(os.environ.get("VELOCITY_MAX_SKEW", 300))
+# Largest /activity submission, in events and in body bytes
+MAX_ACTIVITY_EVENTS = int(os.environ.get("MAX_ACTIVITY_EVENTS", 10000))
+MAX_ACTIVITY_BYTES = int(os.environ.get("MAX_ACTIVITY_BYTES", 4 * 1024 * 1024))
+
+# Assessment history database (SQLite, WAL mode); unset disables it
+HISTORY_DB = os.environ.get("HISTORY_DB", "")
+HISTORY_BATCH_SIZE = int(os.environ.get("HISTORY_BATCH_SIZE", 500))
+HISTORY_FLUSH_MS = float(os.environ.get("HISTORY_FLUSH_MS", 500))
+HISTORY_QUEUE_SIZE = int(os.environ.get("HISTORY_QUEUE_SIZE", 10000))
+
+# Background jobs (SQLite job table); unset disables the /jobs endpoints
+JOB_DB = os.environ.get("JOB_DB", "")
+# Scoring processes per service process; 0 only queues jobs for `python jobs.py worker`
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 1))
+JOB_MAX_QUEUED = int(os.environ.get("JOB_MAX_QUEUED", 100))
+JOB_MAX_BYTES = int(os.environ.get("JOB_MAX_BYTES", 64 * 1024 * 1024))
+JOB_MAX_PROFILES = int(os.environ.get("JOB_MAX_PROFILES", 100000))
+JOB_RETENTION = float(os.environ.get("JOB_RETENTION", 86400))
+
+# gzip for JSON responses at least this long, when the client accepts it (level 0 disables it)
+RESPONSE_GZIP_MIN_BYTES = int(os.environ.get("RESPONSE_GZIP_MIN_BYTES", 1400))
+RESPONSE_GZIP_LEVEL = int(os.environ.get("RESPONSE_GZIP_LEVEL", 6))
+
+# ASGI micro-batching: largest engine call and longest wait to fill it
+ASGI_MAX_BATCH_SIZE = int(os.environ.get("ASGI_MAX_BATCH_SIZE", 64))
+ASGI_MAX_BATCH_WAIT_MS = float(os.environ.get("ASGI_MAX_BATCH_WAIT_MS", 2))
+
+# Fraction of analysis requests written to the request log (0 disables it)
+REQUEST_LOG_SAMPLE_RATE = float(os.environ.get("REQUEST_LOG_SAMPLE_RATE", 0.01))
+
+
+def create_verdict_cache() -> Union[LRUCache, SharedVerdictCache, None]:
+    """The host-wide shared verdict cache when configured, else a per-process one"""
+    if VERDICT_CACHE_SIZE <= 0:
+        return None
+    if SHARED_VERDICT_CACHE:
+        return SharedVerdictCache(SHARED_VERDICT_CACHE, VERDICT_CACHE_SIZE, ttl_seconds=VERDICT_CACHE_TTL,
+                                  slot_bytes=SHARED_CACHE_SLOT_BYTES)
+    return LRUCache(VERDICT_CACHE_SIZE, ttl_seconds=VERDICT_CACHE_TTL)
+
+
+def create_metrics() -> PipelineMetrics:
+    """Pipeline metrics, summed across the host's workers when SHARED_METRICS_DIR is set"""
+    return PipelineMetrics(SHARED_METRICS_DIR or None)
+
+
+def create_engine(metrics: Optional[PipelineMetrics] = None, cross_account: bool = True) -> ThreatDetectionEngine:
+    """
+    Build the threat detection engine with the configured caches
+    cross_account=False leaves out the state one process builds from the accounts it has seen
+    (duplicate index, velocity counts, conversations), so bulk scores do not depend on how
+    profiles are split between processes
+    """
+    builtin = ThreatDetectionEngine.builtin_rules()
+    return ThreatDetectionEngine(
+        verdict_cache=create_verdict_cache(),
+        message_cache=LRUCache(MESSAGE_CACHE_SIZE) if MESSAGE_CACHE_SIZE > 0 else None,
+        conversations=LRUCache(CONVERSATION_CACHE_SIZE, ttl_seconds=CONVERSATION_TTL)
+        if cross_account and CONVERSATION_CACHE_SIZE > 0 else None,
+        metrics=metrics,
+        duplicates=DuplicateIndex(DUPLICATE_INDEX_SIZE, window_seconds=DUPLICATE_WINDOW)
+        if cross_account and DUPLICATE_INDEX_SIZE > 0 else None,
+        reputation=ReputationStore(REPUTATION_STORE, check_interval=REPUTATION_CHECK_INTERVAL) if REPUTATION_STORE else None,
+        social_graph=SocialGraph(SOCIAL_GRAPH) if SOCIAL_GRAPH else None,
+        velocity=VelocityTracker(VELOCITY_MAX_ACCOUNTS, bucket_seconds=VELOCITY_BUCKET_SECONDS,
+                                 window_seconds=VELOCITY_WINDOW, max_skew=VELOCITY_MAX_SKEW)
+        if cross_account and VELOCITY_MAX_ACCOUNTS > 0 else None,
+        join_limit=CONTENT_JOIN_LIMIT,
+        rule_store=RuleStore(RULES, builtin, check_interval=RULES_CHECK_INTERVAL) if RULES else None,
+        shadow_rules=RuleStore(RULES_SHADOW, builtin, check_interval=RULES_CHECK_INTERVAL) if RULES_SHADOW else None,
+        shadow_sample_rate=SHADOW_SAMPLE_RATE,
+        normalizer=TextNormalizer() if TEXT_NORMALIZATION else None,
+        classifier=TextClassifier(TEXT_CLASSIFIER) if TEXT_CLASSIFIER else None
+    )
+
+
+def create_history() -> Optional[HistoryStore]:
+    """Open the configured assessment history, writing queued rows on exit"""
+    if not HISTORY_DB:
+        return None
+    history = HistoryStore(HISTORY_DB, batch_size=HISTORY_BATCH_SIZE, flush_interval=HISTORY_FLUSH_MS / 1000,
+                           max_queue=HISTORY_QUEUE_SIZE)
+    atexit.register(history.close)
+    return history
+
+
+def create_jobs() -> Tuple[Optional[JobStore], Optional[JobRunner]]:
+    """Open the configured job store and start this process's runner, stopped on exit"""
+    if not JOB_DB:
+        return None, None
+    store = JobStore(JOB_DB, max_queued=JOB_MAX_QUEUED)
+    if JOB_WORKERS <= 0:
+        return store, None
+    runner = JobRunner(store, workers=JOB_WORKERS, max_profiles=JOB_MAX_PROFILES, retention=JOB_RETENTION)
+    runner.start()
+    atexit.register(runner.stop)
+    return store, runner
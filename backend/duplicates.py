@@ -0,0 +1,215 @@
+"""
+Cross-account near-duplicate message index
+Recent messages are reduced to MinHash signatures over word shingles and banded into
+an LSH table, so finding the accounts that sent a near-copy costs a few dict lookups
+regardless of how many messages are indexed
+"""
+
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from signatures import WORD_PATTERN
+
+# Signature layout: BANDS x ROWS bins. Two messages become candidates when every bin of
+# one band matches, which happens with probability 1 - (1 - s**ROWS)**BANDS for
+# Jaccard similarity s (about 0.9 at s=0.8, 0.25 at s=0.5)
+BANDS = 6
+ROWS = 5
+BINS = BANDS * ROWS
+
+# Messages are compared as sets of word trigrams
+SHINGLE_SIZE = 3
+
+_HASH_MASK = (1 << 64) - 1
+_VALUE_MASK = (1 << 32) - 1
+_EMPTY = 1 << 64
+
+# Added per bin of distance when an empty bin borrows its neighbour's value
+_DENSIFY_OFFSET = 0x9E3779B1
+
+
+def message_signature(text: str, min_tokens: int = 8) -> Optional[array]:
+    """
+    MinHash signature of a message, or None when it is too short to compare
+    Uses one permutation hashing: each shingle hash lands in one bin and each bin keeps
+    its minimum, and empty bins borrow from the next filled bin (rotation densification).
+    Shingle hashes use the built-in hash, so signatures are only comparable within a process
+    """
+    tokens = WORD_PATTERN.findall(text.lower())
+    if len(tokens) < max(min_tokens, SHINGLE_SIZE):
+        return None
+
+    bins = [_EMPTY] * BINS
+    for shingle in zip(tokens, tokens[1:], tokens[2:]):
+        shingle_hash = hash(shingle) & _HASH_MASK
+        index = shingle_hash % BINS
+        value = shingle_hash // BINS
+        if value < bins[index]:
+            bins[index] = value
+
+    signature = array('I', [0]) * BINS
+    for index in range(BINS):
+        distance = 0
+        value = bins[index]
+        while value == _EMPTY:
+            distance += 1
+            value = bins[(index + distance) % BINS]
+        signature[index] = (value + distance * _DENSIFY_OFFSET) & _VALUE_MASK
+    return signature
+
+
+def _band_keys(signature: array) -> List[int]:
+    return [hash((band, *signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+def _similarity(first: array, second: array) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for a, b in zip(first, second) if a == b) / BINS
+
+
+class DuplicateIndex:
+    """
+    Recent messages by account, searchable for near-duplicates sent by other accounts
+    Holds at most max_entries messages, each for at most window_seconds; the oldest
+    messages are evicted first
+    """
+
+    def __init__(self, max_entries: int = 100000, window_seconds: float = 86400.0,
+                 similarity: float = 0.7, min_tokens: int = 8, max_accounts: int = 100,
+                 clock=time.monotonic):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if not 0.0 < similarity <= 1.0:
+            raise ValueError("similarity must be in (0, 1]")
+
+        self.max_entries = max_entries
+        self.window_seconds = window_seconds
+        self.similarity = similarity
+        self.min_tokens = min_tokens
+        self.max_accounts = max_accounts
+        self._clock = clock
+
+        # entry id -> (account, added at, signature); ids increase in insertion order
+        self._entries: Dict[int, Tuple[Hashable, float, array]] = {}
+        self._order: Deque[int] = deque()
+        # band key -> entry id, or a list of ids once several messages share the band
+        self._buckets: Dict[int, Any] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.inserts = 0
+        self.repeats = 0
+        self.queries = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record_messages(self, account: Optional[Hashable], messages: Iterable[str]) -> int:
+        """
+        Count the other accounts that recently sent near-duplicates of these messages,
+        then index the messages under account (anonymous profiles are only looked up)
+        Returns at most max_accounts
+        """
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            accounts: Set[Hashable] = set()
+            for message in messages:
+                signature = message_signature(message, self.min_tokens)
+                if signature is None:
+                    continue
+                keys = _band_keys(signature)
+                self.queries += 1
+                repeated = self._match(signature, keys, account, accounts)
+                if repeated:
+                    self.repeats += 1
+                elif account is not None:
+                    self._insert(account, now, signature, keys)
+            return min(len(accounts), self.max_accounts)
+
+    def _match(self, signature: array, keys: List[int], account: Optional[Hashable],
+               accounts: Set[Hashable]) -> bool:
+        """Add matching accounts to accounts; returns True if account already sent this message"""
+        repeated = False
+        seen: Set[int] = set()
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            for entry_id in (bucket if isinstance(bucket, list) else (bucket,)):
+                if len(accounts) >= self.max_accounts:
+                    # Large clusters stop the scan early; a repeat may then be indexed twice
+                    return repeated
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                other, _, other_signature = self._entries[entry_id]
+                if other == account:
+                    repeated = repeated or other_signature == signature
+                elif other not in accounts and _similarity(signature, other_signature) >= self.similarity:
+                    accounts.add(other)
+        return repeated
+
+    def _insert(self, account: Hashable, now: float, signature: array, keys: List[int]) -> None:
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (account, now, signature)
+        self._order.append(entry_id)
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = entry_id
+            elif isinstance(bucket, list):
+                bucket.append(entry_id)
+            else:
+                self._buckets[key] = [bucket, entry_id]
+        self.inserts += 1
+
+        while len(self._entries) > self.max_entries:
+            self._remove_oldest()
+            self.evictions += 1
+
+    def _expire(self, now: float) -> None:
+        if self.window_seconds is None:
+            return
+        cutoff = now - self.window_seconds
+        while self._order and self._entries[self._order[0]][1] <= cutoff:
+            self._remove_oldest()
+            self.expirations += 1
+
+    def _remove_oldest(self) -> None:
+        entry_id = self._order.popleft()
+        _, _, signature = self._entries.pop(entry_id)
+        for key in _band_keys(signature):
+            bucket = self._buckets[key]
+            if isinstance(bucket, list):
+                # The oldest id sits at the front of its bucket
+                bucket.remove(entry_id)
+                if len(bucket) == 1:
+                    self._buckets[key] = bucket[0]
+            else:
+                del self._buckets[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._order.clear()
+            self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "window_seconds": self.window_seconds,
+            "buckets": len(self._buckets),
+            "inserts": self.inserts,
+            "repeats": self.repeats,
+            "queries": self.queries,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,547 @@
+"""
+Threat Detection Engine
+Rule-based scoring of profile metadata and message content
+"""
+
+import logging
+import time
+from typing import List, Dict, Any, Optional, Union
+
+from cache import LRUCache, message_cache_key, profile_cache_key
+from classifier import ClassifierSignals, TextClassifier
+from duplicates import DuplicateIndex
+from graph import GraphSignals, NO_SIGNALS, SocialGraph
+from incremental import ConversationState, IncrementalPlan
+from metrics import PipelineMetrics
+from normalize import TextNormalizer
+from records import ProfileRecord
+from reputation import ReputationHits, ReputationSnapshot, ReputationStore
+from rules import CompiledRules
+from rulesets import BUILTIN_VERSION, RuleBundle, RuleStore, ShadowComparison
+from signatures import SignatureHits, SignatureScanner
+from velocity import NO_VELOCITY, VelocitySignals, VelocityTracker
+
+logger = logging.getLogger(__name__)
+
+# Engine entry points take a validated record, or a raw profile dict read with defaults
+Profile = Union[ProfileRecord, Dict[str, Any]]
+
+
+def as_record(profile: Profile) -> ProfileRecord:
+    if isinstance(profile, ProfileRecord):
+        return profile
+    return ProfileRecord.from_dict(profile)
+
+
+class ThreatDetectionEngine:
+    """
+    Ultra-lightweight threat detection using pure Python
+    No dependencies beyond Flask
+    """
+    
+    # Financial scam keywords (high precision patterns)
+    FINANCIAL_KEYWORDS = [
+        r'\b(send|wire|transfer)\s+(money|cash|funds)\b',
+        r'\b(western\s+union|moneygram|bitcoin|paypal)\b',
+        r'\b(emergency|urgent|immediate)\s+(help|assistance|money|funds)\b',
+        r'\b(investment|trading|profit|returns)\s+(opportunity|guaranteed)\b',
+        r'\b(lottery|winner|prize|inheritance)\b'
+    ]
+    
+    # Personal information solicitation patterns
+    PERSONAL_INFO_KEYWORDS = [
+        r'\b(ssn|social\s+security|bank\s+account|routing\s+number)\b',
+        r'\b(credit\s+card|debit\s+card|pin\s+code|password)\b',
+        r'\b(full\s+name|address|phone\s+number|date\s+of\s+birth)\b'
+    ]
+    
+    # Romance scam patterns
+    ROMANCE_SCAM_KEYWORDS = [
+        r'\b(love|darling|honey|sweetheart)\b.*\b(money|help|emergency)\b',
+        r'\b(military|deployed|overseas|doctor|engineer)\b.*\b(money|funds)\b',
+        r'\b(trust|faith|god)\b.*\b(send|transfer|help)\b'
+    ]
+    
+    # Urgency indicators (pressure tactics)
+    URGENCY_KEYWORDS = [
+        r'\burgent\b',
+        r'\bemergency\b',
+        r'\bquickly\b',
+        r'\basap\b',
+        r'\bimmediately\b'
+    ]
+    
+    def __init__(self, verdict_cache: Optional[LRUCache] = None, message_cache: Optional[LRUCache] = None,
+                 conversations: Optional[LRUCache] = None, metrics: Optional[PipelineMetrics] = None,
+                 duplicates: Optional[DuplicateIndex] = None, reputation: Optional[ReputationStore] = None,
+                 social_graph: Optional[SocialGraph] = None, velocity: Optional[VelocityTracker] = None,
+                 join_limit: int = 65536, rule_store: Optional[RuleStore] = None,
+                 shadow_rules: Optional[RuleStore] = None, shadow_sample_rate: float = 1.0,
+                 normalizer: Optional[TextNormalizer] = None, classifier: Optional[TextClassifier] = None):
+        logger.info("Initializing Suspicious Profile Analyzer - Cybersecurity Threat Detection System")
+        logger.info("Loading ultra-lightweight threat detection engine...")
+        # Signatures and rule tables, compiled; a rule store swaps in new versions at runtime
+        self.rule_store = rule_store
+        self._builtin_rules = self.builtin_rules() if rule_store is None else None
+        
+        # Optional text normalization in front of signature matching (leetspeak, homoglyphs...)
+        self.normalizer = normalizer
+        self._normalize = normalizer.normalize if normalizer is not None else str.lower
+        
+        # Optional caches: whole verdicts, and per-message signature scans
+        self.verdict_cache = verdict_cache
+        self.message_cache = message_cache
+        
+        # Optional per-conversation signature state for incremental re-submissions
+        self.conversations = conversations
+        
+        # Messages totalling more characters are scanned one at a time, never joined
+        self.join_limit = join_limit
+        
+        # Optional statistical message classifier, a second content tier next to the signatures
+        self.classifier = classifier
+        
+        # Optional memory-mapped store of known scam indicators
+        self.reputation = reputation
+        
+        # Optional index of recent messages across accounts, for scripted campaigns
+        self.duplicates = duplicates
+        
+        # Optional follow graph of the scored accounts, for bot rings
+        self.social_graph = social_graph
+        
+        # Optional windowed activity counts per account, for bursts
+        self.velocity = velocity
+        
+        # Optional stage timing, exported at /metrics
+        self.metrics = metrics
+        
+        # Optional candidate rule set, compared with the active one off the request path
+        self.shadow = ShadowComparison(self._shadow_score, shadow_rules, sample_rate=shadow_sample_rate,
+                                       metrics=metrics) if shadow_rules is not None else None
+        logger.info("Threat signature database ready for analysis")
+    
+    @classmethod
+    def builtin_rules(cls) -> RuleBundle:
+        """The signatures above and the rules.py tables, compiled"""
+        return RuleBundle(BUILTIN_VERSION, {
+            "financial": cls.FINANCIAL_KEYWORDS,
+            "personal_info": cls.PERSONAL_INFO_KEYWORDS,
+            "romance": cls.ROMANCE_SCAM_KEYWORDS,
+            "urgency": cls.URGENCY_KEYWORDS,
+        })
+    
+    def ruleset(self) -> RuleBundle:
+        """
+        The active rule set; each assessment takes it once and uses it throughout, so a swap
+        never mixes two versions in one result
+        """
+        if self.rule_store is not None:
+            return self.rule_store.current()
+        return self._builtin_rules
+    
+    @property
+    def rules(self) -> CompiledRules:
+        return self.ruleset().rules
+    
+    @property
+    def signatures(self) -> SignatureScanner:
+        return self.ruleset().scanner
+    
+    @property
+    def incremental_plan(self) -> IncrementalPlan:
+        return self.ruleset().incremental_plan
+    
+    @property
+    def rules_fingerprint(self) -> str:
+        """Hash of the signatures and rule tables, so cached verdicts never outlive a rule change"""
+        return self.ruleset().fingerprint
+    
+    def invalidate_caches(self) -> None:
+        """Drop every cached verdict and message scan"""
+        for cache in (self.verdict_cache, self.message_cache, self.conversations):
+            if cache is not None:
+                cache.invalidate()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        return {
+            "rules_fingerprint": self.rules_fingerprint,
+            "rules_version": self.ruleset().version,
+            "normalization": self.normalizer.version if self.normalizer is not None else None,
+            "verdict_cache": self.verdict_cache.stats() if self.verdict_cache is not None else None,
+            "message_cache": self.message_cache.stats() if self.message_cache is not None else None,
+            "conversations": self.conversations.stats() if self.conversations is not None else None,
+            "duplicate_index": self.duplicates.stats() if self.duplicates is not None else None,
+            "reputation": self.reputation.stats() if self.reputation is not None else None,
+            "classifier": self.classifier.stats() if self.classifier is not None else None,
+            "social_graph": self.social_graph.stats() if self.social_graph is not None else None,
+            "velocity": self.velocity.stats() if self.velocity is not None else None
+        }
+    
+    def rules_stats(self) -> Dict[str, Any]:
+        """The active rule set, its reloads, and the shadow comparison when one is configured"""
+        return {
+            "active": self.rule_store.stats() if self.rule_store is not None else self._builtin_rules.stats(),
+            "shadow": self.shadow.stats() if self.shadow is not None else None
+        }
+    
+    def analyze_profile_metadata(self, profile: Profile) -> tuple:
+        """
+        Analyze profile metadata for suspicious patterns
+        Returns: (risk_points, explanations)
+        """
+        return self.rules.metadata(as_record(profile))
+    
+    def _calculate_behavioral_score(self, profile: Profile) -> int:
+        """Lightweight behavioral scoring"""
+        return self.rules.behavioral(as_record(profile))
+    
+    def analyze_message_content(self, messages: List[str]) -> tuple:
+        """
+        Analyze message content for scam patterns
+        Returns: (risk_points, explanations)
+        """
+        bundle = self.ruleset()
+        return bundle.rules.content(self._message_hits(bundle, messages))
+    
+    def _message_hits(self, bundle: RuleBundle, messages: List[str]) -> SignatureHits:
+        if self._exceeds_join_limit(messages):
+            # Same hits as the joined text, carrying only a bounded tail between messages
+            return bundle.incremental_plan.start(self._normalize).append(messages)
+        if self.message_cache is not None:
+            return self._scan_messages_cached(bundle, messages)
+        
+        # Combine all messages for analysis
+        combined_text = " ".join(map(self._normalize, messages))
+        
+        # Single pass over the text for every signature family
+        return bundle.scanner.scan(combined_text, self._signature_observer())
+    
+    def analyze_conversation(self, conversation_id: str, messages: List[str]) -> tuple:
+        """
+        Analyze a growing conversation incrementally
+        Only messages appended since the last call for this conversation are scanned;
+        an edited history starts the conversation state over
+        Returns: (risk_points, explanations)
+        """
+        bundle = self.ruleset()
+        return bundle.rules.content(self._conversation_hits(bundle, conversation_id, messages))
+    
+    def _conversation_hits(self, bundle: RuleBundle, conversation_id: str, messages: List[str]) -> SignatureHits:
+        if self.conversations is None:
+            return self._message_hits(bundle, messages)
+        
+        plan = bundle.incremental_plan
+        state = self.conversations.get(conversation_id)
+        if state is None:
+            state = ConversationState(plan, self._normalize)
+            self.conversations.put(conversation_id, state)
+        
+        with state.lock:
+            # A swapped-in rule set scans the conversation again from the start
+            if state.plan is not plan or not state.scan.matches_prefix(messages):
+                state.plan, state.scan = plan, plan.start(self._normalize)
+            return state.scan.append(messages[state.scan.message_count:])
+    
+    def _reputation_hits(self, snapshot: ReputationSnapshot, messages: List[str]) -> ReputationHits:
+        # With a normalizer, disguised indicators are looked up in normalized form as well
+        normalized = None if self.normalizer is None else list(map(self._normalize, messages))
+        if self._exceeds_join_limit(messages):
+            return snapshot.lookup_messages(messages, normalized)
+        return snapshot.lookup(" ".join(messages).lower(), None if normalized is None else " ".join(normalized))
+    
+    def _exceeds_join_limit(self, messages: List[str]) -> bool:
+        return len(messages) + sum(map(len, messages)) > self.join_limit
+    
+    def _scan_messages_cached(self, bundle: RuleBundle, messages: List[str]) -> SignatureHits:
+        """Signature hits for the joined messages, reusing per-message scans"""
+        observe = self._signature_observer()
+        scanner = bundle.scanner
+        texts = [self._normalize(message) for message in messages]
+        scans = []
+        for text in texts:
+            # Scans depend on the signatures, so entries of another rule set are never reused
+            key = (bundle.fingerprint, message_cache_key(text))
+            scan = self.message_cache.get(key)
+            if scan is None:
+                scan = scanner.scan_message(text, observe)
+                self.message_cache.put(key, scan)
+            scans.append(scan)
+        return scanner.combine(texts, scans, observe)
+    
+    def _signature_observer(self):
+        return self.metrics.signature_seconds.observe if self.metrics is not None else None
+    
+    def _verdict_key(self, bundle: RuleBundle, profile: ProfileRecord,
+                     snapshot: Optional[ReputationSnapshot]) -> Optional[str]:
+        if self.verdict_cache is None:
+            return None
+        rules = bundle.fingerprint
+        if self.normalizer is not None:
+            rules = f"{rules}:{self.normalizer.version}"
+        if self.classifier is not None:
+            rules = f"{rules}:{self.classifier.version}"
+        if snapshot is not None:
+            # A swapped-in store changes every key, so earlier verdicts are never served
+            return profile_cache_key(profile, f"{rules}:{snapshot.version}")
+        return profile_cache_key(profile, rules)
+    
+    def calculate_risk_score(self, profile: Profile, explain: bool = True) -> Dict[str, Any]:
+        """
+        Calculate comprehensive risk score with explanations
+        explain=False returns a score-only assessment without the explanations list
+        """
+        profile = as_record(profile)
+        bundle = self.ruleset()
+        risk, notes = self._profile_risks(bundle, [profile], explain)[0]
+        return self._assess(bundle, profile, risk, notes, explain)
+    
+    def _assess(self, bundle: RuleBundle, profile: ProfileRecord, risk: int, notes: Any,
+                explain: bool) -> Dict[str, Any]:
+        """The assessment from cacheable risk plus the live cross-account signals"""
+        rules = bundle.rules
+        
+        # Cross-account signal, outside the verdict cache since it changes as messages arrive
+        duplicate_accounts = 0
+        if self.duplicates is not None:
+            duplicate_accounts = self.analyze_duplicates(profile)
+            campaign = rules.campaign if explain else rules.campaign_score
+            campaign_risk, campaign_notes = campaign(duplicate_accounts)
+            risk += campaign_risk
+            notes += campaign_notes
+        
+        # Likewise for the follow graph, which grows as edges are added
+        if self.social_graph is not None:
+            graph = rules.graph if explain else rules.graph_score
+            graph_risk, graph_notes = graph(self.analyze_social_graph(profile))
+            risk += graph_risk
+            notes += graph_notes
+        
+        # And for activity velocity, which moves with every event
+        if self.velocity is not None:
+            velocity = rules.velocity if explain else rules.velocity_score
+            velocity_risk, velocity_notes = velocity(self.analyze_velocity(profile))
+            risk += velocity_risk
+            notes += velocity_notes
+        
+        if self.shadow is not None:
+            self.shadow.submit(bundle, profile, duplicate_accounts)
+        if explain:
+            return rules.assess(risk, notes)
+        return rules.assess(risk, None, notes)
+    
+    def calculate_risk_scores(self, profiles: List[Profile], explain: bool = True) -> List[Dict[str, Any]]:
+        """
+        Score a batch of profiles
+        Returns assessments in input order; the classifier runs once over every profile
+        the verdict cache cannot answer
+        """
+        records = [as_record(profile) for profile in profiles]
+        bundle = self.ruleset()
+        risks = self._profile_risks(bundle, records, explain)
+        return [self._assess(bundle, record, risk, notes, explain) for record, (risk, notes) in zip(records, risks)]
+    
+    def fast_verdict(self, profile: Profile) -> Dict[str, Any]:
+        """
+        Risk level and recommended actions only, without score or explanations
+        Components run cheapest first and stop as soon as the ones left can no longer
+        change the level, so content scanning is often skipped or cut short
+        """
+        profile = as_record(profile)
+        bundle = self.ruleset()
+        rules = bundle.rules
+        snapshot = self.reputation.current() if self.reputation is not None else None
+
+        # Always indexed, so other accounts still see these messages
+        duplicate_accounts = self.analyze_duplicates(profile)
+        known = rules.campaign_score(duplicate_accounts)[0] if self.duplicates is not None else 0
+        if self.shadow is not None:
+            self.shadow.submit(bundle, profile, duplicate_accounts)
+
+        # Graph and velocity signals are not cached with the verdict, so they stay pending on a cache hit
+        signals_low, signals_high = rules.graph_range if self.social_graph is not None else (0, 0)
+        if self._tracks_velocity(profile):
+            signals_low, signals_high = signals_low + rules.velocity_range[0], signals_high + rules.velocity_range[1]
+        key = self._verdict_key(bundle, profile, snapshot)
+        if key is not None:
+            cached = self.verdict_cache.get(key)
+            if cached is not None:
+                known += cached[0]
+                verdict = rules.verdict(known + signals_low, known + signals_high)
+                return self._fast_exit("cache", verdict) if verdict is not None else self._fast_signals(rules, profile, known)
+
+        known += rules.metadata_score(profile)[0]
+        reputation_low, reputation_high = rules.reputation_range if snapshot is not None else (0, 0)
+        classifier_low, classifier_high = rules.classifier_range if self.classifier is not None else (0, 0)
+        pending_low = reputation_low + classifier_low + signals_low
+        pending_high = reputation_high + classifier_high + signals_high
+        content_low, content_high = rules.content_partial.range
+        verdict = rules.verdict(known + content_low + pending_low, known + content_high + pending_high)
+        if verdict is not None:
+            return self._fast_exit("metadata", verdict)
+
+        if profile.conversation_id is not None and self.conversations is not None:
+            # Keep the conversation state current; its incremental scan is already cheap
+            content_low = content_high = rules.content_score(
+                self._conversation_hits(bundle, profile.conversation_id, profile.messages))[0]
+        elif self._exceeds_join_limit(profile.messages):
+            content_low = content_high = rules.content_score(self._message_hits(bundle, profile.messages))[0]
+        else:
+            text = " ".join(map(self._normalize, profile.messages))
+            features: Dict[str, Any] = {}
+            state = rules.content_partial.start()
+            for step, (name, value) in enumerate(bundle.scanner.scan_features(text)):
+                features[name] = value
+                content_low, content_high = rules.content_partial.advance(state, step, features)
+                verdict = rules.verdict(known + content_low + pending_low, known + content_high + pending_high)
+                if verdict is not None:
+                    return self._fast_exit(name, verdict)
+        known += content_low
+
+        stage = "content"
+        if snapshot is not None:
+            known += rules.reputation_score(self._reputation_hits(snapshot, profile.messages))[0]
+            stage = "reputation"
+        if self.classifier is not None:
+            verdict = rules.verdict(known + classifier_low + signals_low, known + classifier_high + signals_high)
+            if verdict is not None:
+                return self._fast_exit(stage, verdict)
+            known += rules.classifier_score(self.classifier.classify(profile.messages, False))[0]
+            stage = "classifier"
+        verdict = rules.verdict(known + signals_low, known + signals_high)
+        return self._fast_exit(stage, verdict) if verdict is not None else self._fast_signals(rules, profile, known)
+
+    def _fast_signals(self, rules: CompiledRules, profile: ProfileRecord, known: Union[int, float]) -> Dict[str, Any]:
+        """Graph, then velocity signals, for a verdict still open after the cached components"""
+        velocity_low, velocity_high = rules.velocity_range if self._tracks_velocity(profile) else (0, 0)
+        if self.social_graph is not None:
+            known += rules.graph_score(self.analyze_social_graph(profile))[0]
+            verdict = rules.verdict(known + velocity_low, known + velocity_high)
+            if verdict is not None:
+                return self._fast_exit("graph", verdict)
+        known += rules.velocity_score(self.analyze_velocity(profile))[0]
+        return self._fast_exit("velocity", rules.verdict(known, known))
+
+    def _tracks_velocity(self, profile: ProfileRecord) -> bool:
+        """Velocity risk is only possible for accounts with recorded events"""
+        return self.velocity is not None and profile.record_id in self.velocity
+
+    def _fast_exit(self, stage: str, verdict: Dict[str, Any]) -> Dict[str, Any]:
+        if self.metrics is not None:
+            self.metrics.fast_verdict_exits.inc(stage)
+        return verdict
+
+    def analyze_duplicates(self, profile: Profile) -> int:
+        """
+        Number of other accounts that recently sent near-copies of this profile's messages
+        Indexes the messages under the profile's ID as a side effect
+        """
+        if self.duplicates is None:
+            return 0
+        profile = as_record(profile)
+        return self.duplicates.record_messages(profile.record_id, profile.messages)
+    
+    def analyze_social_graph(self, profile: Profile) -> GraphSignals:
+        """Follow-graph signals of the profile's account, all zero when it is not in the graph"""
+        if self.social_graph is None:
+            return NO_SIGNALS
+        return self.social_graph.signals(as_record(profile).record_id)
+    
+    def analyze_velocity(self, profile: Profile) -> VelocitySignals:
+        """Windowed activity rates of the profile's account, all zero without recorded events"""
+        if self.velocity is None:
+            return NO_VELOCITY
+        return self.velocity.signals(as_record(profile).record_id)
+    
+    def _profile_risks(self, bundle: RuleBundle, profiles: List[ProfileRecord], explain: bool) -> List[tuple]:
+        """
+        Metadata, content, reputation and classifier risk of each profile, with explanations
+        (or the indicator count when explain=False), served from the verdict cache when possible
+        """
+        snapshot = self.reputation.current() if self.reputation is not None else None
+        keys = [self._verdict_key(bundle, profile, snapshot) for profile in profiles]
+        cached = [self.verdict_cache.get(key) if key is not None else None for key in keys]
+        classifications: List[ClassifierSignals] = []
+        if self.classifier is not None:
+            misses = [profile.messages for profile, verdict in zip(profiles, cached) if verdict is None]
+            classifications = self.classifier.classify_batch(misses, explain)
+        pending = iter(classifications)
+        
+        risks = []
+        for profile, key, verdict in zip(profiles, keys, cached):
+            if verdict is not None:
+                risk, explanations = verdict
+                risks.append((risk, list(explanations) if explain else len(explanations)))
+                continue
+            risk, notes = self._score_profile(bundle, profile, explain, snapshot, next(pending, None))
+            if key is not None and explain:
+                self.verdict_cache.put(key, (risk, tuple(notes)))
+            risks.append((risk, notes))
+        return risks
+    
+    def _score_profile(self, bundle: RuleBundle, profile: ProfileRecord, explain: bool = True,
+                       snapshot: Optional[ReputationSnapshot] = None,
+                       classification: Optional[ClassifierSignals] = None) -> tuple:
+        rules = bundle.rules
+        metrics = self.metrics
+        if metrics is not None:
+            started = time.perf_counter()
+        
+        # Profile metadata analysis
+        metadata = rules.metadata if explain else rules.metadata_score
+        metadata_risk, metadata_notes = metadata(profile)
+        if metrics is not None:
+            metadata_done = time.perf_counter()
+            metrics.metadata_seconds.observe(metadata_done - started)
+        
+        # Message content analysis
+        content_risk, content_notes = self._analyze_profile_messages(bundle, profile, explain)
+        if snapshot is not None:
+            hits = self._reputation_hits(snapshot, profile.messages)
+            reputation = rules.reputation if explain else rules.reputation_score
+            reputation_risk, reputation_notes = reputation(hits)
+            content_risk += reputation_risk
+            content_notes += reputation_notes
+        if self.classifier is not None:
+            if classification is None:
+                classification = self.classifier.classify(profile.messages, explain)
+            classifier = rules.classifier if explain else rules.classifier_score
+            classifier_risk, classifier_notes = classifier(classification)
+            content_risk += classifier_risk
+            content_notes += classifier_notes
+        if metrics is not None:
+            metrics.content_seconds.observe(time.perf_counter() - metadata_done)
+        
+        return metadata_risk + content_risk, metadata_notes + content_notes
+    
+    def _analyze_profile_messages(self, bundle: RuleBundle, profile: ProfileRecord, explain: bool = True) -> tuple:
+        if profile.conversation_id is not None and self.conversations is not None:
+            hits = self._conversation_hits(bundle, profile.conversation_id, profile.messages)
+        else:
+            hits = self._message_hits(bundle, profile.messages)
+        return bundle.rules.content(hits) if explain else bundle.rules.content_score(hits)
+    
+    def _shadow_score(self, bundle: RuleBundle, profile: ProfileRecord, duplicate_accounts: int) -> tuple:
+        """
+        Risk and indicator count of profile under bundle, for shadow comparisons
+        Reads the stores without recording anything and bypasses the caches, so it can
+        run for any rule set without affecting the active one
+        """
+        rules = bundle.rules
+        messages = profile.messages
+        if self._exceeds_join_limit(messages):
+            hits = bundle.incremental_plan.start(self._normalize).append(messages)
+        else:
+            hits = bundle.scanner.scan(" ".join(map(self._normalize, messages)))
+        parts = [rules.metadata_score(profile), rules.content_score(hits)]
+        if self.reputation is not None:
+            parts.append(rules.reputation_score(self._reputation_hits(self.reputation.current(), messages)))
+        if self.classifier is not None:
+            parts.append(rules.classifier_score(self.classifier.classify(messages, False)))
+        if self.duplicates is not None:
+            parts.append(rules.campaign_score(duplicate_accounts))
+        if self.social_graph is not None:
+            parts.append(rules.graph_score(self.analyze_social_graph(profile)))
+        if self.velocity is not None:
+            parts.append(rules.velocity_score(self.analyze_velocity(profile)))
+        return sum(risk for risk, _ in parts), sum(count for _, count in parts)
@@ -0,0 +1,374 @@
+"""
+Social graph signals
+Follow edges are prebuilt into a compressed sparse row (CSR) file: the sorted hashes of
+every account, then per-account offsets into flat arrays of followed and follower ids.
+Workers memory-map it read-only; edges added at runtime go into a small in-memory delta
+that every signal reads alongside the mapped arrays
+
+Signals only look at one account's neighbourhood, with hub accounts skipped and the
+work per account capped, so scoring cost does not grow with the graph
+
+Usage:
+    python graph.py build edges.csv -o graph.bin
+    python graph.py info graph.bin
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+MAGIC = b'SPAGRF01'
+
+# magic, build version, created at, account count, edge count
+_HEADER = struct.Struct('<8sQdQQ')
+
+# An edge is (follower, followed account)
+Edge = Tuple[Any, Any]
+
+
+class GraphSignals(NamedTuple):
+    """Follow-graph signals of one account"""
+    following: int
+    mutual_follows: int
+    reciprocity: float
+    ring_accounts: int
+    cluster_density: float
+
+
+NO_SIGNALS = GraphSignals(0, 0, 0.0, 0, 0.0)
+
+
+def account_hash(account: Any) -> int:
+    """Stable 64-bit hash of an account ID, identical in every process"""
+    data = str(account).encode('utf-8', 'surrogatepass')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def read_edges(path: str) -> Iterator[Tuple[str, str]]:
+    """(follower, followed) pairs from a file of comma, tab or space separated lines"""
+    with open(path, encoding='utf-8') as source:
+        for number, line in enumerate(source, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fields = line.replace(',', ' ').split()
+            if len(fields) != 2:
+                raise ValueError(f"{path}:{number}: expected two account IDs")
+            yield fields[0], fields[1]
+
+
+def _csr(node_count: int, sources: Sequence[int], targets: Sequence[int]) -> Tuple[array, array]:
+    """Offsets and sorted, de-duplicated target ids per source, by counting sort"""
+    starts = array('Q', bytes(8 * (node_count + 1)))
+    for source in sources:
+        starts[source + 1] += 1
+    for node in range(node_count):
+        starts[node + 1] += starts[node]
+
+    slots = array('I', bytes(4 * len(targets)))
+    fill = starts[:-1]
+    for source, target in zip(sources, targets):
+        slots[fill[source]] = target
+        fill[source] += 1
+
+    offsets = array('Q', [0])
+    neighbours = array('I')
+    for node in range(node_count):
+        neighbours.extend(sorted(set(slots[starts[node]:starts[node + 1]])))
+        offsets.append(len(neighbours))
+    return offsets, neighbours
+
+
+def build_graph(edges: Iterable[Edge], path: str, version: Optional[int] = None) -> Dict[str, int]:
+    """
+    Write a graph file for the follow edges, replacing path atomically
+    Self-follows and repeated edges are dropped
+    Returns the number of accounts and distinct edges
+    """
+    sources = array('Q')
+    targets = array('Q')
+    for follower, followed in edges:
+        source, target = account_hash(follower), account_hash(followed)
+        if source != target:
+            sources.append(source)
+            targets.append(target)
+
+    nodes = array('Q', sorted(set(sources).union(targets)))
+    if len(nodes) >= 1 << 32:
+        raise ValueError("graph files hold fewer than 2**32 accounts")
+    index = {key: position for position, key in enumerate(nodes)}
+    source_ids = array('I', map(index.__getitem__, sources))
+    target_ids = array('I', map(index.__getitem__, targets))
+    del sources, targets, index
+
+    out_offsets, out_targets = _csr(len(nodes), source_ids, target_ids)
+    del source_ids, target_ids
+    # Followers come from the de-duplicated edges, so both directions hold the same set
+    followers = array('I')
+    for node in range(len(nodes)):
+        followers.extend([node] * (out_offsets[node + 1] - out_offsets[node]))
+    in_offsets, in_targets = _csr(len(nodes), out_targets, followers)
+    del followers
+
+    if version is None:
+        version = time.time_ns()
+    sections = (nodes, out_offsets, in_offsets, out_targets, in_targets)
+    if sys.byteorder != 'little':
+        for section in sections:
+            section.byteswap()
+
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(prefix='.graph-', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as output:
+            output.write(_HEADER.pack(MAGIC, version, time.time(), len(nodes), len(out_targets)))
+            for section in sections:
+                section.tofile(output)
+            output.flush()
+            os.fsync(output.fileno())
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return {"accounts": len(nodes), "edges": len(out_targets)}
+
+
+def _contains(neighbours: Sequence[int], node: int) -> bool:
+    index = bisect_left(neighbours, node)
+    return index < len(neighbours) and neighbours[index] == node
+
+
+class SocialGraph:
+    """
+    Follow graph of the scored accounts: a mapped graph file, if any, plus the edges
+    added since it was built
+
+    Signals per account:
+    - reciprocity: share of followed accounts that follow back
+    - ring_accounts: other accounts following nearly the same accounts (Jaccard of the
+      follow sets at least ring_similarity, with ring_min_shared in common). Accounts with
+      more than hub_followers followers are skipped, and at most max_scan follower
+      entries are read
+    - cluster_density: share of possible follows present among the account's mutual
+      follows (the first max_cluster_size of them)
+    """
+
+    def __init__(self, path: Optional[str] = None, hub_followers: int = 1000, max_scan: int = 20000,
+                 ring_min_shared: int = 5, ring_similarity: float = 0.5, max_cluster_size: int = 48):
+        if not 0.0 < ring_similarity <= 1.0:
+            raise ValueError("ring_similarity must be in (0, 1]")
+
+        self.path = path
+        self.hub_followers = hub_followers
+        self.max_scan = max_scan
+        self.ring_min_shared = ring_min_shared
+        self.ring_similarity = ring_similarity
+        self.max_cluster_size = max_cluster_size
+
+        self.version = 0
+        self.created_at: Optional[float] = None
+        self._nodes: Sequence[int] = array('Q')
+        self._out_offsets: Sequence[int] = array('Q', [0])
+        self._in_offsets: Sequence[int] = array('Q', [0])
+        self._out: Sequence[int] = array('I')
+        self._in: Sequence[int] = array('I')
+        self._map: Optional[mmap.mmap] = None
+        if path is not None:
+            self._load(path)
+        self._base_nodes = len(self._nodes)
+
+        # Accounts first seen after the build, and edges added since (by node id)
+        self._added_nodes: Dict[int, int] = {}
+        self._added_out: Dict[int, Set[int]] = {}
+        self._added_in: Dict[int, Set[int]] = {}
+        self._lock = threading.Lock()
+
+        self.added_edges = 0
+        self.queries = 0
+
+    def _load(self, path: str) -> None:
+        with open(path, 'rb') as source:
+            self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, self.created_at, nodes, edges = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a graph file")
+
+        view = memoryview(self._map)
+        offset = _HEADER.size
+        sections = []
+        for code, count in (('Q', nodes), ('Q', nodes + 1), ('Q', nodes + 1), ('I', edges), ('I', edges)):
+            size = array(code).itemsize * count
+            if offset + size > len(self._map):
+                raise ValueError(f"{path} is truncated")
+            if sys.byteorder == 'little':
+                sections.append(view[offset:offset + size].cast(code))
+            else:
+                # Big-endian hosts pay for a private copy
+                section = array(code, view[offset:offset + size])
+                section.byteswap()
+                sections.append(section)
+            offset += size
+        self._nodes, self._out_offsets, self._in_offsets, self._out, self._in = sections
+
+    def _node(self, key: int) -> Optional[int]:
+        index = bisect_left(self._nodes, key)
+        if index < self._base_nodes and self._nodes[index] == key:
+            return index
+        return self._added_nodes.get(key)
+
+    def _base(self, offsets: Sequence[int], neighbours: Sequence[int], node: int) -> Sequence[int]:
+        """Sorted neighbours of node in the graph file"""
+        if node >= self._base_nodes:
+            return ()
+        return neighbours[offsets[node]:offsets[node + 1]]
+
+    def _following(self, node: int) -> Tuple[Sequence[int], Set[int]]:
+        return self._base(self._out_offsets, self._out, node), self._added_out.get(node, set())
+
+    def _followers(self, node: int) -> Tuple[Sequence[int], Set[int]]:
+        return self._base(self._in_offsets, self._in, node), self._added_in.get(node, set())
+
+    def add_edges(self, edges: Iterable[Edge]) -> int:
+        """Add follow edges without a rebuild; returns the number that were new"""
+        added = 0
+        with self._lock:
+            for follower, followed in edges:
+                source, target = account_hash(follower), account_hash(followed)
+                if source == target:
+                    continue
+                source, target = self._add_node(source), self._add_node(target)
+                base, extra = self._following(source)
+                if target in extra or _contains(base, target):
+                    continue
+                self._added_out.setdefault(source, set()).add(target)
+                self._added_in.setdefault(target, set()).add(source)
+                added += 1
+            self.added_edges += added
+        return added
+
+    def _add_node(self, key: int) -> int:
+        node = self._node(key)
+        if node is None:
+            node = self._added_nodes[key] = self._base_nodes + len(self._added_nodes)
+        return node
+
+    def signals(self, account: Any) -> GraphSignals:
+        """Signals for an account, or NO_SIGNALS when it follows no one in the graph"""
+        if account is None:
+            return NO_SIGNALS
+        with self._lock:
+            node = self._node(account_hash(account))
+            if node is None:
+                return NO_SIGNALS
+            self.queries += 1
+            base, extra = self._following(node)
+            following = set(base)
+            following.update(extra)
+            if not following:
+                return NO_SIGNALS
+            mutual = self._mutual(node, following)
+            return GraphSignals(
+                len(following),
+                len(mutual),
+                len(mutual) / len(following),
+                self._ring_accounts(node, following),
+                self._cluster_density(mutual),
+            )
+
+    def _mutual(self, node: int, following: Set[int]) -> Set[int]:
+        base, extra = self._followers(node)
+        if len(base) + len(extra) <= len(following):
+            mutual = following.intersection(base)
+            mutual.update(following.intersection(extra))
+            return mutual
+        # Popular accounts: look up each followed account in the follower list instead
+        return {target for target in following if target in extra or _contains(base, target)}
+
+    def _ring_accounts(self, node: int, following: Set[int]) -> int:
+        shared: Counter = Counter()
+        scanned = 0
+        for target in sorted(following):
+            base, extra = self._followers(target)
+            if len(base) + len(extra) > self.hub_followers:
+                continue
+            shared.update(base)
+            shared.update(extra)
+            scanned += len(base) + len(extra)
+            if scanned >= self.max_scan:
+                break
+        del shared[node]
+
+        size = len(following)
+        accounts = 0
+        for other, common in shared.items():
+            if common < self.ring_min_shared:
+                continue
+            base, extra = self._following(other)
+            if common / (size + len(base) + len(extra) - common) >= self.ring_similarity:
+                accounts += 1
+        return accounts
+
+    def _cluster_density(self, mutual: Set[int]) -> float:
+        members = sorted(mutual)[:self.max_cluster_size]
+        if len(members) < 2:
+            return 0.0
+        member_set = set(members)
+        links = 0
+        for member in members:
+            base, extra = self._following(member)
+            if len(base) <= 4 * len(members):
+                links += len(member_set.intersection(base))
+            else:
+                links += sum(1 for other in members if _contains(base, other))
+            links += len(member_set.intersection(extra))
+        return links / (len(members) * (len(members) - 1))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "created_at": self.created_at,
+            "accounts": self._base_nodes + len(self._added_nodes),
+            "edges": len(self._out) + self.added_edges,
+            "added_edges": self.added_edges,
+            "queries": self.queries,
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or inspect a social graph file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a graph file from follow edges")
+    build.add_argument("edges", help="one 'follower,followed' pair per line")
+    build.add_argument("-o", "--output", required=True, help="graph file, replaced atomically")
+    build.add_argument("--version", type=int, default=None, help="graph version (default: build time in ns)")
+    info = commands.add_parser("info", help="print a graph file's header")
+    info.add_argument("graph")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "build":
+            counts = build_graph(read_edges(args.edges), args.output, args.version)
+            print(json.dumps(counts), file=sys.stderr)
+        else:
+            print(json.dumps(SocialGraph(args.graph).stats(), indent=2))
+    except (OSError, ValueError, struct.error) as e:
+        print(f"graph: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""
+Assessment history
+Assessments are queued on the request path and written to SQLite (WAL mode) in batches
+by a background thread; analysts page through them and read risk distributions from
+per-hour rollups instead of scanning the log
+
+Rows are timestamped when their batch is written, inside the write transaction, so row
+ids and created_at increase together even with several worker processes writing; time
+filters become id ranges found through the created_at index
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rollup granularity for risk distributions
+BUCKET_SECONDS = 3600
+
+MAX_PAGE_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assessments (
+    id INTEGER PRIMARY KEY,
+    account_id TEXT,
+    created_at REAL NOT NULL,
+    risk_level TEXT NOT NULL,
+    risk_score REAL,
+    assessment TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS assessments_account ON assessments (account_id, id);
+CREATE INDEX IF NOT EXISTS assessments_level ON assessments (risk_level, id);
+CREATE INDEX IF NOT EXISTS assessments_time ON assessments (created_at);
+CREATE TABLE IF NOT EXISTS risk_rollup (
+    bucket INTEGER NOT NULL,
+    risk_level TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    scored INTEGER NOT NULL,
+    score_sum REAL NOT NULL,
+    PRIMARY KEY (bucket, risk_level)
+) WITHOUT ROWID;
+"""
+
+_ROLLUP_UPSERT = """
+INSERT INTO risk_rollup (bucket, risk_level, count, scored, score_sum) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (bucket, risk_level) DO UPDATE SET
+    count = count + excluded.count,
+    scored = scored + excluded.scored,
+    score_sum = score_sum + excluded.score_sum
+"""
+
+# (account_id, assessment) as queued by record()
+QueuedAssessment = Tuple[Optional[str], Dict[str, Any]]
+
+# Query parameters accepted by the history endpoints, and their types
+QUERY_PARAMETERS = {
+    "account_id": str,
+    "risk_level": str,
+    "since": float,
+    "until": float,
+    "limit": int,
+    "cursor": int,
+}
+
+_STOP = object()
+
+
+def query_arguments(params: Mapping[str, str], names: Sequence[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Keyword arguments for a HistoryStore query from request query parameters
+    Returns: (arguments, None), or (None, error message) for a malformed value
+    """
+    arguments: Dict[str, Any] = {}
+    for name in names:
+        value = params.get(name)
+        if value is None or value == "":
+            continue
+        try:
+            arguments[name] = QUERY_PARAMETERS[name](value)
+        except ValueError:
+            return None, f"{name} must be {'an integer' if QUERY_PARAMETERS[name] is int else 'a number'}"
+    return arguments, None
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class HistoryStore:
+    """
+    Append-only assessment log with indexed reads
+    record() never blocks: when the writer falls max_queue rows behind, new rows are
+    dropped and counted instead of slowing down scoring
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 0.5,
+                 max_queue: int = 10000, clock: Callable[[], float] = time.time):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+
+        connection = _connect(path)
+        connection.executescript(SCHEMA)
+        connection.close()
+
+        # Readers get one connection per thread; WAL lets them run alongside the writer
+        self._readers = threading.local()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failed = 0
+
+    def _ensure_writer(self) -> None:
+        # Started on first use in each process, so a store created before a fork still writes
+        with self._start_lock:
+            if self._writer_pid == os.getpid():
+                return
+            # Counters and queued rows belong to the process that recorded them
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._readers = threading.local()
+            self.recorded = self.written = self.dropped = self.batches = self.failed = 0
+            self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+            self._writer_pid = os.getpid()
+            self._writer.start()
+
+    def record(self, account_id: Any, assessment: Dict[str, Any]) -> bool:
+        """
+        Queue an assessment for writing; returns False if it was dropped
+        The assessment is serialized by the writer, so it must not be modified afterwards
+        """
+        if self._writer_pid != os.getpid():
+            self._ensure_writer()
+        try:
+            self._queue.put_nowait((str(account_id) if account_id is not None else None, assessment))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.recorded += 1
+        return True
+
+    def _write_loop(self) -> None:
+        connection = _connect(self.path)
+        stopping = False
+        while not stopping:
+            batch: List[QueuedAssessment] = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # Drain whatever else is already queued, up to one batch
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(connection, batch)
+        connection.close()
+
+    def _write(self, connection: sqlite3.Connection, batch: List[QueuedAssessment]) -> None:
+        rows = [
+            (account_id, assessment["risk_level"], assessment.get("risk_score"),
+             json.dumps(assessment, separators=(',', ':')))
+            for account_id, assessment in batch
+        ]
+        rollup: Dict[str, List[float]] = {}
+        for _, risk_level, risk_score, _ in rows:
+            totals = rollup.setdefault(risk_level, [0, 0, 0.0])
+            totals[0] += 1
+            if risk_score is not None:
+                totals[1] += 1
+                totals[2] += risk_score
+        try:
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                # Taken under the write lock, so timestamps never go backwards across writers
+                created_at = self._clock()
+                bucket = int(created_at // BUCKET_SECONDS)
+                connection.executemany(
+                    "INSERT INTO assessments (account_id, created_at, risk_level, risk_score, assessment) "
+                    "VALUES (?, ?, ?, ?, ?)", [(account, created_at, *row) for account, *row in rows])
+                connection.executemany(
+                    _ROLLUP_UPSERT, [(bucket, level, *totals) for level, totals in rollup.items()])
+        except sqlite3.Error as e:
+            self.failed += len(batch)
+            logger.error(f"Failed to write {len(batch)} assessments to history: {str(e)}")
+            return
+        self.written += len(batch)
+        self.batches += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued assessment is written; returns False on timeout"""
+        deadline = time.monotonic() + timeout
+        while self.written + self.failed < self.recorded:
+            if time.monotonic() >= deadline or self._writer is None or not self._writer.is_alive():
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write what is queued and stop the writer"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None and self._writer_pid == os.getpid():
+            self._queue.put(_STOP)
+            self._writer.join(timeout)
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._readers, "connection", None)
+        if connection is None:
+            connection = self._readers.connection = _connect(self.path)
+        return connection
+
+    def history(self, account_id: Optional[str] = None, risk_level: Optional[str] = None,
+                since: Optional[float] = None, until: Optional[float] = None,
+                limit: int = 50, cursor: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Newest assessments first, filtered by account, level and time
+        Pass the returned next_cursor back to get the following page
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        connection = self._reader()
+        first_id = self._first_id_at(connection, since) if since is not None else None
+        if since is not None and first_id is None:
+            return {"items": [], "next_cursor": None}
+        end_id = self._first_id_at(connection, until) if until is not None else None
+
+        clauses, parameters = [], []
+        for clause, value in (("account_id = ?", account_id), ("risk_level = ?", risk_level),
+                              ("id >= ?", first_id), ("id < ?", end_id), ("id < ?", cursor)):
+            if value is not None:
+                clauses.append(clause)
+                parameters.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = connection.execute(
+            f"SELECT id, account_id, created_at, assessment FROM assessments {where} ORDER BY id DESC LIMIT ?",
+            parameters + [limit + 1]).fetchall()
+
+        items = [
+            {"id": row_id, "account_id": account, "created_at": created_at, "assessment": json.loads(assessment)}
+            for row_id, account, created_at, assessment in rows[:limit]
+        ]
+        return {"items": items, "next_cursor": items[-1]["id"] if len(rows) > limit else None}
+
+    @staticmethod
+    def _first_id_at(connection: sqlite3.Connection, timestamp: float) -> Optional[int]:
+        """Id of the first row written at or after timestamp"""
+        row = connection.execute(
+            "SELECT id FROM assessments WHERE created_at >= ? ORDER BY created_at, id LIMIT 1", (timestamp,)).fetchone()
+        return row[0] if row is not None else None
+
+    def distribution(self, since: Optional[float] = None, until: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Assessment counts and average score per risk level, read from the hourly rollup
+        since and until are rounded down to whole hours
+        """
+        clauses, parameters = [], []
+        if since is not None:
+            clauses.append("bucket >= ?")
+            parameters.append(int(since // BUCKET_SECONDS))
+        if until is not None:
+            clauses.append("bucket < ?")
+            parameters.append(int(until // BUCKET_SECONDS))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._reader().execute(
+            f"SELECT bucket, risk_level, count, scored, score_sum FROM risk_rollup {where} ORDER BY bucket",
+            parameters).fetchall()
+
+        levels: Dict[str, Dict[str, Any]] = {}
+        buckets: Dict[int, Dict[str, int]] = {}
+        for bucket, level, count, scored, score_sum in rows:
+            totals = levels.setdefault(level, {"count": 0, "scored": 0, "score_sum": 0.0})
+            totals["count"] += count
+            totals["scored"] += scored
+            totals["score_sum"] += score_sum
+            buckets.setdefault(bucket, {})[level] = count
+
+        return {
+            "total": sum(totals["count"] for totals in levels.values()),
+            "levels": {
+                level: {
+                    "count": totals["count"],
+                    "average_score": round(totals["score_sum"] / totals["scored"], 1) if totals["scored"] else None,
+                }
+                for level, totals in levels.items()
+            },
+            "buckets": [
+                {"start": bucket * BUCKET_SECONDS, "levels": counts} for bucket, counts in buckets.items()
+            ],
+            "bucket_seconds": BUCKET_SECONDS,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "queued": self._queue.qsize(),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "failed": self.failed,
+        }
@@ -0,0 +1,258 @@
+"""
+Incremental conversation scanning
+Keeps the signature state of a growing conversation so each re-submission only scans
+the newly appended messages, with the same hits as rescanning " ".join(messages)
+"""
+
+import hashlib
+import re
+import threading
+from typing import Callable, Iterable, List, Optional, Sequence, Set, Tuple
+
+from signatures import WORD_PATTERN, SignatureHits, SignatureScanner
+
+# Tokens and line breaks of new text, in order
+TOKEN_OR_NEWLINE_PATTERN = re.compile(r'\w+|\n')
+
+# r'\b(a|b)\b.*\b(c|d)\b': two word sets on the same line, in order
+GAP_SIGNATURE_PATTERN = re.compile(r'^\\b\(([\w|]+)\)\\b\.\*\\b\(([\w|]+)\)\\b$')
+
+# Syntax allowed in a word-sequence signature once \b, \s, \s+ and (?: are removed
+WORD_SEQUENCE_RESIDUE = re.compile(r'[A-Za-z0-9_()|]*')
+WORD_SEQUENCE_SYNTAX = re.compile(r'\\b|\\s\+|\\s|\(\?:')
+
+
+def _word_span(pattern: str) -> Optional[int]:
+    """
+    Upper bound on the number of word tokens a match can touch
+    Returns None unless the signature only matches words and whitespace
+    """
+    residue = WORD_SEQUENCE_SYNTAX.sub('', pattern)
+    if not WORD_SEQUENCE_RESIDUE.fullmatch(residue):
+        return None
+    return pattern.count('\\s') + 1
+
+
+class _WordSet:
+    """Case-insensitive whole-token membership, matching r'\b(a|b)\b' semantics"""
+
+    def __init__(self, words: Sequence[str]):
+        self.words = frozenset(words)
+        self.regex = re.compile('|'.join(words), re.IGNORECASE)
+        self.bounded = re.compile(r'\b(?:' + '|'.join(words) + r')\b', re.IGNORECASE)
+
+    def __contains__(self, token: str) -> bool:
+        if token.isascii():
+            return token in self.words
+        return self.regex.fullmatch(token) is not None
+
+
+class IncrementalPlan:
+    """
+    How each signature can be updated from new text alone
+    word-sequence signatures rescan a bounded tail of earlier tokens, r'a.*b' word
+    signatures track whether their first word set was seen on the current line, and
+    anything else falls back to searching the full conversation
+    """
+
+    FAMILIES = ('financial', 'personal_info', 'romance')
+
+    def __init__(self, scanner: SignatureScanner):
+        self.scanner = scanner
+        self.sequences: List[List[Tuple[re.Pattern, int]]] = []
+        self.gaps: List[List[Tuple[_WordSet, _WordSet]]] = []
+        self.opaque: List[List[re.Pattern]] = []
+        self.anchors = [getattr(scanner, name).anchors for name in self.FAMILIES]
+
+        for name in self.FAMILIES:
+            sequences, gaps, opaque = [], [], []
+            for pattern in getattr(scanner, name).patterns:
+                compiled = re.compile(pattern, re.IGNORECASE)
+                gap = GAP_SIGNATURE_PATTERN.match(pattern)
+                span = _word_span(pattern)
+                if gap:
+                    gaps.append((_WordSet(gap.group(1).split('|')), _WordSet(gap.group(2).split('|'))))
+                elif span is not None:
+                    sequences.append((compiled, span))
+                else:
+                    opaque.append(compiled)
+            self.sequences.append(sequences)
+            self.gaps.append(gaps)
+            self.opaque.append(opaque)
+
+        # Earlier tokens a word-sequence match can reach back into
+        spans = [span for family in self.sequences for _, span in family]
+        self.tail_tokens = max(spans, default=1) - 1
+
+        # Each family's word sequences as one alternation, searched from its widest reach
+        # back; a match starting further back lies wholly in earlier, already scanned text
+        self.sequence_searches: List[Optional[Tuple[re.Pattern, int]]] = [
+            (re.compile('|'.join(f'(?:{regex.pattern})' for regex, _ in family), re.IGNORECASE),
+             max(span for _, span in family)) if family else None
+            for family in self.sequences
+        ]
+
+        self.urgency_words: Optional[List[_WordSet]] = None
+        self.urgency_index = {}
+        if scanner.urgency_words is not None:
+            words = sorted(scanner.urgency_words)
+            self.urgency_words = [_WordSet([word]) for word in words]
+            self.urgency_index = {word: index for index, word in enumerate(words)}
+
+        self.needs_full_text = any(self.opaque) or self.urgency_words is None
+
+    def start(self, normalize: Callable[[str], str] = str.lower) -> "IncrementalScan":
+        """A scan of a new conversation, whose messages normalize lowercases (see normalize.py)"""
+        return IncrementalScan(self, normalize)
+
+
+class IncrementalScan:
+    """Signature state of one growing conversation"""
+
+    def __init__(self, plan: IncrementalPlan, normalize: Callable[[str], str] = str.lower):
+        self._plan = plan
+        self._normalize = normalize
+        self.message_count = 0
+        self.family_hits = [False] * len(plan.FAMILIES)
+        self._gap_open = [[False] * len(gaps) for gaps in plan.gaps]
+        self._urgency_seen: Set[int] = set()
+        self._tail = ""
+        self._parts: Optional[List[str]] = [] if plan.needs_full_text else None
+        self._digest = hashlib.blake2b(digest_size=16)
+
+    def hits(self) -> SignatureHits:
+        plan = self._plan
+        if plan.urgency_words is not None:
+            urgency_count = len(self._urgency_seen)
+        else:
+            text = "".join(self._parts)
+            urgency_count = sum(1 for regex in plan.scanner.urgency_patterns if regex.search(text))
+        financial, personal_info, romance = self.family_hits
+        return SignatureHits(financial, personal_info, romance, urgency_count)
+
+    def matches_prefix(self, messages: Sequence[str]) -> bool:
+        """True if the first message_count messages are the ones already ingested"""
+        if len(messages) < self.message_count:
+            return False
+        digest = hashlib.blake2b(digest_size=16)
+        for message in messages[:self.message_count]:
+            _update_digest(digest, message)
+        return digest.digest() == self._digest.digest()
+
+    def append(self, messages: Iterable[str]) -> SignatureHits:
+        for message in messages:
+            self._append_one(message)
+        return self.hits()
+
+    def _append_one(self, message: str) -> None:
+        plan = self._plan
+        _update_digest(self._digest, message)
+        text = self._normalize(message)
+        segment = (" " + text) if self.message_count else text
+        self.message_count += 1
+
+        if self._parts is not None:
+            self._parts.append(segment)
+
+        # Region = bounded tail of earlier text + the new segment; a match can only start
+        # at one of the tail's tokens or inside the segment
+        region = self._tail + segment
+        starts = [match.start() for match in WORD_PATTERN.finditer(self._tail)]
+        starts.append(len(self._tail))
+        # As in SignatureScanner, ASCII text skips families none of whose anchor words it contains
+        tokens = set(WORD_PATTERN.findall(region)) if region.isascii() else None
+
+        for family, hit in enumerate(self.family_hits):
+            if hit:
+                continue
+            self.family_hits[family] = (
+                self._sequence_hit(family, region, starts, tokens)
+                or self._gap_hit(family, segment, tokens)
+                or any(regex.search("".join(self._parts)) for regex in plan.opaque[family])
+            )
+
+        if plan.urgency_words is not None:
+            self._update_urgency(segment, tokens)
+
+        self._tail = region[_last_tokens_start(region, plan.tail_tokens):] if plan.tail_tokens else ""
+
+    def _sequence_hit(self, family: int, region: str, starts: List[int], tokens: Optional[Set[str]]) -> bool:
+        search = self._plan.sequence_searches[family]
+        if search is None:
+            return False
+        anchors = self._plan.anchors[family]
+        if tokens is not None and anchors is not None and anchors.isdisjoint(tokens):
+            return False
+        regex, span = search
+        first = len(starts) - span
+        position = starts[first] if first > 0 else 0
+        return regex.search(region, position) is not None
+
+    def _gap_hit(self, family: int, segment: str, tokens: Optional[Set[str]]) -> bool:
+        gaps = self._plan.gaps[family]
+        if not gaps:
+            return False
+        open_lines = self._gap_open[family]
+        lines = segment.split("\n")
+        for index, (first_words, second_words) in enumerate(gaps):
+            is_open = open_lines[index]
+            if not is_open and tokens is not None and first_words.words.isdisjoint(tokens):
+                continue
+            for number, line in enumerate(lines):
+                if number:
+                    is_open = False
+                start = 0
+                if not is_open:
+                    first = first_words.bounded.search(line)
+                    if first is None:
+                        continue
+                    start, is_open = first.end(), True
+                if second_words.bounded.search(line, start):
+                    return True
+            open_lines[index] = is_open
+        return False
+
+    def _update_urgency(self, segment: str, tokens: Optional[Set[str]]) -> None:
+        # Tokens of the region may include tail tokens, which were already counted
+        plan = self._plan
+        if tokens is not None:
+            self._urgency_seen.update(plan.urgency_index[token] for token in plan.urgency_index.keys() & tokens)
+            return
+        for token in WORD_PATTERN.findall(segment):
+            if token.isascii():
+                index = plan.urgency_index.get(token)
+                if index is not None:
+                    self._urgency_seen.add(index)
+                continue
+            for index, word in enumerate(plan.urgency_words):
+                if token in word:
+                    self._urgency_seen.add(index)
+
+
+def _last_tokens_start(text: str, count: int) -> int:
+    """Where the last count tokens of text begin (0 when it has no more than count)"""
+    width = 16 * count
+    while True:
+        window = max(len(text) - width, 0)
+        # A token cut by the window edge comes first, so the last count are whole
+        starts = [match.start() for match in WORD_PATTERN.finditer(text, window)]
+        if len(starts) > count:
+            return starts[-count]
+        if window == 0:
+            return 0
+        width *= 4
+
+
+def _update_digest(digest, message: str) -> None:
+    encoded = message.encode('utf-8', 'surrogatepass')
+    digest.update(len(encoded).to_bytes(8, 'little'))
+    digest.update(encoded)
+
+
+class ConversationState:
+    """Incremental scan of one conversation plus the lock serializing its updates"""
+
+    def __init__(self, plan: IncrementalPlan, normalize: Callable[[str], str] = str.lower):
+        self.lock = threading.Lock()
+        self.plan = plan
+        self.scan = plan.start(normalize)
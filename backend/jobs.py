@@ -0,0 +1,436 @@
+"""
+Background analysis jobs
+Large submissions are stored in a SQLite job table and answered with a job ID at once;
+a runner claims queued jobs and scores them on a process pool, writing results and
+progress back as it goes. Any process sharing the database can submit, poll, fetch
+results or cancel, so web workers stay free for interactive requests
+
+Usage:
+    python jobs.py worker jobs.db --workers 4
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from parallel import ParallelScorer
+from rescore import InputRecord, read_ndjson, validated_record
+
+logger = logging.getLogger(__name__)
+
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson')
+
+# Job states; the last three are final
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+MAX_RESULT_PAGE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL,
+    explain INTEGER NOT NULL,
+    content_type TEXT NOT NULL,
+    payload BLOB,
+    total INTEGER,
+    done INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    claim TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (job_id, position)
+) WITHOUT ROWID;
+"""
+
+_JOB_COLUMNS = "id, status, created_at, started_at, finished_at, total, done, errors, cancel_requested, error"
+
+# A claimed job (id, claim token, payload, content type, explain)
+ClaimedJob = Tuple[str, str, bytes, str, bool]
+
+
+class JobLost(Exception):
+    """The job was claimed again by another runner after this one stopped reporting"""
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, timeout=10.0, isolation_level=None, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def parse_payload(payload: bytes, content_type: str) -> List[InputRecord]:
+    """
+    Validated (record, profile, error) tuples from a submitted body: an NDJSON stream,
+    a JSON array of profiles or a single profile object
+    """
+    text = payload.decode('utf-8')
+    if content_type in NDJSON_TYPES:
+        return list(read_ndjson(io.StringIO(text)))
+    try:
+        data = json.loads(text)
+    except RecursionError:
+        raise ValueError("JSON nested too deeply") from None
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        raise ValueError("Expected a profile, a JSON array of profiles or an NDJSON body")
+    return [validated_record(record, profile) for record, profile in enumerate(data, start=1)]
+
+
+class JobStore:
+    """
+    Job table and results, shared by every process that opens the same file
+    At most max_queued jobs may wait or run at once; submit() refuses more
+    """
+
+    def __init__(self, path: str, max_queued: int = 100, clock=time.time):
+        self.path = path
+        self.max_queued = max_queued
+        self._clock = clock
+        connection = _connect(path)
+        connection.executescript(SCHEMA)
+        if "claim" not in {row[1] for row in connection.execute("PRAGMA table_info(jobs)")}:
+            try:
+                connection.execute("ALTER TABLE jobs ADD COLUMN claim TEXT")
+            except sqlite3.OperationalError:
+                # Another process added it first
+                pass
+        connection.close()
+        self._connections = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._connections, "connection", None)
+        if connection is None or getattr(self._connections, "pid", None) != os.getpid():
+            connection = self._connections.connection = _connect(self.path)
+            self._connections.pid = os.getpid()
+        return connection
+
+    def submit(self, payload: bytes, content_type: str, explain: bool = True) -> Optional[Dict[str, Any]]:
+        """Queue a job; returns its status, or None when the queue is full"""
+        job_id = uuid.uuid4().hex
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            if self._depth(connection) >= self.max_queued:
+                return None
+            connection.execute(
+                "INSERT INTO jobs (id, status, created_at, explain, content_type, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, self._clock(), int(explain), content_type, payload))
+        return self.get(job_id)
+
+    @staticmethod
+    def _depth(connection: sqlite3.Connection) -> int:
+        return connection.execute("SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)).fetchone()[0]
+
+    def depth(self) -> int:
+        """Jobs queued or running"""
+        return self._depth(self._connection())
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job_id, status, created_at, started_at, finished_at, total, done, errors, cancel_requested, error = row
+        job = {
+            "job_id": job_id,
+            "status": status,
+            "created_at": created_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "progress": {
+                "done": done,
+                "total": total,
+                "errors": errors,
+                "fraction": round(done / total, 4) if total else (1.0 if status == DONE else 0.0),
+            },
+        }
+        if status == RUNNING and cancel_requested:
+            job["cancel_requested"] = True
+        if error is not None:
+            job["error"] = error
+        return job
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """Results written so far, in input order; pass next_offset back for the following page"""
+        offset = max(0, offset)
+        limit = max(1, min(limit, MAX_RESULT_PAGE))
+        rows = self._connection().execute(
+            "SELECT result FROM job_results WHERE job_id = ? AND position >= ? ORDER BY position LIMIT ?",
+            (job_id, offset, limit + 1)).fetchall()
+        items = [json.loads(result) for result, in rows[:limit]]
+        return {"items": items, "next_offset": offset + limit if len(rows) > limit else None}
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a job: a queued job stops at once, a running one after its current chunk
+        Finished jobs are left as they are
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, payload = NULL WHERE id = ? AND status = ?",
+                (CANCELLED, self._clock(), job_id, QUEUED))
+            connection.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, RUNNING))
+        return self.get(job_id)
+
+    def claim(self, stale_after: float) -> Optional[ClaimedJob]:
+        """
+        Take the oldest queued job, or a running one whose runner stopped reporting for
+        stale_after seconds (its partial results are discarded)
+        Updates for the job must pass the returned claim token; the previous runner's no
+        longer match, so it cannot write over the new runner's results
+        """
+        connection = self._connection()
+        now = self._clock()
+        claim = uuid.uuid4().hex
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT id, payload, content_type, explain FROM jobs WHERE status = ? "
+                "OR (status = ? AND heartbeat_at < ?) ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now - stale_after)).fetchone()
+            if row is None:
+                return None
+            job_id, payload, content_type, explain = row
+            connection.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+            connection.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, heartbeat_at = ?, done = 0, errors = 0, claim = ? "
+                "WHERE id = ?", (RUNNING, now, now, claim, job_id))
+        return job_id, claim, payload, content_type, bool(explain)
+
+    def start(self, job_id: str, claim: str, total: int) -> None:
+        cursor = self._connection().execute(
+            "UPDATE jobs SET total = ?, heartbeat_at = ? WHERE id = ? AND status = ? AND claim = ?",
+            (total, self._clock(), job_id, RUNNING, claim))
+        if cursor.rowcount == 0:
+            raise JobLost(job_id)
+
+    def progress(self, job_id: str, claim: str, first: int, outputs: List[Dict[str, Any]]) -> bool:
+        """
+        Write results from position first on; returns True if the job should stop
+        Raises JobLost once another runner has claimed the job
+        """
+        errors = sum(1 for output in outputs if "error" in output)
+        rows = [(job_id, first + index, json.dumps(output)) for index, output in enumerate(outputs)]
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute("SELECT cancel_requested FROM jobs WHERE id = ? AND status = ? AND claim = ?",
+                                     (job_id, RUNNING, claim)).fetchone()
+            if row is None:
+                raise JobLost(job_id)
+            connection.executemany("INSERT INTO job_results (job_id, position, result) VALUES (?, ?, ?)", rows)
+            connection.execute(
+                "UPDATE jobs SET done = done + ?, errors = errors + ?, heartbeat_at = ? WHERE id = ?",
+                (len(outputs), errors, self._clock(), job_id))
+        return bool(row[0])
+
+    def requeue(self, job_id: str, claim: str) -> None:
+        """Put a job a stopping runner was processing back in the queue"""
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, done = 0, errors = 0, claim = NULL WHERE id = ? AND status = ? AND claim = ?",
+                (QUEUED, job_id, RUNNING, claim))
+            if cursor.rowcount:
+                connection.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+
+    def finish(self, job_id: str, claim: str, status: str, error: Optional[str] = None) -> bool:
+        """Record a final state and drop the payload; returns False if another runner owns the job"""
+        cursor = self._connection().execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, error = ?, payload = NULL "
+            "WHERE id = ? AND status = ? AND claim = ?",
+            (status, self._clock(), error, job_id, RUNNING, claim))
+        return cursor.rowcount > 0
+
+    def prune(self, retention: float) -> int:
+        """Delete jobs that finished more than retention seconds ago, with their results"""
+        connection = self._connection()
+        cutoff = self._clock() - retention
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            expired = [job_id for job_id, in connection.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?, ?) AND finished_at < ?", (*FINAL_STATES, cutoff))]
+            for job_id in expired:
+                connection.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+                connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        return len(expired)
+
+
+class JobRunner:
+    """
+    Claims jobs from a store and scores them on a process pool, so scoring never holds
+    the serving process's GIL; progress and results are written once per chunk
+    """
+
+    def __init__(self, store: JobStore, workers: int = 1, chunk_size: int = 200, max_profiles: int = 100000,
+                 poll_interval: float = 0.5, stale_after: float = 300.0, retention: float = 86400.0):
+        self.store = store
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_profiles = max_profiles
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.retention = retention
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._scorer: Optional[ParallelScorer] = None
+
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="job-runner", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._scorer is not None:
+            self._scorer.close()
+            self._scorer = None
+
+    def run(self) -> None:
+        """Process jobs until stop()"""
+        pruned_at = 0.0
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() - pruned_at >= 60:
+                    pruned_at = time.monotonic()
+                    self.store.prune(self.retention)
+                job = self.store.claim(self.stale_after)
+            except sqlite3.Error as e:
+                logger.error(f"Job store unavailable: {str(e)}")
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            try:
+                self.process(*job)
+            except Exception as e:
+                # One bad job must not stop the runner and stall every job queued behind it
+                logger.exception(f"Job {job[0]} crashed the runner")
+                try:
+                    self._finish(job[0], job[1], FAILED, f"Analysis failed: {e!r}")
+                except sqlite3.Error as e:
+                    logger.error(f"Job store unavailable: {str(e)}")
+
+    def process(self, job_id: str, claim: str, payload: bytes, content_type: str, explain: bool) -> str:
+        """
+        Score one claimed job; returns its final state, or RUNNING when another runner
+        claimed it in the meantime
+        """
+        try:
+            records = parse_payload(payload, content_type)
+            if len(records) > self.max_profiles:
+                raise ValueError(f"Too many profiles: {len(records)} (maximum {self.max_profiles})")
+        except ValueError as e:
+            return self._finish(job_id, claim, FAILED, f"Invalid job payload: {e}")
+        del payload
+        try:
+            self.store.start(job_id, claim, len(records))
+        except JobLost:
+            return self._lost(job_id)
+
+        if self._scorer is None or self._scorer.explain != explain:
+            if self._scorer is not None:
+                self._scorer.close()
+            self._scorer = ParallelScorer(workers=self.workers, chunk_size=self.chunk_size, explain=explain)
+
+        position = 0
+        pending: List[Dict[str, Any]] = []
+        try:
+            for output in self._scorer.score_records(records):
+                pending.append(output)
+                if len(pending) >= self.chunk_size:
+                    stop = self.store.progress(job_id, claim, position, pending)
+                    position += len(pending)
+                    pending = []
+                    if self._stop.is_set():
+                        self.store.requeue(job_id, claim)
+                        return QUEUED
+                    if stop:
+                        # Chunks already submitted to the pool finish and are discarded
+                        return self._finish(job_id, claim, CANCELLED)
+            if pending and self.store.progress(job_id, claim, position, pending):
+                return self._finish(job_id, claim, CANCELLED)
+        except JobLost:
+            return self._lost(job_id)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            return self._finish(job_id, claim, FAILED, f"Analysis failed: {e}")
+        return self._finish(job_id, claim, DONE)
+
+    def _lost(self, job_id: str) -> str:
+        logger.warning(f"Job {job_id} was claimed by another runner; dropping this run")
+        return RUNNING
+
+    def _finish(self, job_id: str, claim: str, status: str, error: Optional[str] = None) -> str:
+        if not self.store.finish(job_id, claim, status, error):
+            return self._lost(job_id)
+        if status == DONE:
+            self.completed += 1
+        elif status == FAILED:
+            self.failed += 1
+        else:
+            self.cancelled += 1
+        return status
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": self._thread is not None,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run analysis jobs from a job database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    worker = commands.add_parser("worker", help="claim and score jobs until interrupted")
+    worker.add_argument("database", help="job database shared with the web service (JOB_DB)")
+    worker.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="scoring processes")
+    worker.add_argument("--chunk-size", type=int, default=200, help="profiles per progress update")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    runner = JobRunner(JobStore(args.database), workers=args.workers, chunk_size=args.chunk_size)
+    try:
+        runner.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
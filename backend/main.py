@@ -3,11 +3,26 @@ Suspicious Profile Analyzer - Pure Flask Backend
 Zero compilation dependencies - guaranteed to work on any platform
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-import re
+import json
 import logging
-from typing import List, Dict, Any
+import os
+import random
+import time
+from typing import Any, Optional
+
+from batch import batch_results, parse_batch_item, parse_ndjson, score_profiles
+from config import (JOB_MAX_BYTES, MAX_ACTIVITY_BYTES, MAX_ACTIVITY_EVENTS, MAX_BATCH_BYTES, MAX_BATCH_SIZE,
+                    PAYLOAD_LIMITS, REQUEST_LOG_SAMPLE_RATE, RESPONSE_GZIP_LEVEL, RESPONSE_GZIP_MIN_BYTES, SERVICE_INFO,
+                    create_engine, create_history, create_jobs, create_metrics)
+from demo_data import DEMO_PROFILES
+from history import query_arguments
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from payloads import PayloadTooLarge, read_profile
+from records import parse_profile
+from responses import ResponseEncoder, StaticPayload, accepts_gzip, negotiate
+from velocity import read_event
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,316 +31,325 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Lightweight Threat Detection Engine
-class ThreatDetectionEngine:
-    """
-    Ultra-lightweight threat detection using pure Python
-    No dependencies beyond Flask
-    """
-    
-    # Financial scam keywords (high precision patterns)
-    FINANCIAL_KEYWORDS = [
-        r'\b(send|wire|transfer)\s+(money|cash|funds)\b',
-        r'\b(western\s+union|moneygram|bitcoin|paypal)\b',
-        r'\b(emergency|urgent|immediate)\s+(help|assistance|money|funds)\b',
-        r'\b(investment|trading|profit|returns)\s+(opportunity|guaranteed)\b',
-        r'\b(lottery|winner|prize|inheritance)\b'
-    ]
-    
-    # Personal information solicitation patterns
-    PERSONAL_INFO_KEYWORDS = [
-        r'\b(ssn|social\s+security|bank\s+account|routing\s+number)\b',
-        r'\b(credit\s+card|debit\s+card|pin\s+code|password)\b',
-        r'\b(full\s+name|address|phone\s+number|date\s+of\s+birth)\b'
-    ]
-    
-    # Romance scam patterns
-    ROMANCE_SCAM_KEYWORDS = [
-        r'\b(love|darling|honey|sweetheart)\b.*\b(money|help|emergency)\b',
-        r'\b(military|deployed|overseas|doctor|engineer)\b.*\b(money|funds)\b',
-        r'\b(trust|faith|god)\b.*\b(send|transfer|help)\b'
-    ]
-    
-    def __init__(self):
-        logger.info("Initializing Suspicious Profile Analyzer - Cybersecurity Threat Detection System")
-        logger.info("Loading ultra-lightweight threat detection engine...")
-        logger.info("Threat signature database ready for analysis")
-    
-    def analyze_profile_metadata(self, profile: Dict[str, Any]) -> tuple:
-        """
-        Analyze profile metadata for suspicious patterns
-        Returns: (risk_points, explanations)
-        """
-        risk_points = 0
-        explanations = []
-        
-        account_age_days = profile.get('account_age_days', 0)
-        followers = profile.get('followers', 0)
-        following = profile.get('following', 0)
-        post_count = profile.get('post_count', 0)
-        profile_completed = profile.get('profile_completed', False)
-        
-        # Rule 1: New account risk
-        if account_age_days < 30:
-            risk_points += 30
-            explanations.append(f"Account created {account_age_days} days ago (new accounts are high risk)")
-        elif account_age_days < 90:
-            risk_points += 15
-            explanations.append(f"Account is {account_age_days} days old (relatively new)")
-        
-        # Rule 2: Follower/Following ratio analysis
-        if following > 0:
-            ratio = followers / max(following, 1)
-            if ratio < 0.01 and following > 1000:
-                risk_points += 25
-                explanations.append(f"Following {following} accounts but only {followers} followers (bot-like behavior)")
-            elif ratio > 100 and followers > 10000:
-                risk_points += 20
-                explanations.append(f"Unusually high follower count ({followers}) may indicate fake followers")
-        
-        # Rule 3: Posting behavior analysis
-        if account_age_days > 0:
-            posts_per_day = post_count / account_age_days
-            if posts_per_day > 50:
-                risk_points += 20
-                explanations.append(f"Posting {posts_per_day:.1f} times per day (abnormally high activity)")
-            elif posts_per_day < 0.01 and account_age_days > 30:
-                risk_points += 10
-                explanations.append("Very low posting activity for account age")
-        
-        # Rule 4: Profile completeness
-        if not profile_completed:
-            risk_points += 15
-            explanations.append("Profile is incomplete (missing key information)")
-        
-        # Rule 5: Behavioral scoring
-        behavioral_score = self._calculate_behavioral_score(profile)
-        risk_points += behavioral_score
-        if behavioral_score > 10:
-            explanations.append(f"Behavioral analysis indicates {behavioral_score} risk points from activity patterns")
-        
-        return min(risk_points, 70), explanations
-    
-    def _calculate_behavioral_score(self, profile: Dict[str, Any]) -> int:
-        """Lightweight behavioral scoring"""
-        score = 0
-        
-        account_age_days = profile.get('account_age_days', 0)
-        followers = profile.get('followers', 0)
-        following = profile.get('following', 0)
-        post_count = profile.get('post_count', 0)
-        
-        # Age vs activity correlation
-        if account_age_days > 0:
-            activity_ratio = post_count / account_age_days
-            if activity_ratio > 20 or activity_ratio < 0.01:
-                score += 10
-        
-        # Follower patterns
-        if following > followers * 10:
-            score += 15
-        
-        # Suspicious round numbers
-        if followers % 100 == 0 and followers > 1000:
-            score += 5
-        
-        return min(score, 30)
-    
-    def analyze_message_content(self, messages: List[str]) -> tuple:
-        """
-        Analyze message content for scam patterns
-        Returns: (risk_points, explanations)
-        """
-        risk_points = 0
-        explanations = []
-        
-        # Combine all messages for analysis
-        combined_text = " ".join(messages).lower()
-        
-        # Check for financial scam patterns
-        for pattern in self.FINANCIAL_KEYWORDS:
-            if re.search(pattern, combined_text, re.IGNORECASE):
-                risk_points += 25
-                explanations.append("Messages contain financial requests or money transfer language")
-                break
-        
-        # Check for personal information solicitation
-        for pattern in self.PERSONAL_INFO_KEYWORDS:
-            if re.search(pattern, combined_text, re.IGNORECASE):
-                risk_points += 20
-                explanations.append("Messages request personal or financial information")
-                break
-        
-        # Check for romance scam patterns
-        for pattern in self.ROMANCE_SCAM_KEYWORDS:
-            if re.search(pattern, combined_text, re.IGNORECASE):
-                risk_points += 30
-                explanations.append("Messages show romance scam patterns (emotional manipulation + money requests)")
-                break
-        
-        # Check for urgency indicators
-        urgency_patterns = [r'\burgent\b', r'\bemergency\b', r'\bquickly\b', r'\basap\b', r'\bimmediately\b']
-        urgency_count = sum(1 for pattern in urgency_patterns if re.search(pattern, combined_text, re.IGNORECASE))
-        if urgency_count >= 2:
-            risk_points += 15
-            explanations.append("Messages contain multiple urgency indicators (pressure tactics)")
-        
-        return min(risk_points, 30), explanations
-    
-    def calculate_risk_score(self, profile: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculate comprehensive risk score with explanations"""
-        all_explanations = []
-        
-        # Profile metadata analysis
-        metadata_risk, metadata_explanations = self.analyze_profile_metadata(profile)
-        all_explanations.extend(metadata_explanations)
-        
-        # Message content analysis
-        messages = profile.get('messages', [])
-        content_risk, content_explanations = self.analyze_message_content(messages)
-        all_explanations.extend(content_explanations)
-        
-        # Combine scores
-        total_score = min(100, metadata_risk + content_risk)
-        
-        # Determine risk level
-        if total_score < 20:
-            risk_level = "Minimal Risk"
-        elif total_score < 40:
-            risk_level = "Low Risk"
-        elif total_score < 60:
-            risk_level = "Medium Risk"
-        elif total_score < 80:
-            risk_level = "High Risk"
-        else:
-            risk_level = "Critical Risk"
-        
-        # Calculate confidence
-        indicator_count = len([e for e in all_explanations if e])
-        confidence = min(0.95, 0.5 + (indicator_count * 0.1))
-        
-        # Generate confidence explanation
-        if confidence >= 0.85:
-            confidence_explanation = "Multiple independent indicators confirm assessment"
-        elif confidence >= 0.70:
-            confidence_explanation = "Assessment based on established threat patterns"
-        else:
-            confidence_explanation = "Limited data available, manual review recommended"
-        
-        # Add summary
-        if total_score > 0:
-            threat_indicators_count = len([e for e in all_explanations if e])
-            summary = f"Threat assessment: {threat_indicators_count} security indicators detected using rule-based analysis"
-            all_explanations.insert(0, summary)
-        
-        # Recommended actions
-        if total_score >= 80:
-            recommended_actions = ["Immediate account restriction recommended", "Manual security review required", "User notification advised"]
-        elif total_score >= 60:
-            recommended_actions = ["Enhanced monitoring enabled", "Manual review triggered", "User warning recommended"]
-        elif total_score >= 40:
-            recommended_actions = ["Standard security protocols apply", "Automated logging increased"]
-        else:
-            recommended_actions = ["Normal monitoring continues"]
-        
-        return {
-            "risk_score": round(total_score, 1),
-            "risk_level": risk_level,
-            "explanations": all_explanations[:10],
-            "confidence": round(confidence, 2),
-            "confidence_explanation": confidence_explanation,
-            "recommended_actions": recommended_actions
-        }
-
 # Initialize global threat detection engine
-threat_detector = ThreatDetectionEngine()
+pipeline_metrics = create_metrics()
+threat_detector = create_engine(metrics=pipeline_metrics)
+
+# Optional assessment history, written in the background
+assessment_history = create_history()
+
+# Optional background jobs for submissions too large to score within a request
+job_store, job_runner = create_jobs()
+
+# Constant responses are encoded once; assessments reuse pre-encoded fragments
+SERVICE_INFO_PAYLOAD = StaticPayload(SERVICE_INFO)
+DEMO_DATA_PAYLOAD = StaticPayload(DEMO_PROFILES)
+response_encoder = ResponseEncoder()
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        pipeline_metrics.request_seconds.observe(time.perf_counter() - started, route)
+        pipeline_metrics.requests.inc(route, str(response.status_code))
+    return response
+
+def _sample_request_log() -> bool:
+    return REQUEST_LOG_SAMPLE_RATE > 0 and random.random() < REQUEST_LOG_SAMPLE_RATE
+
+def _json_response(payload: Any):
+    """Encoded JSON response, gzipped when the client accepts it, with serialization timing"""
+    started = time.perf_counter()
+    body, encoding = negotiate(response_encoder.encode(payload).encode('utf-8'), request.headers.get('Accept-Encoding'),
+                               RESPONSE_GZIP_MIN_BYTES, RESPONSE_GZIP_LEVEL)
+    response = Response(body, mimetype='application/json')
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    if RESPONSE_GZIP_LEVEL > 0:
+        response.vary.add('Accept-Encoding')
+    pipeline_metrics.serialize_seconds.observe(time.perf_counter() - started)
+    return response
+
+def _read_body(max_bytes: int) -> Optional[bytes]:
+    """The request body, or None when it is (or turns out to be) longer than max_bytes"""
+    if request.content_length is not None and request.content_length > max_bytes:
+        return None
+    body = request.stream.read(max_bytes + 1)
+    return body if len(body) <= max_bytes else None
+
+def _static_response(payload: StaticPayload):
+    """Pre-encoded constant response; answers 304 when the client's ETag still matches"""
+    if payload.matches(request.headers.get('If-None-Match')):
+        response = Response(status=304)
+    elif (RESPONSE_GZIP_LEVEL > 0 and len(payload.body) >= RESPONSE_GZIP_MIN_BYTES
+          and accepts_gzip(request.headers.get('Accept-Encoding'))):
+        response = Response(payload.gzipped, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(payload.body, mimetype='application/json')
+    response.set_etag(payload.etag, weak=True)
+    if RESPONSE_GZIP_LEVEL > 0:
+        response.vary.add('Accept-Encoding')
+    return response
+
+def _explain_requested() -> bool:
+    """?explain=false asks for score-only assessments"""
+    return request.args.get('explain', 'true').lower() not in ('0', 'false', 'no')
+
+def _fast_verdict_requested() -> bool:
+    """?verdict=fast asks for the risk level and actions only"""
+    return request.args.get('verdict', 'full').lower() == 'fast'
 
 @app.route('/')
 def root():
     """Health check endpoint"""
-    return jsonify({
-        "message": "Suspicious Profile Analyzer API",
-        "status": "operational",
-        "version": "1.0.0"
-    })
+    return _static_response(SERVICE_INFO_PAYLOAD)
 
 @app.route('/analyze-profile', methods=['POST'])
 def analyze_profile():
     """
     Analyze a profile for suspicious characteristics
+    ?verdict=fast returns only the risk level and recommended actions, skipping
+    content analysis once it can no longer change them
     """
     try:
-        profile = request.get_json()
-        
-        if not profile:
-            return jsonify({"error": "No profile data provided"}), 400
-        
-        logger.info(f"Analyzing profile for security threats: age={profile.get('account_age_days')} days, followers={profile.get('followers')}")
+        started = time.perf_counter()
+        try:
+            # Streamed, so an oversized body is refused before it is fully read
+            data = read_profile(request.stream, PAYLOAD_LIMITS, request.content_length) if request.is_json else None
+        except PayloadTooLarge as e:
+            return jsonify({"error": str(e)}), 413
+        except ValueError:
+            data = None
+        profile, error = parse_profile(data)
+        pipeline_metrics.parse_seconds.observe(time.perf_counter() - started)
         
         # Validate input
-        if profile.get('account_age_days', 0) < 0:
-            return jsonify({"error": "Account age cannot be negative"}), 400
-        
-        messages = profile.get('messages', [])
-        if len(messages) == 0:
-            return jsonify({"error": "At least one message is required for threat analysis"}), 400
+        if error:
+            return jsonify({"error": error}), 400
         
         # Perform security threat assessment
-        logger.info("Step 1: Analyzing profile metadata for identity inconsistencies...")
-        logger.info("Step 2: Scanning message content for social engineering patterns...")
-        logger.info("Step 3: Evaluating behavioral patterns against known threat signatures...")
-        
-        assessment = threat_detector.calculate_risk_score(profile)
-        
-        logger.info(f"Threat assessment complete: {assessment['risk_level']} ({assessment['risk_score']}/100)")
-        return jsonify(assessment)
+        if _fast_verdict_requested():
+            assessment = threat_detector.fast_verdict(profile)
+        else:
+            assessment = threat_detector.calculate_risk_score(profile)
+        pipeline_metrics.assessments.inc(assessment['risk_level'])
+        if assessment_history is not None:
+            assessment_history.record(profile.record_id, assessment)
+        
+        if _sample_request_log():
+            logger.info(
+                "Threat assessment: risk_level=%s risk_score=%s age_days=%s followers=%s messages=%d",
+                assessment['risk_level'], assessment.get('risk_score'), profile.account_age_days,
+                profile.followers, len(profile.messages)
+            )
+        return _json_response(assessment)
         
     except Exception as e:
         logger.error(f"Error analyzing profile: {str(e)}")
         return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
 
+@app.route('/analyze-profiles', methods=['POST'])
+def analyze_profiles():
+    """
+    Analyze a batch of profiles sent as a JSON array or NDJSON body
+    Results come back in input order, with per-item errors; ?explain=false skips
+    building explanations and ?verdict=fast returns levels and actions only
+    """
+    try:
+        explain = _explain_requested()
+        fast = _fast_verdict_requested()
+        body = _read_body(MAX_BATCH_BYTES)
+        if body is None:
+            return jsonify({"error": f"Request body too large (maximum {MAX_BATCH_BYTES} bytes)"}), 413
+        started = time.perf_counter()
+        if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+            items = parse_ndjson(body.decode('utf-8', errors='replace'))
+        else:
+            try:
+                profiles = json.loads(body) if request.is_json else None
+            except (ValueError, RecursionError):
+                profiles = None
+            if not isinstance(profiles, list):
+                return jsonify({"error": "Expected a JSON array or NDJSON body of profiles"}), 400
+            items = [(profile, None) for profile in profiles]
+        
+        if not items:
+            return jsonify({"error": "No profile data provided"}), 400
+        if len(items) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch too large: {len(items)} profiles (maximum {MAX_BATCH_SIZE})"}), 413
+        
+        # Validate every item into a profile record, then score the valid ones together
+        records = [parse_batch_item(profile, PAYLOAD_LIMITS) if error is None else (None, error)
+                   for profile, error in items]
+        pipeline_metrics.parse_seconds.observe(time.perf_counter() - started)
+        errors = [error for _, error in records]
+        valid = [record for record, error in records if error is None]
+        assessments = score_profiles(threat_detector, valid, explain, fast)
+        results = batch_results(errors, assessments)
+        
+        error_count = sum(1 for error in errors if error is not None)
+        for result in results:
+            if "assessment" in result:
+                pipeline_metrics.assessments.inc(result["assessment"]["risk_level"])
+        if assessment_history is not None:
+            for profile, assessment in zip(valid, assessments):
+                if not isinstance(assessment, str):
+                    assessment_history.record(profile.record_id, assessment)
+        if _sample_request_log():
+            logger.info("Batch threat assessment: profiles=%d errors=%d", len(items), error_count)
+        return _json_response({"results": results, "count": len(results), "errors": error_count})
+        
+    except Exception as e:
+        logger.error(f"Error analyzing profile batch: {str(e)}")
+        return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
+
+@app.route('/cache-stats')
+def cache_stats():
+    """Verdict and message cache counters"""
+    return jsonify(threat_detector.cache_stats())
+
+@app.route('/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    """Drop all cached verdicts, e.g. after a rule set change"""
+    threat_detector.invalidate_caches()
+    logger.info("Verdict caches invalidated")
+    return jsonify(threat_detector.cache_stats())
+
+@app.route('/rules')
+def rules_info():
+    """Active rule set version and reloads, plus shadow comparison counts when configured"""
+    return jsonify(threat_detector.rules_stats())
+
+@app.route('/activity', methods=['POST'])
+def record_activity():
+    """
+    Record timestamped activity events ({"account_id", "timestamp", "count"}) sent as a
+    JSON array or NDJSON body, for windowed velocity signals
+    """
+    if threat_detector.velocity is None:
+        return jsonify({"error": "Velocity tracking is not enabled"}), 404
+    body = _read_body(MAX_ACTIVITY_BYTES)
+    if body is None:
+        return jsonify({"error": f"Request body too large (maximum {MAX_ACTIVITY_BYTES} bytes)"}), 413
+    if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+        items = parse_ndjson(body.decode('utf-8', errors='replace'))
+    else:
+        try:
+            events = json.loads(body) if request.is_json else None
+        except (ValueError, RecursionError):
+            events = None
+        if isinstance(events, dict):
+            events = [events]
+        if not isinstance(events, list):
+            return jsonify({"error": "Expected a JSON array or NDJSON body of events"}), 400
+        items = [(event, None) for event in events]
+    if not items:
+        return jsonify({"error": "No events provided"}), 400
+    if len(items) > MAX_ACTIVITY_EVENTS:
+        return jsonify({"error": f"Too many events: {len(items)} (maximum {MAX_ACTIVITY_EVENTS})"}), 413
+    
+    valid, errors = [], []
+    for index, (data, error) in enumerate(items):
+        event, error = read_event(data) if error is None else (None, error)
+        if error is None:
+            valid.append(event)
+        else:
+            errors.append({"index": index, "error": error})
+    recorded = threat_detector.velocity.record_events(valid)
+    return _json_response({"received": len(items), "recorded": recorded, "errors": errors})
+
+@app.route('/history')
+def history():
+    """
+    Past assessments, newest first
+    Filters: account_id, risk_level, since/until (unix seconds); page with limit and
+    the next_cursor of the previous page
+    """
+    if assessment_history is None:
+        return jsonify({"error": "Assessment history is not enabled"}), 404
+    arguments, error = query_arguments(request.args, ("account_id", "risk_level", "since", "until", "limit", "cursor"))
+    if error:
+        return jsonify({"error": error}), 400
+    return _json_response(assessment_history.history(**arguments))
+
+@app.route('/history/distribution')
+def history_distribution():
+    """Assessment counts per risk level and hour, optionally between since and until"""
+    if assessment_history is None:
+        return jsonify({"error": "Assessment history is not enabled"}), 404
+    arguments, error = query_arguments(request.args, ("since", "until"))
+    if error:
+        return jsonify({"error": error}), 400
+    return _json_response(assessment_history.distribution(**arguments))
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a large submission (a profile, a JSON array or NDJSON) for background scoring
+    Answers 202 with the job ID straight away; ?explain=false writes score-only results
+    """
+    if job_store is None:
+        return jsonify({"error": "Background jobs are not enabled"}), 404
+    body = _read_body(JOB_MAX_BYTES)
+    if body is None:
+        return jsonify({"error": f"Job payload too large (maximum {JOB_MAX_BYTES} bytes)"}), 413
+    if not body.strip():
+        return jsonify({"error": "No profile data provided"}), 400
+
+    job = job_store.submit(body, request.mimetype, explain=_explain_requested())
+    if job is None:
+        response = jsonify({"error": "Job queue is full, retry later"})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+    response = _json_response(job)
+    response.status_code = 202
+    response.headers['Location'] = f"/jobs/{job['job_id']}"
+    return response
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id: str):
+    """Job state and progress"""
+    job = job_store.get(job_id) if job_store is not None else None
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return _json_response(job)
+
+@app.route('/jobs/<job_id>/results')
+def job_results(job_id: str):
+    """Results written so far, in input order, paged with offset and limit"""
+    if job_store is None or job_store.get(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        return jsonify({"error": "offset and limit must be integers"}), 400
+    return _json_response(job_store.results(job_id, offset, limit))
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id: str):
+    """Cancel a queued job, or stop a running one after its current chunk"""
+    job = job_store.cancel(job_id) if job_store is not None else None
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return _json_response(job)
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics for the scoring pipeline"""
+    return Response(pipeline_metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/demo-data')
 def get_demo_data():
     """Provide sample test data for demo purposes"""
-    return jsonify({
-        "legitimate_profile": {
-            "account_age_days": 365,
-            "followers": 250,
-            "following": 180,
-            "post_count": 120,
-            "profile_completed": True,
-            "messages": [
-                "Thanks for connecting! Looking forward to networking.",
-                "Great article you shared about industry trends."
-            ]
-        },
-        "suspicious_profile": {
-            "account_age_days": 45,
-            "followers": 15,
-            "following": 800,
-            "post_count": 200,
-            "profile_completed": False,
-            "messages": [
-                "Hello! I'm new to this platform.",
-                "Looking to connect with professionals in your field.",
-                "Would love to discuss potential opportunities."
-            ]
-        },
-        "romance_scam_profile": {
-            "account_age_days": 7,
-            "followers": 2,
-            "following": 500,
-            "post_count": 50,
-            "profile_completed": False,
-            "messages": [
-                "My darling, I love you so much already.",
-                "I am engineer working on oil rig, need emergency money.",
-                "Trust me honey, send Western Union transfer immediately."
-            ]
-        }
-    })
+    return _static_response(DEMO_DATA_PAYLOAD)
 
 if __name__ == "__main__":
-    import os
     port = int(os.environ.get("PORT", 8000))
     app.run(host="0.0.0.0", port=port, debug=False)
\ No newline at end of file
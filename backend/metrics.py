@@ -0,0 +1,343 @@
+"""
+Scoring pipeline instrumentation
+Low-overhead counters and histograms exported in Prometheus text format
+
+With a shared directory, every worker process writes a snapshot of its metrics there
+about once a second, and render() adds up the snapshots of all workers on the host.
+Snapshots of exited workers are folded into one retired totals file, so the directory
+holds one snapshot per live worker
+"""
+
+import atexit
+import fcntl
+import logging
+import marshal
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from 10 microseconds to 1 second
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0
+)
+
+# Prometheus text exposition content type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+# Totals of every exited worker, and the lock serializing folds into it, in the shared directory
+RETIRED_FILE = "retired.totals"
+LOCK_FILE = ".lock"
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def reset(self) -> None:
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, values: Dict[LabelValues, float]) -> None:
+        with self._lock:
+            for label_values, count in values.items():
+                self._values[label_values] = self._values.get(label_values, 0) + count
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        for values, count in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labels, values)} {count}"
+
+
+class Histogram:
+    """Fixed-bucket histogram with optional labels"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return sum(series[0]) if series else 0
+
+    def reset(self) -> None:
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> Dict[LabelValues, Tuple[List[int], float]]:
+        with self._lock:
+            return {values: (list(counts), total[0]) for values, (counts, total) in self._series.items()}
+
+    def merge(self, series: Dict[LabelValues, Tuple[List[int], float]]) -> None:
+        with self._lock:
+            for label_values, (counts, total) in series.items():
+                if len(counts) != len(self.buckets) + 1:
+                    # Written with other buckets, e.g. by a worker still on an older release
+                    continue
+                current = self._series.get(label_values)
+                if current is None:
+                    current = self._series[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+                for index, count in enumerate(counts):
+                    current[0][index] += count
+                current[1][0] += total
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for values, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labels, values, 'le="%s"' % bound)
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, values)} {total[0]}"
+            yield f"{self.name}_count{_format_labels(self.labels, values)} {cumulative}"
+
+
+class PipelineMetrics:
+    """
+    Metrics for every stage of the scoring pipeline
+    With shared_directory, render() reports the totals of every process publishing there
+    """
+
+    def __init__(self, shared_directory: Optional[str] = None, publish_seconds: float = 1.0):
+        self.request_seconds = Histogram(
+            "spa_request_seconds", "Total time spent handling a request", labels=("route",))
+        self.requests = Counter(
+            "spa_requests_total", "Requests handled", labels=("route", "status"))
+        self.parse_seconds = Histogram(
+            "spa_json_parse_seconds", "Time spent parsing request JSON")
+        self.metadata_seconds = Histogram(
+            "spa_metadata_analysis_seconds", "Time spent in analyze_profile_metadata")
+        self.content_seconds = Histogram(
+            "spa_content_analysis_seconds", "Time spent in analyze_message_content")
+        self.signature_seconds = Histogram(
+            "spa_signature_scan_seconds", "Time spent scanning one signature category", labels=("category",))
+        self.serialize_seconds = Histogram(
+            "spa_response_serialization_seconds", "Time spent serializing responses")
+        self.assessments = Counter(
+            "spa_assessments_total", "Assessments produced", labels=("risk_level",))
+        self.fast_verdict_exits = Counter(
+            "spa_fast_verdict_exits_total", "Fast verdicts by the stage that decided them", labels=("stage",))
+        self.shadow_comparisons = Counter(
+            "spa_shadow_comparisons_total", "Shadow rule set comparisons by risk level outcome", labels=("outcome",))
+        self.shadow_seconds = Histogram(
+            "spa_shadow_scoring_seconds", "Time spent scoring one shadow comparison side", labels=("rules",))
+
+        self.shared_directory = shared_directory
+        self.publish_seconds = publish_seconds
+        self._snapshot_path = ""
+        self._publish_lock = threading.Lock()
+        self._retired = False
+        if shared_directory:
+            os.makedirs(shared_directory, exist_ok=True)
+            self._start_publisher()
+            os.register_at_fork(after_in_child=self._after_fork)
+            atexit.register(self._retire_quietly)
+
+    def all(self) -> List[object]:
+        return [
+            self.request_seconds, self.requests, self.parse_seconds, self.metadata_seconds,
+            self.content_seconds, self.signature_seconds, self.serialize_seconds, self.assessments,
+            self.fast_verdict_exits, self.shadow_comparisons, self.shadow_seconds,
+        ]
+
+    def _start_publisher(self) -> None:
+        # Named per process rather than per PID, so a reused PID cannot overwrite a dead worker's totals
+        self._snapshot_path = os.path.join(self.shared_directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.metrics")
+        threading.Thread(target=self._publish_loop, name="metrics-publisher", daemon=True).start()
+
+    def _after_fork(self) -> None:
+        # The parent publishes what it counted before the fork, so the child starts from zero
+        for metric in self.all():
+            metric.reset()
+        self._publish_lock = threading.Lock()
+        self._retired = False
+        self._start_publisher()
+
+    def _publish_loop(self) -> None:
+        while True:
+            time.sleep(self.publish_seconds)
+            self._publish_quietly()
+
+    def _publish_quietly(self) -> None:
+        try:
+            self.publish()
+        except OSError as e:
+            logger.warning(f"Could not publish metrics to {self.shared_directory}: {e}")
+
+    def _retire_quietly(self) -> None:
+        try:
+            self.retire()
+        except OSError as e:
+            logger.warning(f"Could not retire metrics to {self.shared_directory}: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {metric.name: metric.snapshot() for metric in self.all()}
+
+    def merge(self, snapshot: Optional[Dict[str, Any]]) -> None:
+        """Add a snapshot written by another process to these metrics"""
+        metrics: Dict[str, Any] = {metric.name: metric for metric in self.all()}
+        for metric_name, values in (snapshot or {}).items():
+            if metric_name in metrics:
+                metrics[metric_name].merge(values)
+
+    def publish(self) -> None:
+        """Write this process's metrics to its snapshot file in the shared directory"""
+        with self._publish_lock:
+            if not self._retired:
+                _write_snapshot(self._snapshot_path, self.snapshot())
+
+    def retire(self) -> None:
+        """Fold this process's metrics into the retired totals and remove its snapshot file"""
+        with self._publish_lock:
+            if self._retired:
+                return
+            self._retired = True
+            retired_path = os.path.join(self.shared_directory, RETIRED_FILE)
+            with _DirectoryLock(self.shared_directory):
+                totals = PipelineMetrics()
+                totals.merge(_read_snapshot(retired_path))
+                totals.merge(self.snapshot())
+                _write_snapshot(retired_path, totals.snapshot())
+                _remove(self._snapshot_path)
+
+    def combined(self) -> "PipelineMetrics":
+        """The totals of every snapshot in the shared directory, this process's included"""
+        self.publish()
+        retired_path = os.path.join(self.shared_directory, RETIRED_FILE)
+        totals = PipelineMetrics()
+        with _DirectoryLock(self.shared_directory):
+            totals.merge(_read_snapshot(retired_path))
+            live, dead = [], []
+            for name in os.listdir(self.shared_directory):
+                if name.endswith((".metrics", ".tmp")):
+                    # A retired totals temporary file seen under the lock was left by a worker that died folding
+                    alive = _writer_alive(name) and not name.startswith(RETIRED_FILE)
+                    (live if alive else dead).append(os.path.join(self.shared_directory, name))
+            # Workers that exited without retiring, e.g. killed ones, join the retired totals here
+            dead_snapshots = [path for path in dead if path.endswith(".metrics")]
+            for path in dead_snapshots:
+                totals.merge(_read_snapshot(path))
+            if dead_snapshots:
+                _write_snapshot(retired_path, totals.snapshot())
+            for path in dead:
+                _remove(path)
+            for path in live:
+                if path.endswith(".metrics"):
+                    totals.merge(_read_snapshot(path))
+        return totals
+
+    def render(self) -> str:
+        if self.shared_directory:
+            return self.combined().render()
+        lines: List[str] = []
+        for metric in self.all():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class _DirectoryLock:
+    """Exclusive lock on the shared directory, held while snapshots are read or folded"""
+
+    def __init__(self, directory: str):
+        self._path = os.path.join(directory, LOCK_FILE)
+        self._fd = -1
+
+    def __enter__(self) -> None:
+        self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    def __exit__(self, *exc_info: Any) -> None:
+        os.close(self._fd)
+
+
+def _writer_alive(name: str) -> bool:
+    """Whether the process that wrote a "<pid>-<id>.metrics" snapshot is still running"""
+    try:
+        pid = int(name.split("-", 1)[0])
+    except ValueError:
+        return True
+    if pid <= 0 or pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Running as another user
+        return True
+    return True
+
+
+def _read_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "rb") as snapshot_file:
+            return marshal.loads(snapshot_file.read())
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+
+
+def _write_snapshot(path: str, snapshot: Dict[str, Any]) -> None:
+    temporary = f"{path}.{threading.get_ident()}.tmp"
+    with open(temporary, "wb") as output:
+        output.write(marshal.dumps(snapshot))
+    os.replace(temporary, path)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,164 @@
+"""
+Text normalization for signature matching
+Undoes the common ways scam messages dodge keyword signatures, before they are scanned:
+compatibility forms and invisible characters ("ｂｉｔｃｏｉｎ", "bit\\u200bcoin"), accents
+("émergency"), homoglyphs from other scripts ("pаypal" with a Cyrillic "а"), leetspeak
+("W3stern Uni0n") and letter spacing ("b i t c o i n"). Words in another script keep
+their letters unless every one of them has a Latin twin, and Latin words embedded in text
+written without spaces (Chinese, Thai...) are split off so word-bounded signatures match
+
+Every mapping is a precomputed translation table or compiled pattern; ASCII text only
+goes through the leetspeak and spacing patterns
+"""
+
+import re
+import unicodedata
+from typing import Dict, List, Sequence
+
+# Changes whenever normalization output changes, so cached verdicts are not reused across versions
+VERSION = "n2"
+
+# Format and filler characters that render as nothing
+_INVISIBLE = (
+    [0x00AD, 0x034F, 0x061C, 0x115F, 0x1160, 0x17B4, 0x17B5, 0x180E, 0x3164, 0xFEFF, 0xFFA0]
+    + list(range(0x200B, 0x2010)) + list(range(0x202A, 0x202F)) + list(range(0x2060, 0x2065))
+    + list(range(0x2066, 0x206A)) + list(range(0xFE00, 0xFE10))
+)
+
+# Lowercase letters of other scripts that look like a Latin letter
+_CONFUSABLES = {
+    # Cyrillic
+    'а': 'a', 'в': 'b', 'е': 'e', 'ё': 'e', 'к': 'k', 'м': 'm', 'н': 'h', 'о': 'o', 'р': 'p', 'с': 'c',
+    'т': 't', 'у': 'y', 'х': 'x', 'ѕ': 's', 'і': 'i', 'ї': 'i',
+    'ј': 'j', 'ԁ': 'd', 'ԛ': 'q', 'ԝ': 'w', 'ӏ': 'l', 'һ': 'h', 'ү': 'y', 'ԍ': 'g',
+    # Greek
+    'α': 'a', 'β': 'b', 'γ': 'y', 'ε': 'e', 'η': 'n', 'ι': 'i', 'κ': 'k', 'ν': 'v', 'ο': 'o', 'ρ': 'p',
+    'τ': 't', 'υ': 'u', 'χ': 'x', 'ω': 'w', 'ϲ': 'c', 'ϳ': 'j',
+    # Armenian
+    'օ': 'o', 'ս': 'u', 'ց': 'g', 'հ': 'h', 'ո': 'n', 'ա': 'w',
+    # Latin letters outside the ASCII range that NFKC leaves alone
+    'ı': 'i', 'ȷ': 'j', 'ɑ': 'a', 'ɡ': 'g', 'ɢ': 'g', 'ɩ': 'i', 'ɪ': 'i', 'ʏ': 'y', 'ʀ': 'r', 'ɴ': 'n', 'ᴄ': 'c',
+    'ᴅ': 'd', 'ᴇ': 'e', 'ᴋ': 'k', 'ᴍ': 'm', 'ᴏ': 'o', 'ᴘ': 'p', 'ᴛ': 't', 'ᴜ': 'u', 'ᴠ': 'v', 'ᴡ': 'w',
+    'ᴢ': 'z', 'ʙ': 'b', 'ʜ': 'h', 'ʟ': 'l', 'ꜱ': 's', 'ø': 'o', 'đ': 'd', 'ħ': 'h', 'ł': 'l', 'ŧ': 't',
+}
+
+
+def _latin_fold_table() -> Dict[str, str]:
+    """Accented Latin letters to their base letter, and invisible characters and stray accents to nothing"""
+    table = {chr(code): '' for code in _INVISIBLE + list(range(0x0300, 0x0370))}
+    for code in range(0x00C0, 0x0250):
+        decomposed = unicodedata.normalize('NFD', chr(code).lower())
+        if len(decomposed) > 1 and decomposed[0].isascii() and decomposed[0].isalpha():
+            table[chr(code)] = decomposed[0]
+    for letter, latin in _CONFUSABLES.items():
+        if unicodedata.name(letter).startswith('LATIN'):
+            table[letter] = latin
+    return table
+
+
+# Replaced through a pattern rather than str.translate, which costs a lookup per character
+_LATIN_FOLD = _latin_fold_table()
+_FOLDED = re.compile('[' + ''.join(map(re.escape, sorted(_LATIN_FOLD))) + ']')
+_CONFUSABLE_TABLE = str.maketrans(_CONFUSABLES)
+# Characters a disguised word is made of
+_DISGUISE_LETTERS = frozenset(_CONFUSABLES).union(chr(code) for code in range(128))
+
+# Digits and symbols standing in for letters, mapped only between two letters ("m0ney", "ca$h",
+# "fr!end"), so "5pm", "1st" and "urgent!!please" keep their digits and "!".
+# "@" stays, so email addresses keep their words apart
+_LEET_TABLE = str.maketrans({'0': 'o', '1': 'i', '3': 'e', '4': 'a', '5': 's', '7': 't', '8': 'b',
+                             '$': 's', '!': 'i', '|': 'l'})
+_LEET_RUN = re.compile(r'(?<=[a-z])(?:[013-578$|]{1,3}|!)(?=[a-z])')
+
+# Three or more single letters with the same separator between them: "b i t c o i n", "s.s.n"
+_SPACED = re.compile(r'\b[a-z]([ .\-_*+~])[a-z](?:\1[a-z])+\b')
+
+# Cheap necessary conditions for the two patterns above, which cost more per character
+_LEET_HINT = re.compile(r'[013-578$!|][a-z]')
+_SPACED_HINT = re.compile(r'[ .\-_*+~][a-z][ .\-_*+~][a-z](?![a-z])')
+
+# Signs of a disguised word: an ASCII letter next to a character outside ASCII, or three or
+# more letters that all have a Latin twin. Separate patterns, as an alternation is far slower
+_DISGUISE_HINTS = (
+    re.compile(r'[a-z][^\x00-\x7f]'),
+    re.compile(r'[a-z](?<=[^\x00-\x7f][a-z])'),
+    re.compile(r'\b[' + ''.join(_CONFUSABLES) + r']{3,}\b'),
+)
+
+_WORD = re.compile(r'\w+')
+
+
+class TextNormalizer:
+    """Lowercased, normalized text for signature scanning (reputation lookups keep the raw text)"""
+
+    version = VERSION
+
+    def __init__(self):
+        # Script of each non-ASCII character seen, e.g. 'CYRILLIC'; '' for non-letters
+        self._scripts: Dict[str, str] = {}
+
+    def normalize(self, text: str) -> str:
+        text = text.lower()
+        if not text.isascii():
+            # NFKC folds compatibility forms (fullwidth, math alphanumerics, ligatures) and can
+            # produce capitals, so lowercase again
+            text = unicodedata.normalize('NFKC', text).lower()
+            if _FOLDED.search(text):
+                text = _FOLDED.sub(_fold, text)
+            if not text.isascii() and any(hint.search(text) for hint in _DISGUISE_HINTS):
+                text = _WORD.sub(self._word, text)
+        if _LEET_HINT.search(text):
+            text = _LEET_RUN.sub(_unleet, text)
+        if _SPACED_HINT.search(text):
+            text = _SPACED.sub(_unspace, text)
+        return text
+
+    def normalize_messages(self, messages: Sequence[str]) -> List[str]:
+        return [self.normalize(message) for message in messages]
+
+    def _script(self, char: str) -> str:
+        script = self._scripts.get(char)
+        if script is None:
+            script = unicodedata.name(char, '').split(' ', 1)[0] if char.isalpha() else ''
+            self._scripts[char] = script
+        return script
+
+    def _word(self, match: 're.Match[str]') -> str:
+        word = match.group()
+        if word.isascii():
+            return word
+        # Latin mixed with lookalikes, or three or more lookalikes: a disguised Latin word.
+        # Genuine Russian or Greek words almost always hold a letter with no Latin twin
+        if len(word) >= 3 and _DISGUISE_LETTERS.issuperset(word):
+            return word.translate(_CONFUSABLE_TABLE)
+        if _DISGUISE_HINTS[0].search(word) or _DISGUISE_HINTS[1].search(word):
+            return self._split_scripts(word)
+        return word
+
+    def _split_scripts(self, word: str) -> str:
+        """Spaces between Latin and other-script runs, for languages written without them"""
+        parts = []
+        run_start = 0
+        latin = None
+        for index, char in enumerate(word):
+            if not char.isalpha():
+                continue
+            char_latin = char.isascii() or self._script(char) == 'LATIN'
+            if latin is not None and char_latin != latin:
+                parts.append(word[run_start:index])
+                run_start = index
+            latin = char_latin
+        parts.append(word[run_start:])
+        return " ".join(parts)
+
+
+def _fold(match: 're.Match[str]') -> str:
+    return _LATIN_FOLD[match.group()]
+
+
+def _unleet(match: 're.Match[str]') -> str:
+    return match.group().translate(_LEET_TABLE)
+
+
+def _unspace(match: 're.Match[str]') -> str:
+    return match.group().replace(match.group(1), '')
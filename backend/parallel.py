@@ -0,0 +1,99 @@
+"""
+Multi-core scoring for bulk jobs
+Spreads chunks of profiles across a process pool and yields results in input order
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional
+
+from engine import ThreatDetectionEngine
+from rescore import InputRecord, chunked, score_records, validated_record
+
+# Defaults, overridable per scorer
+DEFAULT_WORKERS = int(os.environ.get("SCORING_WORKERS", os.cpu_count() or 1))
+DEFAULT_CHUNK_SIZE = int(os.environ.get("SCORING_CHUNK_SIZE", 500))
+
+# Engine owned by each worker process, built once by the pool initializer
+_worker_engine: Optional[ThreatDetectionEngine] = None
+
+
+def create_scoring_engine() -> ThreatDetectionEngine:
+    """
+    Engine for bulk scoring, built by the service's own factory so bulk scores use the same rules
+    Cross-account state stays out: each pool process would only see its own share of the input
+    """
+    # Imported here, as config imports jobs, which imports this module
+    from config import create_engine
+    return create_engine(cross_account=False)
+
+
+def _init_worker() -> None:
+    global _worker_engine
+    _worker_engine = create_scoring_engine()
+
+
+def _score_chunk(chunk: List[InputRecord], explain: bool) -> List[Dict[str, Any]]:
+    return list(score_records(chunk, _worker_engine, chunk_size=len(chunk), explain=explain))
+
+
+class ParallelScorer:
+    """
+    Process-pool scoring of profile streams
+    At most max_pending chunks are in flight, so input is consumed lazily
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_pending: Optional[int] = None, explain: bool = True):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending or workers * 2
+        self.explain = explain
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "ParallelScorer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def start(self) -> None:
+        if self._executor is None:
+            # Spawned, not forked: the job runner starts pools from a threaded web worker, and a
+            # forked child can inherit a lock another thread held at the time
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def score_records(self, records: Iterable[InputRecord]) -> Iterator[Dict[str, Any]]:
+        """Score (record, profile, error) tuples, yielding output records in input order"""
+        self.start()
+        chunks = chunked(records, self.chunk_size)
+        pending: Deque[Future] = deque()
+
+        for chunk in islice(chunks, self.max_pending):
+            pending.append(self._executor.submit(_score_chunk, chunk, self.explain))
+
+        while pending:
+            outputs = pending.popleft().result()
+            for chunk in islice(chunks, 1):
+                pending.append(self._executor.submit(_score_chunk, chunk, self.explain))
+            yield from outputs
+
+    def score(self, profiles: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Validate and score plain profile dicts, yielding output records in input order"""
+        records = (validated_record(index, profile) for index, profile in enumerate(profiles, start=1))
+        return self.score_records(records)
@@ -0,0 +1,196 @@
+"""
+Bounded profile payloads
+Request bodies are parsed as they arrive: the messages array is decoded one element at
+a time and checked against the limits, so an oversized body, too many messages or one
+huge message is rejected before the rest of the body is read or buffered
+"""
+
+import codecs
+import json
+from typing import Any, BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+# Bytes read from the request stream per parser step
+READ_CHUNK_BYTES = 65536
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '0123456789.eE+-'
+
+# A JSON string of n characters takes at most 6n + 2 characters of source (\uXXXX escapes)
+_ESCAPED_CHARS = 6
+
+# Parser states
+_OPEN, _FIRST_KEY, _KEY, _COLON, _VALUE, _AFTER_VALUE, _FIRST_ITEM, _ITEM, _AFTER_ITEM, _DONE = range(10)
+
+
+class PayloadLimits(NamedTuple):
+    """Largest accepted body in bytes, messages per profile and characters per message"""
+    max_bytes: int
+    max_messages: int
+    max_message_chars: int
+
+
+class PayloadTooLarge(ValueError):
+    """A payload limit was exceeded; answered with 413"""
+
+
+def check_messages(messages: Any, limits: PayloadLimits) -> Optional[str]:
+    """The limit a parsed messages list exceeds, or None"""
+    if not isinstance(messages, list):
+        return None
+    if len(messages) > limits.max_messages:
+        return f"Too many messages: {len(messages)} (maximum {limits.max_messages})"
+    for index, message in enumerate(messages):
+        if isinstance(message, str) and len(message) > limits.max_message_chars:
+            return f"Message {index} is too long (maximum {limits.max_message_chars} characters)"
+    return None
+
+
+class ProfileParser:
+    """
+    Incremental parser for one profile object: feed() the body in chunks, then close()
+    Gives the same dict as json.loads (a repeated key keeps its last value); a body that
+    is not a JSON object raises ValueError
+    """
+
+    def __init__(self, limits: PayloadLimits):
+        self.limits = limits
+        self.bytes_read = 0
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+        self._state = _OPEN
+        self._key = ""
+        self._profile: Dict[str, Any] = {}
+        self._messages: List[Any] = []
+
+    def feed(self, chunk: bytes) -> None:
+        self.bytes_read += len(chunk)
+        if self.bytes_read > self.limits.max_bytes:
+            raise PayloadTooLarge(f"Request body too large (maximum {self.limits.max_bytes} bytes)")
+        self._buffer = self._buffer[self._position:] + self._text.decode(chunk)
+        self._position = 0
+        self._parse(final=False)
+
+    def close(self) -> Dict[str, Any]:
+        self._buffer = self._buffer[self._position:] + self._text.decode(b"", final=True)
+        self._position = 0
+        self._parse(final=True)
+        if self._state != _DONE:
+            raise ValueError("Unexpected end of JSON body")
+        return self._profile
+
+    def _parse(self, final: bool) -> None:
+        buffer = self._buffer
+        position = self._position
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            self._position = position
+            if position == len(buffer):
+                return
+            char = buffer[position]
+            state = self._state
+
+            if state == _OPEN:
+                if char != '{':
+                    raise ValueError("Expected a JSON object")
+                self._state = _FIRST_KEY
+                position += 1
+            elif state == _FIRST_KEY and char == '}':
+                self._state = _DONE
+                position += 1
+            elif state in (_FIRST_KEY, _KEY):
+                if char != '"':
+                    raise ValueError(f"Expected a key at character {position}")
+                decoded = self._decode(buffer, position, final)
+                if decoded is None:
+                    return
+                self._key, position = decoded
+                self._state = _COLON
+            elif state == _COLON:
+                if char != ':':
+                    raise ValueError(f"Expected ':' at character {position}")
+                self._state = _VALUE
+                position += 1
+            elif state == _VALUE:
+                if self._key == 'messages' and char == '[':
+                    self._messages = []
+                    self._state = _FIRST_ITEM
+                    position += 1
+                    continue
+                decoded = self._decode(buffer, position, final)
+                if decoded is None:
+                    return
+                self._profile[self._key], position = decoded
+                self._state = _AFTER_VALUE
+            elif state == _AFTER_VALUE:
+                if char == ',':
+                    self._state = _KEY
+                elif char == '}':
+                    self._state = _DONE
+                else:
+                    raise ValueError(f"Expected ',' or '}}' at character {position}")
+                position += 1
+            elif state == _FIRST_ITEM and char == ']':
+                self._profile['messages'] = self._messages
+                self._state = _AFTER_VALUE
+                position += 1
+            elif state in (_FIRST_ITEM, _ITEM):
+                if len(self._messages) >= self.limits.max_messages:
+                    raise PayloadTooLarge(f"Too many messages (maximum {self.limits.max_messages})")
+                decoded = self._decode(buffer, position, final, self.limits.max_message_chars)
+                if decoded is None:
+                    return
+                message, position = decoded
+                if isinstance(message, str) and len(message) > self.limits.max_message_chars:
+                    raise PayloadTooLarge(f"Message {len(self._messages)} is too long "
+                                          f"(maximum {self.limits.max_message_chars} characters)")
+                self._messages.append(message)
+                self._state = _AFTER_ITEM
+            elif state == _AFTER_ITEM:
+                if char == ',':
+                    self._state = _ITEM
+                elif char == ']':
+                    self._profile['messages'] = self._messages
+                    self._state = _AFTER_VALUE
+                else:
+                    raise ValueError(f"Expected ',' or ']' at character {position}")
+                position += 1
+            else:
+                raise ValueError(f"Extra data at character {position}")
+
+    def _decode(self, buffer: str, position: int, final: bool,
+                max_chars: Optional[int] = None) -> Optional[Tuple[Any, int]]:
+        """One JSON value at position, or None until more of the body arrives"""
+        try:
+            value, end = self._decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            if max_chars is not None and len(buffer) - position > _ESCAPED_CHARS * max_chars + 2:
+                raise PayloadTooLarge(f"Message {len(self._messages)} is too long "
+                                      f"(maximum {max_chars} characters)") from None
+            return None
+        except RecursionError:
+            raise ValueError(f"JSON nested too deeply at character {position}") from None
+        if not final and type(value) in (int, float) and (end == len(buffer) or buffer[end] in _NUMBER_CHARS):
+            # The number may continue in the next chunk, e.g. "8." then "5"
+            return None
+        return value, end
+
+
+def read_profile(stream: BinaryIO, limits: PayloadLimits, length: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Parse a profile from a request body stream; length is its Content-Length, if sent
+    Raises PayloadTooLarge as soon as a limit is exceeded and ValueError for anything
+    that is not a JSON object
+    """
+    if length is not None and length > limits.max_bytes:
+        raise PayloadTooLarge(f"Request body too large (maximum {limits.max_bytes} bytes)")
+    parser = ProfileParser(limits)
+    while True:
+        chunk = stream.read(READ_CHUNK_BYTES)
+        if not chunk:
+            return parser.close()
+        parser.feed(chunk)
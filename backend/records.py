@@ -0,0 +1,106 @@
+"""
+Profile records
+Validates incoming profile JSON once and keeps only the fields the engine scores
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+# Profile fields read by the scoring rules
+PROFILE_FIELDS = ('account_age_days', 'followers', 'following', 'post_count', 'profile_completed')
+
+NUMERIC_FIELDS = ('account_age_days', 'followers', 'following', 'post_count')
+
+# Input fields used to join results back to the source record, in order of preference
+ID_FIELDS = ('id', 'account_id', 'user_id')
+
+
+class ProfileRecord:
+    """
+    The scoring fields of one profile
+    Uses __slots__ so bulk jobs hold a fraction of the memory of the parsed JSON dict
+    """
+
+    __slots__ = ('account_age_days', 'followers', 'following', 'post_count', 'profile_completed',
+                 'messages', 'conversation_id', 'record_id')
+
+    def __init__(self, account_age_days: Any = 0, followers: Any = 0, following: Any = 0, post_count: Any = 0,
+                 profile_completed: Any = False, messages: Optional[List[str]] = None,
+                 conversation_id: Optional[str] = None, record_id: Any = None):
+        self.account_age_days = account_age_days
+        self.followers = followers
+        self.following = following
+        self.post_count = post_count
+        self.profile_completed = profile_completed
+        self.messages = messages if messages is not None else []
+        self.conversation_id = conversation_id
+        self.record_id = record_id
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProfileRecord":
+        """Build a record without validation, using the same defaults as the rules"""
+        conversation_id = data.get('conversation_id')
+        return cls(
+            data.get('account_age_days', 0),
+            data.get('followers', 0),
+            data.get('following', 0),
+            data.get('post_count', 0),
+            data.get('profile_completed', False),
+            data.get('messages', []),
+            str(conversation_id) if conversation_id is not None else None,
+            source_id(data)
+        )
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, ProfileRecord):
+            return NotImplemented
+        return self.__getstate__() == other.__getstate__()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"ProfileRecord({fields})"
+
+
+def source_id(data: Dict[str, Any]) -> Any:
+    """The first ID field present in the input, or None"""
+    for field in ID_FIELDS:
+        if field in data:
+            return data[field]
+    return None
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def parse_profile(data: Any) -> Tuple[Optional[ProfileRecord], Optional[str]]:
+    """
+    Validate a profile JSON value
+    Returns: (record, None) for a valid profile, or (None, error message)
+    """
+    if not isinstance(data, dict) or not data:
+        return None, "No profile data provided"
+
+    for field in NUMERIC_FIELDS:
+        if field in data and not _is_number(data[field]):
+            return None, f"{field} must be a number"
+
+    if data.get('account_age_days', 0) < 0:
+        return None, "Account age cannot be negative"
+
+    messages = data.get('messages', [])
+    if not isinstance(messages, list) or not all(isinstance(message, str) for message in messages):
+        return None, "messages must be a list of strings"
+    if len(messages) == 0:
+        return None, "At least one message is required for threat analysis"
+
+    record = ProfileRecord.from_dict(data)
+    record.profile_completed = bool(record.profile_completed)
+    return record, None
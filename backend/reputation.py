@@ -0,0 +1,469 @@
+"""
+Signature and reputation store
+Indicator lists (scam phrases, domains, payment handles, wallets, phone numbers) are prebuilt into a
+compact file of sorted 64-bit hashes and bitmap filters that every worker memory-maps
+read-only, so the pages are shared between processes and opening the store costs
+nothing per indicator
+
+Usage:
+    python reputation.py build indicators.json -o reputation.bin
+    python reputation.py info reputation.bin
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+MAGIC = b'SPAREP02'
+
+# Indicator categories in file order; phrase_starts holds the first word of every phrase
+CATEGORIES = ('phrases', 'domains', 'payment_handles', 'wallets', 'phone_numbers')
+_TABLES = CATEGORIES + ('phrase_starts',)
+# Tables added after the first stores were built; stores without them read as empty
+_OPTIONAL_TABLES = ('phone_numbers',)
+
+# magic, format fields: build version, created at, longest phrase in words, table count
+_HEADER = struct.Struct('<8sQdII')
+# table name, offset of its hashes, hash count, offset of its filter, filter bits
+_TABLE_ENTRY = struct.Struct('<16sQQQQ')
+
+# Each table has a one-hash bitmap filter in front of the binary search, so most
+# lookups of unknown values cost a crc32 instead of a blake2b digest (about 6% pass)
+FILTER_BITS_PER_ENTRY = 16
+
+# Indicators are matched against whitespace-separated words, without this punctuation
+WORD_PUNCTUATION = '.,;:!?()[]{}<>"\''
+
+URL_PATTERN = re.compile(r'(?:https?://)?(?:www\.)?((?:[a-z0-9-]+\.)+[a-z]{2,})(?:[/?#]\S*)?')
+
+# $cashtag, @handle and payment links like paypal.me/name
+PAYMENT_HANDLE_PATTERN = re.compile(
+    r'\$[a-z][a-z0-9_]{1,19}|@[a-z0-9_.]{3,30}|(?:paypal\.me|venmo\.com|cash\.app)/[\w.-]+')
+
+# Bitcoin legacy and bech32 addresses, Ethereum addresses (matched on lowercased text)
+WALLET_PATTERN = re.compile(r'[13][a-z0-9]{25,34}|bc1[a-z0-9]{25,87}|0x[a-f0-9]{40}')
+
+# A word that can be part of a phone number, like "+1", "555", "123-4567" or "(555)"; a number
+# may span several words, and is looked up by its digits (7 to 15 of them, as in E.164)
+PHONE_WORD_PATTERN = re.compile(r'\+?\(?\d[\d().-]*')
+_PHONE_STARTS = frozenset('+(0123456789')
+PHONE_DIGITS = (7, 15)
+
+
+class ReputationHits(NamedTuple):
+    """Distinct known indicators found in a profile's messages, per category"""
+    known_phrases: int
+    blocked_domains: int
+    payment_handles: int
+    wallets: int
+    phone_numbers: int
+
+
+class Entities(NamedTuple):
+    """Distinct domains, payment handles, wallets and phone numbers (as digits) found in text"""
+    domains: Set[str]
+    payment_handles: Set[str]
+    wallets: Set[str]
+    phone_numbers: Set[str]
+
+
+def _encode(value: str) -> bytes:
+    return value.encode('utf-8', 'surrogatepass')
+
+
+def _digest(data: bytes) -> int:
+    """Stable 64-bit hash of an encoded indicator, identical in every process"""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def normalize_indicator(category: str, value: str) -> str:
+    """The form an indicator is stored and looked up in"""
+    value = value.strip().lower()
+    if category == 'phrases':
+        return " ".join(_words(value))
+    if category == 'domains':
+        match = URL_PATTERN.fullmatch(value)
+        return match.group(1) if match else value
+    if category == 'phone_numbers':
+        return "".join(filter(str.isdigit, value))
+    return value
+
+
+def _filter_bits(count: int) -> int:
+    """Power of two with at least FILTER_BITS_PER_ENTRY bits per entry"""
+    bits = 64
+    while bits < count * FILTER_BITS_PER_ENTRY:
+        bits *= 2
+    return bits
+
+
+def build_store(indicators: Dict[str, Iterable[str]], path: str, version: Optional[int] = None) -> Dict[str, int]:
+    """
+    Write a store file for the indicator lists, replacing path atomically
+    Readers that already mapped the previous file keep using it until they refresh
+    Returns the number of distinct indicators per table
+    """
+    unknown = set(indicators) - set(CATEGORIES)
+    if unknown:
+        raise ValueError(f"Unknown indicator categories: {sorted(unknown)}")
+
+    values: Dict[str, Set[str]] = {name: set() for name in _TABLES}
+    longest_phrase = 0
+    for category in CATEGORIES:
+        for value in indicators.get(category, ()):
+            normalized = normalize_indicator(category, value)
+            if not normalized:
+                continue
+            values[category].add(normalized)
+            if category == 'phrases':
+                words = normalized.split(" ")
+                values['phrase_starts'].add(words[0])
+                longest_phrase = max(longest_phrase, len(words))
+
+    if version is None:
+        version = time.time_ns()
+    header_size = _HEADER.size + _TABLE_ENTRY.size * len(_TABLES)
+    offset = header_size + (-header_size % 8)
+    entries = []
+    sections = []
+    for name in _TABLES:
+        encoded = [value.encode('utf-8', 'surrogatepass') for value in values[name]]
+        hashes = array('Q', sorted({_digest(data) for data in encoded}))
+        if sys.byteorder != 'little':
+            hashes.byteswap()
+        bits = _filter_bits(len(hashes))
+        bitmap = bytearray(bits // 8)
+        for data in encoded:
+            position = zlib.crc32(data) & (bits - 1)
+            bitmap[position >> 3] |= 1 << (position & 7)
+
+        entries.append(_TABLE_ENTRY.pack(name.encode('ascii'), offset, len(hashes), offset + 8 * len(hashes), bits))
+        sections.append(hashes.tobytes() + bytes(bitmap))
+        offset += len(sections[-1])
+
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(prefix='.reputation-', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as output:
+            output.write(_HEADER.pack(MAGIC, version, time.time(), longest_phrase, len(_TABLES)))
+            output.write(b''.join(entries))
+            output.write(b'\0' * (-header_size % 8))
+            for section in sections:
+                output.write(section)
+            output.flush()
+            os.fsync(output.fileno())
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return {name: len(values[name]) for name in _TABLES}
+
+
+class _Table:
+    """Sorted hashes and filter bitmap of one indicator table, as views of the mapped file"""
+
+    __slots__ = ('hashes', 'bitmap', 'mask')
+
+    def __init__(self, mapped: mmap.mmap, offset: int, count: int, filter_offset: int, filter_bits: int):
+        view = memoryview(mapped)
+        if sys.byteorder == 'little':
+            self.hashes = view[offset:offset + 8 * count].cast('Q')
+        else:
+            # Big-endian hosts pay for a private copy
+            self.hashes = array('Q', view[offset:offset + 8 * count])
+            self.hashes.byteswap()
+        self.bitmap = view[filter_offset:filter_offset + filter_bits // 8]
+        self.mask = filter_bits - 1
+
+    @classmethod
+    def empty(cls) -> "_Table":
+        table = cls.__new__(cls)
+        table.hashes, table.bitmap, table.mask = array('Q'), b'\0', 0
+        return table
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def __contains__(self, data: bytes) -> bool:
+        position = zlib.crc32(data) & self.mask
+        if not self.bitmap[position >> 3] >> (position & 7) & 1:
+            return False
+        return self._find(_digest(data))
+
+    def _find(self, key: int) -> bool:
+        index = bisect_left(self.hashes, key)
+        return index < len(self.hashes) and self.hashes[index] == key
+
+    def select(self, values: Iterable[str]) -> List[str]:
+        """The values present in the table, filtering the whole batch before any digest"""
+        if not self.hashes:
+            return []
+        bitmap, mask, crc32 = self.bitmap, self.mask, zlib.crc32
+        passed = [value for value in values
+                  if bitmap[(position := crc32(value.encode('utf-8', 'surrogatepass')) & mask) >> 3] >> (position & 7) & 1]
+        return [value for value in passed if self._find(_digest(_encode(value)))]
+
+
+def _words(text: str) -> List[str]:
+    """Whitespace-separated words without surrounding punctuation"""
+    words = [word.strip(WORD_PUNCTUATION) for word in text.split()]
+    return [word for word in words if word]
+
+
+def _candidates(words: Iterable[str]) -> Tuple[Set[str], Set[str], Set[str]]:
+    """Possible domains, payment handles and wallets among words"""
+    domains: Set[str] = set()
+    handles: Set[str] = set()
+    wallets: Set[str] = set()
+    for word in words:
+        if word[0] in '$@':
+            match = PAYMENT_HANDLE_PATTERN.match(word)
+            if match:
+                handles.add(match.group())
+        elif '.' in word:
+            match = URL_PATTERN.match(word)
+            if match:
+                domains.add(match.group(1))
+                link = PAYMENT_HANDLE_PATTERN.search(word)
+                if link:
+                    handles.add(link.group())
+        elif len(word) >= 26 and WALLET_PATTERN.fullmatch(word):
+            wallets.add(word)
+    return domains, handles, wallets
+
+
+def _phone_numbers(chunks: Iterable[List[str]]) -> Set[str]:
+    """
+    Digits of every run of consecutive phone number words with 7 to 15 digits in all, e.g.
+    "+1 (555) 123-4567" and each number of "555 123 4567 or 555 987 6543". A run can
+    continue into the next chunk, so its words are carried over
+    """
+    least, most = PHONE_DIGITS
+    numbers: Set[str] = set()
+    run: List[str] = []
+    for chunk in chunks:
+        for word in chunk:
+            if word[0] in _PHONE_STARTS and PHONE_WORD_PATTERN.fullmatch(word):
+                run.append("".join(filter(str.isdigit, word)))
+                continue
+            if run:
+                _phone_runs(run, least, most, numbers)
+                run = []
+    if run:
+        _phone_runs(run, least, most, numbers)
+    return numbers
+
+
+def _phone_runs(run: List[str], least: int, most: int, numbers: Set[str]) -> None:
+    for start in range(len(run)):
+        digits = ""
+        for part in run[start:]:
+            digits += part
+            if len(digits) > most:
+                break
+            if len(digits) >= least:
+                numbers.add(digits)
+
+
+def _entities(chunks: List[List[str]], unique: Set[str]) -> Entities:
+    return Entities(*_candidates(unique), _phone_numbers(chunks))
+
+
+def extract_entities(messages: Sequence[str]) -> Entities:
+    """Domains, payment handles, wallets and phone numbers in messages, in one pass over their words"""
+    chunks = [_words(message.lower()) for message in messages]
+    return _entities(chunks, set().union(*chunks))
+
+
+class ReputationSnapshot:
+    """One store file, mapped read-only; lookups binary-search the mapped hash tables"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as source:
+            identity = os.fstat(source.fileno())
+            self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self.identity = (identity.st_dev, identity.st_ino, identity.st_mtime_ns, identity.st_size)
+
+        magic, self.version, self.created_at, self.longest_phrase, table_count = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a reputation store")
+
+        self._tables: Dict[str, _Table] = {}
+        for index in range(table_count):
+            name, *layout = _TABLE_ENTRY.unpack_from(self._map, _HEADER.size + index * _TABLE_ENTRY.size)
+            self._tables[name.rstrip(b'\0').decode('ascii')] = _Table(self._map, *layout)
+        missing = set(_TABLES) - set(self._tables) - set(_OPTIONAL_TABLES)
+        if missing:
+            raise ValueError(f"{path} is missing tables: {sorted(missing)}")
+        for name in _OPTIONAL_TABLES:
+            self._tables.setdefault(name, _Table.empty())
+
+    def __len__(self) -> int:
+        return sum(len(self._tables[category]) for category in CATEGORIES)
+
+    def contains(self, category: str, value: str) -> bool:
+        """Whether value is a known indicator of category"""
+        return _encode(normalize_indicator(category, value)) in self._tables[category]
+
+    def lookup(self, text: str, normalized: Optional[str] = None) -> ReputationHits:
+        """
+        Count the distinct known indicators in already-lowercased text
+        normalized, the same text after TextNormalizer, is searched too, so a disguised
+        phrase, handle or domain still matches; an indicator found in both counts once
+        """
+        return self._lookup([_words(text)], None if normalized is None else [_words(normalized)])
+
+    def lookup_messages(self, messages: Sequence[str], normalized: Optional[Sequence[str]] = None) -> ReputationHits:
+        """
+        Same as lookup(" ".join(messages).lower(), " ".join(normalized)) without building the joined text
+        Words never span messages, so they are read one message at a time
+        """
+        return self._lookup([_words(message.lower()) for message in messages],
+                            None if normalized is None else [_words(message) for message in normalized])
+
+    def _lookup(self, chunks: List[List[str]], normalized: Optional[List[List[str]]] = None) -> ReputationHits:
+        # The same extraction as extract_entities, plus phrase matching over the words
+        unique = set().union(*chunks)
+        entities = _entities(chunks, unique)
+        phrases = self._phrase_candidates(chunks, unique)
+        if normalized is not None and normalized != chunks:
+            # The raw words are kept as well: normalizing would garble wallets and handles with digits
+            normalized_unique = set().union(*normalized)
+            entities = Entities(*(found | more for found, more in zip(entities, _entities(normalized, normalized_unique))))
+            phrases |= self._phrase_candidates(normalized, normalized_unique)
+        return ReputationHits(
+            len(self._tables['phrases'].select(phrases)),
+            self._blocked_domains(entities.domains),
+            len(self._tables['payment_handles'].select(entities.payment_handles)),
+            len(self._tables['wallets'].select(entities.wallets)),
+            len(self._tables['phone_numbers'].select(entities.phone_numbers)),
+        )
+
+    def _phrase_candidates(self, chunks: Iterable[List[str]], unique: Set[str]) -> Set[str]:
+        # Only positions starting with a known first word can begin a phrase
+        first_words = set(self._tables['phrase_starts'].select(unique))
+        if not first_words:
+            return set()
+
+        # A phrase can continue into the next chunk, so the last words are carried over
+        candidates = set()
+        tail: List[str] = []
+        for chunk in chunks:
+            words = tail + chunk
+            for index, word in enumerate(words):
+                if word in first_words:
+                    for length in range(1, min(self.longest_phrase, len(words) - index) + 1):
+                        candidates.add(" ".join(words[index:index + length]))
+            tail = words[-(self.longest_phrase - 1):] if self.longest_phrase > 1 else []
+        return candidates
+
+    def _blocked_domains(self, domains: Set[str]) -> int:
+        # A listed domain also blocks its subdomains
+        parents = set()
+        for domain in domains:
+            labels = domain.split('.')
+            parents.update('.'.join(labels[index:]) for index in range(len(labels) - 1))
+        return len(self._tables['domains'].select(parents))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "version": self.version,
+            "created_at": self.created_at,
+            "bytes": len(self._map),
+            **{category: len(self._tables[category]) for category in CATEGORIES},
+        }
+
+
+class ReputationStore:
+    """
+    The current snapshot of a store file
+    The file is re-checked at most every check_interval seconds; when build_store has
+    replaced it, the new file is mapped and swapped in without a restart
+    """
+
+    def __init__(self, path: str, check_interval: float = 5.0, clock=time.monotonic):
+        self.path = path
+        self.check_interval = check_interval
+        self._clock = clock
+        self._snapshot = ReputationSnapshot(path)
+        self._checked_at = clock()
+        self._lock = threading.Lock()
+        self.swaps = 0
+        self.reload_errors = 0
+
+    def current(self) -> ReputationSnapshot:
+        """The snapshot to use for one assessment"""
+        if self._clock() - self._checked_at >= self.check_interval:
+            self.refresh()
+        return self._snapshot
+
+    def refresh(self) -> bool:
+        """Map the store file again if it was replaced; returns True on a swap"""
+        with self._lock:
+            self._checked_at = self._clock()
+            try:
+                stat = os.stat(self.path)
+                if (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size) == self._snapshot.identity:
+                    return False
+                snapshot = ReputationSnapshot(self.path)
+            except (OSError, ValueError, struct.error):
+                # Keep serving the mapped snapshot until a valid file appears
+                self.reload_errors += 1
+                return False
+            # The previous mapping is released once in-flight lookups drop their reference
+            self._snapshot = snapshot
+            self.swaps += 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._snapshot.stats(), "swaps": self.swaps, "reload_errors": self.reload_errors}
+
+
+def _load_indicators(path: str) -> Dict[str, List[str]]:
+    with open(path, encoding='utf-8') as source:
+        indicators = json.load(source)
+    if not isinstance(indicators, dict) or not all(isinstance(values, list) for values in indicators.values()):
+        raise ValueError("indicator file must map categories to lists of strings")
+    return indicators
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or inspect a reputation store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build a store from a JSON file of indicator lists")
+    build.add_argument("indicators", help=f"JSON object with any of: {', '.join(CATEGORIES)}")
+    build.add_argument("-o", "--output", required=True, help="store file, replaced atomically")
+    build.add_argument("--version", type=int, default=None, help="store version (default: build time in ns)")
+    info = commands.add_parser("info", help="print a store's header and table sizes")
+    info.add_argument("store")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "build":
+            counts = build_store(_load_indicators(args.indicators), args.output, args.version)
+            print(json.dumps(counts), file=sys.stderr)
+        else:
+            print(json.dumps(ReputationSnapshot(args.store).stats(), indent=2))
+    except (OSError, ValueError, struct.error) as e:
+        print(f"reputation: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
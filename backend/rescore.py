@@ -0,0 +1,269 @@
+"""
+Offline rescoring command line tool
+Streams profiles from NDJSON or CSV files (optionally gzipped) through the threat
+detection engine and writes assessments back out one record at a time
+
+Usage:
+    python rescore.py accounts.ndjson.gz -o assessments.ndjson.gz
+    python rescore.py accounts.csv --chunk-size 1000 -o assessments.csv
+    python rescore.py accounts.ndjson.gz --workers 8 -o assessments.ndjson.gz
+    cat accounts.ndjson | python rescore.py - > assessments.ndjson
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import logging
+import sys
+import time
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from engine import ThreatDetectionEngine
+from records import NUMERIC_FIELDS, ProfileRecord, parse_profile, source_id
+
+# Column order for CSV output
+CSV_OUTPUT_FIELDS = ['record', 'id', 'risk_score', 'risk_level', 'confidence', 'explanations', 'error']
+
+# (record number, validated profile or None, error or None); invalid profiles may
+# still carry a bare record holding their source ID
+InputRecord = Tuple[int, Optional[ProfileRecord], Optional[str]]
+
+
+def open_text(path: str, mode: str) -> TextIO:
+    """Open a text stream, handling "-" for stdin/stdout and .gz compression"""
+    if path == '-':
+        return sys.stdin if mode == 'r' else sys.stdout
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, mode + 'b'), encoding='utf-8', newline='')
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def detect_format(path: str) -> str:
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'csv' if name.endswith('.csv') else 'ndjson'
+
+
+def validated_record(record: int, data: Any) -> InputRecord:
+    profile, error = parse_profile(data)
+    if error is not None and isinstance(data, dict):
+        # Keep the source ID so the error can be joined back
+        profile = ProfileRecord(record_id=source_id(data))
+    return record, profile, error
+
+
+def read_ndjson(stream: TextIO) -> Iterator[InputRecord]:
+    """Yield validated profiles from an NDJSON stream, one line at a time"""
+    for record, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            profile = json.loads(line)
+        except ValueError as e:
+            yield record, None, f"Invalid JSON: {e}"
+            continue
+        except RecursionError:
+            yield record, None, "Invalid JSON: nested too deeply"
+            continue
+        yield validated_record(record, profile)
+
+
+def _parse_number(value: str) -> Any:
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def parse_csv_row(row: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Convert a CSV row into a profile dict
+    The messages column holds either a JSON array or a single message; a cell that
+    only looks like an array ("[URGENT] wire money now") is a single message
+    """
+    profile: Dict[str, Any] = {key: value for key, value in row.items() if key and value not in (None, '')}
+
+    for field in NUMERIC_FIELDS:
+        if field in profile:
+            profile[field] = _parse_number(profile[field])
+
+    if 'profile_completed' in profile:
+        profile['profile_completed'] = profile['profile_completed'].strip().lower() in ('1', 'true', 'yes', 'y')
+
+    messages = profile.get('messages', '')
+    profile['messages'] = [messages] if messages else []
+    if messages.startswith('['):
+        try:
+            parsed = json.loads(messages)
+        except (ValueError, RecursionError):
+            parsed = None
+        if isinstance(parsed, list):
+            profile['messages'] = parsed
+
+    return profile
+
+
+def read_csv(stream: TextIO) -> Iterator[InputRecord]:
+    """Yield validated profiles from a CSV stream with a header row"""
+    for record, row in enumerate(csv.DictReader(stream), start=1):
+        try:
+            profile = parse_csv_row(row)
+        except ValueError as e:
+            yield record, None, f"Invalid CSV row: {e}"
+            continue
+        yield validated_record(record, profile)
+
+
+def chunked(records: Iterable[InputRecord], size: int) -> Iterator[List[InputRecord]]:
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _output_record(record: int, profile: Optional[ProfileRecord]) -> Dict[str, Any]:
+    output: Dict[str, Any] = {"record": record}
+    if profile is not None and profile.record_id is not None:
+        output["id"] = profile.record_id
+    return output
+
+
+def score_records(records: Iterable[InputRecord], engine: ThreatDetectionEngine,
+                  chunk_size: int = 500, explain: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Score input records chunk by chunk
+    Yields one output record per input record, in input order; explain=False writes
+    score-only assessments
+    """
+    for chunk in chunked(records, chunk_size):
+        errors = [error for _, _, error in chunk]
+        valid = [profile for (_, profile, _), error in zip(chunk, errors) if error is None]
+        try:
+            assessments = iter(engine.calculate_risk_scores(valid, explain=explain))
+        except Exception:
+            assessments = None
+
+        for (record, profile, _), error in zip(chunk, errors):
+            output = _output_record(record, profile)
+            if error is None:
+                try:
+                    # Fall back to one-by-one scoring if the chunk had malformed values
+                    assessment = next(assessments) if assessments else engine.calculate_risk_score(profile, explain=explain)
+                    output.update(assessment)
+                except Exception as e:
+                    error = f"Analysis failed: {e}"
+            if error is not None:
+                output["error"] = error
+            yield output
+
+
+class ThroughputMeter:
+    """Running counters printed to stderr while a job runs"""
+
+    def __init__(self, interval: float = 5.0, stream: TextIO = sys.stderr):
+        self.interval = interval
+        self.stream = stream
+        self.records = 0
+        self.errors = 0
+        self.started = time.monotonic()
+        self._last_report = self.started
+
+    def update(self, output: Dict[str, Any]) -> None:
+        self.records += 1
+        if "error" in output:
+            self.errors += 1
+        if self.records % 1000 == 0:
+            now = time.monotonic()
+            if now - self._last_report >= self.interval:
+                self._last_report = now
+                self.report()
+
+    def report(self, final: bool = False) -> None:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        label = "done" if final else "progress"
+        self.stream.write(
+            f"[rescore] {label}: {self.records} records, {self.errors} errors, "
+            f"{self.records / elapsed:.0f} records/s, {elapsed:.1f}s elapsed\n"
+        )
+        self.stream.flush()
+
+
+def write_ndjson(outputs: Iterable[Dict[str, Any]], stream: TextIO) -> None:
+    for output in outputs:
+        stream.write(json.dumps(output))
+        stream.write("\n")
+
+
+def write_csv(outputs: Iterable[Dict[str, Any]], stream: TextIO) -> None:
+    writer = csv.DictWriter(stream, fieldnames=CSV_OUTPUT_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for output in outputs:
+        if "explanations" in output:
+            output = dict(output, explanations=json.dumps(output["explanations"]))
+        writer.writerow(output)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Rescore profile dumps with the threat detection engine")
+    parser.add_argument("input", help="NDJSON or CSV file (.gz supported), or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="output file (.ndjson/.csv, .gz supported), default stdout")
+    parser.add_argument("--input-format", choices=["ndjson", "csv"], help="override format detection")
+    parser.add_argument("--output-format", choices=["ndjson", "csv"], help="override format detection")
+    parser.add_argument("--chunk-size", type=int, default=500, help="profiles scored per engine call")
+    parser.add_argument("--score-only", action="store_true", help="skip building explanations")
+    parser.add_argument("--workers", type=int, default=1, help="scoring processes (1 scores in-process)")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="seconds between progress lines")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    input_format = args.input_format or detect_format(args.input)
+    output_format = args.output_format or detect_format(args.output)
+    meter = ThroughputMeter(interval=args.progress_interval)
+
+    scorer = None
+    if args.workers > 1:
+        from parallel import ParallelScorer
+        scorer = ParallelScorer(workers=args.workers, chunk_size=args.chunk_size, explain=not args.score_only)
+    else:
+        from parallel import create_scoring_engine
+        engine = create_scoring_engine()
+
+    source = open_text(args.input, 'r')
+    sink = open_text(args.output, 'w')
+    try:
+        records = read_csv(source) if input_format == 'csv' else read_ndjson(source)
+
+        def counted(outputs: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+            for output in outputs:
+                meter.update(output)
+                yield output
+
+        if scorer is not None:
+            outputs = counted(scorer.score_records(records))
+        else:
+            outputs = counted(score_records(records, engine, chunk_size=args.chunk_size, explain=not args.score_only))
+        if output_format == 'csv':
+            write_csv(outputs, sink)
+        else:
+            write_ndjson(outputs, sink)
+    finally:
+        if scorer is not None:
+            scorer.close()
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+        else:
+            sink.flush()
+
+    meter.report(final=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Response encoding
+Constant payloads are encoded once, with an ETag and a gzip variant. Assessments are
+assembled from pre-encoded fragments for their fixed strings (risk levels, confidence
+explanations, recommended actions), so only the score and explanations are encoded
+per response. Output equals json.dumps(value, sort_keys=True, separators=(',', ':')),
+the compact form jsonify produces
+"""
+
+import gzip
+import hashlib
+import json
+from json.encoder import encode_basestring_ascii
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from rules import CONFIDENCE_EXPLANATIONS, RECOMMENDED_ACTIONS, RISK_LEVELS
+
+# Assessment layouts: full, score-only (explain=False) and fast verdict
+FULL_KEYS = frozenset(
+    ("risk_score", "risk_level", "explanations", "confidence", "confidence_explanation", "recommended_actions",
+     "rules_version"))
+SCORE_ONLY_KEYS = FULL_KEYS - {"explanations"}
+VERDICT_KEYS = frozenset(("risk_level", "recommended_actions", "rules_version"))
+BATCH_KEYS = frozenset(("results", "count", "errors"))
+
+# Composite fragments are memoized up to this many per table
+MAX_FRAGMENTS = 1024
+
+
+def dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header allows gzip"""
+    if not accept_encoding:
+        return False
+    allowed = {}
+    for item in accept_encoding.lower().split(','):
+        coding, _, parameters = item.partition(';')
+        quality = 1.0
+        parameter, _, value = parameters.strip().partition('=')
+        if parameter == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        allowed[coding.strip()] = quality > 0
+    return allowed.get('gzip', allowed.get('*', False))
+
+
+def negotiate(body: bytes, accept_encoding: Optional[str], min_bytes: int, level: int) -> Tuple[bytes, Optional[str]]:
+    """
+    The body to send and its Content-Encoding: gzip when the client accepts it and the
+    body is at least min_bytes long (level 0 never compresses)
+    """
+    if level > 0 and len(body) >= min_bytes and accepts_gzip(accept_encoding):
+        return gzip.compress(body, compresslevel=level, mtime=0), "gzip"
+    return body, None
+
+
+class StaticPayload:
+    """A constant JSON response, encoded and compressed once"""
+
+    __slots__ = ('body', 'gzipped', 'etag')
+
+    def __init__(self, value: Any):
+        self.body = dumps(value).encode('utf-8')
+        self.gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+        # Without the quotes; sent as a weak validator since both encodings share it
+        self.etag = hashlib.blake2b(self.body, digest_size=8).hexdigest()
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header already names this payload"""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(','):
+            tag = tag.strip()
+            if tag == '*' or tag.removeprefix('W/').strip('"') == self.etag:
+                return True
+        return False
+
+
+class ResponseEncoder:
+    """
+    Encodes assessments, and batches of them, from pre-encoded fragments
+    Any other value, or an assessment of unexpected shape, goes through json.dumps
+    """
+
+    def __init__(self):
+        fixed = [level for _, level in RISK_LEVELS]
+        fixed += [explanation for _, explanation in CONFIDENCE_EXPLANATIONS]
+        fixed += [action for _, actions in RECOMMENDED_ACTIONS for action in actions]
+        self._strings = {text: encode_basestring_ascii(text) for text in fixed}
+        # (confidence, explanation) -> '{"confidence":..,"confidence_explanation":..,'
+        self._heads: Dict[Tuple[Any, str], str] = {}
+        # (risk level, *actions) -> '"recommended_actions":[..],"risk_level":..'
+        self._verdicts: Dict[Tuple[str, ...], str] = {}
+
+    def _string(self, text: str) -> str:
+        encoded = self._strings.get(text)
+        return encoded if encoded is not None else encode_basestring_ascii(text)
+
+    def _head(self, confidence: Any, explanation: str) -> str:
+        key = (confidence, explanation)
+        head = self._heads.get(key)
+        if head is None:
+            head = f'{{"confidence":{dumps(confidence)},"confidence_explanation":{self._string(explanation)},'
+            if len(self._heads) < MAX_FRAGMENTS:
+                self._heads[key] = head
+        return head
+
+    def _verdict(self, level: str, actions: Iterable[str]) -> str:
+        key = (level, *actions)
+        verdict = self._verdicts.get(key)
+        if verdict is None:
+            encoded = ",".join(map(self._string, key[1:]))
+            verdict = f'"recommended_actions":[{encoded}],"risk_level":{self._string(level)}'
+            if len(self._verdicts) < MAX_FRAGMENTS:
+                self._verdicts[key] = verdict
+        return verdict
+
+    def assessment(self, assessment: Dict[str, Any]) -> str:
+        keys = assessment.keys()
+        try:
+            if keys == FULL_KEYS or keys == SCORE_ONLY_KEYS:
+                score = assessment["risk_score"]
+                if type(score) is not int and type(score) is not float:
+                    return dumps(assessment)
+                parts = [self._head(assessment["confidence"], assessment["confidence_explanation"])]
+                if "explanations" in assessment:
+                    parts.append(f'"explanations":[{",".join(map(encode_basestring_ascii, assessment["explanations"]))}],')
+                parts.append(self._verdict(assessment["risk_level"], assessment["recommended_actions"]))
+                parts.append(f',"risk_score":{score!r},"rules_version":{self._string(assessment["rules_version"])}}}')
+                return "".join(parts)
+            if keys == VERDICT_KEYS:
+                verdict = self._verdict(assessment["risk_level"], assessment["recommended_actions"])
+                return f'{{{verdict},"rules_version":{self._string(assessment["rules_version"])}}}'
+        except TypeError:
+            # A non-string explanation, level or action
+            pass
+        return dumps(assessment)
+
+    def encode(self, value: Any) -> str:
+        """Compact JSON with sorted keys"""
+        if type(value) is not dict:
+            return dumps(value)
+        keys = value.keys()
+        if keys == BATCH_KEYS and type(value["results"]) is list:
+            return self._batch(value)
+        if keys == FULL_KEYS or keys == SCORE_ONLY_KEYS or keys == VERDICT_KEYS:
+            return self.assessment(value)
+        return dumps(value)
+
+    def _batch(self, batch: Dict[str, Any]) -> str:
+        items = []
+        for result in batch["results"]:
+            if (result.keys() == {"index", "assessment"} and type(result["assessment"]) is dict
+                    and type(result["index"]) is int):
+                items.append(f'{{"assessment":{self.assessment(result["assessment"])},"index":{result["index"]}}}')
+            else:
+                items.append(dumps(result))
+        return f'{{"count":{dumps(batch["count"])},"errors":{dumps(batch["errors"])},"results":[{",".join(items)}]}}'
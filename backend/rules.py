@@ -0,0 +1,542 @@
+"""
+Declarative scoring rules
+Every threshold, weight, cap and explanation template used by the engine lives in the
+tables below; they are compiled once into flat Python functions at startup
+"""
+
+import re
+from bisect import bisect_right
+from string import Formatter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from classifier import ClassifierSignals
+from graph import GraphSignals
+from records import PROFILE_FIELDS
+from reputation import ReputationHits
+from signatures import SCAN_ORDER, SignatureHits
+from velocity import VelocitySignals
+
+# (feature, operator, value). A str value names another feature, and a comparison
+# against True/False tests truthiness, like `if not profile_completed`
+Condition = Tuple[str, str, Any]
+
+OPERATORS = ('<', '<=', '>', '>=', '==', '!=')
+
+# Explanation format specs allowed in templates, e.g. {posts_per_day:.1f}
+FORMAT_SPEC_PATTERN = re.compile(r'[<>=^]?[+\- ]?[0-9]*(\.[0-9]+)?[dfgs%]?')
+
+
+class Rule(NamedTuple):
+    """
+    Adds points when every condition holds
+    points is a number or a feature name; explanation is a str.format template over features
+    """
+    when: Tuple[Condition, ...]
+    points: Union[int, float, str]
+    explanation: Optional[str] = None
+
+
+class RuleSet(NamedTuple):
+    """
+    Independent ladders of rules whose points are summed and capped
+    Within a ladder the first matching rule wins, like an if/elif chain; subscores are
+    nested rule sets computed first and usable as features
+    """
+    cap: Union[int, float]
+    ladders: Tuple[Tuple[Rule, ...], ...]
+    subscores: Tuple[Tuple[str, "RuleSet"], ...] = ()
+
+
+# Features computed from profile fields. They are inlined into the conditions that use
+# them, so a division only runs once the conditions before it have passed
+DERIVED_FEATURES = {
+    'follower_ratio': 'followers / max(following, 1)',
+    'posts_per_day': 'post_count / account_age_days',
+    'followers_x10': 'followers * 10',
+    'followers_mod_100': 'followers % 100',
+}
+
+BEHAVIORAL_RULES = RuleSet(cap=30, ladders=(
+    # Age vs activity correlation
+    (
+        Rule((('account_age_days', '>', 0), ('posts_per_day', '>', 20)), 10),
+        Rule((('account_age_days', '>', 0), ('posts_per_day', '<', 0.01)), 10),
+    ),
+    # Follower patterns
+    (
+        Rule((('following', '>', 'followers_x10'),), 15),
+    ),
+    # Suspicious round numbers
+    (
+        Rule((('followers_mod_100', '==', 0), ('followers', '>', 1000)), 5),
+    ),
+))
+
+METADATA_RULES = RuleSet(cap=70, subscores=(('behavioral_score', BEHAVIORAL_RULES),), ladders=(
+    # Rule 1: New account risk
+    (
+        Rule((('account_age_days', '<', 30),), 30,
+             "Account created {account_age_days} days ago (new accounts are high risk)"),
+        Rule((('account_age_days', '<', 90),), 15,
+             "Account is {account_age_days} days old (relatively new)"),
+    ),
+    # Rule 2: Follower/Following ratio analysis
+    (
+        Rule((('following', '>', 0), ('follower_ratio', '<', 0.01), ('following', '>', 1000)), 25,
+             "Following {following} accounts but only {followers} followers (bot-like behavior)"),
+        Rule((('following', '>', 0), ('follower_ratio', '>', 100), ('followers', '>', 10000)), 20,
+             "Unusually high follower count ({followers}) may indicate fake followers"),
+    ),
+    # Rule 3: Posting behavior analysis
+    (
+        Rule((('account_age_days', '>', 0), ('posts_per_day', '>', 50)), 20,
+             "Posting {posts_per_day:.1f} times per day (abnormally high activity)"),
+        Rule((('account_age_days', '>', 0), ('posts_per_day', '<', 0.01), ('account_age_days', '>', 30)), 10,
+             "Very low posting activity for account age"),
+    ),
+    # Rule 4: Profile completeness
+    (
+        Rule((('profile_completed', '==', False),), 15,
+             "Profile is incomplete (missing key information)"),
+    ),
+    # Rule 5: Behavioral scoring, always counted but only explained above 10 points
+    (
+        Rule((), 'behavioral_score'),
+    ),
+    (
+        Rule((('behavioral_score', '>', 10),), 0,
+             "Behavioral analysis indicates {behavioral_score} risk points from activity patterns"),
+    ),
+))
+
+CONTENT_RULES = RuleSet(cap=30, ladders=(
+    (
+        Rule((('financial', '==', True),), 25,
+             "Messages contain financial requests or money transfer language"),
+    ),
+    (
+        Rule((('personal_info', '==', True),), 20,
+             "Messages request personal or financial information"),
+    ),
+    (
+        Rule((('romance', '==', True),), 30,
+             "Messages show romance scam patterns (emotional manipulation + money requests)"),
+    ),
+    (
+        Rule((('urgency_count', '>=', 2),), 15,
+             "Messages contain multiple urgency indicators (pressure tactics)"),
+    ),
+))
+
+# Cross-account signal: other accounts that recently sent near-copies of the messages
+CAMPAIGN_RULES = RuleSet(cap=25, ladders=(
+    (
+        Rule((('duplicate_accounts', '>=', 10),), 25,
+             "Messages match {duplicate_accounts} other recent accounts (coordinated scam campaign)"),
+        Rule((('duplicate_accounts', '>=', 3),), 15,
+             "Messages closely match {duplicate_accounts} other recent accounts (copy-pasted script)"),
+    ),
+))
+
+# Known indicators from the reputation store found in the messages
+REPUTATION_RULES = RuleSet(cap=40, ladders=(
+    (
+        Rule((('wallets', '>=', 1),), 30,
+             "Messages contain crypto wallet addresses linked to reported scams"),
+    ),
+    (
+        Rule((('payment_handles', '>=', 1),), 25,
+             "Messages contain payment handles linked to reported scams"),
+    ),
+    (
+        Rule((('blocked_domains', '>=', 1),), 25,
+             "Messages link to known scam domains ({blocked_domains})"),
+    ),
+    (
+        Rule((('phone_numbers', '>=', 1),), 25,
+             "Messages contain phone numbers linked to reported scams"),
+    ),
+    (
+        Rule((('known_phrases', '>=', 3),), 15,
+             "Messages contain {known_phrases} known scam phrases"),
+        Rule((('known_phrases', '>=', 1),), 5,
+             "Messages contain known scam phrases"),
+    ),
+))
+
+# Follow-graph signals of the account (see graph.SocialGraph)
+GRAPH_RULES = RuleSet(cap=30, ladders=(
+    (
+        Rule((('ring_accounts', '>=', 10),), 25,
+             "Follows nearly the same accounts as {ring_accounts} other accounts (coordinated bot ring)"),
+        Rule((('ring_accounts', '>=', 3),), 15,
+             "Follows nearly the same accounts as {ring_accounts} other accounts"),
+    ),
+    (
+        Rule((('mutual_follows', '>=', 10), ('cluster_density', '>=', 0.6)), 10,
+             "{mutual_follows} mutual follows are densely interconnected ({cluster_density:.0%}), typical of follow rings"),
+    ),
+    (
+        Rule((('following', '>=', 100), ('reciprocity', '>=', 0.9)), 10,
+             "Follows back {reciprocity:.0%} of followed accounts (follow-for-follow pattern)"),
+    ),
+))
+
+# Windowed activity of the account (see velocity.VelocityTracker); rates are per hour
+VELOCITY_RULES = RuleSet(cap=25, ladders=(
+    (
+        Rule((('recent_events', '>=', 30), ('burst_ratio', '>=', 10)), 20,
+             "Posted {recent_events} times in the last hour, {burst_ratio:.0f}x its usual rate (activity burst)"),
+        Rule((('recent_events', '>=', 15), ('burst_ratio', '>=', 4)), 10,
+             "Posting {burst_ratio:.0f}x faster than its usual rate"),
+    ),
+    (
+        Rule((('peak_rate', '>=', 360),), 10,
+             "Activity peaked at {peak_rate:.0f} posts per hour (automated posting)"),
+    ),
+))
+
+# Statistical message classifier (see classifier.TextClassifier): scam probability of the
+# messages, and the highest-weighted n-grams behind it
+CLASSIFIER_RULES = RuleSet(cap=20, ladders=(
+    (
+        Rule((('probability', '>=', 0.9),), 20,
+             "Message wording closely matches known scams ({probability:.0%} likely; {top_features})"),
+        Rule((('probability', '>=', 0.7),), 10,
+             "Message wording resembles known scams ({probability:.0%} likely; {top_features})"),
+    ),
+))
+
+# Total risk score is the sum of metadata, content, reputation, classifier, campaign, graph and
+# velocity risk, capped
+SCORE_CAP = 100
+
+# (score below, risk level), checked in order; the last level has no bound
+RISK_LEVELS = (
+    (20, "Minimal Risk"),
+    (40, "Low Risk"),
+    (60, "Medium Risk"),
+    (80, "High Risk"),
+    (None, "Critical Risk"),
+)
+
+# confidence = min(cap, base + indicators * per indicator)
+CONFIDENCE = {"base": 0.5, "per_indicator": 0.1, "cap": 0.95}
+
+# (confidence at least, explanation), checked in order
+CONFIDENCE_EXPLANATIONS = (
+    (0.85, "Multiple independent indicators confirm assessment"),
+    (0.70, "Assessment based on established threat patterns"),
+    (None, "Limited data available, manual review recommended"),
+)
+
+# (score at least, actions), checked in order
+RECOMMENDED_ACTIONS = (
+    (80, ("Immediate account restriction recommended", "Manual security review required", "User notification advised")),
+    (60, ("Enhanced monitoring enabled", "Manual review triggered", "User warning recommended")),
+    (40, ("Standard security protocols apply", "Automated logging increased")),
+    (None, ("Normal monitoring continues",)),
+)
+
+SUMMARY_TEMPLATE = "Threat assessment: {indicators} security indicators detected using rule-based analysis"
+
+EXPLANATION_LIMIT = 10
+
+
+# Rule tables a rule set artifact can replace, by CompiledRules argument name
+RULE_TABLES = {
+    "metadata": METADATA_RULES,
+    "content": CONTENT_RULES,
+    "reputation": REPUTATION_RULES,
+    "classifier": CLASSIFIER_RULES,
+    "campaign": CAMPAIGN_RULES,
+    "graph": GRAPH_RULES,
+    "velocity": VELOCITY_RULES,
+}
+
+
+def rules_table(tables: Optional[Dict[str, RuleSet]] = None) -> Dict[str, Any]:
+    """Every table above (with tables replacing RULE_TABLES entries), for fingerprinting the rule set"""
+    return {
+        **RULE_TABLES,
+        **(tables or {}),
+        "score_cap": SCORE_CAP,
+        "risk_levels": RISK_LEVELS,
+        "confidence": CONFIDENCE,
+        "confidence_explanations": CONFIDENCE_EXPLANATIONS,
+        "recommended_actions": RECOMMENDED_ACTIONS,
+        "summary": SUMMARY_TEMPLATE,
+        "explanation_limit": EXPLANATION_LIMIT,
+    }
+
+
+class _RuleCompiler:
+    """Generates the Python source of a rule set evaluator"""
+
+    def __init__(self, inputs: Sequence[str], derived: Dict[str, str]):
+        self.features = {name: name for name in inputs}
+        for name, expression in derived.items():
+            self.features[name] = f"({expression})"
+
+    def feature(self, name: str) -> str:
+        if name not in self.features:
+            raise ValueError(f"Unknown rule feature: {name!r}")
+        return self.features[name]
+
+    def condition(self, condition: Condition) -> str:
+        name, operator, value = condition
+        if operator not in OPERATORS:
+            raise ValueError(f"Unknown rule operator: {operator!r}")
+        feature = self.feature(name)
+
+        if isinstance(value, bool):
+            if operator not in ('==', '!='):
+                raise ValueError(f"Truthiness conditions only support == and !=: {condition!r}")
+            truthy = value == (operator == '==')
+            return feature if truthy else f"not {feature}"
+        if isinstance(value, str):
+            return f"{feature} {operator} {self.feature(value)}"
+        if isinstance(value, (int, float)):
+            return f"{feature} {operator} {value!r}"
+        raise ValueError(f"Unsupported rule value: {condition!r}")
+
+    def explanation(self, template: str) -> str:
+        """Concatenation expression building the explanation string"""
+        parts = []
+        for literal, field, spec, conversion in Formatter().parse(template):
+            if literal:
+                parts.append(repr(literal))
+            if field is None:
+                continue
+            if conversion or not FORMAT_SPEC_PATTERN.fullmatch(spec or ''):
+                raise ValueError(f"Unsupported explanation field in {template!r}")
+            parts.append(f"format({self.feature(field)}, {spec or ''!r})")
+        return " + ".join(parts) or "''"
+
+    def rule_set(self, rules: RuleSet, target: str, mode: str, lines: List[str]) -> None:
+        """
+        Append statements that leave the capped score in target
+        mode is 'explain' (appends to notes), 'count' (increments count) or 'score'
+        """
+        for name, subscore in rules.subscores:
+            self.rule_set(subscore, name, 'score', lines)
+            self.features[name] = name
+
+        lines.append(f"    {target} = 0")
+        for ladder in rules.ladders:
+            for index, rule in enumerate(ladder):
+                test = " and ".join(self.condition(condition) for condition in rule.when) or "True"
+                lines.append(f"    {'if' if index == 0 else 'elif'} {test}:")
+
+                points = self.feature(rule.points) if isinstance(rule.points, str) else repr(rule.points)
+                body = [f"{target} += {points}"] if rule.points != 0 else []
+                if rule.explanation is not None:
+                    note = self.explanation(rule.explanation)
+                    if mode == 'explain':
+                        body.append(f"notes.append({note})")
+                    elif mode == 'count':
+                        body.append("count += 1")
+                lines.extend(f"        {statement}" for statement in body or ["pass"])
+        lines.append(f"    {target} = min({target}, {rules.cap!r})")
+
+
+def _compile_function(name: str, argument: str, prologue: Sequence[str], rules: RuleSet,
+                      inputs: Sequence[str], derived: Dict[str, str], mode: str) -> Callable:
+    compiler = _RuleCompiler(inputs, derived)
+    lines = [f"def {name}({argument}):"]
+    lines.extend(f"    {statement}" for statement in prologue)
+    if mode == 'explain':
+        lines.append("    notes = []")
+    elif mode == 'count':
+        lines.append("    count = 0")
+    compiler.rule_set(rules, "points", mode, lines)
+    lines.append({
+        'explain': "    return points, notes",
+        'count': "    return points, count",
+        'score': "    return points",
+    }[mode])
+
+    source = "\n".join(lines) + "\n"
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, f"<rules:{name}>", "exec"), namespace)
+    function = namespace[name]
+    function.source = source
+    return function
+
+
+class _PartialRuleSet:
+    """
+    Score bounds of a rule set while its features become known one at a time, in order
+    Every ladder is compiled on its own: once all its features are known it adds its
+    exact points, until then it adds the range of points it could still produce
+    """
+
+    def __init__(self, name: str, rules: RuleSet, inputs: Sequence[str], order: Sequence[str]):
+        if rules.subscores:
+            raise ValueError(f"Partial evaluation does not support subscores: {name!r}")
+        self.cap = rules.cap
+        self.order = tuple(order)
+        low = high = 0
+        # Ladders grouped by the step that makes their last feature known
+        self._steps: List[List[Tuple[Callable, Union[int, float], Union[int, float]]]] = [[] for _ in self.order]
+        for index, ladder in enumerate(rules.ladders):
+            points = [rule.points for rule in ladder]
+            if not all(isinstance(value, (int, float)) for value in points):
+                raise ValueError(f"Partial evaluation needs numeric points: {name!r}")
+            features = sorted({feature for rule in ladder for condition in rule.when
+                               for feature in (condition[0], condition[2]) if isinstance(feature, str)})
+            unknown = set(features) - set(self.order)
+            if unknown:
+                raise ValueError(f"Features missing from the evaluation order: {sorted(unknown)}")
+            evaluate = _compile_function(
+                f"{name}_ladder_{index}", "known", [f"{feature} = known[{feature!r}]" for feature in features],
+                RuleSet(cap=max(0, *points), ladders=(ladder,)), inputs, {}, 'score')
+            least, most = min(0, *points), max(0, *points)
+            if not features:
+                least = most = evaluate({})
+            else:
+                self._steps[max(self.order.index(feature) for feature in features)].append((evaluate, least, most))
+            low += least
+            high += most
+        self._start = (low, high)
+        self.range = (min(low, self.cap), min(high, self.cap))
+
+    def start(self) -> List[Union[int, float]]:
+        """Uncapped [low, high] before any feature is known, for advance()"""
+        return list(self._start)
+
+    def advance(self, state: List[Union[int, float]], step: int,
+                known: Dict[str, Any]) -> Tuple[Union[int, float], Union[int, float]]:
+        """Capped (low, high) once known holds the features of order[:step + 1]"""
+        for evaluate, least, most in self._steps[step]:
+            points = evaluate(known)
+            state[0] += points - least
+            state[1] += points - most
+        return min(state[0], self.cap), min(state[1], self.cap)
+
+
+def _threshold_ladder(ladder: Sequence[Tuple[Optional[float], Any]]) -> Tuple[List[float], List[Any]]:
+    """Bounds and outcomes for a "value at least bound" ladder, ascending for bisect"""
+    bounds = [bound for bound, _ in ladder if bound is not None]
+    if bounds != sorted(bounds, reverse=True) or ladder[-1][0] is not None:
+        raise ValueError("Threshold ladders must be descending and end with a default")
+    return bounds[::-1], [outcome for _, outcome in reversed(ladder)]
+
+
+class CompiledRules:
+    """
+    The rule tables compiled into flat evaluators over ProfileRecord, SignatureHits, ReputationHits,
+    ClassifierSignals, GraphSignals and VelocitySignals
+    metadata/content return (points, explanations); the *_score variants return
+    (points, indicator count) and never build explanation strings
+    """
+
+    def __init__(self, metadata: RuleSet = METADATA_RULES, content: RuleSet = CONTENT_RULES,
+                 reputation: RuleSet = REPUTATION_RULES, classifier: RuleSet = CLASSIFIER_RULES,
+                 campaign: RuleSet = CAMPAIGN_RULES, graph: RuleSet = GRAPH_RULES, velocity: RuleSet = VELOCITY_RULES,
+                 version: str = "builtin"):
+        # Recorded in every assessment
+        self.version = version
+        fields = list(PROFILE_FIELDS)
+        prologue = [f"{field} = profile.{field}" for field in PROFILE_FIELDS]
+        self.metadata = _compile_function(
+            "metadata", "profile", prologue, metadata, fields, DERIVED_FEATURES, 'explain')
+        self.metadata_score = _compile_function(
+            "metadata_score", "profile", prologue, metadata, fields, DERIVED_FEATURES, 'count')
+        self.behavioral = _compile_function(
+            "behavioral", "profile", prologue, dict(metadata.subscores)['behavioral_score'],
+            fields, DERIVED_FEATURES, 'score')
+
+        hit_fields = list(SignatureHits._fields)
+        unpack = [f"{', '.join(hit_fields)} = hits"]
+        self.content = _compile_function("content", "hits", unpack, content, hit_fields, {}, 'explain')
+        self.content_score = _compile_function("content_score", "hits", unpack, content, hit_fields, {}, 'count')
+        self.content_partial = _PartialRuleSet("content", content, hit_fields, SCAN_ORDER)
+
+        reputation_fields = list(ReputationHits._fields)
+        unpack = [f"{', '.join(reputation_fields)} = hits"]
+        self.reputation = _compile_function(
+            "reputation", "hits", unpack, reputation, reputation_fields, {}, 'explain')
+        self.reputation_score = _compile_function(
+            "reputation_score", "hits", unpack, reputation, reputation_fields, {}, 'count')
+        self.reputation_range = _PartialRuleSet("reputation", reputation, reputation_fields, reputation_fields).range
+
+        classifier_fields = list(ClassifierSignals._fields)
+        unpack = [f"{', '.join(classifier_fields)} = signals"]
+        self.classifier = _compile_function(
+            "classifier", "signals", unpack, classifier, classifier_fields, {}, 'explain')
+        self.classifier_score = _compile_function(
+            "classifier_score", "signals", unpack, classifier, classifier_fields, {}, 'count')
+        self.classifier_range = _PartialRuleSet("classifier", classifier, classifier_fields, classifier_fields).range
+
+        campaign_fields = ['duplicate_accounts']
+        self.campaign = _compile_function(
+            "campaign", "duplicate_accounts", [], campaign, campaign_fields, {}, 'explain')
+        self.campaign_score = _compile_function(
+            "campaign_score", "duplicate_accounts", [], campaign, campaign_fields, {}, 'count')
+
+        graph_fields = list(GraphSignals._fields)
+        unpack = [f"{', '.join(graph_fields)} = signals"]
+        self.graph = _compile_function("graph", "signals", unpack, graph, graph_fields, {}, 'explain')
+        self.graph_score = _compile_function("graph_score", "signals", unpack, graph, graph_fields, {}, 'count')
+        self.graph_range = _PartialRuleSet("graph", graph, graph_fields, graph_fields).range
+
+        velocity_fields = list(VelocitySignals._fields)
+        unpack = [f"{', '.join(velocity_fields)} = signals"]
+        self.velocity = _compile_function("velocity", "signals", unpack, velocity, velocity_fields, {}, 'explain')
+        self.velocity_score = _compile_function(
+            "velocity_score", "signals", unpack, velocity, velocity_fields, {}, 'count')
+        self.velocity_range = _PartialRuleSet("velocity", velocity, velocity_fields, velocity_fields).range
+
+        # Risk level: score below each bound, so the level index is bisect_right(bounds, score)
+        self._level_bounds = [bound for bound, _ in RISK_LEVELS if bound is not None]
+        self._levels = [level for _, level in RISK_LEVELS]
+        self._action_bounds, self._actions = _threshold_ladder(RECOMMENDED_ACTIONS)
+
+        # Confidence only depends on the indicator count, so precompute it until it saturates
+        explanation_bounds, explanations = _threshold_ladder(CONFIDENCE_EXPLANATIONS)
+        self._confidence: List[Tuple[float, str]] = []
+        while True:
+            confidence = min(CONFIDENCE["cap"], CONFIDENCE["base"] + (len(self._confidence) * CONFIDENCE["per_indicator"]))
+            self._confidence.append(
+                (round(confidence, 2), explanations[bisect_right(explanation_bounds, confidence)]))
+            if confidence >= CONFIDENCE["cap"] or len(self._confidence) > 1000:
+                break
+
+    def assess(self, risk: Union[int, float], explanations: Optional[List[str]],
+               indicator_count: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Final assessment from the summed component risk
+        Pass explanations=None with an indicator_count for a score-only assessment
+        """
+        total_score = min(SCORE_CAP, risk)
+        if explanations is not None:
+            indicator_count = len([e for e in explanations if e])
+        confidence, confidence_explanation = self._confidence[min(indicator_count, len(self._confidence) - 1)]
+
+        assessment = {
+            "risk_score": round(total_score, 1),
+            "risk_level": self._levels[bisect_right(self._level_bounds, total_score)],
+        }
+        if explanations is not None:
+            if total_score > 0:
+                explanations.insert(0, SUMMARY_TEMPLATE.format(indicators=indicator_count))
+            assessment["explanations"] = explanations[:EXPLANATION_LIMIT]
+        assessment["confidence"] = confidence
+        assessment["confidence_explanation"] = confidence_explanation
+        assessment["recommended_actions"] = list(self._actions[bisect_right(self._action_bounds, total_score)])
+        assessment["rules_version"] = self.version
+        return assessment
+
+    def verdict(self, low: Union[int, float], high: Union[int, float]) -> Optional[Dict[str, Any]]:
+        """
+        Risk level and recommended actions shared by every total risk in [low, high],
+        or None while the remaining components could still change them
+        """
+        low, high = min(SCORE_CAP, low), min(SCORE_CAP, high)
+        level = bisect_right(self._level_bounds, low)
+        action = bisect_right(self._action_bounds, low)
+        if level != bisect_right(self._level_bounds, high) or action != bisect_right(self._action_bounds, high):
+            return None
+        return {"risk_level": self._levels[level], "recommended_actions": list(self._actions[action]),
+                "rules_version": self.version}
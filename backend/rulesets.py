@@ -0,0 +1,410 @@
+"""
+Versioned rule sets
+A rule set artifact is a JSON file with a version, the signature families and the rule
+tables of rules.py; a section it leaves out keeps the built-in one. RuleStore compiles a
+replaced artifact on a background thread and swaps it in with one reference assignment,
+so requests never wait for a compile and each assessment is scored by a single version.
+ShadowComparison scores sampled traffic with a candidate rule set next to the active one
+
+Usage:
+    python rulesets.py export -o rules.json --version 2026-10-17.1
+    python rulesets.py check rules.json
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from keyword import iskeyword
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from incremental import IncrementalPlan
+from metrics import PipelineMetrics
+from rules import OPERATORS, RULE_TABLES, CompiledRules, Rule, RuleSet, rules_table
+from signatures import SignatureScanner
+
+logger = logging.getLogger(__name__)
+
+# Signature families, in SignatureScanner argument order
+SIGNATURE_FAMILIES = ('financial', 'personal_info', 'romance', 'urgency')
+
+BUILTIN_VERSION = "builtin"
+
+
+class RuleBundle:
+    """
+    One rule set version compiled for scoring: signature scanner, incremental plan and rule
+    evaluators. fingerprint hashes the content (not the version) and keys cached verdicts
+    """
+
+    def __init__(self, version: str, signatures: Dict[str, Sequence[str]],
+                 tables: Optional[Dict[str, RuleSet]] = None):
+        self.version = version
+        self.signatures = {family: list(signatures[family]) for family in SIGNATURE_FAMILIES}
+        self.tables = {**RULE_TABLES, **(tables or {})}
+        try:
+            self.scanner = SignatureScanner(*(self.signatures[family] for family in SIGNATURE_FAMILIES))
+        except re.error as e:
+            raise ValueError(f"Invalid signature pattern {e.pattern!r}: {e}") from None
+        self.incremental_plan = IncrementalPlan(self.scanner)
+        try:
+            self.rules = CompiledRules(**self.tables, version=version)
+        except KeyError as e:
+            raise ValueError(f"metadata rules need a {e} subscore") from None
+        fingerprinted = [*self.signatures.values(), rules_table(self.tables)]
+        self.fingerprint = hashlib.blake2b(json.dumps(fingerprinted).encode('utf-8'), digest_size=8).hexdigest()
+        self.loaded_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The artifact for this rule set"""
+        return {
+            "version": self.version,
+            "signatures": self.signatures,
+            "rules": {name: rule_set_to_dict(table) for name, table in self.tables.items()},
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"version": self.version, "fingerprint": self.fingerprint, "loaded_at": self.loaded_at}
+
+
+def rule_set_to_dict(rules: RuleSet) -> Dict[str, Any]:
+    data: Dict[str, Any] = {"cap": rules.cap}
+    if rules.subscores:
+        data["subscores"] = {name: rule_set_to_dict(subscore) for name, subscore in rules.subscores}
+    data["ladders"] = [
+        [{"when": [list(condition) for condition in rule.when], "points": rule.points,
+          **({"explanation": rule.explanation} if rule.explanation is not None else {})} for rule in ladder]
+        for ladder in rules.ladders
+    ]
+    return data
+
+
+def _number(value: Any, where: str) -> Any:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{where} must be a finite number")
+    return value
+
+
+def rule_set_from_dict(data: Any, where: str = "rules") -> RuleSet:
+    """
+    Validate an artifact rule table into a RuleSet
+    Feature names are checked when the table is compiled
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("ladders"), list):
+        raise ValueError(f"{where} must be an object with a ladders list")
+    subscores = data.get("subscores", {})
+    if not isinstance(subscores, dict):
+        raise ValueError(f"{where}.subscores must be an object")
+    for name in subscores:
+        # Subscore names become variables in the compiled evaluator
+        if not name.isidentifier() or iskeyword(name):
+            raise ValueError(f"{where}.subscores: {name!r} is not a valid feature name")
+
+    ladders = []
+    for ladder_index, ladder in enumerate(data["ladders"]):
+        if not isinstance(ladder, list):
+            raise ValueError(f"{where}.ladders[{ladder_index}] must be a list of rules")
+        rules = []
+        for rule_index, rule in enumerate(ladder):
+            at = f"{where}.ladders[{ladder_index}][{rule_index}]"
+            if not isinstance(rule, dict) or not isinstance(rule.get("when", []), list):
+                raise ValueError(f"{at} must be an object with a when list")
+            conditions = []
+            for condition in rule.get("when", []):
+                if (not isinstance(condition, list) or len(condition) != 3 or not isinstance(condition[0], str)
+                        or condition[1] not in OPERATORS):
+                    raise ValueError(f"{at}: conditions are [feature, operator, value] with an operator in {OPERATORS}")
+                value = condition[2]
+                if not isinstance(value, (bool, str)):
+                    value = _number(value, f"{at} condition value")
+                conditions.append((condition[0], condition[1], value))
+            points = rule.get("points", 0)
+            if not isinstance(points, str):
+                points = _number(points, f"{at}.points")
+            explanation = rule.get("explanation")
+            if explanation is not None and not isinstance(explanation, str):
+                raise ValueError(f"{at}.explanation must be a string")
+            rules.append(Rule(tuple(conditions), points, explanation))
+        ladders.append(tuple(rules))
+
+    return RuleSet(
+        cap=_number(data.get("cap"), f"{where}.cap"),
+        ladders=tuple(ladders),
+        subscores=tuple((name, rule_set_from_dict(subscore, f"{where}.subscores.{name}"))
+                        for name, subscore in subscores.items()),
+    )
+
+
+def parse_artifact(data: Any, base: RuleBundle) -> RuleBundle:
+    """Compile an artifact; sections it leaves out are taken from base"""
+    if not isinstance(data, dict):
+        raise ValueError("A rule set must be a JSON object")
+    version = data.get("version")
+    if not isinstance(version, str) or not version:
+        raise ValueError("A rule set needs a non-empty version string")
+    unknown = set(data) - {"version", "signatures", "rules"}
+    if unknown:
+        raise ValueError(f"Unknown rule set sections: {', '.join(sorted(unknown))}")
+
+    signatures = dict(base.signatures)
+    supplied = data.get("signatures", {})
+    if not isinstance(supplied, dict):
+        raise ValueError("signatures must map families to pattern lists")
+    for family, patterns in supplied.items():
+        if family not in SIGNATURE_FAMILIES:
+            raise ValueError(f"Unknown signature family {family!r} (expected one of {', '.join(SIGNATURE_FAMILIES)})")
+        if not isinstance(patterns, list) or not all(isinstance(pattern, str) for pattern in patterns):
+            raise ValueError(f"signatures.{family} must be a list of regular expressions")
+        signatures[family] = patterns
+
+    tables = dict(base.tables)
+    supplied = data.get("rules", {})
+    if not isinstance(supplied, dict):
+        raise ValueError("rules must map table names to rule tables")
+    for name, table in supplied.items():
+        if name not in RULE_TABLES:
+            raise ValueError(f"Unknown rule table {name!r} (expected one of {', '.join(RULE_TABLES)})")
+        tables[name] = rule_set_from_dict(table, f"rules.{name}")
+
+    return RuleBundle(version, signatures, tables)
+
+
+def load_artifact(path: str, base: RuleBundle) -> RuleBundle:
+    with open(path, encoding='utf-8') as source:
+        return parse_artifact(json.load(source), base)
+
+
+def _identity(path: str) -> Tuple[int, int, int, int]:
+    stat = os.stat(path)
+    return stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class RuleStore:
+    """
+    The active rule set from an artifact file
+    The file is re-checked at most every check_interval seconds. A replaced file is
+    compiled on a background thread and swapped in once it compiles; requests keep the
+    previous version meanwhile, and an artifact that fails to compile is never swapped in
+    """
+
+    def __init__(self, path: str, base: RuleBundle, check_interval: float = 5.0, clock=time.monotonic):
+        self.path = path
+        self.base = base
+        self.check_interval = check_interval
+        self._clock = clock
+        self._identity = _identity(path)
+        self._bundle = load_artifact(path, base)
+        self._checked_at = clock()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._reloader: Optional[threading.Thread] = None
+        self.swaps = 0
+        self.reload_errors = 0
+        self.last_error: Optional[str] = None
+
+    def current(self) -> RuleBundle:
+        """The rule set to score one assessment with"""
+        if self._clock() - self._checked_at >= self.check_interval:
+            self._start_refresh()
+        return self._bundle
+
+    def _start_refresh(self) -> None:
+        with self._lock:
+            if self._clock() - self._checked_at < self.check_interval:
+                return
+            self._checked_at = self._clock()
+            # Threads do not survive a fork, so a child starts its own
+            if self._reloader is None or not self._reloader.is_alive():
+                self._reloader = threading.Thread(target=self.refresh, name="rules-reload", daemon=True)
+                self._reloader.start()
+
+    def refresh(self) -> bool:
+        """Compile the artifact again if the file was replaced; returns True on a swap"""
+        with self._refresh_lock:
+            try:
+                identity: Optional[Tuple[int, int, int, int]] = _identity(self.path)
+            except OSError:
+                identity = None
+            if identity == self._identity:
+                return False
+            # Remembered before compiling, so a broken or missing file is only reported once
+            self._identity = identity
+            try:
+                bundle = load_artifact(self.path, self.base)
+            except (OSError, ValueError) as e:
+                self.reload_errors += 1
+                self.last_error = str(e)
+                logger.error(f"Keeping rule set {self._bundle.version}: {self.path} did not load: {str(e)}")
+                return False
+            if (bundle.version, bundle.fingerprint) == (self._bundle.version, self._bundle.fingerprint):
+                return False
+            previous, self._bundle = self._bundle, bundle
+            self.swaps += 1
+            logger.info(f"Rule set {previous.version} replaced by {bundle.version} ({bundle.fingerprint})")
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._bundle.stats(), "path": self.path, "swaps": self.swaps,
+                "reload_errors": self.reload_errors, "last_error": self.last_error}
+
+
+# score(rules, profile, context) -> (risk, indicator count), with no side effects
+ShadowScore = Callable[[RuleBundle, Any, Any], Tuple[Any, int]]
+
+
+class ShadowComparison:
+    """
+    Scores a sample of assessments with a candidate rule set next to the active one, on a
+    background thread, and counts risk level disagreements and the scoring time of each.
+    Nothing it computes reaches a response; when it falls behind, samples are dropped
+    """
+
+    def __init__(self, score: ShadowScore, store: RuleStore, sample_rate: float = 1.0, max_queue: int = 1000,
+                 metrics: Optional[PipelineMetrics] = None, sample: Callable[[], float] = random.random):
+        self.score = score
+        self.store = store
+        self.sample_rate = sample_rate
+        self.metrics = metrics
+        self._sample = sample
+        self._queue: "queue.Queue[Tuple[RuleBundle, Any, Any]]" = queue.Queue(maxsize=max_queue)
+        self._worker: Optional[threading.Thread] = None
+        self._worker_pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.submitted = 0
+        self.dropped = 0
+        self.compared = 0
+        self.disagreements = 0
+        self.score_changes = 0
+        self.transitions: Counter = Counter()
+        self.active_seconds = 0.0
+        self.shadow_seconds = 0.0
+
+    def submit(self, active: RuleBundle, profile: Any, context: Any = None) -> bool:
+        """Queue profile for comparison if sampled; returns False if it was not queued"""
+        if self.sample_rate < 1.0 and self._sample() >= self.sample_rate:
+            return False
+        if self._worker_pid != os.getpid():
+            self._ensure_worker()
+        try:
+            self._queue.put_nowait((active, profile, context))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def _ensure_worker(self) -> None:
+        # Started on first use in each process, like the history writer
+        with self._start_lock:
+            if self._worker_pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._reset()
+            self._worker = threading.Thread(target=self._compare_loop, name="rules-shadow", daemon=True)
+            self._worker_pid = os.getpid()
+            self._worker.start()
+
+    def _compare_loop(self) -> None:
+        while True:
+            active, profile, context = self._queue.get()
+            try:
+                self.compare(active, self.store.current(), profile, context)
+            except Exception as e:
+                logger.error(f"Shadow comparison failed: {str(e)}")
+
+    def compare(self, active: RuleBundle, shadow: RuleBundle, profile: Any, context: Any = None) -> bool:
+        """Score profile with both rule sets; returns True when their risk levels differ"""
+        # Alternate which runs first, so neither always meets warm caches
+        order = (active, shadow) if self.compared % 2 == 0 else (shadow, active)
+        results = {}
+        for rules in order:
+            started = time.perf_counter()
+            risk, indicators = self.score(rules, profile, context)
+            results[id(rules)] = (rules.rules.assess(risk, None, indicators), time.perf_counter() - started)
+        (active_assessment, active_seconds), (shadow_assessment, shadow_seconds) = (
+            results[id(active)], results[id(shadow)])
+
+        self.compared += 1
+        self.active_seconds += active_seconds
+        self.shadow_seconds += shadow_seconds
+        disagree = active_assessment["risk_level"] != shadow_assessment["risk_level"]
+        if disagree:
+            self.disagreements += 1
+            self.transitions[f"{active_assessment['risk_level']} -> {shadow_assessment['risk_level']}"] += 1
+        if active_assessment["risk_score"] != shadow_assessment["risk_score"]:
+            self.score_changes += 1
+        if self.metrics is not None:
+            self.metrics.shadow_comparisons.inc("disagree" if disagree else "agree")
+            self.metrics.shadow_seconds.observe(active_seconds, "active")
+            self.metrics.shadow_seconds.observe(shadow_seconds, "shadow")
+        return disagree
+
+    def stats(self) -> Dict[str, Any]:
+        compared = self.compared
+        active_ms = self.active_seconds / compared * 1000 if compared else 0.0
+        shadow_ms = self.shadow_seconds / compared * 1000 if compared else 0.0
+        return {
+            **self.store.stats(),
+            "sample_rate": self.sample_rate,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+            "compared": compared,
+            "disagreements": self.disagreements,
+            "disagreement_rate": round(self.disagreements / compared, 4) if compared else 0.0,
+            "score_changes": self.score_changes,
+            "transitions": dict(self.transitions),
+            "active_ms": round(active_ms, 4),
+            "shadow_ms": round(shadow_ms, 4),
+            "latency_delta_ms": round(shadow_ms - active_ms, 4),
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export or check a rule set artifact")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write the built-in rule set as an artifact to edit")
+    export.add_argument("-o", "--output", required=True)
+    export.add_argument("--version", required=True, help="version recorded in assessments scored with it")
+    check = commands.add_parser("check", help="compile an artifact and print its version and fingerprint")
+    check.add_argument("artifact")
+    args = parser.parse_args(argv)
+
+    # Imported here: the engine imports this module
+    from engine import ThreatDetectionEngine
+    builtin = ThreatDetectionEngine.builtin_rules()
+    try:
+        if args.command == "export":
+            artifact = builtin.to_dict()
+            artifact["version"] = args.version
+            # Written aside and renamed, so running workers never read a partial file
+            temporary = f"{args.output}.tmp"
+            with open(temporary, "w", encoding="utf-8") as output:
+                json.dump(artifact, output, indent=2)
+                output.write("\n")
+            os.replace(temporary, args.output)
+        else:
+            bundle = load_artifact(args.artifact, builtin)
+            changed = [name for name, table in bundle.tables.items() if table != builtin.tables[name]]
+            changed += [family for family, patterns in bundle.signatures.items() if patterns != builtin.signatures[family]]
+            print(json.dumps({**bundle.stats(), "changed_from_builtin": changed}, indent=2))
+    except (OSError, ValueError) as e:
+        print(f"rulesets: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+"""
+Shared verdict cache
+A fixed-size hash table in a memory-mapped file (e.g. under /dev/shm) that every worker
+process on a host maps, so a verdict scored by one worker is served by all of them and
+survives worker recycling. The table is set-associative: a key hashes to one set of
+ways, and a full set drops its least recently used entry
+
+Reads take no lock: each slot carries a checksum, and a read that races a write sees a
+mismatch and counts as a miss. Writers lock one stripe of sets, with a byte-range lock
+on the file (between processes) and a thread lock (within one). Hit/miss counters live
+in the file too, one row per worker process, and stats() adds them up
+"""
+
+import fcntl
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Hashable, Optional
+
+MAGIC = b'SPAVC001'
+
+# magic, sets, ways, slot bytes, generation
+_HEADER = struct.Struct('<8sIIII')
+# key, generation, payload length, expires at (0: never), checksum
+_SLOT = struct.Struct('<16sIIdI4x')
+_ACCESSED = struct.Struct('<d')
+_ACCESSED_OFFSET = _SLOT.size
+_PAYLOAD_OFFSET = _SLOT.size + _ACCESSED.size
+
+# Per-worker counter rows: pid, then one count per name in _COUNTERS
+_COUNTERS = ('hits', 'misses', 'stores', 'evictions', 'expirations', 'oversized', 'invalidations')
+_ROW = struct.Struct('<q' + 'Q' * len(_COUNTERS))
+_COUNT = struct.Struct('<Q')
+MAX_WORKERS = 128
+_ROWS_OFFSET = 64
+_TABLE_OFFSET = 16384
+
+# Writer lock stripes; the byte past the last stripe guards setup and counter rows
+STRIPES = 64
+_SETUP_LOCK = STRIPES
+
+_MISSING = object()
+
+
+def _key_bytes(key: Hashable) -> bytes:
+    if isinstance(key, str) and len(key) == 32:
+        # profile_cache_key is already a 16-byte hash in hex
+        try:
+            return bytes.fromhex(key)
+        except ValueError:
+            pass
+    return hashlib.blake2b(str(key).encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedVerdictCache:
+    """
+    LRUCache-compatible verdict cache shared by every process that opens path
+    Values are (risk, explanations) tuples; one that does not fit in a slot is not cached.
+    Changing max_entries, ways or slot_bytes replaces the file with an empty one
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl_seconds: Optional[float] = None,
+                 ways: int = 8, slot_bytes: int = 1024, clock: Callable[[], float] = time.time):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if ways < 1 or slot_bytes <= _PAYLOAD_OFFSET:
+            raise ValueError(f"ways must be at least 1 and slot_bytes more than {_PAYLOAD_OFFSET}")
+
+        self.path = path
+        self.sets = -(-max_entries // ways)
+        self.ways = ways
+        self.max_entries = self.sets * ways
+        self.slot_bytes = slot_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._size = _TABLE_OFFSET + self.max_entries * slot_bytes
+        self._thread_locks = [threading.Lock() for _ in range(STRIPES + 1)]
+        self._row: Optional[int] = None
+        self._row_pid = 0
+
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            with _StripeLock(fd, _SETUP_LOCK, self._thread_locks[_SETUP_LOCK]):
+                if os.fstat(fd).st_ino != os.stat(path).st_ino:
+                    # Another process swapped in a new file while this one waited for the lock
+                    current = None
+                elif self._matches_geometry(fd):
+                    current = fd
+                else:
+                    current = self._create_file()
+            if current != fd:
+                os.close(fd)
+            if current is not None:
+                break
+        self._fd = current
+        self._map = mmap.mmap(self._fd, self._size)
+
+    def _create_file(self) -> int:
+        """
+        Swap a new, empty table in at path, returning its descriptor. Truncating the file in
+        place would SIGBUS every process that still maps it; those keep the old file instead
+        """
+        directory, name = os.path.split(os.path.abspath(self.path))
+        fd, temporary = tempfile.mkstemp(prefix=f".{name}.", dir=directory)
+        try:
+            os.ftruncate(fd, self._size)
+            os.pwrite(fd, _HEADER.pack(MAGIC, self.sets, self.ways, self.slot_bytes, 1), 0)
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.close(fd)
+            os.unlink(temporary)
+            raise
+        return fd
+
+    def _matches_geometry(self, fd: int) -> bool:
+        if os.fstat(fd).st_size != self._size:
+            return False
+        header = os.pread(fd, _HEADER.size, 0)
+        return header[:-4] == _HEADER.pack(MAGIC, self.sets, self.ways, self.slot_bytes, 0)[:-4]
+
+    def _locked(self, stripe: int):
+        return _StripeLock(self._fd, stripe, self._thread_locks[stripe])
+
+    def _generation(self) -> int:
+        return _HEADER.unpack_from(self._map, 0)[4]
+
+    def _set_offset(self, key: bytes) -> int:
+        return _TABLE_OFFSET + int.from_bytes(key[:8], 'little') % self.sets * self.ways * self.slot_bytes
+
+    def _checksum(self, key: bytes, generation: int, expires_at: float, payload: bytes) -> int:
+        return zlib.crc32(payload, zlib.crc32(_SLOT.pack(key, generation, len(payload), expires_at, 0)))
+
+    def _read(self, offset: int, key: bytes, generation: int, now: float) -> Any:
+        """The value in the slot at offset if it holds key and is current, else _MISSING"""
+        mapped = self._map
+        slot_key, slot_generation, length, expires_at, checksum = _SLOT.unpack_from(mapped, offset)
+        if slot_key != key or not length or length > self.slot_bytes - _PAYLOAD_OFFSET:
+            return _MISSING
+        payload = mapped[offset + _PAYLOAD_OFFSET:offset + _PAYLOAD_OFFSET + length]
+        if self._checksum(slot_key, slot_generation, expires_at, payload) != checksum:
+            # Torn by a concurrent write
+            return _MISSING
+        if slot_generation != generation:
+            return _MISSING
+        if expires_at and expires_at <= now:
+            self._count('expirations')
+            return _MISSING
+        return marshal.loads(payload)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        key_bytes = _key_bytes(key)
+        base = self._set_offset(key_bytes)
+        generation = self._generation()
+        now = self._clock()
+        for way in range(self.ways):
+            offset = base + way * self.slot_bytes
+            if self._map[offset:offset + 16] != key_bytes:
+                continue
+            value = self._read(offset, key_bytes, generation, now)
+            if value is _MISSING:
+                break
+            _ACCESSED.pack_into(self._map, offset + _ACCESSED_OFFSET, now)
+            self._count('hits')
+            return value
+        self._count('misses')
+        return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        risk, explanations = value
+        payload = marshal.dumps((risk, tuple(explanations)))
+        if len(payload) > self.slot_bytes - _PAYLOAD_OFFSET:
+            self._count('oversized')
+            return
+        key_bytes = _key_bytes(key)
+        base = self._set_offset(key_bytes)
+        now = self._clock()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else 0.0
+
+        with self._locked((base - _TABLE_OFFSET) // (self.ways * self.slot_bytes) % STRIPES):
+            generation = self._generation()
+            offset = self._choose_slot(base, key_bytes, generation, now)
+            mapped = self._map
+            # Zero length first, so readers of the half-written slot see a miss
+            _SLOT.pack_into(mapped, offset, key_bytes, generation, 0, expires_at, 0)
+            mapped[offset + _PAYLOAD_OFFSET:offset + _PAYLOAD_OFFSET + len(payload)] = payload
+            _ACCESSED.pack_into(mapped, offset + _ACCESSED_OFFSET, now)
+            _SLOT.pack_into(mapped, offset, key_bytes, generation, len(payload), expires_at,
+                            self._checksum(key_bytes, generation, expires_at, payload))
+        self._count('stores')
+
+    def _choose_slot(self, base: int, key: bytes, generation: int, now: float) -> int:
+        """The way holding key, else a free or stale way, else the least recently used one"""
+        mapped = self._map
+        offsets = range(base, base + self.ways * self.slot_bytes, self.slot_bytes)
+        slots = [_SLOT.unpack_from(mapped, offset) for offset in offsets]
+        for offset, (slot_key, _, length, _, _) in zip(offsets, slots):
+            if slot_key == key and length:
+                return offset
+        for offset, (_, slot_generation, length, expires_at, _) in zip(offsets, slots):
+            if not length or slot_generation != generation or (expires_at and expires_at <= now):
+                return offset
+        self._count('evictions')
+        return min(offsets, key=lambda offset: _ACCESSED.unpack_from(mapped, offset + _ACCESSED_OFFSET)[0])
+
+    def __len__(self) -> int:
+        generation = self._generation()
+        now = self._clock()
+        count = 0
+        for offset in range(_TABLE_OFFSET, self._size, self.slot_bytes):
+            _, slot_generation, length, expires_at, _ = _SLOT.unpack_from(self._map, offset)
+            if length and slot_generation == generation and not (expires_at and expires_at <= now):
+                count += 1
+        return count
+
+    def invalidate(self) -> None:
+        """Drop every entry for all processes, by moving to a new generation"""
+        with self._locked(_SETUP_LOCK):
+            magic, sets, ways, slot_bytes, generation = _HEADER.unpack_from(self._map, 0)
+            _HEADER.pack_into(self._map, 0, magic, sets, ways, slot_bytes, generation % 0xFFFFFFFF + 1)
+        self._count('invalidations')
+
+    def _count(self, name: str) -> None:
+        row = self._claim_row()
+        if row is None:
+            return
+        offset = _ROWS_OFFSET + row * _ROW.size + _COUNT.size * (_COUNTERS.index(name) + 1)
+        # Only this process writes its row, so no lock between processes; threads of one
+        # process racing here can drop an increment, which statistics tolerate
+        _COUNT.pack_into(self._map, offset, _COUNT.unpack_from(self._map, offset)[0] + 1)
+
+    def _claim_row(self) -> Optional[int]:
+        """This process's counter row; a forked child claims its own. None once every row is taken"""
+        pid = os.getpid()
+        if self._row_pid == pid:
+            return self._row
+        with self._locked(_SETUP_LOCK):
+            free = None
+            for row in range(MAX_WORKERS):
+                owner = _ROW.unpack_from(self._map, _ROWS_OFFSET + row * _ROW.size)[0]
+                if owner == pid:
+                    free = row
+                    break
+                if free is None and (owner == 0 or not _pid_alive(owner)):
+                    free = row
+            if free is not None:
+                # A dead worker's counts are kept, so totals survive recycling
+                offset = _ROWS_OFFSET + free * _ROW.size
+                _ROW.pack_into(self._map, offset, pid, *_ROW.unpack_from(self._map, offset)[1:])
+            self._row, self._row_pid = free, pid
+        return free
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+    def stats(self) -> Dict[str, Any]:
+        totals = dict.fromkeys(_COUNTERS, 0)
+        workers = 0
+        for row in range(MAX_WORKERS):
+            pid, *counts = _ROW.unpack_from(self._map, _ROWS_OFFSET + row * _ROW.size)
+            if pid:
+                workers += _pid_alive(pid)
+                for name, count in zip(_COUNTERS, counts):
+                    totals[name] += count
+        lookups = totals['hits'] + totals['misses']
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": totals['hits'],
+            "misses": totals['misses'],
+            "hit_rate": round(totals['hits'] / lookups, 4) if lookups else 0.0,
+            "evictions": totals['evictions'],
+            "expirations": totals['expirations'],
+            "invalidations": totals['invalidations'],
+            "stores": totals['stores'],
+            "oversized": totals['oversized'],
+            "shared": self.path,
+            "workers": workers,
+        }
+
+
+class _StripeLock:
+    """Thread lock plus a one-byte POSIX record lock on the cache file"""
+
+    def __init__(self, fd: int, stripe: int, thread_lock: threading.Lock):
+        self._fd = fd
+        self._stripe = stripe
+        self._thread_lock = thread_lock
+
+    def __enter__(self) -> None:
+        self._thread_lock.acquire()
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, self._stripe)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def __exit__(self, *exc_info: Any) -> None:
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, self._stripe)
+        finally:
+            self._thread_lock.release()
@@ -0,0 +1,232 @@
+"""
+Compiled threat signature scanner
+Builds every signature family once and scans a message corpus in a single pass
+"""
+
+import re
+import time
+from typing import Any, Callable, FrozenSet, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+# Token pass used to decide which signature families can possibly match
+WORD_PATTERN = re.compile(r'\w+')
+
+# Leading alternation group of a signature, e.g. r'\b(send|wire)\s+...'
+LEADING_GROUP_PATTERN = re.compile(r'^\\b\(([^()]*)\)')
+
+# Plain single-word signature, e.g. r'\burgent\b'
+WORD_SIGNATURE_PATTERN = re.compile(r'^\\b(\w+)\\b$')
+
+
+# SignatureHits fields in the order scan_features produces them, cheapest first
+SCAN_ORDER = ('urgency_count', 'financial', 'personal_info', 'romance')
+
+
+class SignatureHits(NamedTuple):
+    """Result of one scan: which signature families matched and urgency count"""
+    financial: bool
+    personal_info: bool
+    romance: bool
+    urgency_count: int
+
+
+class MessageScan(NamedTuple):
+    """
+    Signature state of a single message, reusable across conversations
+    tokens is None for non-ASCII text, which always takes the regex path
+    """
+    tokens: Optional[FrozenSet[str]]
+    financial: bool
+    personal_info: bool
+    romance: bool
+
+
+def _leading_anchors(pattern: str) -> Optional[Set[str]]:
+    """
+    Extract the words a signature must start with
+    Returns None when the signature has no literal leading group
+    """
+    match = LEADING_GROUP_PATTERN.match(pattern)
+    if not match:
+        return None
+
+    anchors = set()
+    for alternative in match.group(1).split('|'):
+        first_word = alternative.split('\\s+', 1)[0]
+        if not re.fullmatch(r'\w+', first_word):
+            return None
+        anchors.add(first_word)
+    return anchors
+
+
+class _SignatureFamily:
+    """One signature family compiled into a single alternation"""
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        self.regex = re.compile('|'.join(f'(?:{p})' for p in self.patterns), re.IGNORECASE)
+
+        # Anchor words let ASCII text skip the family without running the regex
+        anchors: Optional[Set[str]] = set()
+        for pattern in self.patterns:
+            pattern_anchors = _leading_anchors(pattern)
+            if pattern_anchors is None:
+                anchors = None
+                break
+            anchors |= pattern_anchors
+        self.anchors = frozenset(anchors) if anchors is not None else None
+
+    def matches(self, text: str, tokens: Optional[Set[str]]) -> bool:
+        if tokens is not None and self.anchors is not None and self.anchors.isdisjoint(tokens):
+            return False
+        return self.regex.search(text) is not None
+
+
+class _CategoryTimer:
+    """Splits elapsed time between consecutive scan categories"""
+
+    def __init__(self, observe: Callable[[float, str], None]):
+        self.observe = observe
+        self.last = time.perf_counter()
+
+    def lap(self, category: str) -> None:
+        now = time.perf_counter()
+        self.observe(now - self.last, category)
+        self.last = now
+
+
+class SignatureScanner:
+    """
+    Precompiled signature engine shared by every request
+    Produces the same hits as searching each pattern individually
+    """
+
+    def __init__(self, financial: Sequence[str], personal_info: Sequence[str],
+                 romance: Sequence[str], urgency: Sequence[str]):
+        self.financial = _SignatureFamily(financial)
+        self.personal_info = _SignatureFamily(personal_info)
+        self.romance = _SignatureFamily(romance)
+
+        self.urgency_patterns = [re.compile(p, re.IGNORECASE) for p in urgency]
+        urgency_words = [WORD_SIGNATURE_PATTERN.match(p) for p in urgency]
+        if all(urgency_words):
+            self.urgency_words: Optional[frozenset] = frozenset(m.group(1) for m in urgency_words)
+        else:
+            self.urgency_words = None
+
+    def scan(self, text: str, observe: Optional[Callable[[float, str], None]] = None) -> SignatureHits:
+        """
+        Scan already-lowercased text for every signature family at once
+        observe(seconds, category), when given, receives per-category timings
+        """
+        timer = _CategoryTimer(observe) if observe is not None else None
+
+        # Case-insensitive matching only differs from the token pass on non-ASCII text
+        tokens = set(WORD_PATTERN.findall(text)) if text.isascii() else None
+        if timer:
+            timer.lap("tokenize")
+
+        if tokens is not None and self.urgency_words is not None:
+            urgency_count = len(self.urgency_words & tokens)
+        else:
+            urgency_count = sum(1 for regex in self.urgency_patterns if regex.search(text))
+        if timer:
+            timer.lap("urgency")
+
+        financial = self.financial.matches(text, tokens)
+        if timer:
+            timer.lap("financial")
+        personal_info = self.personal_info.matches(text, tokens)
+        if timer:
+            timer.lap("personal_info")
+        romance = self.romance.matches(text, tokens)
+        if timer:
+            timer.lap("romance")
+
+        return SignatureHits(financial, personal_info, romance, urgency_count)
+
+    def scan_features(self, text: str) -> Iterator[Tuple[str, Any]]:
+        """
+        Yield (field, value) for each SignatureHits field of already-lowercased text in
+        SCAN_ORDER, so a caller can stop once the remaining fields cannot matter
+        """
+        tokens = set(WORD_PATTERN.findall(text)) if text.isascii() else None
+        if tokens is not None and self.urgency_words is not None:
+            yield "urgency_count", len(self.urgency_words & tokens)
+        else:
+            yield "urgency_count", sum(1 for regex in self.urgency_patterns if regex.search(text))
+        yield "financial", self.financial.matches(text, tokens)
+        yield "personal_info", self.personal_info.matches(text, tokens)
+        # The romance signatures span the whole text with .*, so they run last
+        yield "romance", self.romance.matches(text, tokens)
+
+    def scan_message(self, text: str, observe: Optional[Callable[[float, str], None]] = None) -> MessageScan:
+        """Scan one already-lowercased message on its own"""
+        timer = _CategoryTimer(observe) if observe is not None else None
+
+        tokens = frozenset(WORD_PATTERN.findall(text)) if text.isascii() else None
+        if timer:
+            timer.lap("tokenize")
+
+        financial = self.financial.matches(text, tokens)
+        if timer:
+            timer.lap("financial")
+        personal_info = self.personal_info.matches(text, tokens)
+        if timer:
+            timer.lap("personal_info")
+        romance = self.romance.matches(text, tokens)
+        if timer:
+            timer.lap("romance")
+
+        return MessageScan(tokens, financial, personal_info, romance)
+
+    def combine(self, texts: List[str], scans: Sequence[MessageScan],
+                observe: Optional[Callable[[float, str], None]] = None) -> SignatureHits:
+        """
+        Merge per-message scans into the hits for " ".join(texts)
+        A hit inside any message is a hit in the joined text; the joined text is only
+        searched when a signature could still match across a message boundary
+        """
+        timer = _CategoryTimer(observe) if observe is not None else None
+
+        tokens: Optional[Set[str]] = set()
+        for scan in scans:
+            if scan.tokens is None:
+                tokens = None
+                break
+            tokens |= scan.tokens
+
+        joined: List[str] = []
+
+        def joined_text() -> str:
+            if not joined:
+                joined.append(" ".join(texts))
+            return joined[0]
+
+        def family_hit(family: _SignatureFamily, hit_in_message: bool) -> bool:
+            if hit_in_message:
+                return True
+            if tokens is not None and family.anchors is not None and family.anchors.isdisjoint(tokens):
+                return False
+            return family.regex.search(joined_text()) is not None
+
+        if timer:
+            timer.lap("tokenize")
+
+        if tokens is not None and self.urgency_words is not None:
+            urgency_count = len(self.urgency_words & tokens)
+        else:
+            urgency_count = sum(1 for regex in self.urgency_patterns if regex.search(joined_text()))
+        if timer:
+            timer.lap("urgency")
+
+        financial = family_hit(self.financial, any(scan.financial for scan in scans))
+        if timer:
+            timer.lap("financial")
+        personal_info = family_hit(self.personal_info, any(scan.personal_info for scan in scans))
+        if timer:
+            timer.lap("personal_info")
+        romance = family_hit(self.romance, any(scan.romance for scan in scans))
+        if timer:
+            timer.lap("romance")
+
+        return SignatureHits(financial, personal_info, romance, urgency_count)
@@ -0,0 +1,8 @@
+import logging
+import os
+import sys
+
+# Modules import each other by name from backend/, as when the app runs there
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+logging.disable(logging.CRITICAL)
@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import pytest
+
+import asgi
+import main
+from demo_data import DEMO_PROFILES
+
+PROFILES = list(DEMO_PROFILES.values())
+
+
+def _scope(method, path, query=b"", headers=()):
+    return {"type": "http", "method": method, "path": path, "query_string": query, "headers": list(headers)}
+
+
+async def _call(method, path, body=b"", query=b"", headers=()):
+    """(status, headers, body) of one request to the ASGI app"""
+    requests = [{"type": "http.request", "body": body, "more_body": False}]
+    messages = []
+
+    async def receive():
+        return requests.pop(0)
+
+    async def send(message):
+        messages.append(message)
+
+    await asgi.app(_scope(method, path, query, headers), receive, send)
+    response_headers = {name.decode(): value.decode() for name, value in messages[0]["headers"]}
+    return messages[0]["status"], response_headers, b"".join(message.get("body", b"") for message in messages[1:])
+
+
+def call(*args, **kwargs):
+    async def run():
+        await asgi.batcher.start()
+        try:
+            return await _call(*args, **kwargs)
+        finally:
+            await asgi.batcher.stop()
+    return asyncio.run(run())
+
+
+@pytest.fixture(scope="module")
+def flask_client():
+    return main.app.test_client()
+
+
+@pytest.mark.parametrize("method, path", [
+    ("POST", "/"), ("DELETE", "/metrics"), ("POST", "/rules"), ("POST", "/demo-data"), ("GET", "/analyze-profile"),
+    ("GET", "/analyze-profiles"), ("GET", "/cache/invalidate"), ("POST", "/cache-stats"), ("POST", "/history"),
+    ("GET", "/activity"), ("GET", "/jobs"), ("POST", "/jobs/abc"), ("GET", "/jobs/abc/cancel"),
+    ("GET", "/nothing-here"), ("OPTIONS", "/nothing-here"), ("GET", "/jobs/abc/other"),
+])
+def test_methods_and_paths_answer_like_flask(flask_client, method, path):
+    status, headers, _ = call(method, path)
+    expected = flask_client.open(path, method=method)
+    assert status == expected.status_code
+    if status == 405:
+        assert set(headers["allow"].split(", ")) == set(expected.headers["Allow"].split(", "))
+
+
+def test_preflight_and_unmatched_paths_use_fixed_metric_labels():
+    assert call("OPTIONS", "/analyze-profile")[0] == 204
+    assert call("OPTIONS", "/jobs/3f9a/results")[0] == 204
+    assert call("GET", "/scan-8c1d")[0] == 404
+    rendered = asgi.pipeline_metrics.render()
+    assert 'route="preflight"' in rendered
+    assert 'route="unmatched"' in rendered
+    assert "3f9a" not in rendered and "8c1d" not in rendered
+
+
+def test_head_answers_like_get_without_a_body():
+    get_status, get_headers, body = call("GET", "/demo-data")
+    status, headers, head_body = call("HEAD", "/demo-data")
+    assert (status, head_body) == (get_status, b"")
+    assert headers["content-length"] == get_headers["content-length"] == str(len(body))
+    assert headers["etag"] == get_headers["etag"]
+
+
+@pytest.mark.parametrize("query", [b"", b"verdict=fast"])
+def test_analyze_profile_matches_flask(flask_client, query):
+    for profile in PROFILES + [{"account_age_days": -1, "messages": ["hi"]}]:
+        status, _, body = call("POST", "/analyze-profile", json.dumps(profile).encode(), query)
+        expected = flask_client.post("/analyze-profile?" + query.decode(), json=profile)
+        assert (status, json.loads(body)) == (expected.status_code, expected.get_json())
+
+
+def test_concurrent_requests_are_scored_in_one_batch():
+    async def run():
+        await asgi.batcher.start()
+        try:
+            batches = asgi.batcher.batches
+            responses = await asyncio.gather(*(_call("POST", "/analyze-profile", json.dumps(profile).encode())
+                                               for profile in PROFILES))
+            return asgi.batcher.batches - batches, responses
+        finally:
+            await asgi.batcher.stop()
+
+    batches, responses = asyncio.run(run())
+    assert batches == 1
+    engine_scores = [asgi.threat_detector.calculate_risk_score(profile)["risk_score"] for profile in PROFILES]
+    assert [json.loads(body)["risk_score"] for _, _, body in responses] == engine_scores
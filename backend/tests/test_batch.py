@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+import main
+from batch import batch_results, parse_ndjson
+from engine import ThreatDetectionEngine
+
+PROFILES = [
+    {"id": "batch-1", "account_age_days": 5, "followers": 3, "following": 2000, "post_count": 400,
+     "messages": ["My darling, I am deployed overseas and need money, send it via Western Union"]},
+    {"id": "batch-2", "account_age_days": 800, "followers": 300, "following": 250, "post_count": 900,
+     "profile_completed": True, "messages": ["Loved the hiking photos from last weekend"]},
+    {"id": "batch-3", "account_age_days": 45, "followers": 20000, "following": 10, "post_count": 50,
+     "messages": ["Guaranteed investment opportunity, reply asap", "urgent, act quickly"]},
+]
+
+
+@pytest.fixture(scope="module")
+def client():
+    return main.app.test_client()
+
+
+def test_results_follow_input_order_with_per_item_errors(client):
+    body = [PROFILES[0], "not a profile", {"id": "batch-4", "account_age_days": "soon", "messages": ["hi"]},
+            PROFILES[1], PROFILES[2]]
+    data = client.post("/analyze-profiles", json=body).get_json()
+    assert (data["count"], data["errors"]) == (5, 2)
+    results = data["results"]
+    assert [result["index"] for result in results] == list(range(5))
+    assert "error" in results[1] and "error" in results[2]
+    singles = [client.post("/analyze-profile", json=profile).get_json() for profile in PROFILES]
+    assert [results[0]["assessment"], results[3]["assessment"], results[4]["assessment"]] == singles
+
+
+def test_explain_false_drops_only_the_explanations(client):
+    full = client.post("/analyze-profiles", json=PROFILES).get_json()["results"]
+    brief = client.post("/analyze-profiles?explain=false", json=PROFILES).get_json()["results"]
+    for result, brief_result in zip(full, brief):
+        result["assessment"].pop("explanations")
+        assert brief_result == result
+
+
+def test_ndjson_body_fails_only_the_bad_lines(client):
+    body = json.dumps(PROFILES[0]) + "\n\n{not json\n" + json.dumps(PROFILES[1]) + "\n"
+    data = client.post("/analyze-profiles", data=body, content_type="application/x-ndjson").get_json()
+    assert (data["count"], data["errors"]) == (3, 1)
+    assert data["results"][1]["error"].startswith("Invalid JSON on line 3")
+    assert parse_ndjson("[" * 100000)[0][1].endswith("nested too deeply")
+
+
+def test_rejected_bodies(client, monkeypatch):
+    assert client.post("/analyze-profiles", json={"profiles": PROFILES}).status_code == 400
+    assert client.post("/analyze-profiles", json=[]).status_code == 400
+    assert client.post("/analyze-profiles", data="[" * 100000, content_type="application/json").status_code == 400
+    monkeypatch.setattr(main, "MAX_BATCH_SIZE", 2)
+    response = client.post("/analyze-profiles", json=PROFILES)
+    assert response.status_code == 413
+    assert "maximum 2" in response.get_json()["error"]
+
+
+def test_batch_scoring_matches_one_at_a_time():
+    batch_engine, single_engine = ThreatDetectionEngine(), ThreatDetectionEngine()
+    assessments = batch_engine.calculate_risk_scores(PROFILES * 2)
+    assert assessments == [single_engine.calculate_risk_score(profile) for profile in PROFILES * 2]
+
+
+def test_batch_results_interleaves_errors_and_assessments():
+    results = batch_results([None, "bad item", None, None], [{"risk_score": 1}, "Analysis failed: boom", {"risk_score": 2}])
+    assert results == [{"index": 0, "assessment": {"risk_score": 1}}, {"index": 1, "error": "bad item"},
+                       {"index": 2, "error": "Analysis failed: boom"}, {"index": 3, "assessment": {"risk_score": 2}}]
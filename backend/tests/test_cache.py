@@ -0,0 +1,63 @@
+import pytest
+
+from cache import LRUCache, profile_cache_key
+from engine import ThreatDetectionEngine
+from records import ProfileRecord
+
+PROFILE = {"id": "u1", "account_age_days": 5, "followers": 3, "following": 2000, "post_count": 400,
+           "messages": ["My darling, send money via Western Union urgently"]}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c"), len(cache)) == (1, 3, 2)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["hit_rate"]) == (3, 1, 1, 0.75)
+    with pytest.raises(ValueError):
+        LRUCache(max_entries=0)
+
+
+def test_entries_expire_after_the_ttl():
+    now = [100.0]
+    cache = LRUCache(ttl_seconds=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    now[0] += 9.9
+    assert cache.get("a") == 1
+    now[0] += 0.1
+    assert cache.get("a", "gone") == "gone"
+    assert (len(cache), cache.stats()["expirations"]) == (0, 1)
+
+
+def test_invalidate_drops_every_entry():
+    cache = LRUCache()
+    cache.put("a", 1)
+    cache.invalidate()
+    assert cache.get("a") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_key_covers_exactly_the_scoring_fields():
+    record = ProfileRecord.from_dict(PROFILE)
+    key = profile_cache_key(record, "rules-1")
+    assert profile_cache_key(ProfileRecord.from_dict(dict(PROFILE, id="u2", bio="x")), "rules-1") == key
+    assert profile_cache_key(ProfileRecord.from_dict(dict(PROFILE, followers=4)), "rules-1") != key
+    assert profile_cache_key(ProfileRecord.from_dict(dict(PROFILE, messages=["hi"])), "rules-1") != key
+    assert profile_cache_key(record, "rules-2") != key
+    assert profile_cache_key(ProfileRecord.from_dict(dict(PROFILE, followers=object()))) is None
+
+
+def test_cached_verdicts_match_fresh_ones():
+    cache = LRUCache()
+    engine, fresh = ThreatDetectionEngine(verdict_cache=cache), ThreatDetectionEngine()
+    first = engine.calculate_risk_score(PROFILE)
+    assert engine.calculate_risk_score(PROFILE) == first == fresh.calculate_risk_score(PROFILE)
+    assert engine.calculate_risk_score(PROFILE, explain=False) == fresh.calculate_risk_score(PROFILE, explain=False)
+    assert (cache.hits, cache.misses, len(cache)) == (2, 1, 1)
+    engine.invalidate_caches()
+    assert engine.calculate_risk_score(PROFILE) == first
+    assert cache.misses == 2
@@ -0,0 +1,104 @@
+import json
+import random
+
+import pytest
+
+from cache import LRUCache
+from classifier import FeatureHasher, TextClassifier, main, parse_label, read_examples, train_model
+from engine import ThreatDetectionEngine
+
+SCAM = ["kindly pay the release fee so your parcel clears customs today",
+        "your account is locked, verify the code we texted to restore access",
+        "claim your reward by paying the small handling charge now",
+        "I can double your savings in a week with my crypto mentor"]
+BENIGN = ["thanks for the recipe, dinner turned out great",
+          "are we still on for the climbing gym on saturday",
+          "congrats on the new job, your team is lucky",
+          "the concert photos came out really well"]
+
+
+def examples(count, seed):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        label = rnd.random() < 0.5
+        pool = SCAM if label else BENIGN
+        yield [rnd.choice(pool) for _ in range(rnd.randint(1, 3))], int(label)
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("classifier") / "classifier.bin")
+    stats = train_model(list(examples(400, seed=1)), path, bits=12, epochs=5, holdout=0.2, version=7)
+    assert stats["holdout"]["accuracy"] == 1.0
+    return path
+
+
+@pytest.fixture(scope="module")
+def model(model_path):
+    return TextClassifier(model_path)
+
+
+def test_trained_model_separates_the_classes(model):
+    scam = model.classify(["Kindly pay the release fee for your parcel"])
+    benign = model.classify(["See you at the climbing gym, thanks for dinner"])
+    assert scam.probability > 0.9 > 0.1 > benign.probability
+    assert scam.top_features.startswith('"')
+    assert model.classify(["kindly pay the fee"], explain=False).top_features == ""
+    assert model.classify([]).probability == 0.0
+    assert (model.version, model.stats()["hash_bits"]) == (7, 12)
+
+
+def test_batch_classification_matches_one_at_a_time(model):
+    batch = [messages for messages, _ in examples(50, seed=2)] + [[SCAM[0]] * 3, [], [" ".join(BENIGN * 200)]]
+    assert model.classify_batch(batch) == [model.classify(messages) for messages in batch]
+
+
+def test_batch_features_respect_the_token_limit():
+    hasher = FeatureHasher(bits=12, max_tokens=12)
+    batch = [[BENIGN[0], SCAM[0]], [SCAM[0], BENIGN[0]], [SCAM[1]] * 4]
+    assert hasher.batch_features(batch) == [hasher.features(messages) for messages in batch]
+
+
+def test_engine_adds_classifier_risk(model):
+    plain, engine = ThreatDetectionEngine(), ThreatDetectionEngine(classifier=model, verdict_cache=LRUCache())
+    profile = {"account_age_days": 400, "post_count": 900, "profile_completed": True, "messages": [SCAM[0]]}
+    assessment = engine.calculate_risk_score(profile)
+    assert assessment["risk_score"] == plain.calculate_risk_score(profile)["risk_score"] + 20
+    assert any(explanation.startswith("Message wording closely matches known scams")
+               for explanation in assessment["explanations"])
+    assert engine.calculate_risk_scores([profile, profile]) == [assessment, assessment]
+    assert engine.fast_verdict(profile)["risk_level"] == assessment["risk_level"]
+
+
+def test_model_files_are_validated(tmp_path, model_path):
+    with open(model_path, "rb") as source:
+        data = source.read()
+    for name, content in (("garbage.bin", b"NOTAMODEL" + data[9:]), ("truncated.bin", data[:1000])):
+        path = tmp_path / name
+        path.write_bytes(content)
+        with pytest.raises(ValueError):
+            TextClassifier(str(path))
+    with pytest.raises(ValueError):
+        train_model([(["only scams"], 1)] * 10, str(tmp_path / "model.bin"), holdout=0)
+
+
+def test_labels_and_exports(tmp_path):
+    assert [parse_label(value) for value in (True, 0, 0.7, " Scam ", "legit", "maybe", None)] == [1, 0, 1, 1, 0, None, None]
+    path = tmp_path / "labeled.ndjson"
+    rows = [{"messages": ["pay the fee"], "label": "scam"}, {"messages": ["hi"], "label": "unknown"},
+            {"messages": "not a list", "label": 1}, {"messages": [1, "thanks"], "label": 0}, ["row"]]
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    assert list(read_examples(str(path))) == [(["pay the fee"], 1), (["thanks"], 0)]
+
+
+def test_cli_trains_and_describes_a_model(tmp_path, capsys):
+    export = tmp_path / "labeled.ndjson"
+    export.write_text("".join(json.dumps({"messages": messages, "is_scam": label}) + "\n"
+                              for messages, label in examples(100, seed=3)))
+    model_path = str(tmp_path / "model.bin")
+    assert main(["train", str(export), "--label-field", "is_scam", "--bits", "10", "-o", model_path,
+                 "--version", "3"]) == 0
+    assert main(["info", model_path]) == 0
+    info = json.loads(capsys.readouterr().out)
+    assert (info["version"], info["hash_bits"], info["training"]["examples"]) == (3, 10, 90)
+    assert main(["info", str(tmp_path / "missing.bin")]) == 1
@@ -0,0 +1,73 @@
+import pytest
+
+from duplicates import DuplicateIndex, message_signature
+from engine import ThreatDetectionEngine
+
+SCRIPT = ("Hello dear, I am a doctor working overseas with the UN and I need your help to move my savings "
+          "before my contract ends next month")
+ENDINGS = ["week", "year", "spring", "summer", "autumn", "winter", "friday", "monday", "sunday", "tuesday"]
+
+
+@pytest.fixture
+def clock():
+    return [1000.0]
+
+
+@pytest.fixture
+def index(clock):
+    return DuplicateIndex(max_entries=100, window_seconds=3600, clock=lambda: clock[0])
+
+
+def test_signature_ignores_case_and_punctuation():
+    assert message_signature("too short to compare") is None
+    assert message_signature(SCRIPT) == message_signature(SCRIPT.upper().replace(",", " ,,"))
+    assert message_signature(SCRIPT) != message_signature("An entirely different message about the weekend "
+                                                          "hike and the photos we took at the lake")
+
+
+def test_copies_from_other_accounts_are_counted(index):
+    assert index.record_messages("a", [SCRIPT]) == 0
+    assert index.record_messages("b", [SCRIPT.upper()]) == 1
+    assert index.record_messages("a", [SCRIPT]) == 1
+    assert index.record_messages(None, [SCRIPT]) == 2
+    assert index.record_messages("c", ["Lovely photos from the lake this weekend, we should all go again soon"]) == 0
+    stats = index.stats()
+    assert (stats["entries"], stats["repeats"], stats["queries"]) == (3, 1, 5)
+
+
+def test_near_copies_are_counted():
+    index = DuplicateIndex(max_accounts=1000)
+    for number, ending in enumerate(ENDINGS):
+        index.record_messages(f"sender-{number}", [SCRIPT.replace("month", ending)])
+    # MinHash banding is probabilistic: each ~0.9 Jaccard near-copy is found with probability about 0.99
+    assert index.record_messages("probe", [SCRIPT]) >= len(ENDINGS) - 3
+
+
+def test_messages_leave_the_index_after_the_window(index, clock):
+    index.record_messages("a", [SCRIPT])
+    clock[0] += 3600
+    assert index.record_messages("b", [SCRIPT]) == 0
+    assert index.stats()["expirations"] == 1
+    assert len(index) == 1
+
+
+def test_oldest_messages_are_evicted_first(clock):
+    index = DuplicateIndex(max_entries=2, max_accounts=2, clock=lambda: clock[0])
+    for account in "abc":
+        index.record_messages(account, [SCRIPT])
+    assert index.stats()["evictions"] == 1
+    assert index.record_messages("d", [SCRIPT]) == 2
+    index.clear()
+    assert (len(index), index.stats()["buckets"]) == (0, 0)
+    with pytest.raises(ValueError):
+        DuplicateIndex(similarity=0)
+
+
+def test_engine_flags_a_copy_pasted_script(index):
+    engine = ThreatDetectionEngine(duplicates=index)
+    profile = {"account_age_days": 400, "profile_completed": True, "messages": [SCRIPT]}
+    baseline = engine.calculate_risk_score(profile)["risk_score"]
+    for account in "abcd":
+        assessment = engine.calculate_risk_score(dict(profile, id=account))
+    assert assessment["risk_score"] == baseline + 15
+    assert "Messages closely match 3 other recent accounts (copy-pasted script)" in assessment["explanations"]
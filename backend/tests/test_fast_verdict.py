@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from cache import LRUCache
+from config import create_engine
+from engine import ThreatDetectionEngine
+from graph import SocialGraph
+from metrics import PipelineMetrics
+from velocity import VelocityTracker
+
+WORDS = ("send wire transfer money funds western union bitcoin emergency urgent help investment guaranteed "
+         "lottery winner ssn password bank account credit card address love darling military overseas "
+         "trust god quickly asap immediately hello the weekend photos").split()
+
+
+def fuzzed_profiles(count, seed):
+    rnd = random.Random(seed)
+    for number in range(count):
+        yield {
+            "id": f"account-{number % 40}",
+            "account_age_days": rnd.choice([0, 10, 45, 120, 800]),
+            "followers": rnd.choice([0, 5, 1000, 1100, 20000]),
+            "following": rnd.randint(0, 3000),
+            "post_count": rnd.randint(0, 5000),
+            "profile_completed": rnd.random() < 0.5,
+            "messages": [" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(0, 6)))
+                         for _ in range(rnd.randint(1, 3))],
+        }
+
+
+def _expected(assessment):
+    return {key: assessment[key] for key in ("risk_level", "recommended_actions", "rules_version")}
+
+
+ENGINES = {
+    "plain": lambda: ThreatDetectionEngine(),
+    "verdict cache": lambda: ThreatDetectionEngine(verdict_cache=LRUCache()),
+    "incremental": lambda: ThreatDetectionEngine(join_limit=16),
+    "service defaults": create_engine,
+}
+
+
+@pytest.mark.parametrize("name", ENGINES)
+def test_fast_verdict_matches_the_full_assessment(name):
+    fast, full = ENGINES[name](), ENGINES[name]()
+    for profile in list(fuzzed_profiles(1500, seed=8)) * 2:
+        assert fast.fast_verdict(profile) == _expected(full.calculate_risk_score(profile)), profile
+
+
+def test_fast_verdict_includes_graph_and_velocity_signals():
+    now = [1_000_000.0]
+    ring = [f"account-{number}" for number in range(12)]
+    engines = []
+    for _ in range(2):
+        graph = SocialGraph()
+        graph.add_edges((account, f"target-{target}") for account in ring for target in range(8))
+        velocity = VelocityTracker(clock=lambda: now[0])
+        velocity.record("account-20", now[0], count=500)
+        engines.append(ThreatDetectionEngine(verdict_cache=LRUCache(), social_graph=graph, velocity=velocity))
+    fast, full = engines
+    assert full.analyze_social_graph({"id": "account-1"}).ring_accounts == 11
+    assert full.analyze_velocity({"id": "account-20"}).recent_events == 500
+    for profile in list(fuzzed_profiles(400, seed=9)) * 2:
+        assert fast.fast_verdict(profile) == _expected(full.calculate_risk_score(profile)), profile
+
+
+def test_exit_stages_are_counted():
+    metrics = PipelineMetrics()
+    engine = ThreatDetectionEngine(metrics=metrics)
+    engine.fast_verdict({"account_age_days": 5, "messages": ["send money now, urgent, asap"]})
+    engine.fast_verdict({"account_age_days": 800, "profile_completed": True, "post_count": 900, "messages": ["hi"]})
+    exits = metrics.fast_verdict_exits.snapshot()
+    assert sum(exits.values()) == 2
+    assert ("content",) not in exits
+
+
+def test_cached_verdicts_answer_without_scanning():
+    metrics = PipelineMetrics()
+    engine = ThreatDetectionEngine(verdict_cache=LRUCache(), metrics=metrics)
+    profiles = list(fuzzed_profiles(200, seed=10))
+    expected = [_expected(engine.calculate_risk_score(profile)) for profile in profiles]
+    assert [engine.fast_verdict(profile) for profile in profiles] == expected
+    assert metrics.fast_verdict_exits.snapshot() == {("cache",): len(profiles)}
@@ -0,0 +1,56 @@
+import pytest
+
+from graph import NO_SIGNALS, GraphSignals, SocialGraph, build_graph
+
+# A follows B, C, D; B and C follow A back and each other; E and F follow what A follows
+EDGES = [("a", "b"), ("a", "c"), ("a", "d"), ("b", "a"), ("c", "a"), ("b", "c"), ("c", "b"),
+         ("e", "b"), ("e", "c"), ("e", "d"), ("f", "b"), ("f", "c"), ("f", "d"), ("a", "a"), ("a", "b")]
+
+
+@pytest.fixture
+def graph(tmp_path):
+    path = str(tmp_path / "graph.bin")
+    assert build_graph(EDGES, path, version=3) == {"accounts": 6, "edges": 13}
+    return SocialGraph(path, ring_min_shared=3)
+
+
+def test_signals_from_the_graph_file(graph):
+    assert graph.signals("a") == GraphSignals(3, 2, 2 / 3, 2, 1.0)
+    assert graph.signals("e") == GraphSignals(3, 0, 0.0, 2, 0.0)
+    assert graph.signals("d") == NO_SIGNALS
+    assert graph.signals("unknown") == NO_SIGNALS
+    assert graph.signals(None) == NO_SIGNALS
+    assert graph.version == 3
+
+
+def test_added_edges_are_read_with_the_file(graph):
+    assert graph.add_edges([("d", "a"), ("a", "b"), ("g", "g"), ("g", "a")]) == 2
+    assert graph.signals("a").mutual_follows == 3
+    assert graph.signals("g") == GraphSignals(1, 0, 0.0, 0, 0.0)
+    assert graph.stats()["accounts"] == 7
+    assert graph.stats()["edges"] == 15
+
+
+def test_added_edges_match_a_rebuild(tmp_path):
+    extra = [("d", "a"), ("g", "b"), ("g", "c"), ("g", "d"), ("b", "g")]
+    path = str(tmp_path / "full.bin")
+    build_graph(EDGES + extra, path)
+    rebuilt = SocialGraph(path, ring_min_shared=3)
+
+    empty = SocialGraph(ring_min_shared=3)
+    empty.add_edges(EDGES + extra)
+    for account in "abcdefg":
+        assert empty.signals(account) == rebuilt.signals(account), account
+
+
+def test_hub_accounts_are_skipped_for_rings(tmp_path):
+    path = str(tmp_path / "graph.bin")
+    build_graph(EDGES, path)
+    assert SocialGraph(path, ring_min_shared=3, hub_followers=2).signals("a").ring_accounts == 0
+
+
+def test_rejects_a_file_that_is_not_a_graph(tmp_path):
+    path = tmp_path / "graph.bin"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        SocialGraph(str(path))
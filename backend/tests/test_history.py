@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from history import BUCKET_SECONDS, HistoryStore, query_arguments
+
+HOUR = BUCKET_SECONDS
+
+
+@pytest.fixture
+def clock():
+    return [1000 * HOUR + 10.0]
+
+
+@pytest.fixture
+def store(tmp_path, clock):
+    store = HistoryStore(str(tmp_path / "history.db"), batch_size=3, flush_interval=0.01, clock=lambda: clock[0])
+    yield store
+    store.close()
+
+
+def _assessment(level, score):
+    return {"risk_level": level, "risk_score": score, "explanations": []}
+
+
+def _record(store, rows):
+    for account, level, score in rows:
+        assert store.record(account, _assessment(level, score))
+    assert store.flush()
+
+
+def test_history_pages_newest_first_with_filters(store):
+    _record(store, [("a", "High Risk", 70), ("b", "Low Risk", 30), ("a", "Low Risk", 25), (7, "High Risk", 65),
+                    (None, "Minimal Risk", 5)])
+    page = store.history(limit=2)
+    assert [item["assessment"]["risk_score"] for item in page["items"]] == [5, 65]
+    rest = store.history(limit=2, cursor=page["next_cursor"])
+    assert [item["assessment"]["risk_score"] for item in rest["items"]] == [25, 30]
+    assert store.history(limit=2, cursor=rest["next_cursor"])["next_cursor"] is None
+    assert [item["account_id"] for item in store.history(risk_level="High Risk")["items"]] == ["7", "a"]
+    assert [item["assessment"]["risk_score"] for item in store.history(account_id="a")["items"]] == [25, 70]
+    assert store.stats()["written"] == 5
+
+
+def test_time_filters_and_hourly_distribution(store, clock):
+    _record(store, [("a", "High Risk", 70), ("b", "Low Risk", 30)])
+    clock[0] += HOUR
+    _record(store, [("c", "High Risk", 80)])
+    start = clock[0] - HOUR
+
+    assert [item["account_id"] for item in store.history(since=start + HOUR)["items"]] == ["c"]
+    assert [item["account_id"] for item in store.history(until=start + 1)["items"]] == ["b", "a"]
+    assert store.history(since=clock[0] + 1)["items"] == []
+
+    distribution = store.distribution()
+    assert distribution["total"] == 3
+    assert distribution["levels"]["High Risk"] == {"count": 2, "average_score": 75.0}
+    assert [bucket["levels"] for bucket in distribution["buckets"]] == [
+        {"High Risk": 1, "Low Risk": 1}, {"High Risk": 1}]
+    assert store.distribution(since=clock[0])["total"] == 1
+
+
+def test_record_drops_rows_when_the_writer_falls_behind(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"), max_queue=1)
+    # As if this process's writer were stuck on a slow disk
+    store._writer_pid = os.getpid()
+    assert store.record("a", _assessment("Low Risk", 30))
+    assert not store.record("b", _assessment("Low Risk", 30))
+    assert (store.stats()["recorded"], store.stats()["dropped"]) == (1, 1)
+
+
+def test_query_arguments():
+    assert query_arguments({"limit": "5", "since": "1.5", "risk_level": "", "x": "1"}, ["limit", "since", "risk_level"]) \
+        == ({"limit": 5, "since": 1.5}, None)
+    assert query_arguments({"cursor": "next"}, ["cursor"]) == (None, "cursor must be an integer")
+    assert query_arguments({"until": "today"}, ["until"]) == (None, "until must be a number")
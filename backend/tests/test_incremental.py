@@ -0,0 +1,52 @@
+import random
+
+from cache import LRUCache
+from engine import ThreatDetectionEngine
+
+WORDS = ("send wire money funds western union urgent emergency help darling love military overseas "
+         "trust god password bank account routing number asap quickly hello the ſend Émergency").split()
+SEPARATORS = [" ", "\n", ", ", ".", ""]
+
+
+def conversations(count, seed):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        yield ["".join(rnd.choice(WORDS) + rnd.choice(SEPARATORS) for _ in range(rnd.randint(0, 4)))
+               for _ in range(rnd.randint(1, 12))]
+
+
+def test_growing_conversation_matches_a_full_rescan():
+    engine = ThreatDetectionEngine(conversations=LRUCache(max_entries=64))
+    rescan = ThreatDetectionEngine()
+    rnd = random.Random(5)
+    for number, messages in enumerate(conversations(300, seed=6)):
+        end = 0
+        while end < len(messages):
+            end = min(len(messages), end + rnd.randint(1, 3))
+            assert engine.analyze_conversation(f"c{number}", messages[:end]) == \
+                rescan.analyze_message_content(messages[:end]), messages[:end]
+
+
+def test_signatures_spanning_messages_are_found():
+    engine = ThreatDetectionEngine(conversations=LRUCache())
+    assert engine.analyze_conversation("c", ["please send"])[0] == 0
+    risk, explanations = engine.analyze_conversation("c", ["please send", "money today"])
+    assert risk == 25
+    assert explanations == ["Messages contain financial requests or money transfer language"]
+
+
+def test_edited_history_starts_the_conversation_over():
+    cache = LRUCache()
+    engine = ThreatDetectionEngine(conversations=cache)
+    engine.analyze_conversation("c", ["send money", "now"])
+    assert engine.analyze_conversation("c", ["hello", "now", "again"]) == (0, [])
+    assert engine.analyze_conversation("c", ["hello", "now", "again", "send"]) == (0, [])
+    assert len(cache) == 1
+
+
+def test_profiles_with_a_conversation_id_score_like_plain_profiles():
+    engine, plain = ThreatDetectionEngine(conversations=LRUCache()), ThreatDetectionEngine()
+    messages = ["hi darling", "I am deployed overseas", "please wire the money", "urgent, asap"]
+    for end in range(1, len(messages) + 1):
+        profile = {"account_age_days": 20, "messages": messages[:end]}
+        assert engine.calculate_risk_score(dict(profile, conversation_id="c1")) == plain.calculate_risk_score(profile)
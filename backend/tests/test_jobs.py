@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from engine import ThreatDetectionEngine
+from jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobLost, JobRunner, JobStore, parse_payload
+
+PROFILES = [
+    {"id": "p1", "account_age_days": 5, "followers": 3, "following": 2000, "post_count": 400,
+     "messages": ["My darling, send money via Western Union urgently"]},
+    {"id": "p2", "account_age_days": 800, "followers": 300, "following": 250, "post_count": 900,
+     "profile_completed": True, "messages": ["Great article, thanks for sharing"]},
+    {"id": "p3", "account_age_days": "soon"},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"), max_queued=2)
+
+
+@pytest.fixture
+def runner(store):
+    runner = JobRunner(store, workers=1, chunk_size=2)
+    yield runner
+    runner.stop()
+
+
+def _ndjson(profiles):
+    return "".join(json.dumps(profile) + "\n" for profile in profiles).encode()
+
+
+def test_parse_payload_accepts_every_body_shape():
+    ndjson = parse_payload(_ndjson(PROFILES), "application/x-ndjson")
+    array = parse_payload(json.dumps(PROFILES).encode(), "application/json")
+    assert [record for record, _, _ in ndjson] == [1, 2, 3]
+    assert [error is None for _, _, error in array] == [True, True, False]
+    assert len(parse_payload(json.dumps(PROFILES[0]).encode(), "application/json")) == 1
+    with pytest.raises(ValueError):
+        parse_payload(b'"profiles"', "application/json")
+    with pytest.raises(ValueError):
+        parse_payload(b"[" * 100000, "application/json")
+
+
+def test_submit_refuses_jobs_beyond_the_queue_limit(store):
+    first = store.submit(b"[]", "application/json")
+    assert first["status"] == QUEUED
+    assert store.submit(b"[]", "application/json") is not None
+    assert store.submit(b"[]", "application/json") is None
+    assert store.depth() == 2
+    assert store.cancel(first["job_id"])["status"] == CANCELLED
+    assert store.depth() == 1
+
+
+def test_runner_scores_a_job_in_input_order(store, runner):
+    job_id = store.submit(_ndjson(PROFILES), "application/x-ndjson")["job_id"]
+    assert runner.process(*store.claim(stale_after=300)) == DONE
+
+    job = store.get(job_id)
+    assert job["status"] == DONE
+    assert job["progress"] == {"done": 3, "total": 3, "errors": 1, "fraction": 1.0}
+    page = store.results(job_id, limit=2)
+    assert page["next_offset"] == 2
+    items = page["items"] + store.results(job_id, offset=2)["items"]
+    assert [item["id"] for item in items] == ["p1", "p2", "p3"]
+    assert "error" in items[2]
+    assert store.results(job_id, offset=-5, limit=2) == page
+
+    engine = ThreatDetectionEngine()
+    for item, profile in zip(items[:2], PROFILES):
+        assert item["risk_score"] == engine.calculate_risk_score(profile)["risk_score"]
+
+
+def test_nested_payload_fails_the_job(store, runner):
+    job_id = store.submit(b"[" * 100000, "application/json")["job_id"]
+    assert runner.process(*store.claim(stale_after=300)) == FAILED
+    job = store.get(job_id)
+    assert job["status"] == FAILED
+    assert job["error"].startswith("Invalid job payload")
+    assert runner.stats()["failed"] == 1
+
+
+def test_reclaimed_job_is_lost_to_the_first_runner(tmp_path):
+    now = [1000.0]
+    store = JobStore(str(tmp_path / "jobs.db"), clock=lambda: now[0])
+    job_id = store.submit(_ndjson(PROFILES), "application/x-ndjson")["job_id"]
+    _, first, *_ = store.claim(stale_after=60)
+    store.start(job_id, first, 3)
+    assert store.claim(stale_after=60) is None
+
+    now[0] += 61
+    _, second, *_ = store.claim(stale_after=60)
+    with pytest.raises(JobLost):
+        store.progress(job_id, first, 0, [{"id": "p1"}])
+    with pytest.raises(JobLost):
+        store.start(job_id, first, 3)
+    assert not store.finish(job_id, first, DONE)
+
+    store.progress(job_id, second, 0, [{"id": "p1"}])
+    assert store.get(job_id)["status"] == RUNNING
+    assert store.finish(job_id, second, DONE)
+    assert store.results(job_id)["items"] == [{"id": "p1"}]
+
+
+def test_cancel_stops_a_running_job(store):
+    job_id = store.submit(_ndjson(PROFILES), "application/x-ndjson")["job_id"]
+    _, claim, *_ = store.claim(stale_after=300)
+    assert store.cancel(job_id)["cancel_requested"] is True
+    assert store.progress(job_id, claim, 0, [{"id": "p1"}]) is True
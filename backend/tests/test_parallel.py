@@ -0,0 +1,32 @@
+import random
+
+from parallel import ParallelScorer, create_scoring_engine
+from rescore import score_records, validated_record
+
+SCRIPT = "my darling I am a doctor deployed overseas and need money for the ticket, please help"
+
+
+def near_duplicates(count, seed):
+    """Profiles of distinct accounts sending copies of one script with a word or two changed"""
+    rnd = random.Random(seed)
+    profiles = []
+    for index in range(count):
+        words = SCRIPT.split()
+        for _ in range(rnd.randint(0, 2)):
+            words[rnd.randrange(len(words))] = rnd.choice(["dear", "honey", "urgent", "soon", "now"])
+        profiles.append({"id": f"account-{index}", "account_age_days": rnd.randint(1, 400),
+                         "followers": rnd.randint(0, 500), "following": rnd.randint(0, 500),
+                         "post_count": rnd.randint(0, 300), "messages": [" ".join(words)]})
+    return profiles
+
+
+def _records(profiles):
+    return [validated_record(record, profile) for record, profile in enumerate(profiles, start=1)]
+
+
+def test_bulk_scores_do_not_depend_on_workers_or_chunking():
+    profiles = near_duplicates(300, seed=11)
+    expected = list(score_records(_records(profiles), create_scoring_engine(), chunk_size=300))
+    for workers, chunk_size in ((1, 25), (3, 10)):
+        with ParallelScorer(workers=workers, chunk_size=chunk_size) as scorer:
+            assert list(scorer.score_records(_records(profiles))) == expected, (workers, chunk_size)
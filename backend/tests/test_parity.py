@@ -0,0 +1,226 @@
+"""
+Compiled scanner and rules against the original per-pattern regex loop
+The reference below is the scoring the engine shipped with, one re.search per pattern
+over the joined, lowercased messages; every engine path must give the same results
+"""
+
+import random
+import re
+
+import pytest
+
+from cache import LRUCache
+from config import create_engine
+from engine import ThreatDetectionEngine
+from normalize import TextNormalizer
+
+FINANCIAL_KEYWORDS = [
+    r'\b(send|wire|transfer)\s+(money|cash|funds)\b',
+    r'\b(western\s+union|moneygram|bitcoin|paypal)\b',
+    r'\b(emergency|urgent|immediate)\s+(help|assistance|money|funds)\b',
+    r'\b(investment|trading|profit|returns)\s+(opportunity|guaranteed)\b',
+    r'\b(lottery|winner|prize|inheritance)\b'
+]
+PERSONAL_INFO_KEYWORDS = [
+    r'\b(ssn|social\s+security|bank\s+account|routing\s+number)\b',
+    r'\b(credit\s+card|debit\s+card|pin\s+code|password)\b',
+    r'\b(full\s+name|address|phone\s+number|date\s+of\s+birth)\b'
+]
+ROMANCE_SCAM_KEYWORDS = [
+    r'\b(love|darling|honey|sweetheart)\b.*\b(money|help|emergency)\b',
+    r'\b(military|deployed|overseas|doctor|engineer)\b.*\b(money|funds)\b',
+    r'\b(trust|faith|god)\b.*\b(send|transfer|help)\b'
+]
+URGENCY_KEYWORDS = [r'\burgent\b', r'\bemergency\b', r'\bquickly\b', r'\basap\b', r'\bimmediately\b']
+
+WORDS = ("send wire transfer money cash funds western union moneygram bitcoin paypal emergency urgent "
+         "immediate help assistance investment trading profit returns opportunity guaranteed lottery "
+         "winner prize inheritance ssn social security bank account routing number credit card debit "
+         "pin code password full name address phone date of birth love darling honey sweetheart "
+         "military deployed overseas doctor engineer trust faith god quickly asap immediately hello "
+         "the a ſend ﬁ Émergency K sendmoney love-money s3nd m0ney ca$h p4ssw0rd urg3nt 5pm").split()
+SEPARATORS = [' ', '  ', '\n', ', ', '.', '-', '\t']
+
+
+def reference_content(messages):
+    risk_points = 0
+    explanations = []
+    combined_text = " ".join(messages).lower()
+    for patterns, points, explanation in (
+            (FINANCIAL_KEYWORDS, 25, "Messages contain financial requests or money transfer language"),
+            (PERSONAL_INFO_KEYWORDS, 20, "Messages request personal or financial information"),
+            (ROMANCE_SCAM_KEYWORDS, 30,
+             "Messages show romance scam patterns (emotional manipulation + money requests)")):
+        for pattern in patterns:
+            if re.search(pattern, combined_text, re.IGNORECASE):
+                risk_points += points
+                explanations.append(explanation)
+                break
+    urgency_count = sum(1 for pattern in URGENCY_KEYWORDS if re.search(pattern, combined_text, re.IGNORECASE))
+    if urgency_count >= 2:
+        risk_points += 15
+        explanations.append("Messages contain multiple urgency indicators (pressure tactics)")
+    return min(risk_points, 30), explanations
+
+
+def reference_behavioral(profile):
+    score = 0
+    account_age_days = profile.get('account_age_days', 0)
+    followers = profile.get('followers', 0)
+    following = profile.get('following', 0)
+    post_count = profile.get('post_count', 0)
+    if account_age_days > 0:
+        activity_ratio = post_count / account_age_days
+        if activity_ratio > 20 or activity_ratio < 0.01:
+            score += 10
+    if following > followers * 10:
+        score += 15
+    if followers % 100 == 0 and followers > 1000:
+        score += 5
+    return min(score, 30)
+
+
+def reference_metadata(profile):
+    risk_points = 0
+    explanations = []
+    account_age_days = profile.get('account_age_days', 0)
+    followers = profile.get('followers', 0)
+    following = profile.get('following', 0)
+    post_count = profile.get('post_count', 0)
+
+    if account_age_days < 30:
+        risk_points += 30
+        explanations.append(f"Account created {account_age_days} days ago (new accounts are high risk)")
+    elif account_age_days < 90:
+        risk_points += 15
+        explanations.append(f"Account is {account_age_days} days old (relatively new)")
+
+    if following > 0:
+        ratio = followers / max(following, 1)
+        if ratio < 0.01 and following > 1000:
+            risk_points += 25
+            explanations.append(f"Following {following} accounts but only {followers} followers (bot-like behavior)")
+        elif ratio > 100 and followers > 10000:
+            risk_points += 20
+            explanations.append(f"Unusually high follower count ({followers}) may indicate fake followers")
+
+    if account_age_days > 0:
+        posts_per_day = post_count / account_age_days
+        if posts_per_day > 50:
+            risk_points += 20
+            explanations.append(f"Posting {posts_per_day:.1f} times per day (abnormally high activity)")
+        elif posts_per_day < 0.01 and account_age_days > 30:
+            risk_points += 10
+            explanations.append("Very low posting activity for account age")
+
+    if not profile.get('profile_completed', False):
+        risk_points += 15
+        explanations.append("Profile is incomplete (missing key information)")
+
+    behavioral_score = reference_behavioral(profile)
+    risk_points += behavioral_score
+    if behavioral_score > 10:
+        explanations.append(f"Behavioral analysis indicates {behavioral_score} risk points from activity patterns")
+    return min(risk_points, 70), explanations
+
+
+def reference_risk_score(profile):
+    metadata_risk, explanations = reference_metadata(profile)
+    content_risk, content_explanations = reference_content(profile.get('messages', []))
+    explanations.extend(content_explanations)
+    total_score = min(100, metadata_risk + content_risk)
+
+    levels = ((20, "Minimal Risk"), (40, "Low Risk"), (60, "Medium Risk"), (80, "High Risk"))
+    risk_level = next((level for bound, level in levels if total_score < bound), "Critical Risk")
+    confidence = min(0.95, 0.5 + len(explanations) * 0.1)
+    if confidence >= 0.85:
+        confidence_explanation = "Multiple independent indicators confirm assessment"
+    elif confidence >= 0.70:
+        confidence_explanation = "Assessment based on established threat patterns"
+    else:
+        confidence_explanation = "Limited data available, manual review recommended"
+    if total_score > 0:
+        explanations.insert(0, f"Threat assessment: {len(explanations)} security indicators detected "
+                               f"using rule-based analysis")
+
+    if total_score >= 80:
+        recommended_actions = ["Immediate account restriction recommended", "Manual security review required",
+                               "User notification advised"]
+    elif total_score >= 60:
+        recommended_actions = ["Enhanced monitoring enabled", "Manual review triggered", "User warning recommended"]
+    elif total_score >= 40:
+        recommended_actions = ["Standard security protocols apply", "Automated logging increased"]
+    else:
+        recommended_actions = ["Normal monitoring continues"]
+    return {
+        "risk_score": round(total_score, 1),
+        "risk_level": risk_level,
+        "explanations": explanations[:10],
+        "confidence": round(confidence, 2),
+        "confidence_explanation": confidence_explanation,
+        "recommended_actions": recommended_actions,
+    }
+
+
+def fuzzed_profiles(count, seed):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        messages = ["".join(rnd.choice(WORDS) + rnd.choice(SEPARATORS) for _ in range(rnd.randint(0, 8)))
+                    for _ in range(rnd.randint(0, 3))]
+        if rnd.random() < 0.3:
+            messages = [message.upper() for message in messages]
+        yield {
+            "account_age_days": rnd.randint(0, 400),
+            "followers": rnd.choice([0, 5, 1000, 1100, 20000]),
+            "following": rnd.randint(0, 3000),
+            "post_count": rnd.randint(0, 5000),
+            "profile_completed": rnd.random() < 0.5,
+            "messages": messages,
+        }
+
+
+ENGINES = {
+    "joined": lambda: ThreatDetectionEngine(),
+    "message cache": lambda: ThreatDetectionEngine(message_cache=LRUCache(max_entries=256)),
+    "incremental": lambda: ThreatDetectionEngine(join_limit=16),
+    "service defaults": create_engine,
+}
+
+
+def _without_version(assessment):
+    assessment.pop("rules_version")
+    return assessment
+
+
+@pytest.mark.parametrize("path", ENGINES)
+def test_message_content_matches_reference(path):
+    engine = ENGINES[path]()
+    for profile in fuzzed_profiles(5000, seed=1):
+        messages = profile["messages"]
+        assert engine.analyze_message_content(messages) == reference_content(messages), messages
+
+
+@pytest.mark.parametrize("path", ENGINES)
+def test_risk_score_matches_reference(path):
+    engine = ENGINES[path]()
+    for profile in fuzzed_profiles(2000, seed=2):
+        assert engine.analyze_profile_metadata(profile) == reference_metadata(profile), profile
+        assert _without_version(engine.calculate_risk_score(profile)) == reference_risk_score(profile), profile
+
+
+def test_batch_scoring_matches_reference():
+    engine = ThreatDetectionEngine()
+    profiles = list(fuzzed_profiles(500, seed=3))
+    for start in range(0, len(profiles), 64):
+        batch = profiles[start:start + 64]
+        assessments = [_without_version(assessment) for assessment in engine.calculate_risk_scores(batch)]
+        assert assessments == [reference_risk_score(profile) for profile in batch]
+
+
+@pytest.mark.parametrize("join_limit", [65536, 16])
+def test_normalized_scoring_matches_reference_on_normalized_text(join_limit):
+    normalize = TextNormalizer().normalize
+    engine = ThreatDetectionEngine(normalizer=TextNormalizer(), join_limit=join_limit)
+    for profile in fuzzed_profiles(2000, seed=4):
+        normalized = dict(profile, messages=[normalize(message) for message in profile["messages"]])
+        assert _without_version(engine.calculate_risk_score(profile)) == reference_risk_score(normalized), profile
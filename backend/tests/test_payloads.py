@@ -0,0 +1,74 @@
+import io
+import json
+import random
+
+import pytest
+
+from payloads import PayloadLimits, PayloadTooLarge, ProfileParser, check_messages, read_profile
+
+LIMITS = PayloadLimits(max_bytes=4096, max_messages=4, max_message_chars=50)
+
+PROFILE = {"id": "p1", "account_age_days": 8.5, "followers": -3, "profile_completed": True, "bio": None,
+           "messages": ["café ☃ \"quoted\" \\ \n", "second", 7], "tags": {"a": [1, {"b": []}]},
+           "account_age_days ": 1e3}
+
+
+def _parse(body, limits=LIMITS, chunk_size=None):
+    parser = ProfileParser(limits)
+    chunk_size = chunk_size or len(body) or 1
+    for start in range(0, len(body), chunk_size):
+        parser.feed(body[start:start + chunk_size])
+    return parser.close()
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1, 2, 3, 7])
+def test_matches_json_loads_for_any_chunking(chunk_size):
+    for body in (json.dumps(PROFILE), json.dumps(PROFILE, indent=2, ensure_ascii=False),
+                 '{"a": 1, "a": 2, "messages": []}', '  {}  '):
+        encoded = body.encode()
+        assert _parse(encoded, chunk_size=chunk_size) == json.loads(body)
+
+
+def test_numbers_split_across_chunks():
+    rnd = random.Random(5)
+    for _ in range(200):
+        body = json.dumps({"followers": rnd.randint(0, 10 ** 9), "score": rnd.random() * 10 ** rnd.randint(-5, 5)})
+        assert _parse(body.encode(), chunk_size=rnd.randint(1, 6)) == json.loads(body)
+
+
+@pytest.mark.parametrize("body", [b"", b"[]", b'"profile"', b'{"a": 1', b'{"a": 1} x', b'{"a" 1}',
+                                  b'{"messages": [1,]}', b"\xff{}"])
+def test_rejects_anything_but_one_object(body):
+    with pytest.raises(ValueError):
+        _parse(body)
+
+
+def test_limits_raise_payload_too_large():
+    with pytest.raises(PayloadTooLarge):
+        _parse(json.dumps({"messages": ["m"] * 5}).encode())
+    with pytest.raises(PayloadTooLarge):
+        _parse(json.dumps({"messages": ["m" * 51]}).encode(), chunk_size=8)
+    with pytest.raises(PayloadTooLarge):
+        _parse(json.dumps({"bio": "x" * 5000}).encode(), chunk_size=1024)
+    with pytest.raises(PayloadTooLarge):
+        read_profile(io.BytesIO(b"{}"), LIMITS, length=LIMITS.max_bytes + 1)
+
+
+def test_deeply_nested_values_are_malformed_not_fatal():
+    limits = PayloadLimits(max_bytes=1 << 20, max_messages=4, max_message_chars=50)
+    for body in ('{"tags": ' + "[" * 100000 + "]" * 100000 + "}", '{"messages": [' + "[" * 100000 + "]" * 100000 + "]}"):
+        with pytest.raises(ValueError) as error:
+            read_profile(io.BytesIO(body.encode()), limits)
+        assert not isinstance(error.value, PayloadTooLarge)
+
+
+def test_read_profile_parses_a_stream():
+    body = json.dumps(PROFILE).encode()
+    assert read_profile(io.BytesIO(body), LIMITS, length=len(body)) == PROFILE
+
+
+def test_check_messages():
+    assert check_messages(["a", "b"], LIMITS) is None
+    assert check_messages("not a list", LIMITS) is None
+    assert check_messages(["a"] * 5, LIMITS).startswith("Too many messages")
+    assert check_messages(["a", "b" * 51], LIMITS).startswith("Message 1 is too long")
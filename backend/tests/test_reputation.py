@@ -0,0 +1,121 @@
+import os
+import random
+
+import pytest
+
+from engine import ThreatDetectionEngine
+from normalize import TextNormalizer
+from reputation import ReputationHits, ReputationSnapshot, ReputationStore, build_store, extract_entities
+
+INDICATORS = {
+    "phrases": ["gift card", "Claim your prize now", "customs fee"],
+    "domains": ["scam-pay.example", "https://www.fake-bank.test/login"],
+    "payment_handles": ["$quickcash", "@crypto_helper", "paypal.me/helpnow"],
+    "wallets": ["1BoatSLRtn1Mzk9b5xrPZGbcdzKc6NEXyW"],
+    "phone_numbers": ["+1 (555) 123-4567"],
+}
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "reputation.bin")
+    build_store(INDICATORS, path, version=1)
+    return path
+
+
+def test_build_store_counts_distinct_normalized_indicators(tmp_path):
+    counts = build_store({"phrases": ["Gift  card", "gift card", ""], "domains": ["https://a.example/x"]},
+                         str(tmp_path / "store.bin"))
+    assert counts["phrases"] == 1
+    assert counts["phrase_starts"] == 1
+    assert counts["domains"] == 1
+
+    with pytest.raises(ValueError):
+        build_store({"emails": ["a@b.example"]}, str(tmp_path / "other.bin"))
+
+
+def test_contains_normalizes_the_value(path):
+    snapshot = ReputationSnapshot(path)
+    assert snapshot.contains("domains", "http://fake-bank.test/")
+    assert snapshot.contains("payment_handles", "$QuickCash")
+    assert snapshot.contains("phone_numbers", "15551234567")
+    assert not snapshot.contains("domains", "bank.test")
+    assert len(snapshot) == 10
+
+
+def test_lookup_counts_each_category(path):
+    snapshot = ReputationSnapshot(path)
+    text = ("buy a gift card, then claim your prize now at login.scam-pay.example or pay $quickcash "
+            "and paypal.me/helpnow. wallet 1boatslrtn1mzk9b5xrpzgbcdzkc6nexyw, call +1 (555) 123-4567")
+    assert snapshot.lookup(text) == ReputationHits(2, 1, 2, 1, 1)
+    assert snapshot.lookup("nothing to see here") == ReputationHits(0, 0, 0, 0, 0)
+
+
+def test_lookup_messages_matches_the_joined_text(path):
+    snapshot = ReputationSnapshot(path)
+    words = ["gift", "card", "Claim", "your", "prize", "now", "customs", "fee", "$quickcash", "@crypto_helper",
+             "scam-pay.example", "555", "123-4567", "+1", "(555)", "hello", "there", "1.", "card."]
+    rnd = random.Random(7)
+    for _ in range(2000):
+        messages = [" ".join(rnd.choice(words) for _ in range(rnd.randint(0, 6))) for _ in range(rnd.randint(0, 4))]
+        assert snapshot.lookup_messages(messages) == snapshot.lookup(" ".join(messages).lower()), messages
+
+
+def test_disguised_indicators_match_in_normalized_form(path):
+    snapshot = ReputationSnapshot(path)
+    normalize = TextNormalizer().normalize
+    messages = ["Claim your pr1ze n0w: pay $qu1ckcash at sc4m-pay.example",
+                "wallet 1BoatSLRtn1Mzk9b5xrPZGbcdzKc6NEXyW, also $quickcash"]
+    normalized = [normalize(message) for message in messages]
+    text = " ".join(messages).lower()
+    assert snapshot.lookup(text) == ReputationHits(0, 0, 1, 1, 0)
+    assert snapshot.lookup(text, " ".join(normalized)) == ReputationHits(1, 1, 1, 1, 0)
+    assert snapshot.lookup_messages(messages, normalized) == ReputationHits(1, 1, 1, 1, 0)
+
+
+def test_engine_looks_up_normalized_text_with_a_normalizer(path):
+    profile = {"account_age_days": 400, "followers": 120, "following": 80, "post_count": 200,
+               "profile_completed": True, "messages": ["pay $qu1ckcash at sc4m-pay.example"]}
+    plain = ThreatDetectionEngine(reputation=ReputationStore(path))
+    normalizing = ThreatDetectionEngine(reputation=ReputationStore(path), normalizer=TextNormalizer())
+    assert normalizing.calculate_risk_score(profile)["risk_score"] > plain.calculate_risk_score(profile)["risk_score"]
+    for join_limit in (65536, 8):
+        engine = ThreatDetectionEngine(reputation=ReputationStore(path), normalizer=TextNormalizer(),
+                                       join_limit=join_limit)
+        assert engine.calculate_risk_score(profile) == normalizing.calculate_risk_score(profile)
+
+
+def test_extract_entities():
+    entities = extract_entities(["Pay $Boss at https://www.Pay-Me.example/now or venmo.com/boss",
+                                 "wallet 0x" + "ab" * 20 + ", call 555 123 4567 or 555 987 6543"])
+    assert entities.domains == {"pay-me.example", "venmo.com"}
+    assert entities.payment_handles == {"$boss", "venmo.com/boss"}
+    assert entities.wallets == {"0x" + "ab" * 20}
+    assert {"5551234567", "5559876543"} <= entities.phone_numbers
+    assert "123" not in entities.phone_numbers
+
+
+def test_phone_numbers_continue_across_messages():
+    assert "5551234567" in extract_entities(["call 555", "123 4567"]).phone_numbers
+
+
+def test_store_swaps_in_a_rebuilt_file(path):
+    now = [0.0]
+    store = ReputationStore(path, check_interval=5.0, clock=lambda: now[0])
+    assert not store.current().contains("domains", "new-scam.example")
+
+    build_store(dict(INDICATORS, domains=["new-scam.example"]), path, version=2)
+    assert not store.current().contains("domains", "new-scam.example")
+    now[0] += 5
+    assert store.current().contains("domains", "new-scam.example")
+    assert store.current().version == 2
+    assert store.swaps == 1
+
+
+def test_store_keeps_serving_when_the_file_is_broken(path):
+    store = ReputationStore(path, check_interval=0.0)
+    with open(path + ".tmp", "wb") as output:
+        output.write(b"not a store")
+    os.replace(path + ".tmp", path)
+    assert store.current().version == 1
+    assert store.reload_errors == 1
@@ -0,0 +1,85 @@
+import gzip
+import json
+import random
+
+import pytest
+
+import main
+from engine import ThreatDetectionEngine
+from responses import ResponseEncoder, StaticPayload, accepts_gzip, dumps, negotiate
+
+WORDS = ("send money western union urgent emergency help password bank account darling overseas "
+         "hello weekend café «quoted»   \"escaped\" \\ 😀").split()
+
+
+def assessments(count, seed):
+    rnd = random.Random(seed)
+    engine = ThreatDetectionEngine()
+    for _ in range(count):
+        profile = {"account_age_days": rnd.randint(0, 400), "followers": rnd.choice([0, 1100, 20000]),
+                   "following": rnd.randint(0, 3000), "post_count": rnd.randint(0, 5000),
+                   "messages": [" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(0, 8)))]}
+        yield engine.calculate_risk_score(profile)
+        yield engine.calculate_risk_score(profile, explain=False)
+        yield engine.fast_verdict(profile)
+
+
+def test_encoded_assessments_equal_json_dumps():
+    encoder = ResponseEncoder()
+    values = list(assessments(300, seed=12))
+    for value in values:
+        assert encoder.encode(value) == dumps(value)
+    batch = {"results": [{"index": 0, "assessment": values[0]}, {"index": 1, "error": "No profile data provided"},
+                         {"index": 2, "assessment": values[2]}], "count": 3, "errors": 1}
+    assert encoder.encode(batch) == dumps(batch)
+
+
+@pytest.mark.parametrize("value", [
+    {"risk_score": True, "risk_level": "Low Risk", "explanations": [], "confidence": 0.5,
+     "confidence_explanation": "x", "recommended_actions": [], "rules_version": "builtin"},
+    {"risk_level": "Low Risk", "recommended_actions": [1, None], "rules_version": "builtin"},
+    {"results": "not a list", "count": 0, "errors": 0},
+    {"results": [{"index": "0", "assessment": {}}], "count": 1, "errors": 0},
+    ["a", {"b": 1}], "text", None,
+])
+def test_unexpected_shapes_fall_back_to_json_dumps(value):
+    assert ResponseEncoder().encode(value) == dumps(value)
+
+
+def test_accept_encoding_negotiation():
+    for header in ("gzip", "deflate, gzip;q=0.5", "*", "br, *;q=1", "GZIP"):
+        assert accepts_gzip(header), header
+    for header in (None, "", "br", "gzip;q=0", "*;q=0", "gzip;q=x", "gzip;q=0, *"):
+        assert not accepts_gzip(header), header
+
+    body = json.dumps(list(range(1000))).encode()
+    compressed, encoding = negotiate(body, "gzip", min_bytes=1400, level=6)
+    assert encoding == "gzip" and gzip.decompress(compressed) == body
+    assert negotiate(body, "gzip", min_bytes=len(body) + 1, level=6) == (body, None)
+    assert negotiate(body, "gzip", min_bytes=0, level=0) == (body, None)
+
+
+def test_static_payload_etags():
+    payload = StaticPayload({"b": 1, "a": [1, 2]})
+    assert payload.body == b'{"a":[1,2],"b":1}'
+    assert gzip.decompress(payload.gzipped) == payload.body
+    assert payload.matches(f'W/"{payload.etag}"') and payload.matches(f'"other", "{payload.etag}"')
+    assert payload.matches("*")
+    assert not payload.matches('"other"') and not payload.matches(None)
+    assert StaticPayload({"a": [1, 2], "b": 1}).etag == payload.etag != StaticPayload({"a": 1}).etag
+
+
+def test_routes_revalidate_and_compress():
+    client = main.app.test_client()
+    response = client.get("/demo-data")
+    etag = response.headers["ETag"]
+    assert response.get_json() == json.loads(response.data)
+    revalidated = client.get("/demo-data", headers={"If-None-Match": etag})
+    assert (revalidated.status_code, revalidated.data, revalidated.headers["ETag"]) == (304, b"", etag)
+
+    profiles = [{"account_age_days": 5, "messages": ["send money via western union, urgent"]}] * 20
+    plain = client.post("/analyze-profiles", json=profiles)
+    compressed = client.post("/analyze-profiles", json=profiles, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+    assert json.loads(gzip.decompress(compressed.data)) == plain.get_json()
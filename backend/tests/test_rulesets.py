@@ -0,0 +1,116 @@
+import json
+import os
+import time
+
+import pytest
+
+from cache import LRUCache
+from engine import ThreatDetectionEngine
+from records import ProfileRecord
+from rulesets import RuleStore, ShadowComparison, main, parse_artifact
+
+BUILTIN = ThreatDetectionEngine.builtin_rules()
+PROFILE = {"account_age_days": 400, "post_count": 900, "profile_completed": True,
+           "messages": ["Please buy a gift card and send me the code"]}
+
+
+def _artifact(version, gift_cards=False):
+    artifact = {"version": version}
+    if gift_cards:
+        artifact["signatures"] = {"financial": BUILTIN.signatures["financial"] + [r'\bgift\s+cards?\b']}
+    return artifact
+
+
+def _write(path, artifact):
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as output:
+        json.dump(artifact, output)
+    os.replace(temporary, path)
+
+
+def test_exported_artifact_compiles_to_the_builtin_rules():
+    bundle = parse_artifact(json.loads(json.dumps(dict(BUILTIN.to_dict(), version="2026-10-17.1"))), BUILTIN)
+    assert bundle.version == "2026-10-17.1"
+    assert bundle.fingerprint == BUILTIN.fingerprint
+    assert parse_artifact(_artifact("v2", gift_cards=True), BUILTIN).fingerprint != BUILTIN.fingerprint
+
+
+@pytest.mark.parametrize("artifact", [
+    [], {}, {"version": ""}, {"version": "v", "extra": 1},
+    {"version": "v", "signatures": {"crypto": []}},
+    {"version": "v", "signatures": {"financial": [r"\b(unclosed"]}},
+    {"version": "v", "rules": {"unknown": {"cap": 1, "ladders": []}}},
+    {"version": "v", "rules": {"content": {"cap": "high", "ladders": []}}},
+    {"version": "v", "rules": {"content": {"cap": 30, "ladders": [[{"when": [["urgency_count", "~", 1]]}]]}}},
+    {"version": "v", "rules": {"content": {"cap": 30, "ladders": [[{"when": [["no_such_feature", ">", 1]]}]]}}},
+    {"version": "v", "rules": {"content": {"cap": 30, "ladders": [[{"points": float("inf")}]]}}},
+])
+def test_invalid_artifacts_are_rejected(artifact):
+    with pytest.raises(ValueError):
+        parse_artifact(artifact, BUILTIN)
+
+
+def test_replaced_artifact_is_swapped_in(tmp_path):
+    path = str(tmp_path / "rules.json")
+    _write(path, _artifact("v1"))
+    store = RuleStore(path, BUILTIN, check_interval=3600)
+    engine = ThreatDetectionEngine(verdict_cache=LRUCache(), rule_store=store)
+    before = engine.calculate_risk_score(PROFILE)
+    assert before["rules_version"] == "v1"
+    assert not store.refresh()
+
+    _write(path, _artifact("v2", gift_cards=True))
+    assert store.refresh()
+    after = engine.calculate_risk_score(PROFILE)
+    assert (after["rules_version"], after["risk_score"]) == ("v2", before["risk_score"] + 25)
+
+    with open(path, "w", encoding="utf-8") as output:
+        output.write("{not json")
+    assert not store.refresh()
+    assert engine.calculate_risk_score(PROFILE) == after
+    assert (store.stats()["swaps"], store.stats()["reload_errors"]) == (1, 1)
+
+
+def test_rule_store_checks_the_file_in_the_background(tmp_path):
+    path = str(tmp_path / "rules.json")
+    _write(path, _artifact("v1"))
+    now = [0.0]
+    store = RuleStore(path, BUILTIN, check_interval=5, clock=lambda: now[0])
+    _write(path, _artifact("v2"))
+    assert store.current().version == "v1"
+    now[0] += 5
+    store.current()
+    deadline = time.monotonic() + 5
+    while store.current().version != "v2" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.current().version == "v2"
+
+
+def test_shadow_comparison_counts_level_changes(tmp_path):
+    path = str(tmp_path / "candidate.json")
+    _write(path, _artifact("candidate", gift_cards=True))
+    engine = ThreatDetectionEngine(shadow_rules=RuleStore(path, BUILTIN))
+    assert engine.calculate_risk_score(PROFILE) == ThreatDetectionEngine().calculate_risk_score(PROFILE)
+
+    shadow = ShadowComparison(engine._shadow_score, engine.shadow.store)
+    candidate = shadow.store.current()
+    assert shadow.compare(BUILTIN, candidate, ProfileRecord.from_dict(PROFILE), 0)
+    assert not shadow.compare(BUILTIN, candidate, ProfileRecord.from_dict(dict(PROFILE, messages=["hi"])), 0)
+    stats = shadow.stats()
+    assert (stats["compared"], stats["disagreements"], stats["score_changes"], stats["version"]) == (
+        2, 1, 1, "candidate")
+    assert stats["transitions"] == {"Minimal Risk -> Low Risk": 1}
+
+    unsampled = ShadowComparison(engine._shadow_score, engine.shadow.store, sample_rate=0.5, sample=lambda: 0.9)
+    assert not unsampled.submit(BUILTIN, ProfileRecord.from_dict(PROFILE))
+    assert unsampled.stats()["submitted"] == 0
+
+
+def test_cli_exports_and_checks_an_artifact(tmp_path, capsys):
+    path = str(tmp_path / "rules.json")
+    assert main(["export", "-o", path, "--version", "2026-10-17.1"]) == 0
+    assert main(["check", path]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert (report["version"], report["fingerprint"], report["changed_from_builtin"]) == (
+        "2026-10-17.1", BUILTIN.fingerprint, [])
+    assert main(["check", str(tmp_path / "missing.json")]) == 1
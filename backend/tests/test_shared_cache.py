@@ -0,0 +1,110 @@
+import multiprocessing
+import os
+
+import pytest
+
+from engine import ThreatDetectionEngine
+from shared_cache import SharedVerdictCache
+
+VERDICT = (45, ("Account is 40 days old (relatively new)", "Profile is incomplete (missing key information)"))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "verdicts.cache")
+
+
+def test_put_is_seen_by_every_instance(path):
+    writer, reader = SharedVerdictCache(path, 64), SharedVerdictCache(path, 64)
+    assert reader.get("profile") is None
+    writer.put("profile", VERDICT)
+    assert reader.get("profile") == VERDICT
+    assert len(reader) == 1
+
+
+def test_oversized_values_are_not_cached(path):
+    cache = SharedVerdictCache(path, 64, slot_bytes=128)
+    cache.put("profile", (10, ("x" * 200,)))
+    assert cache.get("profile") is None
+    assert cache.stats()["oversized"] == 1
+
+
+def test_full_set_evicts_least_recently_used(path):
+    now = [0.0]
+    cache = SharedVerdictCache(path, 1, ways=1, clock=lambda: now[0])
+    cache.put("old", VERDICT)
+    now[0] += 1
+    cache.put("new", VERDICT)
+    assert cache.get("old") is None
+    assert cache.get("new") == VERDICT
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(path):
+    now = [100.0]
+    cache = SharedVerdictCache(path, 64, ttl_seconds=10, clock=lambda: now[0])
+    cache.put("profile", VERDICT)
+    now[0] += 9
+    assert cache.get("profile") == VERDICT
+    now[0] += 1
+    assert cache.get("profile") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_invalidate_drops_entries_for_every_instance(path):
+    first, second = SharedVerdictCache(path, 64), SharedVerdictCache(path, 64)
+    first.put("profile", VERDICT)
+    second.invalidate()
+    assert first.get("profile") is None
+    assert len(first) == 0
+    first.put("profile", VERDICT)
+    assert second.get("profile") == VERDICT
+
+
+def test_geometry_change_swaps_in_a_new_file(path):
+    old = SharedVerdictCache(path, 64)
+    old.put("profile", VERDICT)
+    inode = os.stat(path).st_ino
+
+    new = SharedVerdictCache(path, 4096)
+    assert os.stat(path).st_ino != inode
+    assert new.get("profile") is None
+    # The old mapping stays valid (truncating it in place would SIGBUS this process)
+    assert old.get("profile") == VERDICT
+    old.put("other", VERDICT)
+    assert new.get("other") is None
+    assert SharedVerdictCache(path, 4096).stats()["max_entries"] == new.max_entries
+
+
+def _worker(path):
+    cache = SharedVerdictCache(path, 64)
+    cache.get("profile")
+    cache.put("profile", VERDICT)
+    cache.get("profile")
+
+
+def test_stats_add_up_every_process(path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_worker, args=(path,)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    stats = SharedVerdictCache(path, 64).stats()
+    assert stats["stores"] == 3
+    assert stats["hits"] + stats["misses"] == 6
+    assert stats["hits"] >= 3
+    assert stats["entries"] == 1
+    assert stats["workers"] == 0
+
+
+def test_engine_serves_cached_verdicts(path):
+    profile = {"account_age_days": 40, "followers": 10, "following": 5, "post_count": 20,
+               "messages": ["Send money via Western Union urgently"]}
+    expected = ThreatDetectionEngine().calculate_risk_score(profile)
+    engine = ThreatDetectionEngine(verdict_cache=SharedVerdictCache(path, 64))
+    assert engine.calculate_risk_score(profile) == expected
+    assert engine.calculate_risk_score(profile) == expected
+    assert engine.verdict_cache.stats()["hits"] == 1
@@ -0,0 +1,77 @@
+import pytest
+
+from velocity import MAX_EVENT_COUNT, NO_VELOCITY, VelocitySignals, VelocityTracker, read_event
+
+NOW = 1_000_000 * 300.0
+
+
+@pytest.fixture
+def clock():
+    return [NOW]
+
+
+@pytest.fixture
+def tracker(clock):
+    # 24 one-hour buckets, the last one recent
+    return VelocityTracker(max_accounts=3, bucket_seconds=3600, window_seconds=86400, recent_seconds=3600,
+                           clock=lambda: clock[0])
+
+
+def test_read_event():
+    assert read_event({"account_id": "u1"}) == (("u1", None, 1), None)
+    assert read_event({"user_id": 7, "timestamp": 12.5, "count": 3}) == ((7, 12.5, 3), None)
+    for data in ([], {}, {"account_id": ["u1"]}, {"account_id": "u1", "timestamp": "now"},
+                 {"account_id": "u1", "timestamp": True}, {"account_id": "u1", "timestamp": float("nan")},
+                 {"account_id": "u1", "timestamp": float("inf")}, {"account_id": "u1", "count": 0},
+                 {"account_id": "u1", "count": 1.5}, {"account_id": "u1", "count": MAX_EVENT_COUNT + 1},
+                 {"account_id": "u1", "count": 2 ** 40}):
+        event, error = read_event(data)
+        assert event is None and error, data
+
+
+def test_burst_against_the_baseline(tracker):
+    for hours_ago in range(1, 23):
+        tracker.record("u1", NOW - hours_ago * 3600, count=2)
+    tracker.record("u1", NOW, count=30)
+    signals = tracker.signals("u1")
+    assert signals == VelocitySignals(30, 30.0, 44 / 23, 30.0 / (44 / 23), 30.0)
+    assert tracker.signals("unknown") == NO_VELOCITY
+    assert "u1" in tracker
+
+
+def test_events_older_than_the_window_are_dropped(tracker, clock):
+    assert not tracker.record("u1", NOW - 86400)
+    assert tracker.record("u1", NOW - 3600)
+    clock[0] += 86400
+    assert tracker.signals("u1") == NO_VELOCITY
+    assert tracker.stats()["late"] == 1
+
+
+def test_future_events_are_dropped(tracker):
+    assert not tracker.record("u1", NOW + 10 * 86400)
+    assert not tracker.record("u1", 1e300)
+    assert "u1" not in tracker
+    assert tracker.record("u1", NOW + 200)
+    assert tracker.record("u1")
+    assert tracker.record("u1", NOW - 7200)
+    assert tracker.signals("u1").recent_events == 2
+    assert tracker.stats()["future"] == 2
+
+
+def test_buckets_saturate_instead_of_overflowing(tracker):
+    assert tracker.record_events([("u1", None, 1), ("u1", None, 2 ** 31), ("u1", None, 2 ** 40), ("u2", None, 1)]) == 4
+    assert tracker.signals("u1").recent_events == 2 ** 32 - 1
+    assert tracker.signals("u2").recent_events == 1
+    assert tracker.record("u1", NOW - 3600, count=5)
+    assert tracker.signals("u1").baseline_rate == 5 / 23
+
+
+def test_quiet_accounts_are_dropped_first(tracker, clock):
+    for account in ("a", "b", "c"):
+        tracker.record(account)
+        clock[0] += 3600
+    tracker.record("a")
+    tracker.record("d")
+    assert "b" not in tracker
+    assert all(account in tracker for account in "acd")
+    assert tracker.stats()["evictions"] == 1
@@ -0,0 +1,245 @@
+"""
+Windowed activity velocity per account
+Timestamped activity events (posts, messages) are counted into a ring of fixed-width
+time buckets per account, so memory per account is bounded by the window, and the
+recent rate can be compared with the account's own baseline. A lifetime ratio such
+as post_count / account_age_days hides a burst inside an old account; this does not
+"""
+
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+from records import source_id
+
+# (account, Unix timestamp or None for now, count)
+Event = Tuple[Hashable, Optional[float], int]
+
+# Largest count one event may carry
+MAX_EVENT_COUNT = 1000000
+
+# Buckets are unsigned 32-bit counts and stop there rather than overflow
+_BUCKET_MAX = 0xFFFFFFFF
+
+
+class VelocitySignals(NamedTuple):
+    """
+    Activity of one account over the tracking window
+    Rates are events per hour; burst_ratio compares the recent window with the rest of
+    the window, whose rate is floored so a dormant account does not divide by zero
+    """
+    recent_events: int
+    recent_rate: float
+    baseline_rate: float
+    burst_ratio: float
+    peak_rate: float
+
+
+NO_VELOCITY = VelocitySignals(0, 0.0, 0.0, 0.0, 0.0)
+
+
+def read_event(data: Any) -> Tuple[Optional[Event], Optional[str]]:
+    """
+    Validate an activity event: {"account_id": ..., "timestamp": ..., "count": ...}
+    timestamp (Unix seconds) defaults to now and count to 1
+    Returns: (event, None), or (None, error message)
+    """
+    if not isinstance(data, dict):
+        return None, "Event must be an object"
+    account = source_id(data)
+    if account is None or isinstance(account, (dict, list)):
+        return None, "Event needs an account_id"
+    timestamp = data.get('timestamp')
+    if timestamp is not None and (isinstance(timestamp, bool) or not isinstance(timestamp, (int, float))
+                                  or not math.isfinite(timestamp)):
+        return None, "timestamp must be a number"
+    count = data.get('count', 1)
+    if isinstance(count, bool) or not isinstance(count, int) or not 1 <= count <= MAX_EVENT_COUNT:
+        return None, f"count must be an integer from 1 to {MAX_EVENT_COUNT}"
+    return (account, timestamp, count), None
+
+
+def _window(counts: array, first: int, last: int) -> array:
+    """Counts of buckets first..last (at most one ring's worth), in ring order"""
+    if first > last:
+        return counts[:0]
+    size = len(counts)
+    start, end = first % size, last % size
+    if start <= end:
+        return counts[start:end + 1]
+    return counts[start:] + counts[:end + 1]
+
+
+class VelocityTracker:
+    """
+    Per-account activity counts over the last window_seconds, in bucket_seconds buckets
+    Tracks at most max_accounts; accounts that went quiet longest ago are dropped first.
+    Events older than the window are ignored, and so are events stamped more than max_skew
+    seconds ahead of the clock, which would otherwise move the account's window past its
+    real activity
+    """
+
+    def __init__(self, max_accounts: int = 100000, bucket_seconds: float = 300.0,
+                 window_seconds: float = 86400.0, recent_seconds: float = 3600.0,
+                 min_baseline: float = 1.0, max_skew: float = 300.0, clock=time.time):
+        buckets = round(window_seconds / bucket_seconds)
+        recent = round(recent_seconds / bucket_seconds)
+        if max_accounts < 1:
+            raise ValueError("max_accounts must be at least 1")
+        if not 1 <= recent < buckets:
+            raise ValueError("recent_seconds must span at least one bucket and less than the window")
+
+        self.max_accounts = max_accounts
+        self.bucket_seconds = bucket_seconds
+        self.buckets = buckets
+        self.recent_buckets = recent
+        self.min_baseline = min_baseline
+        self.max_skew = max_skew
+        self._clock = clock
+        self._zeros = array('I', bytes(4 * buckets))
+
+        # Events per hour for a count over the recent part, the rest, and one bucket
+        self._recent_scale = 3600.0 / (recent * bucket_seconds)
+        self._baseline_scale = 3600.0 / ((buckets - recent) * bucket_seconds)
+        self._bucket_scale = 3600.0 / bucket_seconds
+
+        # account -> [latest bucket, ring of counts, sum of the ring]; ordered by when the latest bucket began
+        self._accounts: "OrderedDict[Hashable, List[Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.events = 0
+        self.late = 0
+        self.future = 0
+        self.queries = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def __contains__(self, account: Optional[Hashable]) -> bool:
+        """Whether account has events in the tracker (possibly already out of the window)"""
+        return isinstance(account, Hashable) and account in self._accounts
+
+    def record(self, account: Hashable, timestamp: Optional[float] = None, count: int = 1) -> bool:
+        """Count one event (or count events) at timestamp; False when it is older than the window"""
+        return self.record_events(((account, timestamp, count),)) == 1
+
+    def record_events(self, events: Iterable[Event]) -> int:
+        """
+        Count (account, timestamp, count) events under one lock; returns how many were kept
+        A bucket that would pass 2**32 - 1 stays there
+        """
+        accounts = self._accounts
+        size = self.buckets
+        width = self.bucket_seconds
+        kept = 0
+        with self._lock:
+            clock = self._clock()
+            now = int(clock // width)
+            oldest = now - size
+            newest = int((clock + self.max_skew) // width)
+            for account, timestamp, count in events:
+                bucket = now if timestamp is None else int(timestamp // width)
+                if bucket > newest:
+                    self.future += 1
+                    continue
+                state = accounts.get(account)
+                if state is None:
+                    if bucket <= oldest:
+                        self.late += 1
+                        continue
+                    if len(accounts) >= self.max_accounts:
+                        self._make_room(oldest)
+                    state = accounts[account] = [bucket, array('I', self._zeros), 0]
+                else:
+                    latest = state[0]
+                    if bucket > latest:
+                        self._advance(state, bucket)
+                        accounts.move_to_end(account)
+                    elif bucket <= latest - size or bucket <= oldest:
+                        self.late += 1
+                        continue
+                counts = state[1]
+                slot = bucket % size
+                total = counts[slot] + count
+                if total > _BUCKET_MAX:
+                    count -= total - _BUCKET_MAX
+                    total = _BUCKET_MAX
+                counts[slot] = total
+                state[2] += count
+                kept += 1
+            self.events += kept
+        return kept
+
+    def _advance(self, state: List[Any], bucket: int) -> None:
+        """Move an account's ring forward to bucket, clearing the buckets it skips"""
+        counts = state[1]
+        size = self.buckets
+        if bucket - state[0] >= size:
+            counts[:] = self._zeros
+            state[2] = 0
+        else:
+            for skipped in range(state[0] + 1, bucket + 1):
+                state[2] -= counts[skipped % size]
+                counts[skipped % size] = 0
+        state[0] = bucket
+
+    def _make_room(self, oldest: int) -> None:
+        accounts = self._accounts
+        # Quiet accounts sit at the front; drop every one whose window has passed
+        while accounts and next(iter(accounts.values()))[0] <= oldest:
+            accounts.popitem(last=False)
+            self.expirations += 1
+        if len(accounts) >= self.max_accounts:
+            accounts.popitem(last=False)
+            self.evictions += 1
+
+    def signals(self, account: Optional[Hashable], now: Optional[float] = None) -> VelocitySignals:
+        """Recent and baseline rates of account at now (default: the clock)"""
+        if account is None or not isinstance(account, Hashable):
+            return NO_VELOCITY
+        with self._lock:
+            self.queries += 1
+            state = self._accounts.get(account)
+            if state is None:
+                return NO_VELOCITY
+            latest, counts, total = state
+            current = max(int((self._clock() if now is None else now) // self.bucket_seconds), latest)
+            first = current - self.buckets + 1
+            if latest < first:
+                return NO_VELOCITY
+            if current == latest:
+                peak = max(counts)
+            else:
+                # Buckets that have left the window since the account's latest event
+                total -= sum(_window(counts, latest - self.buckets + 1, first - 1))
+                peak = max(_window(counts, first, latest))
+            recent = sum(_window(counts, max(first, current - self.recent_buckets + 1), latest))
+            baseline = total - recent
+
+        recent_rate = recent * self._recent_scale
+        baseline_rate = baseline * self._baseline_scale
+        return VelocitySignals(recent, recent_rate, baseline_rate, recent_rate / max(baseline_rate, self.min_baseline),
+                               peak * self._bucket_scale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._accounts.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "accounts": len(self._accounts),
+            "max_accounts": self.max_accounts,
+            "bucket_seconds": self.bucket_seconds,
+            "window_seconds": self.buckets * self.bucket_seconds,
+            "events": self.events,
+            "late": self.late,
+            "future": self.future,
+            "queries": self.queries,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }